@@ -1 +1 @@
-from .movie_file_fixer import FileRemover, Folderizer, Formatter, MovieFileFixer, PosterFinder, SubtitleFinder, main, parse_args
+from .movie_file_fixer import BrowseViewGenerator, DuplicateFinder, FileRemover, Folderizer, Formatter, MovieFileFixer, PosterFinder, SubtitleFinder, ThumbnailGenerator, ViewBuilder, main, parse_args
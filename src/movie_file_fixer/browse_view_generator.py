@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Generates browse trees of symbolic links to the title folders of a library, derived from the IMDb objects
+of its metadata (i.e., `by-year/1995/Heat [1995]`, `by-genre/Crime/Heat [1995]`, `by-director/Michael Mann/Heat [1995]`).
+
+The links wanted are computed in memory from the metadata, and compared with a browse manifest in the browse directory
+recording the links made by the last generation, so only the links added or removed since are ever touched on disk.
+Regenerating the trees of a large library therefore costs a metadata read, not a filesystem walk.
+"""
+
+import json
+import os
+import re
+
+from utils import get_metadata_backend
+
+BROWSE_MANIFEST_VERSION = 1
+BROWSE_MANIFEST_FILENAME = ".browse.json"
+# The folder and IMDb object field every browse tree is derived from:
+BROWSE_VIEWS = {
+    "year": ("by-year", "Year"),
+    "genre": ("by-genre", "Genre"),
+    "director": ("by-director", "Director"),
+}
+
+
+class BrowseViewGenerator:
+    def __init__(
+        self,
+        directory,
+        browse_directory,
+        metadata_filename="metadata.json",
+        metadata_backend="json",
+        views=None,
+        dry_run=False,
+        verbose=False,
+    ):
+        self._directory = directory
+        self._browse_directory = browse_directory
+        self._metadata_filename = metadata_filename
+        self._metadata_backend = metadata_backend
+        self._views = views or list(BROWSE_VIEWS)
+        self._dry_run = dry_run
+        self._verbose = verbose
+        self._action_counter = 0
+
+        if self._verbose:
+            print("[CURRENT ACTION: GENERATING BROWSE VIEWS]\n")
+
+    @property
+    def manifest_filepath(self):
+        """The path of the browse manifest, in the browse directory."""
+        return os.path.join(self._browse_directory, BROWSE_MANIFEST_FILENAME)
+
+    def _load_manifest(self):
+        """
+
+        :return dict: The link targets made by the last generation, keyed by link path (none if there's no manifest yet).
+        """
+        if not os.path.exists(self.manifest_filepath):
+            return {}
+
+        with open(self.manifest_filepath, encoding="UTF-8") as infile:
+            manifest = json.load(infile)
+
+        if manifest.get("version") != BROWSE_MANIFEST_VERSION:
+            return {}
+
+        return manifest.get("links", {})
+
+    def _save_manifest(self, links):
+        """
+
+        :param dict links: The link targets made, keyed by link path (relative to the browse directory).
+        :return None:
+
+        The manifest is written to a temporary file first, so an interrupted generation never leaves a truncated one behind.
+        """
+        os.makedirs(self._browse_directory, exist_ok=True)
+        temporary_filepath = f"{self.manifest_filepath}.{os.getpid()}.tmp"
+        with open(temporary_filepath, mode="w", encoding="UTF-8") as outfile:
+            json.dump(
+                {
+                    "version": BROWSE_MANIFEST_VERSION,
+                    "directory": os.path.abspath(self._directory),
+                    "links": links,
+                },
+                outfile,
+                separators=(",", ":"),
+            )
+        os.replace(temporary_filepath, self.manifest_filepath)
+
+    def _get_browse_values(self, imdb_object, field):
+        """
+
+        :param dict imdb_object: An IMDb object.
+        :param str field: The IMDb object field to browse by (i.e., `Genre`).
+        :return list: The folder names the title is filed under for that field (i.e., `["Crime", "Drama"]`).
+
+        Years are reduced to the release year (i.e., `2008` for a series running `2008–2013`).
+        """
+        value = imdb_object.get(field)
+        if not isinstance(value, str) or value == "N/A":
+            return []
+
+        if field == "Year":
+            release_year = re.match(r"\d{4}", value)
+            return [release_year.group()] if release_year else []
+
+        browse_values = []
+        for browse_value in value.split(","):
+            # Strip the characters that aren't allowed in folder names (see `Formatter._strip_illegal_characters()`):
+            browse_value = re.sub(r'[(<>:"/\\|?*)]', "", browse_value).strip(". ")
+            if browse_value and browse_value not in browse_values:
+                browse_values.append(browse_value)
+
+        return browse_values
+
+    def get_links(self):
+        """
+
+        :return dict: The target of every link the browse trees should hold, keyed by link path (relative to the
+        browse directory). Targets are relative to the link, so the trees survive the share being mounted elsewhere.
+        """
+        metadata_backend = get_metadata_backend(
+            directory=self._directory,
+            metadata_filename=self._metadata_filename,
+            backend=self._metadata_backend,
+        )
+        if not metadata_backend.exists():
+            return {}
+
+        imdb_objects = {
+            imdb_object.get("imdbID"): imdb_object
+            for imdb_object in metadata_backend.load().get("metadata", [])
+            if isinstance(imdb_object, dict)
+        }
+        browse_directory = os.path.abspath(self._browse_directory)
+        directory = os.path.abspath(self._directory)
+
+        links = {}
+        for title in metadata_backend.iter_titles():
+            imdb_object = imdb_objects.get(title.get("imdb_id"))
+            if imdb_object is None or not title.get("title"):
+                continue
+
+            for view in self._views:
+                view_folder, field = BROWSE_VIEWS[view]
+                for browse_value in self._get_browse_values(
+                    imdb_object=imdb_object, field=field
+                ):
+                    link_path = os.path.join(
+                        view_folder, browse_value, title.get("title")
+                    )
+                    links[link_path] = os.path.relpath(
+                        os.path.join(directory, title.get("title")),
+                        os.path.dirname(os.path.join(browse_directory, link_path)),
+                    )
+
+        return links
+
+    def _remove_link(self, link_path):
+        """
+
+        :param str link_path: The path of the link to remove (relative to the browse directory).
+        :return None:
+
+        Only symbolic links are removed, and the folders left empty are pruned (up to the browse directory).
+        """
+        link_filepath = os.path.join(self._browse_directory, link_path)
+        if os.path.islink(link_filepath):
+            os.remove(link_filepath)
+
+        folder = os.path.dirname(link_path)
+        while folder:
+            try:
+                os.rmdir(os.path.join(self._browse_directory, folder))
+            except OSError:
+                break
+            folder = os.path.dirname(folder)
+
+    def _add_link(self, link_path, target):
+        """
+
+        :param str link_path: The path of the link to make (relative to the browse directory).
+        :param str target: The path the link points to (relative to the link).
+        :return None:
+
+        Links left over from an interrupted generation are replaced, anything else in the way is never touched.
+        """
+        link_filepath = os.path.join(self._browse_directory, link_path)
+        os.makedirs(os.path.dirname(link_filepath), exist_ok=True)
+        if os.path.islink(link_filepath):
+            os.remove(link_filepath)
+        os.symlink(target, link_filepath, target_is_directory=True)
+
+    def generate_views(self):
+        """
+
+        :return dict: The paths of the links `added` and `removed` by this generation (relative to the browse directory).
+
+        Applies the difference between the links the metadata calls for and the links recorded in the browse manifest.
+        Links are never checked on disk, so a link removed by hand is only restored once its title changes (or the
+        browse manifest is deleted, which regenerates the trees from scratch).
+        """
+        browse_directory = os.path.realpath(self._browse_directory)
+        directory = os.path.realpath(self._directory)
+        if os.path.commonpath([browse_directory, directory]) == directory:
+            raise ValueError(
+                "The browse directory must be outside of the library directory."
+            )
+
+        links = self.get_links()
+        generated_links = self._load_manifest()
+
+        removed_links = sorted(
+            link_path
+            for link_path, target in generated_links.items()
+            if links.get(link_path) != target
+        )
+        added_links = sorted(
+            link_path
+            for link_path, target in links.items()
+            if generated_links.get(link_path) != target
+        )
+
+        for link_path in removed_links:
+            if self._verbose:
+                print(
+                    f'[{self._action_counter}] [REMOVING] [LINK] "{os.path.join(self._browse_directory, link_path)}"\n'
+                )
+                self._action_counter += 1
+
+            if not self._dry_run:
+                self._remove_link(link_path=link_path)
+            del generated_links[link_path]
+
+        for link_path in added_links:
+            if self._verbose:
+                print(
+                    f'[{self._action_counter}] [LINKING] "{os.path.join(self._browse_directory, link_path)}" to [TARGET] "{links[link_path]}"\n'
+                )
+                self._action_counter += 1
+
+            if not self._dry_run:
+                try:
+                    self._add_link(link_path=link_path, target=links[link_path])
+                except OSError as error:
+                    print(f'[ERROR] [CANNOT LINK] "{link_path}": {error}\n')
+                    continue
+            generated_links[link_path] = links[link_path]
+
+        if (removed_links or added_links) and not self._dry_run:
+            self._save_manifest(links=generated_links)
+
+        print(
+            f'[GENERATED] [BROWSE VIEWS] in [DIRECTORY] "{self._browse_directory}": {len(added_links)} [LINKS ADDED] '
+            f"and {len(removed_links)} [LINKS REMOVED]\n"
+        )
+
+        return {"added": added_links, "removed": removed_links}
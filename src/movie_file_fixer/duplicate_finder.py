@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Finds the movie files stored more than once in a library, and how many bytes removing the extra copies
+would reclaim.
+
+Movie files are first bucketed by size (a single `stat()` each), so only the files sharing their size with another
+one are ever read. Those candidates are then confirmed by their partial-file hash (the first and last 64 KB, see
+`file_hashing`), i.e. 128 KB per candidate, however large the file. Hard links to the same file aren't duplicates
+(they share their storage), so they're only counted once.
+
+Releases of the same film that differ in content (i.e., a 720p and a 1080p release) are found from the metadata
+file instead: the movie files of every title resolved to the same `imdb_id`.
+"""
+
+import os
+
+from utils import (
+    MOVIE_FILE_EXTENSIONS,
+    HashCache,
+    get_metadata_backend,
+    hash_media_files,
+)
+
+
+class DuplicateFinder:
+    def __init__(
+        self,
+        directory=None,
+        metadata_filename="metadata.json",
+        metadata_backend="json",
+        hash_cache_filepath=None,
+        hash_workers_per_device=2,
+        dry_run=False,
+        verbose=False,
+    ):
+        self._directory = directory
+        self._metadata_filename = metadata_filename
+        self._metadata_backend = metadata_backend
+        self._hash_workers_per_device = hash_workers_per_device
+        self._hash_cache = None
+        if hash_cache_filepath is not None:
+            self._hash_cache = HashCache(filepath=hash_cache_filepath, verbose=verbose)
+        self._dry_run = dry_run
+        self._verbose = verbose
+        self._action_counter = 0
+
+        if self._verbose:
+            print("[CURRENT ACTION: FINDING DUPLICATE MOVIE FILES]\n")
+
+    def _scan_movie_files(self, directory):
+        """
+
+        :param str directory: The directory to scan (recursively).
+        :return dict: The status of every movie file in the directory, keyed by file path.
+
+        Symbolic links are skipped, so a file linked into the library from elsewhere isn't reported as a copy of itself.
+        """
+        stat_results = {}
+        folders = [directory]
+        while folders:
+            try:
+                entries = list(os.scandir(folders.pop()))
+            except OSError:
+                continue
+
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                elif (
+                    entry.is_file(follow_symlinks=False)
+                    and os.path.splitext(entry.name)[1].lower() in MOVIE_FILE_EXTENSIONS
+                ):
+                    try:
+                        stat_results[entry.path] = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+
+        return stat_results
+
+    def _get_hashes(self, filepaths):
+        """
+
+        :param list filepaths: The paths of the files to hash.
+        :return dict: The hashes of every file, keyed by file path. Files that can't be read map to None.
+        """
+        if self._verbose:
+            print(
+                f"[{self._action_counter}] [HASHING] {len(filepaths)} [DUPLICATE CANDIDATES]\n"
+            )
+            self._action_counter += 1
+
+        if self._hash_cache is not None:
+            return self._hash_cache.hash_files(
+                filepaths=filepaths,
+                max_workers_per_device=self._hash_workers_per_device,
+            )
+
+        return hash_media_files(
+            filepaths=filepaths, max_workers_per_device=self._hash_workers_per_device
+        )
+
+    def find_duplicate_files(self, directory=None, stat_results=None):
+        """
+
+        :param str directory: The directory to search for duplicate movie files.
+        :param dict stat_results: The status of every movie file to compare, keyed by file path. [optional]
+        :return list: The groups of identical movie files (their `size`, partial-file `hash` and `filepaths`),
+        the groups reclaiming the most bytes first.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if stat_results is None:
+            stat_results = self._scan_movie_files(directory=directory)
+
+        # Bucket by size, keeping a single path per file (hard links share their device and inode numbers):
+        sizes = {}
+        for filepath, stat_result in sorted(stat_results.items()):
+            if stat_result.st_size:
+                identities = sizes.setdefault(stat_result.st_size, {})
+                identities.setdefault(
+                    (stat_result.st_dev, stat_result.st_ino), filepath
+                )
+
+        candidates = [
+            filepath
+            for identities in sizes.values()
+            if len(identities) > 1
+            for filepath in identities.values()
+        ]
+        file_hashes = self._get_hashes(filepaths=candidates)
+
+        groups = {}
+        for filepath in candidates:
+            hashes = file_hashes[filepath]
+            if hashes is None:
+                print(f'[ERROR] [UNREADABLE] [MOVIE FILE] "{filepath}"\n')
+                continue
+            groups.setdefault((hashes["size"], hashes["subdb"]), []).append(filepath)
+
+        if self._hash_cache is not None and not self._dry_run:
+            self._hash_cache.save()
+
+        duplicate_files = [
+            {"size": size, "hash": hashcode, "filepaths": filepaths}
+            for (size, hashcode), filepaths in groups.items()
+            if len(filepaths) > 1
+        ]
+        duplicate_files.sort(
+            key=lambda group: group["size"] * (len(group["filepaths"]) - 1),
+            reverse=True,
+        )
+
+        return duplicate_files
+
+    def find_duplicate_titles(
+        self, directory=None, metadata_filename=None, stat_results=None
+    ):
+        """
+
+        :param str directory: The directory containing the metadata file and the title folders.
+        :param str metadata_filename: The metadata filename.
+        :param dict stat_results: The status of every movie file in the directory, keyed by file path. [optional]
+        :return list: The groups of movie files of the titles resolved to the same IMDb ID (their `imdb_id`, `titles`,
+        the `sizes` of each file, keyed by file path, and the `title_sizes` of each title, keyed by title folder),
+        the groups reclaiming the most bytes first.
+
+        Series are skipped, as every episode is a movie file of the same IMDb ID. So is a single title with several
+        movie files (i.e., `CD1` and `CD2`, or a sample), which are parts of the same release rather than copies.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        metadata_backend = get_metadata_backend(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            backend=self._metadata_backend,
+        )
+        if not metadata_backend.exists():
+            return []
+
+        if stat_results is None:
+            stat_results = self._scan_movie_files(directory=directory)
+
+        imdb_ids = {}
+        for title in metadata_backend.iter_titles():
+            if title.get("type") == "series" or not title.get("imdb_id"):
+                continue
+            imdb_ids.setdefault(
+                os.path.join(directory, title.get("title")), title.get("imdb_id")
+            )
+
+        groups = {}
+        for filepath, stat_result in sorted(stat_results.items()):
+            relative_path = os.path.relpath(filepath, directory)
+            if os.sep not in relative_path:
+                continue
+
+            title_folder = os.path.join(directory, relative_path.split(os.sep)[0])
+            imdb_id = imdb_ids.get(title_folder)
+            if imdb_id is None:
+                continue
+
+            group = groups.setdefault(
+                imdb_id,
+                {
+                    "imdb_id": imdb_id,
+                    "titles": [],
+                    "sizes": {},
+                    "title_sizes": {},
+                    "identities": set(),
+                },
+            )
+            identity = (stat_result.st_dev, stat_result.st_ino)
+            if identity in group["identities"]:
+                continue
+            group["identities"].add(identity)
+            title_name = os.path.basename(title_folder)
+            if title_name not in group["titles"]:
+                group["titles"].append(title_name)
+            group["sizes"][filepath] = stat_result.st_size
+            group["title_sizes"][title_name] = (
+                group["title_sizes"].get(title_name, 0) + stat_result.st_size
+            )
+
+        duplicate_titles = []
+        for group in groups.values():
+            if len(group["titles"]) > 1:
+                del group["identities"]
+                duplicate_titles.append(group)
+        duplicate_titles.sort(key=_reclaimable_title_bytes, reverse=True)
+
+        return duplicate_titles
+
+    def find_duplicates(self, directory=None, metadata_filename=None):
+        """
+
+        :param str directory: The directory to search for duplicates.
+        :param str metadata_filename: The metadata filename.
+        :return dict: The groups of identical movie `files` (see `find_duplicate_files()`), the groups of movie files
+        of the same `titles` (see `find_duplicate_titles()`), and the bytes removing every extra copy would reclaim:
+        `reclaimable_bytes` for the identical files, and `reclaimable_title_bytes` for keeping only the largest title
+        folder (all of its movie files) of every IMDb ID.
+
+        The library is only scanned once, and only the movie files sharing their size with another one are read.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        stat_results = self._scan_movie_files(directory=directory)
+        if self._verbose:
+            print(
+                f'[{self._action_counter}] [SCANNED] {len(stat_results)} [MOVIE FILES] in [DIRECTORY] "{directory}"\n'
+            )
+            self._action_counter += 1
+
+        duplicate_files = self.find_duplicate_files(
+            directory=directory, stat_results=stat_results
+        )
+        duplicate_titles = self.find_duplicate_titles(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            stat_results=stat_results,
+        )
+
+        for group in duplicate_files:
+            print(
+                f'[DUPLICATE FILES] {len(group["filepaths"])} copies of {group["size"]} [BYTES] [HASH] "{group["hash"]}"\n'
+                + "".join(f'  "{filepath}"\n' for filepath in group["filepaths"])
+            )
+        for group in duplicate_titles:
+            print(
+                f'[DUPLICATE TITLE] [IMDB ID] "{group["imdb_id"]}" in {len(group["titles"])} [TITLES]\n'
+                + "".join(
+                    f'  "{filepath}" ({size} [BYTES])\n'
+                    for filepath, size in group["sizes"].items()
+                )
+            )
+
+        return {
+            "files": duplicate_files,
+            "titles": duplicate_titles,
+            "reclaimable_bytes": sum(
+                group["size"] * (len(group["filepaths"]) - 1)
+                for group in duplicate_files
+            ),
+            "reclaimable_title_bytes": sum(
+                _reclaimable_title_bytes(group) for group in duplicate_titles
+            ),
+        }
+
+
+def _reclaimable_title_bytes(group):
+    """
+
+    :param dict group: A group of movie files of the same title (see `DuplicateFinder.find_duplicate_titles()`).
+    :return int: The bytes reclaimed by keeping only the largest title folder (all of its movie files).
+    """
+    return sum(group["title_sizes"].values()) - max(group["title_sizes"].values())
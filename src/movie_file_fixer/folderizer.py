@@ -7,6 +7,8 @@ a directory of their namesake.
 import os
 import shutil
 
+from utils import metadata_storage_filenames
+
 
 class Folderizer:
     def __init__(
@@ -66,7 +68,7 @@ class Folderizer:
             metadata_filename = self._metadata_filename
 
         for filename in filenames:
-            if filename != metadata_filename:
+            if filename not in metadata_storage_filenames(metadata_filename):
                 old_filepath = os.path.join(directory, filename)
                 stripped_filename, file_ext = os.path.splitext(
                     filename
@@ -5,11 +5,27 @@ Description: Formats all the files and folders in a given directory based on the
 and creates a title metadata file called "metadata.json", which also contains poster information.
 """
 
-import json
 import os
 import re
-
-from utils import OmdbService
+import shutil
+
+from utils import (
+    EPISODE_PATTERNS,
+    MOVIE_FILE_EXTENSIONS,
+    SEASON_FOLDER_PATTERN,
+    HashCache,
+    OmdbService,
+    ProbeCache,
+    ResolutionCache,
+    classify_title,
+    deduplicate_imdb_objects,
+    get_content_fingerprint,
+    get_metadata_backend,
+    get_runtime_minutes,
+    hash_media_files,
+    metadata_storage_filenames,
+    probe_media_files,
+)
 
 
 class Formatter:
@@ -18,21 +34,80 @@ class Formatter:
         directory=None,
         metadata_filename="metadata.json",
         result_type=None,
+        fuzzy_scorer="fuzzywuzzy",
+        resolution_cache_filepath=None,
+        metadata_fields=None,
+        compact=False,
+        metadata_backend="json",
+        probe_media=False,
+        probe_cache_filepath=None,
+        probe_workers_per_device=2,
+        hash_cache_filepath=None,
+        hash_workers_per_device=2,
         dry_run=False,
         verbose=False,
     ):
         self._directory = directory
         self._metadata_filename = metadata_filename
         self._result_type = result_type
+        # Whether to probe the main movie file of each title (see `_probe_titles()`):
+        self._probe_media = probe_media
+        self._probe_workers_per_device = probe_workers_per_device
+        self._probe_cache = None
+        if probe_cache_filepath is not None:
+            self._probe_cache = ProbeCache(
+                filepath=probe_cache_filepath, verbose=verbose
+            )
+        self._hash_workers_per_device = hash_workers_per_device
+        self._hash_cache = None
+        if hash_cache_filepath is not None:
+            self._hash_cache = HashCache(filepath=hash_cache_filepath, verbose=verbose)
+        self._metadata_fields = metadata_fields
+        self._compact = compact
+        self._metadata_backend = metadata_backend
+        self._metadata_backends = {}
         self._dry_run = dry_run
         self._verbose = verbose
         self._action_counter = 0
 
-        self._omdb_service = OmdbService(verbose=self._verbose)
+        self._omdb_service = OmdbService(
+            fuzzy_scorer=fuzzy_scorer, verbose=self._verbose
+        )
+        self._omdb_calls_saved = 0
+        self._resolution_cache = None
+        if resolution_cache_filepath is not None:
+            self._resolution_cache = ResolutionCache(
+                filepath=resolution_cache_filepath, verbose=self._verbose
+            )
 
         if self._verbose:
             print("[CURRENT ACTION: FORMATTING MOVIE TITLES]\n")
 
+    def _get_metadata_backend(self, directory=None, metadata_filename=None):
+        """
+
+        :param str directory: The directory containing the metadata.
+        :param str metadata_filename: The metadata filename.
+        :return MetadataBackend: The metadata backend for the given metadata file (one instance per file).
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        key = (directory, metadata_filename)
+        if key not in self._metadata_backends:
+            self._metadata_backends[key] = get_metadata_backend(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                backend=self._metadata_backend,
+                compact=self._compact,
+                verbose=self._verbose,
+            )
+
+        return self._metadata_backends[key]
+
     def initialize_metadata_file(self, directory=None, metadata_filename=None):
         """
 
@@ -54,26 +129,23 @@ class Formatter:
             )
             self._action_counter += 1
 
+        metadata_backend = self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        )
         # If we couldn't find a metadata file containing the table of contents, create a new one:
-        if not os.path.exists(os.path.join(directory, metadata_filename)):
-            metadata = {"titles": [], "metadata": [], "errors": []}
+        if metadata_backend.initialize():
+            metadata = metadata_backend.load()
 
             if self._verbose:
                 print(
                     f'[INITIALIZED] [NEW] [FILE] "{metadata_filename}" with [METADATA] "{metadata}"\n'
                 )
-
-            with open(os.path.join(directory, metadata_filename), mode="w") as outfile:
-                json.dump(metadata, outfile, indent=4)
         else:  # However, if it does exist,
             # Let's keep track of the files we've already indexed, so we don't duplicate our work:
             if self._verbose:
                 print(f'[LOADED] [EXISTING] [FILE] "{metadata_filename}"\n')
 
-            with open(
-                os.path.join(directory, metadata_filename), encoding="UTF-8"
-            ) as infile:
-                metadata = json.load(infile)
+            metadata = metadata_backend.load()
 
         return metadata
 
@@ -187,8 +259,10 @@ class Formatter:
         if metadata_filename is None:
             metadata_filename = self._metadata_filename
 
-        metadata_filepath = os.path.join(directory, metadata_filename)
-        if not os.path.exists(metadata_filepath):
+        metadata_backend = self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        if not metadata_backend.exists():
             self.initialize_metadata_file(
                 directory=directory, metadata_filename=metadata_filename
             )
@@ -199,21 +273,206 @@ class Formatter:
             )
             self._action_counter += 1
 
-        # Open file for reading:
-        with open(metadata_filepath, mode="rb") as infile:
-            # Load existing data into titles index list:
-            contents_file = json.load(infile)
-
-        # Check that the `content_key` exists:
-        if contents_file.get(content_key) is not None:
-            # Open file for writing:
-            with open(metadata_filepath, mode="w") as outfile:
-                # Append the new data to the titles index list:
-                contents_file[content_key].append(new_content)
-                # Write that updated list to the existing file:
-                json.dump(contents_file, outfile, indent=4)
-        else:
-            raise KeyError(content_key)
+        # Raises a `KeyError` for an unknown `content_key`, IMDb objects replace any older copy with the same `imdbID`:
+        metadata_backend.append(content_key=content_key, new_content=new_content)
+
+    def _save_metadata_file(self, metadata, directory=None, metadata_filename=None):
+        """
+
+        :param dict metadata: The complete metadata to write.
+        :param str directory: The directory containing the metadata file.
+        :param str metadata_filename: The metadata filename.
+        :return: None
+
+        Writes the complete metadata file, either human-readable (indented) or compact.
+        """
+        self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        ).save(metadata=metadata)
+
+    def _project_imdb_object(self, imdb_object, metadata_fields=None):
+        """
+
+        :param dict imdb_object: An IMDb object.
+        :param list metadata_fields: The IMDb object fields to keep. Keeps every field if not provided.
+        :return dict: The IMDb object, reduced to the given fields (and its `imdbID`).
+        """
+        if metadata_fields is None:
+            metadata_fields = self._metadata_fields
+
+        if not metadata_fields or not isinstance(imdb_object, dict):
+            return imdb_object
+
+        projected_imdb_object = {
+            field: imdb_object[field]
+            for field in metadata_fields
+            if field in imdb_object
+        }
+        projected_imdb_object["imdbID"] = imdb_object.get("imdbID")
+
+        return projected_imdb_object
+
+    def _deduplicate_imdb_objects(self, imdb_objects):
+        """
+
+        :param list imdb_objects: A list of IMDb objects, possibly containing several copies of the same title.
+        :return list: The IMDb objects with only the latest copy of each `imdbID`, in order of first appearance.
+        """
+        return deduplicate_imdb_objects(imdb_objects=imdb_objects)
+
+    def compact_metadata_file(
+        self, directory=None, metadata_filename=None, metadata_fields=None
+    ):
+        """
+
+        :param str directory: The directory containing the metadata file.
+        :param str metadata_filename: The metadata filename.
+        :param list metadata_fields: The IMDb object fields to keep. Keeps every field if not provided.
+        :return tuple: The size of the metadata file (in bytes) before and after compaction.
+
+        Rewrites an existing metadata file with projected, deduplicated IMDb objects.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        metadata_backend = self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        metadata_filepath = metadata_backend.storage_filepath
+        original_size = os.path.getsize(metadata_filepath)
+
+        metadata = self.initialize_metadata_file(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        metadata["metadata"] = self._deduplicate_imdb_objects(
+            imdb_objects=[
+                self._project_imdb_object(
+                    imdb_object=imdb_object, metadata_fields=metadata_fields
+                )
+                for imdb_object in metadata.get("metadata", [])
+            ]
+        )
+
+        if not self._dry_run:
+            self._save_metadata_file(
+                metadata=metadata,
+                directory=directory,
+                metadata_filename=metadata_filename,
+            )
+            metadata_backend.optimize()
+
+        compacted_size = os.path.getsize(metadata_filepath)
+
+        if self._verbose:
+            print(
+                f'[COMPACTED] [FILE] "{metadata_filepath}" from {original_size} to {compacted_size} [BYTES]\n'
+            )
+
+        return original_size, compacted_size
+
+    def fix_titles(self, directory=None, metadata_filename=None):
+        """
+
+        :param str directory: The directory of movie folders to fix titles in.
+        :param str metadata_filename: The metadata file to get `titles` metadata from.
+        :return None:
+
+        Given a directory and metadata file, will use the `original_filename` and `imdb_id`
+        to determine the correct title information for the files/folders in the directory.
+        Folders matching no `original_filename` are matched by the content `fingerprint` of their main movie file instead.
+        Nothing is renamed or written in dry run mode.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        metadata = self.initialize_metadata_file(
+            directory=directory, metadata_filename=metadata_filename
+        )
+
+        all_folders = [
+            folder_name
+            for folder_name in os.listdir(directory)
+            if folder_name not in metadata_storage_filenames(metadata_filename)
+        ]
+
+        titles = metadata.get("titles")
+        # Folders renamed since they were formatted can still be told apart by their content:
+        original_filenames = {
+            title_data.get("original_filename") for title_data in titles
+        }
+        fingerprints = self._fingerprint_titles(
+            directory=directory,
+            titles=[
+                folder_name
+                for folder_name in all_folders
+                if folder_name not in original_filenames
+            ],
+        )
+        folders_by_fingerprint = {}
+        for folder_name, fingerprint in fingerprints.items():
+            folders_by_fingerprint.setdefault(fingerprint, folder_name)
+
+        for title_index in range(len(titles)):
+            title_data = titles[title_index]
+            # See if the file is in the given directory:
+            original_filename = title_data.get("original_filename")
+            # formatted_title = title_data.get('title')
+            if original_filename not in all_folders:
+                original_filename = folders_by_fingerprint.get(
+                    title_data.get("fingerprint")
+                )
+
+            # If a file hasn't been formatted OR it has already been formatted, such as
+            if original_filename in all_folders:
+                # Use the IMDb ID to find the IMDb object metadata:
+                imdb_id = title_data.get("imdb_id")
+                imdb_object = self._omdb_service.get_imdb_object(
+                    search_query="", imdb_id=imdb_id
+                )
+                # Replace any earlier copy of this IMDb object, rather than adding another one:
+                metadata["metadata"] = self._deduplicate_imdb_objects(
+                    imdb_objects=metadata["metadata"]
+                    + [self._project_imdb_object(imdb_object=imdb_object)]
+                )
+
+                # Gather the important bits of metadata:
+                title = imdb_object.get("Title")
+                poster = imdb_object.get("Poster")
+                release_year = imdb_object.get("Year")
+                formatted_title = title + " [" + release_year + "]"
+                # If it is, rename the folder and its contents:
+                self.rename_folder_and_contents(
+                    original_name=original_filename,
+                    new_name=formatted_title,
+                    directory=directory,
+                )
+                # mark that folder complete:
+                all_folders.remove(original_filename)
+                if self._verbose:
+                    print(
+                        f'[{self._action_counter}] [FIXED] [FOLDER] "{original_filename}" as [TITLE] "{formatted_title}" '
+                        f"({len(all_folders)} [FOLDERS REMAINING])\n"
+                    )
+                    self._action_counter += 1
+
+                # set the potentially incorrect or missing metadata:
+                title_data["title"] = formatted_title
+                title_data["poster"] = poster
+
+        if self._dry_run:
+            print("[DRY MODE ACTIVATED, METADATA NOT WRITTEN]\n")
+            return
+
+        # Finally, write the updated metadata to the metadata file:
+        self._save_metadata_file(
+            metadata=metadata, directory=directory, metadata_filename=metadata_filename
+        )
 
     def _write_all_metadata(
         self,
@@ -222,12 +481,14 @@ class Formatter:
         final_title,
         directory=None,
         metadata_filename=None,
+        extra_title_metadata=None,
     ):
         """
 
         :param dict imdb_object: An IMDb object to collect metadata from.
         :param str original_filename: The original filename of the movie title prior to being formatted.
         :param str final_title: The filename of the movie title after being formatted.
+        :param dict extra_title_metadata: Additional values to store in the `titles` entry (i.e., the episodes of a series). [optional]
         :return: None
         """
         if directory is None:
@@ -236,8 +497,9 @@ class Formatter:
         if metadata_filename is None:
             metadata_filename = self._metadata_filename
 
-        metadata_filepath = os.path.join(directory, metadata_filename)
-        if not os.path.exists(metadata_filepath):
+        if not self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        ).exists():
             self.initialize_metadata_file(
                 directory=directory, metadata_filename=metadata_filename
             )
@@ -254,6 +516,9 @@ class Formatter:
             "imdb_id": imdb_object.get("imdbID"),
             "poster": imdb_object.get("Poster"),
         }
+        if extra_title_metadata:
+            title_metadata.update(extra_title_metadata)
+
         self._write_metadata(
             new_content=title_metadata,
             content_key="titles",
@@ -261,7 +526,7 @@ class Formatter:
             metadata_filename=metadata_filename,
         )
         self._write_metadata(
-            new_content=imdb_object,
+            new_content=self._project_imdb_object(imdb_object=imdb_object),
             content_key="metadata",
             directory=directory,
             metadata_filename=metadata_filename,
@@ -343,7 +608,9 @@ class Formatter:
                 f'[RENAMED] [FILEPATH] "{original_filepath}" to [FILEPATH] "{new_filepath}"\n'
             )
 
-        # Rename the contents of the folder:
+        # Rename the contents of the folder (which is still at its original path in dry run mode):
+        if self._dry_run:
+            new_filepath = original_filepath
         single_files = [
             file
             for file in os.listdir(new_filepath)
@@ -356,15 +623,579 @@ class Formatter:
                 proposed_new_filename=new_name,
             )
 
+    def _get_cached_imdb_object(self, release_name):
+        """
+
+        :param str release_name: The original file or folder name of the title.
+        :return dict: The IMDb object of a previously resolved release, or None if the release isn't in the resolution cache.
+
+        Checks the resolution cache before any fuzzy OMDb search. A cache hit only costs a single lookup by IMDb ID.
+        """
+        if self._resolution_cache is None:
+            return None
+
+        cached_imdb_id = self._resolution_cache.get(release_name=release_name)
+        if cached_imdb_id is None:
+            return None
+
+        imdb_object = self._omdb_service.get_imdb_object(
+            search_query="", imdb_id=cached_imdb_id
+        )
+        # A stale or invalid cache entry falls back to a regular search:
+        if imdb_object is None or imdb_object.get("Response") != "True":
+            return None
+
+        return imdb_object
+
+    def _parse_episode(self, filename):
+        """
+
+        :param str filename: The filename to parse.
+        :return tuple: A tuple containing the show search terms (the text preceding the episode marker), the season and the episode number, or None if the filename isn't an episode.
+
+        Detects `S01E02` (or `1x02`) style episode markers in the given filename.
+        """
+        name, extension = os.path.splitext(filename)
+        stripped_name = self._strip_punctuation(phrase=name)
+
+        for episode_pattern in EPISODE_PATTERNS:
+            match = episode_pattern.search(stripped_name)
+            if match:
+                return (
+                    stripped_name[: match.start()].strip(),
+                    int(match.group(1)),
+                    int(match.group(2)),
+                )
+
+        return None
+
+    def _find_episode_files(self, directory, metadata_filename, formatted_titles):
+        """
+
+        :param str directory: The directory containing the (folderized) titles.
+        :param str metadata_filename: The metadata filename to ignore.
+        :param list formatted_titles: Folder names that have already been formatted and should be ignored.
+        :return dict: A dictionary of show search terms, each containing a list of the episode files belonging to that show.
+
+        Groups every episode file found in the given directory (at any depth) by show, so each show only needs to be resolved once.
+        """
+        series_episodes = {}
+        for title in sorted(os.listdir(directory)):
+            if (
+                title in metadata_storage_filenames(metadata_filename)
+                or title in formatted_titles
+            ):
+                continue
+
+            title_path = os.path.join(directory, title)
+            if os.path.isfile(title_path):
+                filepaths = [title_path]
+            else:
+                filepaths = [
+                    os.path.join(root, filename)
+                    for root, dirs, files in os.walk(title_path)
+                    for filename in sorted(files)
+                ]
+
+            for filepath in filepaths:
+                episode = self._parse_episode(filename=os.path.basename(filepath))
+                if episode is None:
+                    continue
+
+                show_search_terms, season, episode_number = episode
+                if not show_search_terms:
+                    # Files like "S01E02.mkv" get their show name from the folder they were found in (minus any season markers):
+                    folder_name = self._strip_punctuation(phrase=title)
+                    show_search_terms = SEASON_FOLDER_PATTERN.split(folder_name)[0]
+                    show_search_terms = show_search_terms.strip()
+
+                if show_search_terms:
+                    series_episodes.setdefault(show_search_terms, []).append(
+                        {
+                            "filepath": filepath,
+                            "original_title": title,
+                            "season": season,
+                            "episode": episode_number,
+                        }
+                    )
+
+        return series_episodes
+
+    def _find_formatted_series(self, titles, title_candidate):
+        """
+
+        :param list titles: The `titles` section of the metadata file.
+        :param str title_candidate: The clean (punctuation-free) show title candidate.
+        :return dict: The `titles` entry of the matching series, if that show has already been formatted, or None.
+        """
+        for entry in titles:
+            if isinstance(entry, dict) and entry.get("type") == "series":
+                formatted_title = re.sub(r"\s*\[[^\]]*\]$", "", entry.get("title", ""))
+                if self._strip_punctuation(phrase=formatted_title) == title_candidate:
+                    return entry
+
+        return None
+
+    def _move_episode_file(self, filepath, destination_folder, proposed_new_filename):
+        """
+
+        :param str filepath: The current path of the episode file.
+        :param str destination_folder: The (season) folder to move the episode file into.
+        :param str proposed_new_filename: The proposed new filename (without extension).
+        :return str: The final filename, which is suffixed with a counter if the proposed filename is already taken.
+        """
+        name, extension = os.path.splitext(filepath)
+        new_filename = proposed_new_filename + extension
+        counter = 2
+        while os.path.exists(os.path.join(destination_folder, new_filename)):
+            if self._verbose:
+                print(
+                    f'[ERROR] [DUPLICATE] [FILEPATH] "{os.path.join(destination_folder, new_filename)}"'
+                )
+            new_filename = f"{proposed_new_filename}_{counter}{extension}"
+            counter += 1
+
+        if self._verbose:
+            print(
+                f'[{self._action_counter}] [MOVING] [EPISODE] "{filepath}" to [FILEPATH] "{os.path.join(destination_folder, new_filename)}"\n'
+            )
+            self._action_counter += 1
+
+        if not self._dry_run:
+            os.makedirs(destination_folder, exist_ok=True)
+            shutil.move(filepath, os.path.join(destination_folder, new_filename))
+
+        return new_filename
+
+    def _remove_empty_folders(self, folder_path):
+        """
+
+        :param str folder_path: The folder to remove, if it (and all of its sub-folders) no longer contain any files.
+        :return None:
+        """
+        if self._dry_run or not os.path.isdir(folder_path):
+            return
+
+        for root, dirs, files in os.walk(folder_path, topdown=False):
+            if not os.listdir(root):
+                os.rmdir(root)
+
+    def _add_series_episodes(
+        self, final_title, episodes, directory=None, metadata_filename=None
+    ):
+        """
+
+        :param str final_title: The formatted title of an existing series in the `titles` section.
+        :param list episodes: The episode metadata to add to that series.
+        :param str directory: The directory containing the metadata file.
+        :param str metadata_filename: The metadata filename.
+        :return: None
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        metadata_backend = self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        entry = metadata_backend.find_title(key="title", value=final_title)
+        if entry is not None:
+            metadata_backend.update_title(
+                title=final_title,
+                values={"episodes": entry.get("episodes", []) + episodes},
+            )
+
+    def format_series(self, directory=None, metadata_filename=None):
+        """
+
+        :param str directory: The directory containing series episode files to format.
+        :param str metadata_filename: The metadata filename.
+        :return set: The original file/folder names that contained episodes (and were handled as a series).
+
+        Formats every `S01E02` style episode file in the given directory into a
+        `<show_title> [<year>]/Season <season>/<show_title> - S<season>E<episode> - <episode_title>` tree.
+
+        Each show is resolved once and each season's episode list is fetched with a single `Season=` request,
+        so a complete series costs O(seasons) OMDb requests instead of O(episodes).
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if self._verbose:
+            print(
+                f'[{self._action_counter}] [FORMATTING SERIES] in [DIRECTORY] "{directory}"\n'
+            )
+            self._action_counter += 1
+
+        metadata = self.initialize_metadata_file(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        titles = metadata.get("titles")
+        formatted_titles = [
+            entry.get("title") for entry in titles if isinstance(entry, dict)
+        ]
+        series_episodes = self._find_episode_files(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            formatted_titles=formatted_titles,
+        )
+
+        handled_titles = set()
+        for show_search_terms, episodes in series_episodes.items():
+            original_titles = sorted(
+                {episode["original_title"] for episode in episodes}
+            )
+            handled_titles.update(original_titles)
+            (
+                title_candidate,
+                release_year,
+            ) = self._get_clean_title_candidate_and_release_year(
+                search_terms=show_search_terms
+            )
+
+            try:
+                formatted_series = self._find_formatted_series(
+                    titles=titles, title_candidate=title_candidate
+                )
+                if formatted_series is not None:
+                    # We've seen this show before, no need to search for it again:
+                    imdb_id = formatted_series.get("imdb_id")
+                    final_title = formatted_series.get("title")
+                    series_object = None
+                else:
+                    series_object = self._get_cached_imdb_object(
+                        release_name=original_titles[0]
+                    )
+                    if series_object is None:
+                        series_object = self._omdb_service.get_imdb_object(
+                            search_query=title_candidate,
+                            release_year=release_year,
+                            result_type="series",
+                        )
+                    imdb_id = series_object.get("imdbID")
+                    final_title = self._strip_illegal_characters(
+                        phrase=f"{series_object.get('Title')} [{series_object.get('Year')}]"
+                    )
+
+                show_title = re.sub(r"\s*\[[^\]]*\]$", "", final_title)
+
+                # One request per season, no matter how many episodes it has:
+                seasons = {}
+                for season in sorted({episode["season"] for episode in episodes}):
+                    season_object = self._omdb_service.get_season(
+                        imdb_id=imdb_id, season=season
+                    )
+                    seasons[season] = {
+                        int(season_episode.get("Episode")): season_episode
+                        for season_episode in season_object.get("Episodes", [])
+                        if str(season_episode.get("Episode", "")).isdigit()
+                    }
+
+                episode_metadata = []
+                for episode in sorted(
+                    episodes,
+                    key=lambda episode: (episode["season"], episode["episode"]),
+                ):
+                    season_episode = seasons[episode["season"]].get(
+                        episode["episode"], {}
+                    )
+                    episode_code = f"S{episode['season']:02d}E{episode['episode']:02d}"
+                    proposed_new_filename = f"{show_title} - {episode_code}"
+                    if season_episode.get("Title"):
+                        proposed_new_filename += f" - {season_episode.get('Title')}"
+                    season_folder = f"Season {episode['season']:02d}"
+
+                    new_filename = self._move_episode_file(
+                        filepath=episode["filepath"],
+                        destination_folder=os.path.join(
+                            directory, final_title, season_folder
+                        ),
+                        proposed_new_filename=self._strip_illegal_characters(
+                            phrase=proposed_new_filename
+                        ),
+                    )
+                    episode_metadata.append(
+                        {
+                            "original_filename": os.path.basename(episode["filepath"]),
+                            "filename": os.path.join(season_folder, new_filename),
+                            "season": episode["season"],
+                            "episode": episode["episode"],
+                            "title": season_episode.get("Title"),
+                            "imdb_id": season_episode.get("imdbID"),
+                        }
+                    )
+
+                if series_object is not None:
+                    self._write_all_metadata(
+                        imdb_object=series_object,
+                        original_filename=original_titles[0],
+                        final_title=final_title,
+                        directory=directory,
+                        metadata_filename=metadata_filename,
+                        extra_title_metadata={
+                            "type": "series",
+                            "episodes": episode_metadata,
+                        },
+                    )
+                    titles.append(
+                        {"title": final_title, "imdb_id": imdb_id, "type": "series"}
+                    )
+                    if self._resolution_cache is not None:
+                        self._resolution_cache.add(
+                            release_name=original_titles[0], imdb_id=imdb_id
+                        )
+                else:
+                    self._add_series_episodes(
+                        final_title=final_title,
+                        episodes=episode_metadata,
+                        directory=directory,
+                        metadata_filename=metadata_filename,
+                    )
+
+                for original_title in original_titles:
+                    self._remove_empty_folders(
+                        folder_path=os.path.join(directory, original_title)
+                    )
+            except Exception as error:
+                if self._verbose:
+                    print(
+                        f'[ERROR] No result for [SERIES] "{show_search_terms}"\n[ERROR] {error}\n'
+                    )
+
+                for original_title in original_titles:
+                    self._write_metadata(
+                        new_content={
+                            "original_filename": original_title,
+                            "title_candidate": title_candidate,
+                        },
+                        content_key="errors",
+                        directory=directory,
+                        metadata_filename=metadata_filename,
+                    )
+
+        return handled_titles
+
+    def _get_main_movie_file(self, directory, title):
+        """
+
+        :param str directory: The directory containing the title.
+        :param str title: The file or folder name of the title.
+        :return str: The path of the largest movie file of the title, or None if it has none.
+        """
+        title_path = os.path.join(directory, title)
+        if os.path.isdir(title_path):
+            movie_file_paths = [
+                os.path.join(root, filename)
+                for root, dirs, files in os.walk(title_path)
+                for filename in files
+                if os.path.splitext(filename)[1].lower() in MOVIE_FILE_EXTENSIONS
+            ]
+        elif os.path.splitext(title)[1].lower() in MOVIE_FILE_EXTENSIONS:
+            movie_file_paths = [title_path]
+        else:
+            movie_file_paths = []
+
+        if not movie_file_paths:
+            return None
+
+        return max(movie_file_paths, key=os.path.getsize)
+
+    def _probe_titles(self, directory, titles):
+        """
+
+        :param str directory: The directory containing the titles.
+        :param list titles: The file or folder names of the titles.
+        :return dict: The probe of the main movie file of every title that has one, keyed by title.
+
+        The main movie files are probed from their container headers only (see `probe_media_file()`), concurrently
+        on every device, and from the probe cache if one is in use.
+        """
+        movie_file_paths = {}
+        for title in titles:
+            movie_file_path = self._get_main_movie_file(
+                directory=directory, title=title
+            )
+            if movie_file_path is not None:
+                movie_file_paths[title] = movie_file_path
+
+        if self._verbose:
+            print(
+                f"[{self._action_counter}] [PROBING] {len(movie_file_paths)} [MOVIE FILES]\n"
+            )
+            self._action_counter += 1
+
+        if self._probe_cache is not None:
+            probes = self._probe_cache.probe_files(
+                filepaths=list(movie_file_paths.values()),
+                max_workers_per_device=self._probe_workers_per_device,
+            )
+        else:
+            probes = probe_media_files(
+                filepaths=list(movie_file_paths.values()),
+                max_workers_per_device=self._probe_workers_per_device,
+            )
+
+        return {
+            title: probes[movie_file_path]
+            for title, movie_file_path in movie_file_paths.items()
+            if probes[movie_file_path] is not None
+        }
+
+    def _fingerprint_titles(self, directory, titles):
+        """
+
+        :param str directory: The directory containing the titles.
+        :param list titles: The file or folder names of the titles.
+        :return dict: The content fingerprint of the main movie file of every title that has one, keyed by title.
+
+        Only the first and last 64 KB of every main movie file are read (see `get_content_fingerprint()`), concurrently
+        on every device, and none at all for the files in the hash cache, if one is in use.
+        """
+        movie_file_paths = {}
+        for title in titles:
+            movie_file_path = self._get_main_movie_file(
+                directory=directory, title=title
+            )
+            if movie_file_path is not None:
+                movie_file_paths[title] = movie_file_path
+
+        if self._verbose:
+            print(
+                f"[{self._action_counter}] [FINGERPRINTING] {len(movie_file_paths)} [MOVIE FILES]\n"
+            )
+            self._action_counter += 1
+
+        if self._hash_cache is not None:
+            file_hashes = self._hash_cache.hash_files(
+                filepaths=list(movie_file_paths.values()),
+                max_workers_per_device=self._hash_workers_per_device,
+            )
+        else:
+            file_hashes = hash_media_files(
+                filepaths=list(movie_file_paths.values()),
+                max_workers_per_device=self._hash_workers_per_device,
+            )
+
+        return {
+            title: get_content_fingerprint(hashes=file_hashes[movie_file_path])
+            for title, movie_file_path in movie_file_paths.items()
+            if file_hashes[movie_file_path] is not None
+        }
+
+    def _reassociate_titles(self, directory, metadata_backend, fingerprints):
+        """
+
+        :param str directory: The directory containing the titles.
+        :param MetadataBackend metadata_backend: The metadata backend of the directory.
+        :param dict fingerprints: The content fingerprint of every unformatted title, keyed by title.
+        :return set: The titles re-associated with their existing `titles` entries.
+
+        A formatted title folder renamed (or moved) by hand no longer matches its `titles` entry, but its main movie
+        file still does, by content fingerprint. Its entry is renamed after the folder, so the title is never
+        searched for again. Entries whose folder still exists are left alone, as the title is then a copy.
+        """
+        titles_by_fingerprint = {}
+        for title, fingerprint in fingerprints.items():
+            titles_by_fingerprint.setdefault(fingerprint, title)
+
+        reassociated_titles = set()
+        if not titles_by_fingerprint:
+            return reassociated_titles
+
+        # A single pass over the `titles` entries, however many titles are looked up:
+        updates = {}
+        for entry in metadata_backend.iter_titles():
+            if not isinstance(entry, dict):
+                continue
+            title = titles_by_fingerprint.get(entry.get("fingerprint"))
+            if (
+                title is None
+                or title in reassociated_titles
+                or os.path.exists(os.path.join(directory, entry.get("title")))
+            ):
+                continue
+
+            if self._verbose:
+                print(
+                    f'[REASSOCIATED] [FOLDER] "{title}" with [TITLE] "{entry.get("title")}" by [FINGERPRINT] "{entry.get("fingerprint")}"\n'
+                )
+            updates[entry.get("title")] = {"title": title}
+            reassociated_titles.add(title)
+
+        if updates and not self._dry_run:
+            metadata_backend.update_titles(updates=updates)
+
+        return reassociated_titles
+
+    def _classify_title(self, directory, title, runtime_minutes=None):
+        """
+
+        :param str directory: The directory containing the title.
+        :param str title: The file or folder name of the title.
+        :param float runtime_minutes: The runtime of the main movie file of the title, if known. [optional]
+        :return str: The `result_type` to search the title with. Valid Options: [`movie`, `series`]
+
+        Classifies the title from its name and the names of the files it contains (and its runtime, if known).
+        """
+        title_path = os.path.join(directory, title)
+        if os.path.isdir(title_path):
+            filenames = [
+                filename
+                for root, dirs, files in os.walk(title_path)
+                for filename in files
+            ]
+        else:
+            filenames = [title]
+
+        result_type, reason = classify_title(
+            title=title, filenames=filenames, runtime_minutes=runtime_minutes
+        )
+
+        if self._verbose:
+            print(
+                f'[{self._action_counter}] [CLASSIFIED] "{title}" as [RESULT TYPE] "{result_type}" by [{reason.upper()}]\n'
+            )
+            self._action_counter += 1
+
+        return result_type
+
+    def _estimate_wasted_omdb_calls(self, title_candidate):
+        """
+
+        :param str title_candidate: The clean title candidate of a series.
+        :return int: The number of OMDb requests a `movie` search for the given series would have wasted.
+
+        A series searched as a `movie` never yields a candidate, so `get_imdb_object()` drops every word of the
+        search query in turn, sending a search by title and a search by search terms for each one.
+        """
+        return 2 * len(title_candidate.split())
+
     def format(self, directory=None, metadata_filename=None, result_type=None):
         """
 
         :param str directory: The directory containing IMDb titles to format.
         :param str metadata_filename: The metadata filename.
-        :param str result_type: What type of IMDb object you want returned. Valid Options: [`movie`, `series`, `episode`]
+        :param str result_type: What type of IMDb object you want returned. Valid Options: [`movie`, `series`, `episode`, `auto`]
         :return: None
 
         Formats every folder/filename in the given directory according to the IMDb title closest to the folder/filename.
+
+        If `result_type` is `series`, episode files are grouped by show and formatted by `format_series()` first.
+        If `result_type` is `auto`, episodes are handled the same way and every other title is classified
+        as a `movie` or `series` (from its name and folder structure) and searched with that type.
+        A title classified as a `series` that isn't found is searched again as a `movie`.
+
+        Every title folder that was renamed (or moved) by hand after it was formatted is re-associated with its
+        existing metadata, by the content fingerprint of its main movie file, without searching for it again.
+        Every new title's metadata records that fingerprint.
+
+        If `probe_media` is set, the main movie file of every title is probed first. Its runtime helps classify the
+        title and choose between equally good matches, and the probe is stored in the title's `media` metadata.
         """
         if directory is None:
             directory = self._directory
@@ -381,17 +1212,69 @@ class Formatter:
             )
             self._action_counter += 1
 
+        # Episodes are grouped by show and formatted in one go, the remaining titles are formatted one by one:
+        series_titles = set()
+        if result_type in ["series", "auto"]:
+            series_titles = self.format_series(
+                directory=directory, metadata_filename=metadata_filename
+            )
+            if result_type == "auto":
+                for series_title in series_titles:
+                    title_candidate, release_year = (
+                        self._get_clean_title_candidate_and_release_year(
+                            search_terms=series_title
+                        )
+                    )
+                    self._omdb_calls_saved += self._estimate_wasted_omdb_calls(
+                        title_candidate=title_candidate
+                    )
+
+        self.initialize_metadata_file(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        metadata_backend = self._get_metadata_backend(
+            directory=directory, metadata_filename=metadata_filename
+        )
+        pending_titles = [
+            title
+            for title in os.listdir(directory)
+            if title not in metadata_storage_filenames(metadata_filename)
+            and title not in series_titles
+            and metadata_backend.find_title(key="title", value=title) is None
+        ]
+        fingerprints = self._fingerprint_titles(
+            directory=directory, titles=pending_titles
+        )
+        reassociated_titles = self._reassociate_titles(
+            directory=directory,
+            metadata_backend=metadata_backend,
+            fingerprints=fingerprints,
+        )
+        pending_titles = [
+            title for title in pending_titles if title not in reassociated_titles
+        ]
+
+        media_probes = {}
+        if self._probe_media:
+            media_probes = self._probe_titles(
+                directory=directory, titles=pending_titles
+            )
+
         for title in os.listdir(directory):
-            if title != self._metadata_filename:
-                metadata = self.initialize_metadata_file()
+            if (
+                title not in metadata_storage_filenames(metadata_filename)
+                and title not in series_titles
+                and title not in reassociated_titles
+            ):
                 if self._verbose:
                     print(f'[{self._action_counter}] [FORMATTING] [FOLDER] "{title}"\n')
                     self._action_counter += 1
 
                 # Let's not process the metadata file or duplicate our work:
-                if str(title) not in metadata_filename and title not in [
-                    entry.get("title") for entry in metadata.get("titles")
-                ]:
+                if (
+                    str(title) not in metadata_filename
+                    and metadata_backend.find_title(key="title", value=title) is None
+                ):
                     # Retrieve the release year to increase dependability of search query results:
                     (
                         title_candidate,
@@ -399,21 +1282,71 @@ class Formatter:
                     ) = self._get_clean_title_candidate_and_release_year(
                         search_terms=title
                     )
-                    try:
-                        imdb_object = self._omdb_service.get_imdb_object(
-                            search_query=title_candidate,
-                            release_year=release_year,
-                            result_type=result_type,
+                    media_probe = media_probes.get(title)
+                    runtime_minutes = get_runtime_minutes(probe=media_probe)
+                    title_result_type = result_type
+                    if result_type == "auto":
+                        title_result_type = self._classify_title(
+                            directory=directory,
+                            title=title,
+                            runtime_minutes=runtime_minutes,
                         )
+                    try:
+                        imdb_object = self._get_cached_imdb_object(release_name=title)
+                        if imdb_object is None:
+                            search_options = {}
+                            if runtime_minutes is not None:
+                                search_options["runtime_minutes"] = runtime_minutes
+                            imdb_object = self._omdb_service.get_imdb_object(
+                                search_query=title_candidate,
+                                release_year=release_year,
+                                result_type=title_result_type,
+                                **search_options,
+                            )
+                            # The classification is only a guess, so a title is never given up on without a `movie` search:
+                            if (
+                                imdb_object is None
+                                and result_type == "auto"
+                                and title_result_type != "movie"
+                            ):
+                                if self._verbose:
+                                    print(
+                                        f'[{self._action_counter}] [RETRYING] "{title}" with [RESULT TYPE] "movie"\n'
+                                    )
+                                    self._action_counter += 1
+
+                                title_result_type = "movie"
+                                imdb_object = self._omdb_service.get_imdb_object(
+                                    search_query=title_candidate,
+                                    release_year=release_year,
+                                    result_type=title_result_type,
+                                    **search_options,
+                                )
+                        if result_type == "auto" and title_result_type != "movie":
+                            self._omdb_calls_saved += self._estimate_wasted_omdb_calls(
+                                title_candidate=title_candidate
+                            )
                         final_title = (
                             f"{imdb_object.get('Title')} [{imdb_object.get('Year')}]"
                         )
                         final_title = self._strip_illegal_characters(phrase=final_title)
+                        extra_title_metadata = {}
+                        if title in fingerprints:
+                            extra_title_metadata["fingerprint"] = fingerprints[title]
+                        if media_probe:
+                            extra_title_metadata["media"] = media_probe
                         self._write_all_metadata(
                             imdb_object=imdb_object,
                             original_filename=title,
                             final_title=final_title,
+                            directory=directory,
+                            metadata_filename=metadata_filename,
+                            extra_title_metadata=extra_title_metadata,
                         )
+                        if self._resolution_cache is not None:
+                            self._resolution_cache.add(
+                                release_name=title, imdb_id=imdb_object.get("imdbID")
+                            )
                         self.rename_folder_and_contents(
                             directory=directory,
                             original_name=title,
@@ -435,3 +1368,35 @@ class Formatter:
                             directory=directory,
                             metadata_filename=metadata_filename,
                         )
+
+        if result_type == "auto":
+            print(
+                f"[OMDB CALLS] {self._omdb_service.api_call_count} [USED] and ~{self._omdb_calls_saved} [SAVED] by [AUTOMATIC TYPE DETECTION]\n"
+            )
+
+        # Let the metadata backend write everything out (i.e., compact its journal):
+        metadata_backend.close()
+
+        if self._resolution_cache is not None and not self._dry_run:
+            self._resolution_cache.export_cache()
+
+            if self._verbose:
+                print(
+                    f"[RESOLUTION CACHE] {self._resolution_cache.hits} [HITS] and {self._resolution_cache.misses} [MISSES]\n"
+                )
+
+        if self._hash_cache is not None and not self._dry_run:
+            self._hash_cache.save()
+
+            if self._verbose:
+                print(
+                    f"[HASH CACHE] {self._hash_cache.hits} [HITS] and {self._hash_cache.misses} [MISSES]\n"
+                )
+
+        if self._probe_cache is not None and not self._dry_run:
+            self._probe_cache.save()
+
+            if self._verbose:
+                print(
+                    f"[PROBE CACHE] {self._probe_cache.hits} [HITS] and {self._probe_cache.misses} [MISSES]\n"
+                )
@@ -2,10 +2,13 @@
 """
 Description:
 
-Executes a five part movie folder formatting workflow for a given directory.
+Executes an eight part movie folder formatting workflow for a given directory.
 
 The workflow actions are as follows:
 
+0. [ViewBuilder] (Optional) Links every new movie file and folder into a separate target directory,
+which the rest of the workflow formats instead, leaving the originals untouched.
+
 1. [Folderizer] Searches a directory and puts all singleton files into a directory of their namesake.
 
 2. [FileRemover] Removes any files with unwanted extensions like ".txt" or ".dat".
@@ -15,7 +18,12 @@ and creates a title directory called "contents.json", which also contains poster
 
 4. [PosterFinder] Reads that "contents.json" file and downloads the poster for each title.
 
-5. [SubtitleFinder] Reads the "contents.json" file and downloads the subtitle for each title.
+5. [ThumbnailGenerator] (Optional) Generates the thumbnails of every poster that weren't downloaded along with it.
+
+6. [SubtitleFinder] Reads the "contents.json" file and downloads the subtitle for each title.
+
+7. [BrowseViewGenerator] (Optional) Links every title into browse trees (by year, genre and director)
+in a separate browse directory, only adding and removing the links that changed since the last run.
 w
 """
 
@@ -24,11 +32,23 @@ import json
 import os
 import sys
 
+from movie_file_fixer.browse_view_generator import BROWSE_VIEWS, BrowseViewGenerator
+from movie_file_fixer.duplicate_finder import DuplicateFinder
 from movie_file_fixer.file_remover import FileRemover
 from movie_file_fixer.folderizer import Folderizer
 from movie_file_fixer.formatter import Formatter
-from movie_file_fixer.poster_finder import PosterFinder
+from movie_file_fixer.poster_finder import PosterFinder, get_thumbnail_width
 from movie_file_fixer.subtitle_finder import SubtitleFinder
+from movie_file_fixer.thumbnail_generator import ThumbnailGenerator
+from movie_file_fixer.view_builder import ViewBuilder
+from utils import (
+    ResolutionCache,
+    default_hash_cache_filepath,
+    default_poster_cache_directory,
+    default_probe_cache_filepath,
+    default_subtitle_miss_cache_filepath,
+    get_metadata_backend,
+)
 
 
 def main():
@@ -36,23 +56,68 @@ def main():
 
     utils = args.utils
     if utils:
-        movie_file_fixer = MovieFileFixer(directory=args.directory, util="title_fixer")
-        movie_file_fixer.run()
+        movie_file_fixer = MovieFileFixer(
+            directory=args.directory,
+            metadata_filename=args.metadata_filename,
+            resolution_cache=args.resolution_cache,
+            metadata_fields=args.metadata_fields,
+            compact=args.compact,
+            metadata_backend=args.metadata_backend,
+            hash_cache=args.hash_cache,
+            hash_workers_per_device=args.hash_workers_per_device,
+            browse_directory=args.browse_directory,
+            browse_views=args.browse_views,
+            util=args.util_name,
+            dry_run=args.dry_run,
+            verbose=args.verbose,
+        )
+        movie_file_fixer.run(metadata_filepaths=args.seed_metadata_files)
     else:
         movie_file_fixer = MovieFileFixer(
             directory=args.directory,
+            target_directory=args.target_directory,
             file_extensions=args.file_extensions,
             metadata_filename=args.metadata_filename,
             language=args.language,
             result_type=args.result_type,
+            fuzzy_scorer=args.fuzzy_scorer,
+            resolution_cache=args.resolution_cache,
+            metadata_fields=args.metadata_fields,
+            compact=args.compact,
+            metadata_backend=args.metadata_backend,
+            poster_workers=args.poster_workers,
+            refresh_posters=args.refresh_posters,
+            poster_size=args.poster_size,
+            thumbnail_sizes=args.thumbnail_sizes,
+            poster_cache=args.poster_cache,
+            poster_cache_size=args.poster_cache_size,
+            thumbnail_workers=args.thumbnail_workers,
+            probe_media=args.probe_media,
+            probe_cache=args.probe_cache,
+            probe_workers_per_device=args.probe_workers_per_device,
+            hash_cache=args.hash_cache,
+            hash_workers_per_device=args.hash_workers_per_device,
+            subtitle_workers=args.subtitle_workers,
+            subtitle_providers=args.subtitle_providers,
+            subtitle_miss_cache=args.subtitle_miss_cache,
+            subtitle_miss_ttl=args.subtitle_miss_ttl,
+            download_embedded_subtitles=args.download_embedded_subtitles,
+            browse_directory=args.browse_directory,
+            browse_views=args.browse_views,
             dry_run=args.dry_run,
             verbose=args.verbose,
         )
+        if args.target_directory:
+            movie_file_fixer.build_view()
         movie_file_fixer.folderize()
         movie_file_fixer.cleanup()
         movie_file_fixer.format()
         movie_file_fixer.get_posters()
+        if args.thumbnail_sizes:
+            movie_file_fixer.generate_thumbnails()
         movie_file_fixer.get_subtitles()
+        if args.browse_directory:
+            movie_file_fixer.generate_browse_views()
 
 
 def parse_args(args):
@@ -73,6 +138,13 @@ def parse_args(args):
         type=str,
         help="A directory containing raw movie files and folders.",
     )
+    parser.add_argument(
+        "--target_directory",
+        type=str,
+        default=None,
+        help="A directory to build the formatted library in, out of hardlinks (or reflinks) to the movie files and "
+        "folders of `--directory`, which are then never moved or renamed. Only new titles are linked on later runs.",
+    )
     parser.add_argument(
         "--file_extensions",
         "-e",
@@ -91,16 +163,204 @@ def parse_args(args):
         "--language",
         "-l",
         type=str,
-        default="en",
-        help="To specify a two-character language encoding for subtitles.",
+        nargs="+",
+        default=["en"],
+        help="To specify the two-character language encodings for subtitles (i.e., `-l en es fr` or `-l en,es,fr`). "
+        "Every movie file is hashed and searched once, whatever the number of languages.",
     )
     parser.add_argument(
         "--result_type",
         "-r",
         type=str,
         default="movie",
-        choices=["movie", "series", "episode"],
-        help="To specify a type of IMDb object result to return metadata and poster information for.",
+        choices=["movie", "series", "episode", "auto"],
+        help="To specify a type of IMDb object result to return metadata and poster information for. "
+        "Use `auto` to detect the type of every title from its name and folder structure.",
+    )
+    parser.add_argument(
+        "--fuzzy_scorer",
+        "-s",
+        type=str,
+        default="fuzzywuzzy",
+        choices=["fuzzywuzzy", "rapidfuzz", "builtin"],
+        help="To specify the fuzzy matching engine used to pick the best IMDb search result.",
+    )
+    parser.add_argument(
+        "--resolution_cache",
+        "-c",
+        type=str,
+        default=None,
+        help="A resolution cache file mapping release names to IMDb IDs, checked before any OMDb search and updated afterwards.",
+    )
+    parser.add_argument(
+        "--seed_metadata_file",
+        "-m",
+        action="append",
+        dest="seed_metadata_files",
+        default=None,
+        help="A metadata file to seed the resolution cache from (used with the `seed_resolution_cache` utility). "
+        "Defaults to every metadata file found under the directory.",
+    )
+    parser.add_argument(
+        "--metadata_field",
+        "-p",
+        action="append",
+        dest="metadata_fields",
+        default=None,
+        help="An IMDb object field to keep in the metadata file (i.e., `Title`, `Year`, `Genre`). Keeps every field if not provided.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        default=False,
+        help="Set this flag to write the metadata file as compact (non-indented) JSON.",
+    )
+    parser.add_argument(
+        "--metadata_backend",
+        "-b",
+        type=str,
+        default="json",
+        choices=["json", "sqlite", "journal"],
+        help="To specify where the metadata is stored: a single JSON file, an SQLite database next to it "
+        "(imported from the JSON file on first use), or an append-only journal compacted into the JSON file.",
+    )
+    parser.add_argument(
+        "--poster_workers",
+        "-w",
+        type=int,
+        default=8,
+        help="To specify the number of posters downloaded concurrently.",
+    )
+    parser.add_argument(
+        "--refresh_posters",
+        action="store_true",
+        default=False,
+        help="Set this flag to revalidate existing posters (with conditional requests) instead of skipping them.",
+    )
+    parser.add_argument(
+        "--poster_size",
+        type=str,
+        default="default",
+        help="To specify the poster width to download: `default` (the stored URL), `full` (the original image), "
+        "`thumbnail`, or a width in pixels. Only applies to Amazon image URLs.",
+    )
+    parser.add_argument(
+        "--thumbnail_size",
+        action="append",
+        dest="thumbnail_sizes",
+        default=None,
+        help="A thumbnail size (`thumbnail` or a width in pixels) to write a `poster-<width>w.jpg` of every poster at. "
+        "Can be given several times. Thumbnails of Amazon image URLs are downloaded along with the posters, "
+        "the others are generated from the posters (which requires the `Pillow` package).",
+    )
+    parser.add_argument(
+        "--poster_cache",
+        type=str,
+        nargs="?",
+        const=default_poster_cache_directory(),
+        default=None,
+        help="A poster cache directory shared across libraries and runs, checked before downloading any poster. "
+        f'Defaults to "{default_poster_cache_directory()}" if the flag is given without a directory.',
+    )
+    parser.add_argument(
+        "--poster_cache_size",
+        type=int,
+        default=512,
+        help="To specify the maximum size of the poster cache (in MiB). The least recently used posters are evicted first. Posters still hardlinked into a library take no extra space, so they aren't counted (nor evicted).",
+    )
+    parser.add_argument(
+        "--thumbnail_workers",
+        type=int,
+        default=None,
+        help="To specify the number of processes generating thumbnails. Defaults to the number of cores.",
+    )
+    parser.add_argument(
+        "--probe_media",
+        action="store_true",
+        default=False,
+        help="Set this flag to probe the main movie file of each title (duration, resolution, codecs and track languages) "
+        "from its container headers, store the results in the title metadata, and use the runtime to classify and match titles.",
+    )
+    parser.add_argument(
+        "--probe_cache",
+        type=str,
+        nargs="?",
+        const=default_probe_cache_filepath(),
+        default=None,
+        help="A cache file of media probes, keyed by file identity and modification time, so unchanged files are never re-probed. "
+        f'Defaults to "{default_probe_cache_filepath()}" if the flag is given without a file.',
+    )
+    parser.add_argument(
+        "--probe_workers_per_device",
+        type=int,
+        default=2,
+        help="To specify the number of movie files probed concurrently on each disk.",
+    )
+    parser.add_argument(
+        "--hash_cache",
+        type=str,
+        nargs="?",
+        const=default_hash_cache_filepath(),
+        default=None,
+        help="A cache file of movie file hashes, keyed by file identity and modification time, so unchanged files are never re-read. "
+        f'Defaults to "{default_hash_cache_filepath()}" if the flag is given without a file.',
+    )
+    parser.add_argument(
+        "--hash_workers_per_device",
+        type=int,
+        default=2,
+        help="To specify the number of movie files hashed concurrently on each disk (files on different disks are hashed in parallel).",
+    )
+    parser.add_argument(
+        "--subtitle_workers",
+        type=int,
+        default=4,
+        help="To specify the number of concurrent subtitle searches and downloads.",
+    )
+    parser.add_argument(
+        "--subtitle_provider",
+        action="append",
+        dest="subtitle_providers",
+        default=None,
+        help="A subtitle provider to search, in order of preference: `subdb`, or `local:<directory>` "
+        "(subtitles stored as `<directory>/<hash>/<language>.srt`). Can be given several times; "
+        "every provider is searched concurrently. Defaults to `subdb`.",
+    )
+    parser.add_argument(
+        "--subtitle_miss_cache",
+        type=str,
+        nargs="?",
+        const=default_subtitle_miss_cache_filepath(),
+        default=None,
+        help="A cache file of the subtitles searched for and not found, so they aren't searched for again until they expire. "
+        f'Defaults to "{default_subtitle_miss_cache_filepath()}" if the flag is given without a file.',
+    )
+    parser.add_argument(
+        "--subtitle_miss_ttl",
+        type=float,
+        default=7,
+        help="To specify the number of days a subtitle that wasn't found is remembered for (see `--subtitle_miss_cache`).",
+    )
+    parser.add_argument(
+        "--download_embedded_subtitles",
+        action="store_true",
+        default=False,
+        help="Set this flag to download subtitles even in the languages a movie file already has an embedded subtitle track in.",
+    )
+    parser.add_argument(
+        "--browse_directory",
+        type=str,
+        default=None,
+        help="A directory to generate browse trees of links to the title folders in (i.e., `by-year/1995/Heat [1995]`), "
+        "derived from the metadata. Only the links added or removed since the last run are touched.",
+    )
+    parser.add_argument(
+        "--browse_view",
+        action="append",
+        dest="browse_views",
+        choices=list(BROWSE_VIEWS),
+        default=None,
+        help="A browse tree to generate in the browse directory. Can be given several times. Defaults to every tree.",
     )
     parser.add_argument(
         "--verbose",
@@ -128,7 +388,15 @@ def parse_args(args):
         "-n",
         type=str,
         default="title_fixer",
-        choices=["title_fixer"],
+        choices=[
+            "title_fixer",
+            "seed_resolution_cache",
+            "compact_metadata",
+            "import_metadata",
+            "export_metadata",
+            "find_duplicates",
+            "generate_browse_views",
+        ],
         help="Choose a stand-alone utility to run",
     )
     return parser.parse_args(args)
@@ -138,6 +406,7 @@ class MovieFileFixer:
     def __init__(
         self,
         directory,
+        target_directory=None,
         file_extensions=[
             ".idx",
             ".sub",
@@ -151,6 +420,30 @@ class MovieFileFixer:
         metadata_filename="metadata.json",
         language="en",
         result_type="movie",
+        fuzzy_scorer="fuzzywuzzy",
+        resolution_cache=None,
+        metadata_fields=None,
+        compact=False,
+        metadata_backend="json",
+        poster_workers=8,
+        refresh_posters=False,
+        poster_size="default",
+        thumbnail_sizes=None,
+        poster_cache=None,
+        poster_cache_size=512,
+        thumbnail_workers=None,
+        probe_media=False,
+        probe_cache=None,
+        probe_workers_per_device=2,
+        hash_cache=None,
+        hash_workers_per_device=2,
+        subtitle_workers=4,
+        subtitle_providers=None,
+        subtitle_miss_cache=None,
+        subtitle_miss_ttl=7,
+        download_embedded_subtitles=False,
+        browse_directory=None,
+        browse_views=None,
         util="title_fixer",
         dry_run=False,
         verbose=False,
@@ -165,17 +458,72 @@ class MovieFileFixer:
             ".txt",
             ".exe",
         ]
-        self._directory = directory
+        # The library is built in the target directory, if any (see `build_view()`):
+        self._source_directory = directory
+        self._directory = target_directory or directory
+        self._target_directory = target_directory
         self._file_extensions = (
             file_extensions if file_extensions else default_file_extensions
         )
         self._metadata_filename = metadata_filename
         self._language = language
         self._result_type = result_type
+        self._fuzzy_scorer = fuzzy_scorer
+        self._resolution_cache = resolution_cache
+        self._metadata_fields = metadata_fields
+        self._compact = compact
+        self._metadata_backend = metadata_backend
+        self._poster_workers = poster_workers
+        self._refresh_posters = refresh_posters
+        self._poster_size = poster_size
+        self._thumbnail_sizes = thumbnail_sizes
+        self._poster_cache = poster_cache
+        self._poster_cache_size = poster_cache_size
+        self._thumbnail_workers = thumbnail_workers
+        self._probe_media = probe_media
+        self._probe_cache = probe_cache
+        self._probe_workers_per_device = probe_workers_per_device
+        self._hash_cache = hash_cache
+        self._hash_workers_per_device = hash_workers_per_device
+        self._subtitle_workers = subtitle_workers
+        self._subtitle_providers = subtitle_providers
+        self._subtitle_miss_cache = subtitle_miss_cache
+        self._subtitle_miss_ttl = subtitle_miss_ttl
+        self._download_embedded_subtitles = download_embedded_subtitles
+        self._browse_directory = browse_directory
+        self._browse_views = browse_views
         self._util = util
         self._dry_run = dry_run
         self._verbose = verbose
 
+    def build_view(self, dry_run=None, verbose=None):
+        """
+
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return list: The names of the source files and folders linked.
+
+        0. Link every new movie file and folder of the source directory into the target directory
+        (see `ViewBuilder`), so every later step works on the links, and never moves or renames the originals.
+        """
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        if self._target_directory is None:
+            raise ValueError("A target directory is required to build a view.")
+
+        view_builder = ViewBuilder(
+            directory=self._source_directory,
+            target_directory=self._target_directory,
+            metadata_filename=self._metadata_filename,
+            dry_run=dry_run,
+            verbose=verbose,
+        )
+        return view_builder.build_view()
+
     def folderize(
         self,
         directory=None,
@@ -252,7 +600,7 @@ class MovieFileFixer:
         """
 
         :param str directory: The directory of movie folders to format.
-        :param str result_type: What type of IMDb object you want returned. Valid Options: [`movie`, `series`, `episode`]
+        :param str result_type: What type of IMDb object you want returned. Valid Options: [`movie`, `series`, `episode`, `auto`]
         :param bool dry_run: Run this function in no-op mode.
         :param bool verbose: Whether to activate verbose mode.
         :return: None
@@ -275,6 +623,16 @@ class MovieFileFixer:
         formatter = Formatter(
             directory=directory,
             result_type=result_type,
+            fuzzy_scorer=self._fuzzy_scorer,
+            resolution_cache_filepath=self._resolution_cache,
+            metadata_fields=self._metadata_fields,
+            compact=self._compact,
+            metadata_backend=self._metadata_backend,
+            probe_media=self._probe_media or self._probe_cache is not None,
+            probe_cache_filepath=self._probe_cache,
+            probe_workers_per_device=self._probe_workers_per_device,
+            hash_cache_filepath=self._hash_cache,
+            hash_workers_per_device=self._hash_workers_per_device,
             dry_run=dry_run,
             verbose=verbose,
         )
@@ -309,11 +667,58 @@ class MovieFileFixer:
         poster_finder = PosterFinder(
             directory=directory,
             metadata_filename=metadata_filename,
+            metadata_backend=self._metadata_backend,
+            max_workers=self._poster_workers,
+            refresh=self._refresh_posters,
+            poster_size=self._poster_size,
+            thumbnail_sizes=self._thumbnail_sizes,
+            poster_cache_directory=self._poster_cache,
+            poster_cache_size=self._poster_cache_size * 1024 * 1024,
             dry_run=dry_run,
             verbose=verbose,
         )
         poster_finder.get_posters()
 
+    def generate_thumbnails(
+        self, directory=None, metadata_filename=None, dry_run=None, verbose=None
+    ):
+        """
+
+        :param str directory: The directory of movie folders to generate poster thumbnails for.
+        :param str metadata_filename: The metadata file to record the thumbnails in.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return: None
+
+        5. Generate the thumbnails (i.e., poster-150w.jpg) of every poster which weren't downloaded along with it,
+        in a pool of worker processes.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        thumbnail_generator = ThumbnailGenerator(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            metadata_backend=self._metadata_backend,
+            widths=[
+                get_thumbnail_width(thumbnail_size=thumbnail_size)
+                for thumbnail_size in self._thumbnail_sizes or []
+            ],
+            max_workers=self._thumbnail_workers,
+            dry_run=dry_run,
+            verbose=verbose,
+        )
+        thumbnail_generator.generate_thumbnails()
+
     def get_subtitles(
         self,
         directory=None,
@@ -326,12 +731,12 @@ class MovieFileFixer:
 
         :param str directory: The directory of movie folders to get subtitles for.
         :param str metadata_filename: The metadata file to get movie paths from.
-        :param str language: The two-character language code for the subtitle language to retrieve.
+        :param str|list language: The two-character language code(s) for the subtitle language(s) to retrieve.
         :param bool dry_run: Run this function in no-op mode.
         :param bool verbose: Whether to activate verbose mode.
         :return: None
 
-        5. Download the movie subtitles and name the file <language>_subtitles.srt
+        6. Download the movie subtitles and name the files <language>_subtitles.srt
         """
         if directory is None:
             directory = self._directory
@@ -352,11 +757,60 @@ class MovieFileFixer:
             directory=directory,
             metadata_filename=metadata_filename,
             language=language,
+            metadata_backend=self._metadata_backend,
+            hash_cache_filepath=self._hash_cache,
+            hash_workers_per_device=self._hash_workers_per_device,
+            max_workers=self._subtitle_workers,
+            providers=self._subtitle_providers,
+            subtitle_miss_cache_filepath=self._subtitle_miss_cache,
+            # The time to live is given in days:
+            subtitle_miss_ttl=self._subtitle_miss_ttl * 24 * 60 * 60,
+            skip_embedded_subtitles=not self._download_embedded_subtitles,
             dry_run=dry_run,
             verbose=verbose,
         )
         subtitle_finder.get_subtitles()
 
+    def generate_browse_views(
+        self, directory=None, metadata_filename=None, dry_run=None, verbose=None
+    ):
+        """
+
+        :param str directory: The directory of title folders to generate browse views of.
+        :param str metadata_filename: The metadata file to get the IMDb objects from.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return dict: The links added and removed (see `BrowseViewGenerator.generate_views()`).
+
+        7. Link every title into browse trees (i.e., by-year/<year>/<title>) in the browse directory,
+        only applying the links added or removed since the last generation.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        if self._browse_directory is None:
+            raise ValueError("A browse directory is required to generate browse views.")
+
+        browse_view_generator = BrowseViewGenerator(
+            directory=directory,
+            browse_directory=self._browse_directory,
+            metadata_filename=metadata_filename,
+            metadata_backend=self._metadata_backend,
+            views=self._browse_views,
+            dry_run=dry_run,
+            verbose=verbose,
+        )
+        return browse_view_generator.generate_views()
+
     def title_fixer(
         self, directory=None, metadata_filename=None, dry_run=None, verbose=None
     ):
@@ -368,8 +822,8 @@ class MovieFileFixer:
         :param bool verbose: Whether to activate verbose mode.
         :return None:
 
-        Given a directory and metadata file, will use the `original_filename` and `imdb_id`
-        to determine the correct title information for the files/folders in the directory.
+        Renames the files/folders in the directory after the title information of their `original_filename`
+        (or content `fingerprint`) and `imdb_id` in the metadata file (see `Formatter.fix_titles()`).
         """
         if directory is None:
             directory = self._directory
@@ -383,65 +837,259 @@ class MovieFileFixer:
         if verbose is None:
             verbose = self._verbose
 
-        formatter = Formatter(directory=directory, verbose=verbose)
+        formatter = Formatter(
+            directory=directory,
+            metadata_fields=self._metadata_fields,
+            compact=self._compact,
+            metadata_backend=self._metadata_backend,
+            hash_cache_filepath=self._hash_cache,
+            hash_workers_per_device=self._hash_workers_per_device,
+            dry_run=dry_run,
+            verbose=verbose,
+        )
+
+        formatter.fix_titles(directory=directory, metadata_filename=metadata_filename)
 
-        metadata = formatter.initialize_metadata_file(
-            directory=directory, metadata_filename=metadata_filename
+    def compact_metadata(
+        self,
+        directory=None,
+        metadata_filename=None,
+        metadata_fields=None,
+        dry_run=None,
+        verbose=None,
+    ):
+        """
+
+        :param str directory: The directory containing the metadata file to compact.
+        :param str metadata_filename: The metadata file to compact.
+        :param list metadata_fields: The IMDb object fields to keep. Keeps every field if not provided.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return tuple: The size of the metadata file (in bytes) before and after compaction.
+
+        Rewrites an existing metadata file with one (projected) IMDb object per `imdbID`, in compact JSON.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if metadata_fields is None:
+            metadata_fields = self._metadata_fields
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        formatter = Formatter(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            metadata_fields=metadata_fields,
+            compact=True,
+            metadata_backend=self._metadata_backend,
+            dry_run=dry_run,
+            verbose=verbose,
         )
+        original_size, compacted_size = formatter.compact_metadata_file()
 
-        all_folders = [
-            folder_name
-            for folder_name in os.listdir(directory)
-            if folder_name != metadata_filename
-        ]
+        print(
+            f'[COMPACTED] [METADATA FILE] "{os.path.join(directory, metadata_filename)}" from {original_size} to {compacted_size} [BYTES]\n'
+        )
+
+        return original_size, compacted_size
+
+    def import_metadata(
+        self, directory=None, metadata_filename=None, dry_run=None, verbose=None
+    ):
+        """
+
+        :param str directory: The directory containing the metadata file to import.
+        :param str metadata_filename: The metadata file (in JSON layout) to import.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return None:
+
+        Replaces the contents of the metadata backend with the contents of the JSON layout metadata file.
+        """
+        if directory is None:
+            directory = self._directory
 
-        titles = metadata.get("titles")
-        while len(all_folders) > 0:
-            for title_index in range(len(titles)):
-                title_data = titles[title_index]
-                # See if the file is in the given directory:
-                original_filename = title_data.get("original_filename")
-                # formatted_title = title_data.get('title')
-
-                # If a file hasn't been formatted OR it has already been formatted, such as
-                if original_filename in all_folders:
-                    # Use the IMDb ID to find the IMDb object metadata:
-                    imdb_id = title_data.get("imdb_id")
-                    imdb_object = formatter.get_imdb_object(
-                        search_query="", imdb_id=imdb_id
-                    )
-                    metadata["metadata"].append(imdb_object)
-
-                    # Gather the important bits of metadata:
-                    title = imdb_object.get("Title")
-                    poster = imdb_object.get("Poster")
-                    release_year = imdb_object.get("Year")
-                    formatted_title = title + " [" + release_year + "]"
-                    # If it is, rename the folder and its contents:
-                    formatter.rename_folder_and_contents(
-                        original_name=original_filename,
-                        new_name=formatted_title,
-                        directory=directory,
-                    )
-                    # mark that folder complete:
-                    all_folders.remove(original_filename)
-                    print(f"{original_filename} removed!")
-                    print(f"All Folders:{all_folders}\n")
-
-                    # set the potentially incorrect or missing metadata:
-                    title_data["title"] = formatted_title
-                    title_data["poster"] = poster
-
-        # Finally, write the updated metadata to the metadata file:
-        metadata_filepath = os.path.join(directory, metadata_filename)
-        with open(metadata_filepath, "w+") as outfile:
-            json.dump(metadata, outfile, indent=4)
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        metadata_backend = get_metadata_backend(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            backend=self._metadata_backend,
+            compact=self._compact,
+            verbose=verbose,
+        )
+        if not dry_run:
+            metadata_backend.import_json()
+            metadata_backend.close()
+
+        print(
+            f'[IMPORTED] [METADATA FILE] "{metadata_backend.metadata_filepath}" into [METADATA BACKEND] "{metadata_backend.storage_filepath}"\n'
+        )
+
+    def export_metadata(
+        self, directory=None, metadata_filename=None, dry_run=None, verbose=None
+    ):
+        """
+
+        :param str directory: The directory containing the metadata to export.
+        :param str metadata_filename: The metadata file (in JSON layout) to export to.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return None:
+
+        Writes the contents of the metadata backend to the JSON layout metadata file.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        metadata_backend = get_metadata_backend(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            backend=self._metadata_backend,
+            compact=self._compact,
+            verbose=verbose,
+        )
+        if not dry_run:
+            metadata_backend.export_json()
+            metadata_backend.close()
+
+        print(
+            f'[EXPORTED] [METADATA BACKEND] "{metadata_backend.storage_filepath}" to [METADATA FILE] "{metadata_backend.metadata_filepath}"\n'
+        )
+
+    def seed_resolution_cache(
+        self,
+        directory=None,
+        metadata_filename=None,
+        metadata_filepaths=None,
+        resolution_cache=None,
+        dry_run=None,
+        verbose=None,
+    ):
+        """
+
+        :param str directory: The directory to search for metadata files, if `metadata_filepaths` isn't provided.
+        :param str metadata_filename: The metadata filename to search for.
+        :param list metadata_filepaths: A list of metadata files to import into the resolution cache.
+        :param str resolution_cache: The resolution cache file to seed.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return int: The number of resolutions imported.
+
+        Bulk-seeds the resolution cache with the `original_filename` -> `imdb_id` pairs of existing metadata files,
+        so releases already resolved in other libraries are never fuzzy searched again.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if resolution_cache is None:
+            resolution_cache = self._resolution_cache
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        if resolution_cache is None:
+            raise ValueError("A resolution cache file is required to seed it.")
+
+        if not metadata_filepaths:
+            metadata_filepaths = [
+                os.path.join(root, metadata_filename)
+                for root, dirs, files in os.walk(directory)
+                if metadata_filename in files
+            ]
+
+        cache = ResolutionCache(filepath=resolution_cache, verbose=verbose)
+        imported = cache.import_metadata_files(metadata_filepaths=metadata_filepaths)
+
+        if not dry_run:
+            cache.export_cache()
+
+        print(
+            f'[SEEDED] [RESOLUTION CACHE] "{resolution_cache}" with {imported} [RESOLUTIONS] from {len(metadata_filepaths)} [METADATA FILES]\n'
+        )
+
+        return imported
+
+    def find_duplicates(
+        self, directory=None, metadata_filename=None, dry_run=None, verbose=None
+    ):
+        """
+
+        :param str directory: The directory to search for duplicate movie files.
+        :param str metadata_filename: The metadata filename.
+        :param bool dry_run: Run this function in no-op mode.
+        :param bool verbose: Whether to activate verbose mode.
+        :return dict: The duplicates found (see `DuplicateFinder.find_duplicates()`).
+
+        Reports the movie files stored more than once (byte for byte, or as several releases of the same title),
+        and the bytes removing the extra copies would reclaim. Nothing is removed.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        if dry_run is None:
+            dry_run = self._dry_run
+
+        if verbose is None:
+            verbose = self._verbose
+
+        duplicate_finder = DuplicateFinder(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            metadata_backend=self._metadata_backend,
+            hash_cache_filepath=self._hash_cache,
+            hash_workers_per_device=self._hash_workers_per_device,
+            dry_run=dry_run,
+            verbose=verbose,
+        )
+        duplicates = duplicate_finder.find_duplicates()
+
+        print(
+            f'[FOUND] {len(duplicates["files"])} [DUPLICATE FILES] ({duplicates["reclaimable_bytes"]} [RECLAIMABLE BYTES]) '
+            f'and {len(duplicates["titles"])} [DUPLICATE TITLES] ({duplicates["reclaimable_title_bytes"]} [RECLAIMABLE BYTES])\n'
+        )
+
+        return duplicates
 
     def run(
         self,
         directory=None,
         metadata_filename=None,
         util=None,
+        metadata_filepaths=None,
         dry_run=None,
         verbose=None,
     ):
@@ -450,6 +1098,7 @@ class MovieFileFixer:
         :param str directory: The directory of movie folders to run the given `util` on.
         :param str metadata_filename: The metadata file to get metadata from.
         :param str util: The name of the utility function to run.
+        :param list metadata_filepaths: A list of metadata files to seed the resolution cache from (`seed_resolution_cache` only).
         :param bool dry_run: Run this function in no-op mode.
         :param bool verbose: Whether to activate verbose mode.
         :return None:
@@ -460,6 +1109,18 @@ class MovieFileFixer:
 
         `title_fixer`: Fixes titles (folders, directories, and subtitles files) based on
         given metadata file `titles.original_filename` and `titles.imdb_id` values.
+
+        `seed_resolution_cache`: Seeds the resolution cache from existing metadata files.
+
+        `compact_metadata`: Rewrites the metadata file with projected, deduplicated IMDb objects in compact JSON.
+
+        `import_metadata`: Imports the JSON layout metadata file into the metadata backend (i.e., `sqlite`).
+
+        `export_metadata`: Exports the metadata backend to the JSON layout metadata file.
+
+        `find_duplicates`: Reports the duplicate movie files and titles, and the bytes removing them would reclaim.
+
+        `generate_browse_views`: Updates the browse trees of the browse directory from the metadata.
         """
         if directory is None:
             directory = self._directory
@@ -483,3 +1144,46 @@ class MovieFileFixer:
                 dry_run=dry_run,
                 verbose=verbose,
             )
+        elif util == "seed_resolution_cache":
+            self.seed_resolution_cache(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                metadata_filepaths=metadata_filepaths,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
+        elif util == "compact_metadata":
+            self.compact_metadata(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
+        elif util == "import_metadata":
+            self.import_metadata(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
+        elif util == "export_metadata":
+            self.export_metadata(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
+        elif util == "find_duplicates":
+            self.find_duplicates(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
+        elif util == "generate_browse_views":
+            self.generate_browse_views(
+                directory=directory,
+                metadata_filename=metadata_filename,
+                dry_run=dry_run,
+                verbose=verbose,
+            )
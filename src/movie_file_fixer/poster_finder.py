@@ -4,22 +4,140 @@
 Description: Reads the "titles" section of the `metadata.json` file and downloads the poster for each title.
 """
 
-import json
+import hashlib
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
+from utils import PosterCache, get_metadata_backend
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/74.0.3729.169 Safari/537.36"
+}
+# The response headers stored in the `titles` entry (i.e., as `poster_etag`), so a refresh can ask whether the poster changed:
+POSTER_VALIDATORS = {
+    "etag": ("ETag", "If-None-Match"),
+    "last_modified": ("Last-Modified", "If-Modified-Since"),
+}
+DOWNLOAD_CHUNK_SIZE = 65536
+# Poster size policies, as a width in pixels (`None` keeps the stored URL, `0` requests the original image):
+POSTER_SIZES = {"default": None, "full": 0, "thumbnail": 150}
+# The size suffix of Amazon image URLs, i.e., "...@._V1_SX300.jpg":
+AMAZON_IMAGE_SIZE_SUFFIX = re.compile(r"(\._V1_)[^/.]*(\.\w+)$")
+
+
+def get_poster_width(poster_size):
+    """
+
+    :param str|int poster_size: A poster size policy or a width in pixels. Valid Options: [`default`, `full`, `thumbnail`, <width>]
+    :return int: The poster width to request (`0` for the original image), or None to keep the stored URL.
+    """
+    if poster_size is None or isinstance(poster_size, int):
+        return poster_size
+
+    if str(poster_size).isdigit():
+        return int(poster_size)
+
+    if poster_size not in POSTER_SIZES:
+        raise ValueError(
+            f'Unknown poster size "{poster_size}". Choose one of the following: {sorted(POSTER_SIZES)} or a width in pixels'
+        )
+
+    return POSTER_SIZES[poster_size]
+
+
+def get_thumbnail_width(thumbnail_size):
+    """
+
+    :param str|int thumbnail_size: A thumbnail size policy or a width in pixels. Valid Options: [`thumbnail`, <width>]
+    :return int: The thumbnail width (in pixels).
+    """
+    width = get_poster_width(poster_size=thumbnail_size)
+    if not width:
+        raise ValueError(
+            f'Unknown thumbnail size "{thumbnail_size}". Choose `thumbnail` or a width in pixels'
+        )
+
+    return width
+
+
+def get_thumbnail_filename(width, poster_filename="poster.jpg"):
+    """
+
+    :param int width: The width of the thumbnail (in pixels).
+    :param str poster_filename: The filename of the poster the thumbnail is a smaller copy of.
+    :return str: The filename of the thumbnail (i.e., `poster-150w.jpg`).
+    """
+    name, extension = os.path.splitext(poster_filename)
+    return f"{name}-{width}w{extension}"
+
+
+def is_resizable_poster_url(poster_url):
+    """
+
+    :param str poster_url: A poster URL, as stored in the `titles` entry.
+    :return bool: Whether the poster can be requested at any width (i.e., Amazon image URLs).
+    """
+    return bool(AMAZON_IMAGE_SIZE_SUFFIX.search(poster_url or ""))
+
+
+def resize_poster_url(poster_url, width=None):
+    """
+
+    :param str poster_url: A poster URL, as stored in the `titles` entry.
+    :param int width: The width to request (`0` for the original image), or None to keep the URL.
+    :return str: The poster URL for the requested width. URLs without an Amazon size suffix are returned unchanged.
+    """
+    if width is None or not is_resizable_poster_url(poster_url=poster_url):
+        return poster_url
+
+    size_suffix = f"SX{width}" if width else ""
+    return AMAZON_IMAGE_SIZE_SUFFIX.sub(rf"\g<1>{size_suffix}\g<2>", poster_url)
+
 
 class PosterFinder:
     def __init__(
         self,
         directory=None,
         metadata_filename="metadata.json",
+        metadata_backend="json",
+        max_workers=8,
+        refresh=False,
+        poster_size="default",
+        thumbnail_sizes=None,
+        poster_cache_directory=None,
+        poster_cache_size=512 * 1024 * 1024,
         dry_run=False,
         verbose=False,
     ):
         self._directory = directory
         self._metadata_filename = metadata_filename
+        self._metadata_backend = metadata_backend
+        self._max_workers = max_workers
+        self._refresh = refresh
+        # Every poster variant to write for each title, as (metadata key prefix, filename, width):
+        self._poster_variants = [
+            ("poster", "poster.jpg", get_poster_width(poster_size))
+        ]
+        # Thumbnails are only downloaded for posters the server can resize (see `ThumbnailGenerator` for the others):
+        self._thumbnail_variants = [
+            (f"poster_{width}w", get_thumbnail_filename(width=width), width)
+            for width in sorted(
+                {
+                    get_thumbnail_width(thumbnail_size=thumbnail_size)
+                    for thumbnail_size in thumbnail_sizes or []
+                }
+            )
+        ]
+        self._poster_cache = None
+        if poster_cache_directory is not None:
+            self._poster_cache = PosterCache(
+                directory=poster_cache_directory,
+                max_size=poster_cache_size,
+                verbose=verbose,
+            )
         self._dry_run = dry_run
         self._verbose = verbose
         self._action_counter = 0
@@ -32,32 +150,184 @@ class PosterFinder:
 
         :param str url: The URL of a file to download.
         :param dict headers: A dictionary containing custom headers. Default only contains the `User-Agent`.
-        :return requests.Response: A `requests.Response` object containing the file being requested.
+        :return requests.Response: A streaming `requests.Response` object containing the file being requested.
         """
         response = None
 
         if headers is None:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/74.0.3729.169 Safari/537.36"
-            }
+            headers = dict(DEFAULT_HEADERS)
 
         if self._verbose:
             print(f'[{self._action_counter}] [DOWNLOADING] [FILE] from [URL] "{url}"\n')
             self._action_counter += 1
 
         if not self._dry_run:
-            response = requests.get(url=url, headers=headers)
+            response = requests.get(url=url, headers=headers, stream=True, timeout=60)
 
         return response
 
-    def get_posters(self, directory=None, metadata_filename=None):
+    def _is_poster_present(
+        self, poster_filepath, title, key_prefix="poster", poster_url=None
+    ):
+        """
+
+        :param str poster_filepath: The path of the title's poster.
+        :param dict title: The `titles` entry of the title.
+        :param str key_prefix: The prefix of the poster variant's values in the `titles` entry.
+        :param str poster_url: The poster URL about to be requested. [optional]
+        :return bool: Whether a complete poster has already been downloaded (it exists, isn't empty, and has the recorded size and URL).
+        """
+        if not os.path.isfile(poster_filepath):
+            return False
+
+        poster_size = os.path.getsize(poster_filepath)
+        if poster_size == 0:
+            return False
+
+        # A different URL means a different poster size was asked for:
+        if poster_url is not None and title.get(f"{key_prefix}_url") not in [
+            None,
+            poster_url,
+        ]:
+            return False
+
+        return title.get(f"{key_prefix}_size") in [None, poster_size]
+
+    def _write_response(self, response, filepath):
+        """
+
+        :param requests.Response response: A streaming response.
+        :param str filepath: The path to write the response body to.
+        :return tuple: The number of bytes written and their SHA-256 hex digest.
+
+        Streams the response body to a temporary file, which is only renamed into place once complete.
+        """
+        temporary_filepath = filepath + ".part"
+        sha256 = hashlib.sha256()
+        try:
+            with open(temporary_filepath, "wb") as outfile:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        outfile.write(chunk)
+                        sha256.update(chunk)
+            os.replace(temporary_filepath, filepath)
+        finally:
+            if os.path.exists(temporary_filepath):
+                os.remove(temporary_filepath)
+
+        return os.path.getsize(filepath), sha256.hexdigest()
+
+    def _fetch_poster(
+        self, title, poster_url, poster_filepath, refresh, key_prefix="poster"
+    ):
+        """
+
+        :param dict title: The `titles` entry of the title.
+        :param str poster_url: The URL of the poster.
+        :param str poster_filepath: The path to write the poster to.
+        :param bool refresh: Whether to revalidate an existing poster with a conditional request.
+        :param str key_prefix: The prefix of the poster variant's values in the `titles` entry.
+        :return dict: The values to store in the `titles` entry (the poster validators, size and hash), or None if nothing was downloaded.
+
+        Unless a refresh is asked for, the poster cache is checked before touching the network.
+        """
+        if self._poster_cache is not None and not refresh and not self._dry_run:
+            content_hash = self._poster_cache.materialize(
+                url=poster_url, destination=poster_filepath
+            )
+            if content_hash is not None:
+                return {
+                    f"{key_prefix}_url": poster_url,
+                    f"{key_prefix}_size": os.path.getsize(poster_filepath),
+                    f"{key_prefix}_sha256": content_hash,
+                }
+
+        if refresh and self._is_poster_present(
+            poster_filepath=poster_filepath,
+            title=title,
+            key_prefix=key_prefix,
+            poster_url=poster_url,
+        ):
+            headers = dict(DEFAULT_HEADERS)
+            for key, (response_header, request_header) in POSTER_VALIDATORS.items():
+                if title.get(f"{key_prefix}_{key}"):
+                    headers[request_header] = title.get(f"{key_prefix}_{key}")
+            response = self._download(url=poster_url, headers=headers)
+        else:
+            response = self._download(url=poster_url)
+
+        if self._dry_run:
+            print("[DRY MODE ACTIVATED, POSTER NOT DOWNLOADED]\n")
+            return None
+
+        try:
+            if response.status_code == 304:
+                if self._verbose:
+                    print(f'[NOT MODIFIED] [POSTER] "{poster_filepath}"\n')
+                return None
+
+            if response.status_code != 200:
+                if self._verbose:
+                    print(
+                        f'[ERROR] [RESPONSE STATUS CODE] "{response.status_code}" for [POSTER URL] "{poster_url}"\n'
+                    )
+                return None
+
+            if self._verbose:
+                print(f'[WRITING FILE] -> "{poster_filepath}"\n')
+
+            poster_size, content_hash = self._write_response(
+                response=response, filepath=poster_filepath
+            )
+            poster_values = {
+                f"{key_prefix}_url": poster_url,
+                f"{key_prefix}_size": poster_size,
+                f"{key_prefix}_sha256": content_hash,
+            }
+            if self._poster_cache is not None:
+                self._poster_cache.add(
+                    url=poster_url, filepath=poster_filepath, content_hash=content_hash
+                )
+            for key, (response_header, request_header) in POSTER_VALIDATORS.items():
+                value = response.headers.get(response_header)
+                if isinstance(value, str):
+                    poster_values[f"{key_prefix}_{key}"] = value
+
+            return poster_values
+        finally:
+            response.close()
+
+    def _try_fetch_poster(self, poster_job):
+        """
+
+        :param dict poster_job: The keyword arguments of `_fetch_poster()`.
+        :return dict: The values to store in the `titles` entry, or None if nothing was downloaded.
+
+        A poster that can't be downloaded or written is reported and skipped (and retried by the next run),
+        so a single failure never discards the posters fetched by the other workers.
+        """
+        try:
+            return self._fetch_poster(**poster_job)
+        except (requests.RequestException, OSError) as error:
+            print(
+                f'[ERROR] [CANNOT FETCH POSTER] "{poster_job["poster_url"]}" for [FILE] "{poster_job["poster_filepath"]}": {error}\n'
+            )
+            return None
+
+    def get_posters(self, directory=None, metadata_filename=None, refresh=None):
         """
 
         :param str directory: The directory containing the metadata file.
         :param str metadata_filename: The metadata filename.
-        :return: None
+        :param bool refresh: Whether to revalidate existing posters (with conditional requests) instead of skipping them.
+        :return int: The number of posters downloaded (or placed from the poster cache).
 
-        Downloads all posters specified in the metadata file `titles` section.
+        Downloads all posters specified in the metadata file `titles` section, using a bounded pool of workers.
+        Every poster variant (i.e., `poster.jpg` and `poster-150w.jpg`) of every title is fetched concurrently, at the width of its size policy.
+        Thumbnails are only fetched for posters the server can resize, the others are generated by the `ThumbnailGenerator`.
+
+        Posters that are already present (and complete) are skipped, so a second run over a fully postered library
+        doesn't download anything. The size, `ETag` and `Last-Modified` of every downloaded poster are stored in its `titles` entry.
         """
         if directory is None:
             directory = self._directory
@@ -65,7 +335,15 @@ class PosterFinder:
         if metadata_filename is None:
             metadata_filename = self._metadata_filename
 
-        full_metadata_filepath = os.path.join(directory, metadata_filename)
+        if refresh is None:
+            refresh = self._refresh
+
+        metadata_backend = get_metadata_backend(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            backend=self._metadata_backend,
+        )
+        full_metadata_filepath = metadata_backend.storage_filepath
 
         if self._verbose:
             print(
@@ -73,47 +351,76 @@ class PosterFinder:
             )
             self._action_counter += 1
 
-        # If the metadata file exists:
-        if os.path.exists(full_metadata_filepath):
-            # Open file for reading:
-            with open(full_metadata_filepath, mode="rb") as infile:
-                # Load existing data into titles index list:
-                metadata_file = json.load(infile)
-
-            # For each title in the metadata file,
-            for title in metadata_file["titles"]:
-                title_path = os.path.join(directory, title["title"])
-                # If the title folder exists
-                if os.path.exists(title_path):
-                    poster_filepath = os.path.join(
-                        directory, title["title"], "poster.jpg"
-                    )
+        # If the metadata file doesn't exist, there's nothing to download:
+        if not metadata_backend.exists():
+            return 0
+
+        poster_jobs = []
+        # For each title in the metadata file,
+        for title in metadata_backend.iter_titles():
+            title_path = os.path.join(directory, title["title"])
+            # If the title folder exists
+            if os.path.exists(title_path):
+                if self._verbose:
+                    print(f'[PROCESSING TITLE] "{title}]"\n')
 
-                    if self._verbose:
-                        print(f'[PROCESSING TITLE] "{title}]"\n')
+                if title["poster"] in ["", None, " ", "N/A"]:
+                    continue
 
-                    poster_url = title["poster"]
+                poster_variants = self._poster_variants
+                if is_resizable_poster_url(poster_url=title["poster"]):
+                    poster_variants = poster_variants + self._thumbnail_variants
 
-                    if poster_url not in ["", None, " ", "N/A"]:
+                for key_prefix, poster_filename, width in poster_variants:
+                    poster_filepath = os.path.join(title_path, poster_filename)
+                    poster_url = resize_poster_url(
+                        poster_url=title["poster"], width=width
+                    )
+                    if not refresh and self._is_poster_present(
+                        poster_filepath=poster_filepath,
+                        title=title,
+                        key_prefix=key_prefix,
+                        poster_url=poster_url,
+                    ):
                         if self._verbose:
-                            print(
-                                f'[{self._action_counter}] [DOWNLOADING] [POSTER URL] {poster_url}"\n'
-                            )
-                            self._action_counter += 1
-
-                        response = self._download(url=poster_url)
-
-                        if not self._dry_run:
-                            if response.status_code == 200:
-                                if self._verbose:
-                                    print("[DOWNLOAD COMPLETE]\n")
-                                    print(
-                                        f'[{self._action_counter}] [WRITING FILE] -> "{poster_filepath}"\n'
-                                    )
-                                    self._action_counter += 1
-
-                                with open(poster_filepath, "wb") as outfile:
-                                    outfile.write(response.content)
-                        else:
-                            print("[DRY MODE ACTIVATED, POSTER NOT DOWNLOADED]\n")
-                            self._action_counter += 1
+                            print(f'[SKIPPING] [EXISTING POSTER] "{poster_filepath}"\n')
+                        continue
+
+                    poster_jobs.append(
+                        {
+                            "title": title,
+                            "poster_url": poster_url,
+                            "poster_filepath": poster_filepath,
+                            "refresh": refresh,
+                            "key_prefix": key_prefix,
+                        }
+                    )
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            poster_values = list(executor.map(self._try_fetch_poster, poster_jobs))
+
+        # Record the poster validators of every downloaded poster in a single batch:
+        updates = {}
+        downloaded = 0
+        for poster_job, values in zip(poster_jobs, poster_values):
+            if values is not None:
+                updates.setdefault(poster_job["title"]["title"], {}).update(values)
+                downloaded += 1
+        if updates:
+            metadata_backend.update_titles(updates=updates)
+        metadata_backend.close()
+
+        if self._poster_cache is not None and not self._dry_run:
+            self._poster_cache.save()
+
+            if self._verbose:
+                print(
+                    f"[POSTER CACHE] {self._poster_cache.hits} [HITS] and {self._poster_cache.misses} [MISSES]\n"
+                )
+
+        if self._verbose:
+            print(
+                f"[DOWNLOADED] {downloaded} of {len(poster_jobs)} [MISSING OR REFRESHED POSTERS]\n"
+            )
+
+        return downloaded
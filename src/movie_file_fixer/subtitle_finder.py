@@ -1,15 +1,67 @@
 # -*- coding: utf-8 -*-
 """
 
-Description: Reads the "metadata.json" file and downloads the subtitle for each title, given a language of preference.
+Description: Reads the "metadata.json" file and downloads the subtitles for each title, given the languages of preference.
 """
 
-import hashlib
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
+from utils import (
+    MOVIE_FILE_EXTENSIONS,
+    HashCache,
+    LocalSubtitleProvider,
+    SubtitleProvider,
+    SubtitleMissCache,
+    SubtitleProviderPool,
+    get_embedded_subtitle_languages,
+    get_metadata_backend,
+    hash_media_file,
+    hash_media_files,
+)
+
+
+def get_languages(language):
+    """
+
+    :param str|list language: A two character language code, a comma-separated string of them, or a list of either.
+    :return list: The language codes, deduplicated, in order.
+    """
+    if isinstance(language, str):
+        language = [language]
+
+    languages = []
+    for language_codes in language:
+        for language_code in language_codes.split(","):
+            language_code = language_code.strip()
+            if language_code and language_code not in languages:
+                languages.append(language_code)
+
+    return languages
+
+
+class SubDbProvider(SubtitleProvider):
+    """Looks subtitles up on SubDB (http://thesubdb.com/), through the requests of a `SubtitleFinder`."""
+
+    name = "subdb"
+
+    def __init__(self, subtitle_finder):
+        """
+
+        :param SubtitleFinder subtitle_finder: The subtitle finder to make the requests with.
+        """
+        self._subtitle_finder = subtitle_finder
+
+    def search(self, hashes):
+        return self._subtitle_finder._get_available_languages(hashcode=hashes["subdb"])
+
+    def download(self, hashes, language):
+        return self._subtitle_finder._get_subtitle_text(
+            language=language, hashcode=hashes["subdb"]
+        )
+
 
 class SubtitleFinder:
     def __init__(
@@ -17,12 +69,37 @@ class SubtitleFinder:
         directory=None,
         metadata_filename="metadata.json",
         language="en",
+        metadata_backend="json",
+        hash_cache_filepath=None,
+        hash_workers_per_device=2,
+        max_workers=4,
+        providers=None,
+        subtitle_miss_cache_filepath=None,
+        subtitle_miss_ttl=None,
+        skip_embedded_subtitles=True,
         dry_run=False,
         verbose=False,
     ):
         self._directory = directory
         self._metadata_filename = metadata_filename
+        self._metadata_backend = metadata_backend
         self._language = language
+        self._hash_workers_per_device = hash_workers_per_device
+        self._max_workers = max_workers
+        # Subtitle providers, in order of preference: `subdb`, `local:<directory>`, or `SubtitleProvider` instances:
+        self._providers = providers or ["subdb"]
+        self._hash_cache = None
+        if hash_cache_filepath is not None:
+            self._hash_cache = HashCache(filepath=hash_cache_filepath, verbose=verbose)
+        # Whether movie files with an embedded subtitle track in a language are skipped for that language:
+        self._skip_embedded_subtitles = skip_embedded_subtitles
+        self._subtitle_miss_cache = None
+        if subtitle_miss_cache_filepath is not None:
+            self._subtitle_miss_cache = SubtitleMissCache(
+                filepath=subtitle_miss_cache_filepath,
+                time_to_live=subtitle_miss_ttl,
+                verbose=verbose,
+            )
         self._dry_run = dry_run
         self._verbose = verbose
         self._action_counter = 0
@@ -42,9 +119,8 @@ class SubtitleFinder:
             print(f'[{self._action_counter}] [PROCESSING FILE] "{filename}"\n')
             self._action_counter += 1
 
-        movie_file_extensions = [".avi", ".mp4", ".mkv", ".mov"]
         filename, extension = os.path.splitext(filename)
-        if extension in movie_file_extensions:
+        if extension.lower() in MOVIE_FILE_EXTENSIONS:
             if self._verbose:
                 print(f'[INFO] "{filename}" [IS A] [MOVIE FILE]\n')
             return True
@@ -81,7 +157,8 @@ class SubtitleFinder:
         and end `size` KB sized chunks.
 
         i.e. If `size=64`, we will take a 64KB chunk from the beginning and end of the file and return
-        the `md5` hash of those chunks.
+        the `md5` hash of those chunks. Files shorter than `size` KB are hashed whole, as both chunks.
+        Files that haven't changed since they were last hashed aren't read at all, if a hash cache is in use.
         """
         if self._verbose:
             print(
@@ -89,13 +166,13 @@ class SubtitleFinder:
             )
             self._action_counter += 1
 
-        readsize = size * 1024
-        with open(filepath, "rb") as f:
-            data = f.read(readsize)
-            f.seek(-readsize, os.SEEK_END)
-            data += f.read(readsize)
-
-        file_hash = hashlib.md5(data).hexdigest()
+        if self._hash_cache is not None:
+            file_hashes = self._hash_cache.hash_file(
+                filepath=filepath, chunk_size=size * 1024
+            )
+        else:
+            file_hashes = hash_media_file(filepath=filepath, chunk_size=size * 1024)
+        file_hash = file_hashes["subdb"]
 
         if self._verbose:
             if self._verbose:
@@ -103,6 +180,89 @@ class SubtitleFinder:
 
         return file_hash
 
+    def _get_hashes(self, filepaths, size=64):
+        """
+
+        :param list filepaths: The paths to the files to be hashed.
+        :param int size: The size (in KB) of the chunks to hash.
+        :return dict: The hashes of every file (the SubDB `md5` hash of the end chunks, see `_get_hash()`,
+        and the OpenSubtitles hash), keyed by file path. Files that can't be read map to None.
+
+        Files are hashed concurrently, with `hash_workers_per_device` readers per device,
+        so a library spread over several disks keeps every disk busy.
+        """
+        if self._verbose:
+            print(
+                f"[{self._action_counter}] [HASHING] {len(filepaths)} [MOVIE FILES]\n"
+            )
+            self._action_counter += 1
+
+        if self._hash_cache is not None:
+            file_hashes = self._hash_cache.hash_files(
+                filepaths=filepaths,
+                chunk_size=size * 1024,
+                max_workers_per_device=self._hash_workers_per_device,
+            )
+        else:
+            file_hashes = hash_media_files(
+                filepaths=filepaths,
+                chunk_size=size * 1024,
+                max_workers_per_device=self._hash_workers_per_device,
+            )
+
+        if self._verbose:
+            for filepath, hashes in file_hashes.items():
+                hashcode = None if hashes is None else hashes["subdb"]
+                print(f'[INFO] "{filepath}": [HASH] "{hashcode}"\n')
+
+        return file_hashes
+
+    def _get_embedded_languages(self, filepath):
+        """
+
+        :param str filepath: The path to a movie file.
+        :return set: The two character language codes of the subtitle tracks embedded in the movie file.
+
+        Only the container headers of Matroska and MP4 files are read (see `probe_media_file()`).
+        Files that can't be probed are treated as having no embedded subtitles.
+        """
+        try:
+            embedded_languages = get_embedded_subtitle_languages(filepath=filepath)
+        except (OSError, ValueError) as error:
+            if self._verbose:
+                print(f'[ERROR] [PROBING] [MOVIE FILE] "{filepath}": {error}\n')
+            return set()
+
+        if self._verbose and embedded_languages:
+            print(
+                f'[INFO] "{filepath}": [EMBEDDED SUBTITLES] {sorted(embedded_languages)}\n'
+            )
+
+        return embedded_languages
+
+    def _get_providers(self):
+        """
+
+        :return list: The subtitle providers, in order of preference.
+        """
+        providers = []
+        for provider in self._providers:
+            if isinstance(provider, SubtitleProvider):
+                providers.append(provider)
+                continue
+
+            name, _, argument = provider.partition(":")
+            if name == "subdb":
+                providers.append(SubDbProvider(subtitle_finder=self))
+            elif name == "local" and argument:
+                providers.append(LocalSubtitleProvider(directory=argument))
+            else:
+                raise ValueError(
+                    f'Unknown subtitle provider "{provider}". Choose one of the following: ["subdb", "local:<directory>"]'
+                )
+
+        return providers
+
     def _download(self, url="http://api.thesubdb.com/", payload=None, headers=None):
         """
 
@@ -171,13 +331,180 @@ class SubtitleFinder:
 
         return response
 
-    def get_subtitles(self, directory=None, metadata_filename=None, language="en"):
+    def _get_available_languages(self, hashcode):
+        """
+
+        :param str hashcode: The `md5` hash of the file to search subtitles for.
+        :return list: The two character language codes the subtitle is available in (none in dry run mode).
+
+        SubDB answers a search for a movie file it has no subtitle for with a 404. Any other error is raised,
+        so it isn't mistaken for the subtitle being missing.
+        """
+        response = self._search_subtitles(hashcode=hashcode)
+        if self._dry_run:
+            return []
+
+        try:
+            if response.status_code == 404:
+                return []
+            if response.status_code != 200:
+                raise OSError(
+                    f'SubDB search for [HASHCODE] "{hashcode}" failed: [RESPONSE STATUS CODE] "{response.status_code}"'
+                )
+
+            return [
+                language.strip()
+                for language in response.text.split(",")
+                if language.strip()
+            ]
+        finally:
+            response.close()
+
+    def _get_subtitle_text(self, language, hashcode):
+        """
+
+        :param str language: The two character language code of the subtitle.
+        :param str hashcode: The `md5` hash of the movie file.
+        :return str: The subtitle downloaded from SubDB, or None if it couldn't be downloaded (or in dry run mode).
+        """
+        response = self._download_subtitles(language=language, hashcode=hashcode)
+        if self._dry_run:
+            return None
+
+        try:
+            if response.status_code != 200:
+                print(
+                    f'[ERROR] [RESPONSE STATUS CODE] "{response.status_code}".\n'
+                    f'[SUBTITLE] for [HASHCODE] "{hashcode}" [MAY NOT EXIST]\n'
+                )
+                return None
+
+            return response.text
+        finally:
+            response.close()
+
+    def _fetch_subtitle(self, provider, language, hashes, subtitle_path):
+        """
+
+        :param SubtitleProvider provider: The provider to download the subtitle from.
+        :param str language: The two character language code of the subtitle.
+        :param dict hashes: The hashes of the movie file.
+        :param str subtitle_path: The path to write the subtitle to.
+        :return bool: Whether the subtitle was written.
+
+        Like failed searches (see `SubtitleProviderPool`), a subtitle that can't be downloaded or written is reported
+        and skipped (and retried by the next run), so it never discards the work of the rest of the run.
+        """
+        if self._verbose:
+            print(
+                f'[ADDING SUBTITLE FILE] "{os.path.basename(subtitle_path)}" from [PROVIDER] "{provider.name}" at [FILEPATH] "{subtitle_path}"\n'
+            )
+
+        if self._dry_run:
+            print("[DRY MODE ACTIVATED, SUBTITLE NOT DOWNLOADED]\n")
+            return False
+
+        try:
+            subtitles = provider.download(hashes=hashes, language=language)
+        except (OSError, ValueError) as error:
+            print(
+                f'[ERROR] [SUBTITLE PROVIDER] "{provider.name}" [DOWNLOAD FAILED] for [FILEPATH] "{subtitle_path}": {error}\n'
+            )
+            return False
+
+        if subtitles is None:
+            return False
+
+        if self._verbose:
+            print("[INFO] [DOWNLOAD COMPLETE]\n")
+            print(
+                f'[WRITING SUBTITLE FILE] "{os.path.basename(subtitle_path)}" at [FILEPATH] "{subtitle_path}"\n'
+            )
+
+        try:
+            with open(subtitle_path, "w+", encoding="UTF-8") as outfile:
+                outfile.writelines(subtitles)
+        except OSError as error:
+            print(
+                f'[ERROR] [CANNOT WRITE] [SUBTITLE FILE] "{subtitle_path}": {error}\n'
+            )
+            # Never leave a partial subtitle behind, it would be mistaken for a complete one by the next run:
+            if os.path.isfile(subtitle_path):
+                os.remove(subtitle_path)
+            return False
+
+        if self._verbose:
+            print("[WRITE COMPLETE]")
+
+        return True
+
+    def _skip_known_misses(self, subtitle_jobs, file_hashes):
+        """
+
+        :param list subtitle_jobs: The movie file paths, and the subtitle path of each language they're missing.
+        :param dict file_hashes: The hashes of every movie file, keyed by file path.
+        :return list: The subtitle jobs, without the languages known to be missing (nor the movie files left with none).
+        """
+        remaining_subtitle_jobs = []
+        for movie_file_path, subtitle_paths in subtitle_jobs:
+            hashes = file_hashes[movie_file_path]
+            if hashes is not None:
+                subtitle_paths = {
+                    subtitle_language: subtitle_path
+                    for subtitle_language, subtitle_path in subtitle_paths.items()
+                    if not self._subtitle_miss_cache.is_missing(
+                        hashcode=hashes["subdb"], language=subtitle_language
+                    )
+                }
+                if not subtitle_paths:
+                    if self._verbose:
+                        print(
+                            f'[INFO] [KNOWN SUBTITLE MISS] "{movie_file_path}". Skipping...\n'
+                        )
+                    continue
+
+            remaining_subtitle_jobs.append((movie_file_path, subtitle_paths))
+
+        return remaining_subtitle_jobs
+
+    def _record_misses(self, hashcode, languages, providers, conclusive):
+        """
+
+        :param str hashcode: The SubDB hash of the movie file.
+        :param list languages: The two character language codes searched for.
+        :param dict providers: The provider of each language found, keyed by language.
+        :param bool conclusive: Whether every provider answered the search (or every language was found).
+        :return None:
+
+        A search some provider failed to answer proves nothing, so its misses aren't recorded.
+        """
+        for subtitle_language in languages:
+            if subtitle_language in providers:
+                self._subtitle_miss_cache.discard(
+                    hashcode=hashcode, language=subtitle_language
+                )
+            elif conclusive:
+                self._subtitle_miss_cache.add(
+                    hashcode=hashcode, language=subtitle_language
+                )
+
+    def get_subtitles(self, directory=None, metadata_filename=None, language=None):
         """
 
         :param str directory: The movie file directory to download subtitles for.
         :param str metadata_filename: The metadata filename.
-        :param str language: The two character language code representing the language to download the subtitle in.
-        :return None:
+        :param str|list language: The two character language code(s) representing the language(s) to download subtitles in
+        (a list, or a comma-separated string, i.e., "en,es,fr").
+        :return int: The number of subtitles written.
+
+        Languages a movie file already carries an embedded subtitle track in are skipped (unless
+        `skip_embedded_subtitles` is False), without hashing the file. Every movie file missing a subtitle in any of
+        the languages is hashed once and searched once, on every provider concurrently (see `SubtitleProviderPool`). The subtitles in every requested language the search found are then
+        downloaded concurrently, and named `<language>_subtitles.srt`.
+
+        If a subtitle miss cache is in use, languages a movie file had no subtitle in when it was last searched
+        (within the time to live) aren't searched for again, and the languages a conclusive search didn't find
+        are recorded as misses.
         """
         if directory is None:
             directory = self._directory
@@ -185,81 +512,152 @@ class SubtitleFinder:
         if metadata_filename is None:
             metadata_filename = self._metadata_filename
 
-        full_filepath = os.path.join(directory, metadata_filename)
-        if os.path.exists(full_filepath):
-            if self._verbose:
-                print(f'[{self._action_counter}] [PROCESSING FILE] "{full_filepath}"\n')
-                self._action_counter += 1
-
-            # Open file for reading:
-            with open(full_filepath, mode="rb") as infile:
-                # Load existing data into titles index list:
-                titles = json.load(infile)
-
-            for title in titles.get("titles", []):
-                title_filename = title.get("title")
-                title_folder_path = os.path.join(directory, title_filename)
-                subtitle_filename = f"{language}_subtitles.srt"
-                subtitle_path = os.path.join(title_folder_path, subtitle_filename)
-                movie_file_paths = self._get_movie_file_paths(
-                    directory=title_folder_path
+        languages = get_languages(language=language or self._language)
+
+        metadata_backend = get_metadata_backend(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            backend=self._metadata_backend,
+        )
+        full_filepath = metadata_backend.storage_filepath
+        if not metadata_backend.exists():
+            return 0
+
+        if self._verbose:
+            print(f'[{self._action_counter}] [PROCESSING FILE] "{full_filepath}"\n')
+            self._action_counter += 1
+
+        subtitle_jobs = []
+        for title in metadata_backend.iter_titles():
+            title_filename = title.get("title")
+            title_folder_path = os.path.join(directory, title_filename)
+            movie_file_paths = self._get_movie_file_paths(directory=title_folder_path)
+
+            for movie_file_path in movie_file_paths:
+                if self._verbose:
+                    print(f'[PROCESSING TITLE] "{title_filename}"\n')
+
+                subtitle_paths = {}
+                for subtitle_language in languages:
+                    subtitle_path = os.path.join(
+                        title_folder_path, f"{subtitle_language}_subtitles.srt"
+                    )
+                    if os.path.exists(subtitle_path):
+                        print(
+                            f'[INFO] Subtitle "{subtitle_language}" already exists. Skipping...\n'
+                        )
+                    else:
+                        subtitle_paths[subtitle_language] = subtitle_path
+
+                if subtitle_paths and self._skip_embedded_subtitles:
+                    embedded_languages = self._get_embedded_languages(
+                        filepath=movie_file_path
+                    )
+                    for subtitle_language in embedded_languages.intersection(
+                        subtitle_paths
+                    ):
+                        print(
+                            f'[INFO] Subtitle "{subtitle_language}" is embedded in the movie file. Skipping...\n'
+                        )
+                        del subtitle_paths[subtitle_language]
+
+                if subtitle_paths:
+                    subtitle_jobs.append((movie_file_path, subtitle_paths))
+
+        # Hash every movie file missing a subtitle up front, reading from all devices at once:
+        file_hashes = self._get_hashes(
+            filepaths=[
+                movie_file_path for movie_file_path, subtitle_paths in subtitle_jobs
+            ]
+        )
+
+        if self._subtitle_miss_cache is not None:
+            subtitle_jobs = self._skip_known_misses(
+                subtitle_jobs=subtitle_jobs, file_hashes=file_hashes
+            )
+
+        provider_pool = SubtitleProviderPool(
+            providers=self._get_providers(),
+            max_workers=self._max_workers,
+            verbose=self._verbose,
+        )
+        try:
+            with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+                # One search per movie file (fanned out to every provider), for every missing language:
+                search_results = executor.map(
+                    lambda subtitle_job: (
+                        ({}, False)
+                        if file_hashes[subtitle_job[0]] is None
+                        else provider_pool.search(
+                            hashes=file_hashes[subtitle_job[0]],
+                            languages=list(subtitle_job[1]),
+                        )
+                    ),
+                    subtitle_jobs,
                 )
 
-                for movie_file_path in movie_file_paths:
-                    if self._verbose:
-                        print(f'[PROCESSING TITLE] "{title_filename}"\n')
-
-                    if not os.path.exists(subtitle_path):
-                        subtitles_available = None
-                        hashcode = self._get_hash(filepath=movie_file_path)
-                        response = self._search_subtitles(hashcode=hashcode)
-                        if not self._dry_run:
-                            if response.status_code == 200:
-                                subtitles_available = response.text
-
-                        if (
-                            subtitles_available not in ["", None, " "]
-                            and language in subtitles_available
-                        ):
+                subtitle_fetches = []
+                # Several movie files in a folder share its subtitles, which go to the first file that has them:
+                claimed_subtitle_paths = set()
+                for (movie_file_path, subtitle_paths), (providers, conclusive) in zip(
+                    subtitle_jobs, search_results
+                ):
+                    if file_hashes[movie_file_path] is None:
+                        print(
+                            f'[ERROR] [UNREADABLE] [MOVIE FILE] "{movie_file_path}"\n'
+                        )
+                        continue
+
+                    if self._subtitle_miss_cache is not None and not self._dry_run:
+                        self._record_misses(
+                            hashcode=file_hashes[movie_file_path]["subdb"],
+                            languages=subtitle_paths,
+                            providers=providers,
+                            conclusive=conclusive,
+                        )
+
+                    for subtitle_language, subtitle_path in subtitle_paths.items():
+                        if subtitle_path in claimed_subtitle_paths:
+                            continue
+                        if subtitle_language not in providers:
                             if self._verbose:
                                 print(
-                                    f'[ADDING SUBTITLE FILE] "{language}_subtitles.srt" at [FILEPATH] "{subtitle_path}"\n'
+                                    f'[ERROR] No Subtitles Available for [LANGUAGE] "{subtitle_language}".\n'
                                 )
-
-                            response = self._download_subtitles(
-                                language=language, hashcode=hashcode
+                            continue
+
+                        claimed_subtitle_paths.add(subtitle_path)
+                        subtitle_fetches.append(
+                            executor.submit(
+                                self._fetch_subtitle,
+                                provider=providers[subtitle_language],
+                                language=subtitle_language,
+                                hashes=file_hashes[movie_file_path],
+                                subtitle_path=subtitle_path,
                             )
+                        )
 
-                            if not self._dry_run:
-                                if response.status_code == 200:
-                                    subtitles = response.text
-
-                                    if self._verbose:
-                                        print("[INFO] [DOWNLOAD COMPLETE]\n")
-                                        print(
-                                            f'[WRITING SUBTITLE FILE] "{language}_subtitles.srt" at [FILEPATH] "{subtitle_path}"\n'
-                                        )
-
-                                    with open(
-                                        subtitle_path, "w+", encoding="UTF-8"
-                                    ) as outfile:
-                                        outfile.writelines(subtitles)
-                                        if self._verbose:
-                                            print("[WRITE COMPLETE]")
-                                else:
-                                    print(
-                                        f'[ERROR] [RESPONSE STATUS CODE] "{response.status_code}".\n'
-                                        f'[SUBTITLE] for [MOVIE FILE] "{movie_file_path}" [MAY NOT EXIST]\n'
-                                    )
-                            else:
-                                print("[DRY MODE ACTIVATED, SUBTITLE NOT DOWNLOADED]\n")
-                                self._action_counter += 1
-                        else:
-                            if self._verbose:
-                                print(
-                                    f'[ERROR] No Subtitles Available for [LANGUAGE] "{language}".\n'
-                                )
-                    else:
-                        print("[INFO] Subtitle already exists. Skipping...\n")
+                written = sum(future.result() for future in subtitle_fetches)
+        finally:
+            provider_pool.close()
+
+        if self._hash_cache is not None and not self._dry_run:
+            self._hash_cache.save()
+
+            if self._verbose:
+                print(
+                    f"[HASH CACHE] {self._hash_cache.hits} [HITS] and {self._hash_cache.misses} [MISSES]\n"
+                )
+
+        if self._subtitle_miss_cache is not None:
+            if not self._dry_run:
+                self._subtitle_miss_cache.save()
+
+            print(
+                f"[SUBTITLE MISS CACHE] {self._subtitle_miss_cache.avoided} [SEARCHES AVOIDED] and "
+                f"{self._subtitle_miss_cache.recorded} [MISSES RECORDED]\n"
+            )
+
+        print("[COMPLETE]")
 
-            print("[COMPLETE]")
+        return written
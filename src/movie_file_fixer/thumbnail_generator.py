@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Reads the "titles" section of the `metadata.json` file and generates thumbnails of each title's poster.
+
+Thumbnails are generated in a pool of worker processes (decoding and resampling images is CPU bound), and are only
+regenerated when the poster's content hash changes. The thumbnail paths are recorded in each title's `titles` entry,
+along with the hash, size and modification time of the poster they were generated from (so a poster is only hashed
+again once it changed on disk, whoever replaced it).
+
+Thumbnails use the same sizes and names as the ones the `PosterFinder` downloads (`poster-<width>w.jpg`, see
+`--thumbnail_size`): the thumbnails of posters the server can resize are downloaded in the same pass as the posters,
+so only the thumbnails of the other posters (or the ones that failed to download) are generated here.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from movie_file_fixer.poster_finder import get_thumbnail_filename
+from utils import get_metadata_backend, hash_file
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+DEFAULT_THUMBNAIL_WIDTHS = [150, 300]
+THUMBNAIL_QUALITY = 85
+
+
+def _generate_thumbnails(poster_filepath, widths, poster_filename="poster.jpg"):
+    """
+
+    :param str poster_filepath: The path of the poster.
+    :param list widths: The widths of the thumbnails to generate (in pixels).
+    :param str poster_filename: The filename of the poster, which the thumbnail filenames are derived from.
+    :return dict: The thumbnail filenames (relative to the title folder), keyed by width.
+
+    Runs in a worker process. The poster is decoded once, at the lowest resolution the JPEG decoder can scale to
+    for the largest thumbnail, and the thumbnails are then resampled from largest to smallest, each from the previous one.
+    Posters are never upscaled.
+    """
+    title_path = os.path.dirname(poster_filepath)
+    thumbnails = {}
+    with Image.open(poster_filepath) as poster:
+        largest_width = max(widths)
+        largest_height = max(
+            1, round(poster.height * largest_width / max(poster.width, 1))
+        )
+        # Lets the JPEG decoder skip most of the work with DCT scaling (ignored by other formats):
+        poster.draft("RGB", (largest_width, largest_height))
+        image = poster.convert("RGB")
+
+    for width in sorted(widths, reverse=True):
+        image.thumbnail((width, image.height), Image.LANCZOS)
+        thumbnail_filename = get_thumbnail_filename(
+            width=width, poster_filename=poster_filename
+        )
+        thumbnail_filepath = os.path.join(title_path, thumbnail_filename)
+        temporary_filepath = thumbnail_filepath + ".part"
+        image.save(
+            temporary_filepath,
+            format="JPEG",
+            quality=THUMBNAIL_QUALITY,
+            optimize=True,
+        )
+        os.replace(temporary_filepath, thumbnail_filepath)
+        thumbnails[str(width)] = thumbnail_filename
+
+    return thumbnails
+
+
+class ThumbnailGenerator:
+    def __init__(
+        self,
+        directory=None,
+        metadata_filename="metadata.json",
+        metadata_backend="json",
+        widths=None,
+        max_workers=None,
+        poster_filename="poster.jpg",
+        dry_run=False,
+        verbose=False,
+    ):
+        self._directory = directory
+        self._metadata_filename = metadata_filename
+        self._metadata_backend = metadata_backend
+        self._widths = sorted(set(widths or DEFAULT_THUMBNAIL_WIDTHS))
+        # Defaults to one worker process per core:
+        self._max_workers = max_workers
+        self._poster_filename = poster_filename
+        self._dry_run = dry_run
+        self._verbose = verbose
+        self._action_counter = 0
+
+        if self._verbose:
+            print("[CURRENT ACTION: GENERATING POSTER THUMBNAILS]\n")
+
+    def _is_thumbnail_current(self, title, title_path, poster_sha256):
+        """
+
+        :param dict title: The `titles` entry of the title.
+        :param str title_path: The title folder.
+        :param str poster_sha256: The content hash of the title's poster.
+        :return bool: Whether every thumbnail was generated from this exact poster, and still exists.
+        """
+        thumbnails = title.get("thumbnails") or {}
+        if title.get("thumbnails_sha256") != poster_sha256:
+            return False
+
+        if sorted(thumbnails) != sorted(str(width) for width in self._widths):
+            return False
+
+        return all(
+            os.path.isfile(os.path.join(title_path, thumbnail_filename))
+            for thumbnail_filename in thumbnails.values()
+        )
+
+    def _get_poster_sha256(self, title, poster_filepath, poster_stat):
+        """
+
+        :param dict title: The `titles` entry of the title.
+        :param str poster_filepath: The path of the title's poster.
+        :param list poster_stat: The size and modification time (in nanoseconds) of the poster.
+        :return str: The content hash of the poster, only read from disk if the poster changed since its thumbnails were generated.
+        """
+        if (
+            title.get("thumbnails_sha256")
+            and title.get("thumbnails_poster_stat") == poster_stat
+        ):
+            return title["thumbnails_sha256"]
+
+        return hash_file(filepath=poster_filepath)
+
+    def _is_thumbnail_downloaded(self, title, title_path, width):
+        """
+
+        :param dict title: The `titles` entry of the title.
+        :param str title_path: The title folder.
+        :param int width: The width of the thumbnail (in pixels).
+        :return bool: Whether the `PosterFinder` downloaded the thumbnail (and it's still the file it wrote).
+        """
+        thumbnail_filepath = os.path.join(
+            title_path,
+            get_thumbnail_filename(width=width, poster_filename=self._poster_filename),
+        )
+        return os.path.isfile(thumbnail_filepath) and title.get(
+            f"poster_{width}w_size"
+        ) == os.path.getsize(thumbnail_filepath)
+
+    def _run_jobs(self, thumbnail_jobs):
+        """
+
+        :param list thumbnail_jobs: The keyword arguments of `_generate_thumbnails()` for every poster.
+        :return list: The thumbnails of every job, in order (None for posters that couldn't be read).
+        """
+        if self._max_workers == 1 or len(thumbnail_jobs) < 2:
+            return [self._run_job(thumbnail_job) for thumbnail_job in thumbnail_jobs]
+
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = [
+                executor.submit(_generate_thumbnails, **thumbnail_job)
+                for thumbnail_job in thumbnail_jobs
+            ]
+            results = []
+            for thumbnail_job, future in zip(thumbnail_jobs, futures):
+                try:
+                    results.append(future.result())
+                except OSError as error:
+                    results.append(self._report_error(thumbnail_job, error))
+
+        return results
+
+    def _run_job(self, thumbnail_job):
+        """
+
+        :param dict thumbnail_job: The keyword arguments of `_generate_thumbnails()`.
+        :return dict: The thumbnails of the poster, or None if it couldn't be read.
+        """
+        try:
+            return _generate_thumbnails(**thumbnail_job)
+        except OSError as error:
+            return self._report_error(thumbnail_job, error)
+
+    def _report_error(self, thumbnail_job, error):
+        """
+
+        :param dict thumbnail_job: The keyword arguments of `_generate_thumbnails()`.
+        :param Exception error: The error raised while generating the thumbnails.
+        :return None:
+        """
+        if self._verbose:
+            print(
+                f'[ERROR] [GENERATING THUMBNAILS] for [POSTER] "{thumbnail_job["poster_filepath"]}": {error}\n'
+            )
+
+        return None
+
+    def generate_thumbnails(self, directory=None, metadata_filename=None):
+        """
+
+        :param str directory: The directory containing the metadata file.
+        :param str metadata_filename: The metadata filename.
+        :return int: The number of posters thumbnails were generated for.
+
+        Generates a thumbnail of every configured width for every downloaded poster, in a pool of worker processes.
+        Titles whose poster content hash matches the one their thumbnails were generated from are skipped, and so are
+        titles whose thumbnails were all downloaded by the `PosterFinder` (which are only recorded).
+        The thumbnail filenames (i.e., `{"150": "poster-150w.jpg"}`) and the poster hash are stored in the `titles` entry.
+        Posters are hashed from disk (never trusted from the metadata), unless their size and modification time match
+        the ones recorded when their thumbnails were generated.
+        """
+        if directory is None:
+            directory = self._directory
+
+        if metadata_filename is None:
+            metadata_filename = self._metadata_filename
+
+        metadata_backend = get_metadata_backend(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            backend=self._metadata_backend,
+        )
+
+        if self._verbose:
+            print(
+                f'[{self._action_counter}] [PROCESSING METADATA] from [FILE] "{metadata_backend.storage_filepath}"\n'
+            )
+            self._action_counter += 1
+
+        # If the metadata file doesn't exist, there are no posters:
+        if not metadata_backend.exists():
+            return 0
+
+        thumbnail_jobs = []
+        poster_hashes = []
+        # The thumbnails downloaded by the `PosterFinder` only need recording:
+        updates = {}
+        for title in metadata_backend.iter_titles():
+            title_path = os.path.join(directory, title["title"])
+            poster_filepath = os.path.join(title_path, self._poster_filename)
+            if not os.path.isfile(poster_filepath):
+                continue
+
+            if all(
+                self._is_thumbnail_downloaded(
+                    title=title, title_path=title_path, width=width
+                )
+                for width in self._widths
+            ):
+                thumbnails = {
+                    str(width): get_thumbnail_filename(
+                        width=width, poster_filename=self._poster_filename
+                    )
+                    for width in self._widths
+                }
+                if title.get("thumbnails") != thumbnails:
+                    updates[title["title"]] = {"thumbnails": thumbnails}
+                elif self._verbose:
+                    print(f'[SKIPPING] [DOWNLOADED THUMBNAILS] "{poster_filepath}"\n')
+                continue
+
+            poster_stat = os.stat(poster_filepath)
+            poster_stat = [poster_stat.st_size, poster_stat.st_mtime_ns]
+            poster_sha256 = self._get_poster_sha256(
+                title=title, poster_filepath=poster_filepath, poster_stat=poster_stat
+            )
+            if self._is_thumbnail_current(
+                title=title, title_path=title_path, poster_sha256=poster_sha256
+            ):
+                # The poster was touched without changing (or its stat was never recorded), so there's no need to hash it again:
+                if title.get("thumbnails_poster_stat") != poster_stat:
+                    updates[title["title"]] = {"thumbnails_poster_stat": poster_stat}
+                if self._verbose:
+                    print(f'[SKIPPING] [UNCHANGED POSTER] "{poster_filepath}"\n')
+                continue
+
+            if self._verbose:
+                print(
+                    f'[{self._action_counter}] [GENERATING THUMBNAILS] {self._widths} for [POSTER] "{poster_filepath}"\n'
+                )
+                self._action_counter += 1
+
+            thumbnail_jobs.append(
+                {
+                    "poster_filepath": poster_filepath,
+                    "widths": self._widths,
+                    "poster_filename": self._poster_filename,
+                }
+            )
+            poster_hashes.append((title["title"], poster_sha256, poster_stat))
+
+        if thumbnail_jobs and Image is None:
+            raise ImportError(
+                "Generating thumbnails requires the `Pillow` package to be installed."
+            )
+
+        if self._dry_run:
+            print("[DRY MODE ACTIVATED, THUMBNAILS NOT GENERATED]\n")
+            return 0
+
+        # Record the thumbnails of every poster in a single batch:
+        generated = 0
+        for (title_name, poster_sha256, poster_stat), thumbnails in zip(
+            poster_hashes, self._run_jobs(thumbnail_jobs=thumbnail_jobs)
+        ):
+            if thumbnails is not None:
+                updates[title_name] = {
+                    "thumbnails": thumbnails,
+                    "thumbnails_sha256": poster_sha256,
+                    "thumbnails_poster_stat": poster_stat,
+                }
+                generated += 1
+        if updates:
+            metadata_backend.update_titles(updates=updates)
+        metadata_backend.close()
+
+        if self._verbose:
+            print(
+                f"[GENERATED THUMBNAILS] for {generated} of {len(thumbnail_jobs)} [NEW OR CHANGED POSTERS]\n"
+            )
+
+        return generated
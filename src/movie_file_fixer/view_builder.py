@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Builds the library in a separate target directory out of links to the original movie files and folders,
+so the originals are never moved or renamed (i.e., while they're still being seeded).
+
+Every file is placed with a hardlink or, across filesystems that support it, a reflink (a copy-on-write clone), so no
+data is ever copied. The rest of the workflow then folderizes, cleans up and renames the links in the target directory.
+A view manifest in the target directory records the source files and folders already linked, so incremental rebuilds
+only link (and format) the new ones.
+"""
+
+import json
+import os
+
+from utils import link_or_copy, metadata_storage_filenames, view_manifest_filename
+
+VIEW_MANIFEST_VERSION = 1
+
+
+class ViewBuilder:
+    def __init__(
+        self,
+        directory,
+        target_directory,
+        metadata_filename="metadata.json",
+        dry_run=False,
+        verbose=False,
+    ):
+        self._directory = directory
+        self._target_directory = target_directory
+        self._metadata_filename = metadata_filename
+        self._dry_run = dry_run
+        self._verbose = verbose
+        self._action_counter = 0
+
+        if self._verbose:
+            print("[CURRENT ACTION: LINKING MOVIE FILES INTO THE TARGET DIRECTORY]\n")
+
+    @property
+    def manifest_filepath(self):
+        """The path of the view manifest, in the target directory."""
+        return os.path.join(
+            self._target_directory, view_manifest_filename(self._metadata_filename)
+        )
+
+    def _load_manifest(self):
+        """
+
+        :return dict: The source files and folders already linked, keyed by name (none if there's no manifest yet).
+        """
+        if not os.path.exists(self.manifest_filepath):
+            return {}
+
+        with open(self.manifest_filepath, encoding="UTF-8") as infile:
+            manifest = json.load(infile)
+
+        if manifest.get("version") != VIEW_MANIFEST_VERSION:
+            return {}
+
+        return manifest.get("sources", {})
+
+    def _save_manifest(self, sources):
+        """
+
+        :param dict sources: The source files and folders linked, keyed by name.
+        :return None:
+
+        The manifest is written to a temporary file first, so an interrupted build never leaves a truncated one behind.
+        """
+        temporary_filepath = f"{self.manifest_filepath}.{os.getpid()}.tmp"
+        with open(temporary_filepath, mode="w", encoding="UTF-8") as outfile:
+            json.dump(
+                {
+                    "version": VIEW_MANIFEST_VERSION,
+                    "directory": os.path.abspath(self._directory),
+                    "sources": sources,
+                },
+                outfile,
+                separators=(",", ":"),
+            )
+        os.replace(temporary_filepath, self.manifest_filepath)
+
+    def _link_file(self, source, destination):
+        """
+
+        :param str source: The file to link.
+        :param str destination: The path to link it at.
+        :return str: How the file was linked. Valid Options: [`hardlink`, `reflink`, `existing`]
+        """
+        if os.path.exists(destination) and os.path.samefile(source, destination):
+            return "existing"
+
+        if self._dry_run:
+            return "hardlink"
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        return link_or_copy(source=source, destination=destination, allow_copy=False)
+
+    def _link_entry(self, name):
+        """
+
+        :param str name: The name of a file or folder in the source directory.
+        :return dict: The number of files linked with each method.
+
+        Folders are linked file by file, keeping their structure.
+        """
+        source_path = os.path.join(self._directory, name)
+        target_path = os.path.join(self._target_directory, name)
+        if os.path.isdir(source_path):
+            filepaths = [
+                os.path.join(root, filename)
+                for root, dirs, files in os.walk(source_path)
+                for filename in sorted(files)
+            ]
+        else:
+            filepaths = [source_path]
+
+        methods = {}
+        for filepath in filepaths:
+            method = self._link_file(
+                source=filepath,
+                destination=(
+                    os.path.join(target_path, os.path.relpath(filepath, source_path))
+                    if filepath != source_path
+                    else target_path
+                ),
+            )
+            methods[method] = methods.get(method, 0) + 1
+
+        return methods
+
+    def build_view(self, directory=None, target_directory=None):
+        """
+
+        :param str directory: The source directory of raw movie files and folders.
+        :param str target_directory: The directory to build the library in.
+        :return list: The names of the source files and folders linked by this build.
+
+        Links every file and folder of the source directory missing from the view manifest into the target directory.
+        Entries that can't be linked without copying (i.e., the target directory is on another filesystem, which
+        doesn't support reflinks) are reported and left out of the manifest, so they're retried by the next build.
+        Titles removed from the source directory are left in the target directory.
+        """
+        if directory is not None:
+            self._directory = directory
+
+        if target_directory is not None:
+            self._target_directory = target_directory
+
+        if os.path.realpath(self._directory) == os.path.realpath(
+            self._target_directory
+        ):
+            raise ValueError(
+                "The target directory must be different from the source directory."
+            )
+
+        if not self._dry_run:
+            os.makedirs(self._target_directory, exist_ok=True)
+
+        sources = self._load_manifest()
+        linked_names = []
+        totals = {}
+        for name in sorted(os.listdir(self._directory)):
+            source_path = os.path.join(self._directory, name)
+            if (
+                name in sources
+                or name in metadata_storage_filenames(self._metadata_filename)
+                or os.path.realpath(source_path)
+                == os.path.realpath(self._target_directory)
+            ):
+                continue
+
+            if self._verbose:
+                print(
+                    f'[{self._action_counter}] [LINKING] "{source_path}" into [TARGET DIRECTORY] "{self._target_directory}"\n'
+                )
+                self._action_counter += 1
+
+            try:
+                methods = self._link_entry(name=name)
+            except OSError as error:
+                print(f'[ERROR] [CANNOT LINK] "{source_path}": {error}\n')
+                continue
+
+            sources[name] = {"files": sum(methods.values())}
+            linked_names.append(name)
+            for method, count in methods.items():
+                totals[method] = totals.get(method, 0) + count
+
+        if linked_names and not self._dry_run:
+            self._save_manifest(sources=sources)
+
+        print(
+            f"[LINKED] {len(linked_names)} [TITLES] ({totals.get('hardlink', 0)} [HARDLINKS] and "
+            f"{totals.get('reflink', 0)} [REFLINKS]) into [TARGET DIRECTORY] \"{self._target_directory}\"\n"
+        )
+
+        return linked_names
@@ -0,0 +1,133 @@
+"""
+
+Microbenchmark comparing the legacy per-call `fuzzywuzzy` matching with the batched `FuzzyMatcher`.
+
+Every trouble title is turned into the three query variants `OmdbService.get_imdb_object()` scores
+(the original query plus two shortened ones) and matched against a candidate pool built from all trouble titles.
+
+Usage (from the repository root):
+
+    python -m src.tests.benchmark_fuzzy_matcher [--repeat 5]
+"""
+
+import argparse
+import json
+import re
+import timeit
+
+from fuzzywuzzy import process as fuzzywuzzy_process
+
+import src.tests.blockbuster as blockbuster
+from utils.fuzzy_matcher import SCORERS, FuzzyMatcher
+
+
+def load_trouble_titles():
+    """
+
+    :return tuple: The candidate pool (as IMDb-like objects) and a list of `(query_variants, expected_imdb_id)` tuples.
+    """
+    with open(blockbuster.TEST_TITLES["r-rated"], "rb") as infile:
+        title_examples = json.load(infile)
+
+    search_list = []
+    queries = []
+    for title_example in title_examples:
+        for example in title_example.get("examples"):
+            title = re.sub(r"\s*\[\d{4}\]$", "", example["title"])
+            search_list.append(
+                {
+                    "Title": title,
+                    "imdbID": example["imdb_id"],
+                    "Type": "movie",
+                    "Poster": "https://m.media-amazon.com/images/M/poster.jpg",
+                }
+            )
+            words = (
+                re.sub(r"[^\w\d'\s]+", " ", example["original_filename"])
+                .lower()
+                .split()
+            )
+            query_variants = [
+                " ".join(words),
+                " ".join(words[:-1]),
+                " ".join(words[:2]),
+            ]
+            queries.append(
+                ([query for query in query_variants if query], example["imdb_id"])
+            )
+
+    return search_list, queries
+
+
+def legacy_match(search_list, queries):
+    """The pre-`FuzzyMatcher` approach: rebuild the pool and score it twice, for every query variant."""
+    for query_variants, expected_imdb_id in queries:
+        for query in query_variants:
+            result_values = {
+                search_item["Title"]: search_item["imdbID"]
+                for search_item in search_list
+                if search_item.get("Poster") != "N/A"
+            }
+            fuzzywuzzy_process.extract(query, result_values.keys())
+            fuzzywuzzy_process.extractOne(query, result_values.keys())
+
+
+def batched_match(search_list, queries, scorer):
+    """Builds the pool once per title and scores every query variant in one batch, returning the number of correct matches."""
+    correct = 0
+    for query_variants, expected_imdb_id in queries:
+        fuzzy_matcher = FuzzyMatcher(search_list=search_list, scorer=scorer)
+        best_matches = fuzzy_matcher.best_matches(search_queries=query_variants)
+        best_title, best_imdb_id, best_score = max(
+            best_matches, key=lambda best_match: best_match[2]
+        )
+        correct += int(best_imdb_id == expected_imdb_id)
+
+    return correct
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fuzzy matcher microbenchmark over the trouble titles fixture."
+    )
+    parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=5,
+        help="Number of timed repetitions per engine.",
+    )
+    args = parser.parse_args()
+
+    search_list, queries = load_trouble_titles()
+    print(
+        f"[BENCHMARK] {len(queries)} titles, {sum(len(query_variants) for query_variants, _ in queries)} query variants, {len(search_list)} candidates\n"
+    )
+
+    legacy_seconds = min(
+        timeit.repeat(
+            lambda: legacy_match(search_list, queries), number=1, repeat=args.repeat
+        )
+    )
+    print(f"[LEGACY] fuzzywuzzy extract + extractOne: {legacy_seconds * 1000:.2f} ms")
+
+    for scorer in SCORERS:
+        try:
+            correct = batched_match(search_list, queries, scorer)
+        except ImportError as error:
+            print(f"[SKIPPED] {scorer}: {error}")
+            continue
+        seconds = min(
+            timeit.repeat(
+                lambda: batched_match(search_list, queries, scorer),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(
+            f"[BATCHED] {scorer}: {seconds * 1000:.2f} ms ({legacy_seconds / seconds:.1f}x), {correct}/{len(queries)} correct"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Blockbuster creates a movie file library test environment.
 
 import json
 import os
+import struct
 
 TEST_FOLDER = os.path.join("src", "tests")
 TEST_INPUT_FOLDER = os.path.join(TEST_FOLDER, "test_input")
@@ -16,6 +17,261 @@ TEST_TITLES = {
 }
 
 
+def _ebml_element(element_id, payload):
+    """
+
+    :param int element_id: The ID of an EBML element.
+    :param bytes payload: The data of the element.
+    :return bytes: The element, with its size as an 8 byte variable-length integer.
+    """
+    return (
+        element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+        + (len(payload) | 1 << 56).to_bytes(8, "big")
+        + payload
+    )
+
+
+def create_matroska_file(
+    filepath,
+    subtitle_languages,
+    audio_languages=("eng",),
+    duration=5400.0,
+    width=1920,
+    height=1080,
+    media_size=65536,
+    tracks_after_media=False,
+):
+    """
+
+    :param str filepath: The path of the file to create.
+    :param list subtitle_languages: The language of each subtitle track: an ISO 639-2 code, an IETF code (with a dash),
+    or None for a track without a language.
+    :param list audio_languages: The language of each audio track (as above).
+    :param float duration: The duration (in seconds).
+    :param int width: The width of the video track.
+    :param int height: The height of the video track.
+    :param int media_size: The size (in bytes) of the media data.
+    :param bool tracks_after_media: Whether to place the tracks after the media data (only indexed by the seek head).
+    :return None:
+
+    Creates a minimal Matroska file: a video track, one audio and subtitle track per language,
+    and a cluster of random data.
+    """
+
+    def track_entry(track_type, codec_id, language=None, video=b""):
+        fields = _ebml_element(0x83, bytes([track_type])) + _ebml_element(
+            0x86, codec_id
+        )
+        if language is not None:
+            fields += _ebml_element(
+                0x22B59D if "-" in language else 0x22B59C, language.encode("ascii")
+            )
+        if video:
+            fields += _ebml_element(0xE0, video)
+        return _ebml_element(0xAE, fields)
+
+    track_entries = [
+        track_entry(
+            track_type=1,
+            codec_id=b"V_MPEG4/ISO/AVC",
+            video=_ebml_element(0xB0, width.to_bytes(2, "big"))
+            + _ebml_element(0xBA, height.to_bytes(2, "big")),
+        )
+    ]
+    for language in audio_languages:
+        track_entries.append(
+            track_entry(track_type=2, codec_id=b"A_AAC", language=language)
+        )
+    for language in subtitle_languages:
+        track_entries.append(
+            track_entry(track_type=17, codec_id=b"S_TEXT/UTF8", language=language)
+        )
+    tracks = _ebml_element(0x1654AE6B, b"".join(track_entries))
+    # The duration is given in milliseconds (the default timestamp scale):
+    info = _ebml_element(
+        0x1549A966,
+        _ebml_element(0x2AD7B1, (1000000).to_bytes(3, "big"))
+        + _ebml_element(0x4489, struct.pack(">d", duration * 1000)),
+    )
+    cluster = _ebml_element(0x1F43B675, os.urandom(media_size))
+
+    def seek_head(tracks_position):
+        return _ebml_element(
+            0x114D9B74,
+            _ebml_element(
+                0x4DBB,
+                _ebml_element(0x53AB, (0x1654AE6B).to_bytes(4, "big"))
+                + _ebml_element(0x53AC, tracks_position.to_bytes(8, "big")),
+            ),
+        )
+
+    # The seek head has a fixed size, so the position of the tracks can be computed up front:
+    header = len(seek_head(tracks_position=0)) + len(info)
+    if tracks_after_media:
+        segment = seek_head(header + len(cluster)) + info + cluster + tracks
+    else:
+        segment = seek_head(header) + info + tracks + cluster
+
+    with open(filepath, "wb") as outfile:
+        outfile.write(_ebml_element(0x1A45DFA3, _ebml_element(0x4282, b"matroska")))
+        outfile.write(_ebml_element(0x18538067, segment))
+
+
+def _mp4_box(box_type, payload):
+    """
+
+    :param bytes box_type: The four character type of an MP4 box.
+    :param bytes payload: The payload of the box.
+    :return bytes: The box.
+    """
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def create_mp4_file(
+    filepath,
+    subtitle_languages,
+    audio_languages=("eng",),
+    duration=5400.0,
+    width=1920,
+    height=1080,
+    media_size=65536,
+    moov_after_media=False,
+):
+    """
+
+    :param str filepath: The path of the file to create.
+    :param list subtitle_languages: The language of each subtitle track: an ISO 639-2 code, or an IETF code (with a dash).
+    :param list audio_languages: The language of each audio track (as above).
+    :param float duration: The duration (in seconds).
+    :param int width: The width of the video track.
+    :param int height: The height of the video track.
+    :param int media_size: The size (in bytes) of the media data.
+    :param bool moov_after_media: Whether to place the movie box after the media data (as files not optimized for streaming do).
+    :return None:
+
+    Creates a minimal MP4 file: a video track, one audio and subtitle track per language, and random media data.
+    """
+
+    def track(handler, codec, language="und"):
+        packed_language = 0
+        for character in "und" if "-" in language else language:
+            packed_language = packed_language << 5 | ord(character) - 0x60
+        tkhd = bytes(76)
+        if handler == b"vide":
+            tkhd += struct.pack(">II", width << 16, height << 16)
+        else:
+            tkhd += bytes(8)
+        mdia = _mp4_box(b"mdhd", bytes(20) + struct.pack(">HH", packed_language, 0))
+        mdia += _mp4_box(b"hdlr", bytes(8) + handler + bytes(13))
+        if "-" in language:
+            mdia += _mp4_box(b"elng", bytes(4) + language.encode("ascii") + b"\0")
+        # The sample tables, which the probe shouldn't read (but for the sample description):
+        stsd = _mp4_box(
+            b"stsd", bytes(4) + struct.pack(">I", 1) + _mp4_box(codec, bytes(8))
+        )
+        stbl = _mp4_box(b"stbl", stsd + _mp4_box(b"stsz", os.urandom(4096)))
+        mdia += _mp4_box(b"minf", stbl)
+        return _mp4_box(b"trak", _mp4_box(b"tkhd", tkhd) + _mp4_box(b"mdia", mdia))
+
+    # The duration is given in milliseconds (a timescale of 1000):
+    mvhd = bytes(12) + struct.pack(">II", 1000, int(duration * 1000)) + bytes(80)
+    moov = _mp4_box(
+        b"moov",
+        _mp4_box(b"mvhd", mvhd)
+        + track(handler=b"vide", codec=b"avc1")
+        + b"".join(
+            track(handler=b"soun", codec=b"mp4a", language=language)
+            for language in audio_languages
+        )
+        + b"".join(
+            track(handler=b"sbtl", codec=b"tx3g", language=language)
+            for language in subtitle_languages
+        ),
+    )
+    mdat = _mp4_box(b"mdat", os.urandom(media_size))
+
+    with open(filepath, "wb") as outfile:
+        outfile.write(_mp4_box(b"ftyp", b"isom" + bytes(4) + b"isommp42"))
+        outfile.write(mdat + moov if moov_after_media else moov + mdat)
+
+
+def _riff_chunk(chunk_id, payload, list_type=None):
+    """
+
+    :param bytes chunk_id: The four character ID of a RIFF chunk.
+    :param bytes payload: The data of the chunk.
+    :param bytes list_type: The four character type of the list, if the chunk is a list.
+    :return bytes: The chunk, padded to an even size.
+    """
+    if list_type is not None:
+        payload = list_type + payload
+    return (
+        struct.pack("<4sI", chunk_id, len(payload)) + payload + bytes(len(payload) % 2)
+    )
+
+
+def create_avi_file(
+    filepath, duration=5400.0, width=720, height=480, audio_streams=1, media_size=65536
+):
+    """
+
+    :param str filepath: The path of the file to create.
+    :param float duration: The duration (in seconds).
+    :param int width: The width of the video stream.
+    :param int height: The height of the video stream.
+    :param int audio_streams: The number of (MP3) audio streams.
+    :param int media_size: The size (in bytes) of the media data.
+    :return None:
+
+    Creates a minimal AVI file: an XviD video stream at 25 frames per second, the audio streams, and random media data.
+    """
+    total_frames = int(duration * 25)
+    avih = struct.pack(
+        "<IIIIIIIIII",
+        40000,
+        0,
+        0,
+        0,
+        total_frames,
+        0,
+        1 + audio_streams,
+        0,
+        width,
+        height,
+    ) + bytes(16)
+    video_strh = (
+        b"vids"
+        + b"XVID"
+        + bytes(12)
+        + struct.pack("<IIII", 1, 25, 0, total_frames)
+        + bytes(20)
+    )
+    video_strf = struct.pack("<IiiHH4s", 40, width, height, 1, 24, b"XVID") + bytes(20)
+    streams = _riff_chunk(
+        b"LIST",
+        _riff_chunk(b"strh", video_strh) + _riff_chunk(b"strf", video_strf),
+        list_type=b"strl",
+    )
+    for _ in range(audio_streams):
+        audio_strh = (
+            b"auds"
+            + bytes(16)
+            + struct.pack("<IIII", 1, 44100, 0, int(duration * 44100))
+            + bytes(20)
+        )
+        streams += _riff_chunk(
+            b"LIST",
+            _riff_chunk(b"strh", audio_strh)
+            + _riff_chunk(b"strf", struct.pack("<H", 0x55) + bytes(16)),
+            list_type=b"strl",
+        )
+    hdrl = _riff_chunk(b"LIST", _riff_chunk(b"avih", avih) + streams, list_type=b"hdrl")
+    movi = _riff_chunk(b"LIST", os.urandom(media_size), list_type=b"movi")
+
+    with open(filepath, "wb") as outfile:
+        outfile.write(_riff_chunk(b"RIFF", hdrl + movi, list_type=b"AVI "))
+
+
 class BlockBusterBuilder:
     """
 
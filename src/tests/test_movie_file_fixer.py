@@ -3,10 +3,11 @@ import os
 import random
 import shutil
 import sys
-from unittest import TestCase, mock, skip
+from unittest import TestCase, mock, skip, skipIf
 from unittest.mock import patch
 
 import faker
+import requests
 
 import movie_file_fixer
 import src.tests.blockbuster as blockbuster
@@ -726,6 +727,62 @@ class FormatterTestCase(TestCase):
         for content_key in content_keys:
             self.assertNotEqual(metadata.get(content_key), fake_data)
 
+    def test_write_metadata_deduplicates_imdb_objects(self):
+        """Ensure `_write_metadata()` keeps only the latest copy of an IMDb object in the `metadata` section."""
+        fake_imdb_id = fake.word()
+        self.formatter.initialize_metadata_file()
+        self.formatter._write_metadata(
+            new_content={"imdbID": fake_imdb_id, "Plot": fake.sentence()},
+            content_key="metadata",
+        )
+        self.formatter._write_metadata(
+            new_content={"imdbID": fake.word() + "2", "Plot": fake.sentence()},
+            content_key="metadata",
+        )
+        latest_imdb_object = {"imdbID": fake_imdb_id, "Plot": fake.sentence()}
+        self.formatter._write_metadata(
+            new_content=latest_imdb_object, content_key="metadata"
+        )
+
+        metadata = self.formatter.initialize_metadata_file()
+        self.assertEqual(len(metadata.get("metadata")), 2)
+        self.assertEqual(metadata.get("metadata")[0], latest_imdb_object)
+
+    def test_compact_metadata_file(self):
+        """Ensure `compact_metadata_file()` projects and deduplicates IMDb objects and shrinks the metadata file."""
+        fake_imdb_objects = [
+            {
+                "Title": fake.sentence(),
+                "Year": fake.year(),
+                "Plot": fake.paragraph(nb_sentences=10),
+                "Awards": fake.sentence(),
+                "imdbID": f"tt{iteration % 3}",
+            }
+            for iteration in range(9)
+        ]
+        self.formatter._save_metadata_file(
+            metadata={"titles": [], "metadata": fake_imdb_objects, "errors": []}
+        )
+
+        (
+            original_size,
+            compacted_size,
+        ) = self.formatter.compact_metadata_file(metadata_fields=["Title", "Year"])
+
+        self.assertLess(compacted_size, original_size)
+        metadata = self.formatter.initialize_metadata_file()
+        self.assertEqual(
+            metadata.get("metadata"),
+            [
+                {
+                    "Title": fake_imdb_object["Title"],
+                    "Year": fake_imdb_object["Year"],
+                    "imdbID": fake_imdb_object["imdbID"],
+                }
+                for fake_imdb_object in fake_imdb_objects[-3:]
+            ],
+        )
+
     @patch(f"{module_under_test}.Formatter._write_metadata")
     def test_write_all_metadata(self, write_metadata_method_patch):
         """Ensure all metadata gets written as expected."""
@@ -1046,6 +1103,48 @@ class FormatterTestCase(TestCase):
                 self.assertEqual(test_title, title)
                 self.assertEqual(test_release_year, release_year)
 
+    @patch(f"{module_under_test}.formatter.OmdbService.search_by_imdb_id")
+    @patch(f"{module_under_test}.formatter.OmdbService.search_by_search_terms")
+    @patch(f"{module_under_test}.formatter.OmdbService.search_by_title")
+    def test_get_imdb_object_by_runtime(
+        self,
+        search_by_title_method_patch,
+        search_by_search_terms_method_patch,
+        search_by_imdb_id_method_patch,
+    ):
+        """Ensure namesakes (e.g. remakes) are told apart by the runtime of the movie file."""
+        imdb_objects = {
+            "tt0084787": {"Title": "The Thing", "Type": "movie", "Runtime": "109 min"},
+            "tt0905372": {"Title": "The Thing", "Type": "movie", "Runtime": "103 min"},
+            "tt0044121": {"Title": "The Thing", "Type": "movie", "Runtime": "87 min"},
+        }
+        for imdb_id, imdb_object in imdb_objects.items():
+            imdb_object.update({"imdbID": imdb_id, "Response": "True"})
+
+        search_by_title_method_patch.return_value = {"Response": "False"}
+        search_by_search_terms_method_patch.return_value = {
+            "Response": "True",
+            "Search": [
+                {key: value for key, value in imdb_object.items() if key != "Runtime"}
+                for imdb_object in imdb_objects.values()
+            ],
+        }
+        search_by_imdb_id_method_patch.side_effect = lambda imdb_id: imdb_objects[
+            imdb_id
+        ]
+
+        test_imdb_object = self.omdb_service.get_imdb_object(
+            search_query="the thing", runtime_minutes=88.5
+        )
+        self.assertEqual(test_imdb_object.get("imdbID"), "tt0044121")
+        # Every namesake was looked up once, and the closest one wasn't looked up again:
+        self.assertEqual(search_by_imdb_id_method_patch.call_count, 3)
+
+        # Without a runtime, the best fuzzy match is looked up right away:
+        search_by_imdb_id_method_patch.reset_mock()
+        self.omdb_service.get_imdb_object(search_query="the thing")
+        search_by_imdb_id_method_patch.assert_called_once()
+
     # TODO: Fix this failing test
     # def test_format_creates_correct_files_and_folders(self):
     #     """Ensure formatting happens as expected, given a directory of poorly formatted title folders with files."""
@@ -1126,6 +1225,395 @@ class FormatterTestCase(TestCase):
     #             self.assertEqual(test_release_year, release_year)
     #             self.assertEqual(test_imdb_id, imdb_id)
 
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_format_checks_resolution_cache_before_searching(
+        self, get_imdb_object_method_patch
+    ):
+        """Ensure `format()` resolves a cached release by IMDb ID alone, without a fuzzy search."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        release_name = "The.Matrix.1999.1080p.BluRay.x264-GROUP"
+        os.makedirs(os.path.join(special_test_folder, release_name))
+        resolution_cache_filepath = os.path.join(self.test_folder, "resolutions.json")
+        resolution_cache = utils.ResolutionCache()
+        resolution_cache.add(release_name=release_name, imdb_id="tt0133093")
+        resolution_cache.export_cache(filepath=resolution_cache_filepath)
+
+        get_imdb_object_method_patch.return_value = {
+            "Response": "True",
+            "Title": "The Matrix",
+            "Year": "1999",
+            "imdbID": "tt0133093",
+            "Poster": "N/A",
+        }
+        formatter = movie_file_fixer.Formatter(
+            directory=special_test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            resolution_cache_filepath=resolution_cache_filepath,
+            verbose=True,
+        )
+        formatter.format()
+
+        get_imdb_object_method_patch.assert_called_once_with(
+            search_query="", imdb_id="tt0133093"
+        )
+        self.assertTrue(
+            os.path.isdir(os.path.join(special_test_folder, "The Matrix [1999]"))
+        )
+
+    def test_parse_episode(self):
+        """Ensure `S01E02` and `1x02` style episode markers are detected and non-episodes are ignored."""
+        self.assertEqual(
+            self.formatter._parse_episode(filename="Breaking.Bad.S01E02.720p.mkv"),
+            ("breaking bad", 1, 2),
+        )
+        self.assertEqual(
+            self.formatter._parse_episode(filename="the_office_us_2x13_hdtv.avi"),
+            ("the office us", 2, 13),
+        )
+        self.assertIsNone(
+            self.formatter._parse_episode(filename="The.Matrix.1999.1920x1080.mkv")
+        )
+
+    @patch(f"{module_under_test}.formatter.OmdbService._search")
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_format_series_fetches_each_season_once(
+        self, get_imdb_object_method_patch, search_method_patch
+    ):
+        """Ensure `format()` resolves a show once and fetches one episode list per season, not per episode."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        os.makedirs(special_test_folder)
+        episode_filenames = [
+            "Breaking.Bad.S01E01.720p.HDTV.x264.mkv",
+            "Breaking.Bad.S01E02.720p.HDTV.x264.mkv",
+            "Breaking.Bad.S01E02.720p.HDTV.x264.srt",
+            "Breaking.Bad.S02E01.720p.HDTV.x264.mkv",
+        ]
+        for episode_filename in episode_filenames:
+            folder_name, extension = os.path.splitext(episode_filename)
+            os.makedirs(os.path.join(special_test_folder, folder_name), exist_ok=True)
+            open(
+                os.path.join(special_test_folder, folder_name, episode_filename), "a"
+            ).close()
+        # Episodes without a show name inside a show folder:
+        os.makedirs(os.path.join(special_test_folder, "Breaking Bad Season 2"))
+        open(
+            os.path.join(special_test_folder, "Breaking Bad Season 2", "S02E02.mkv"),
+            "a",
+        ).close()
+
+        get_imdb_object_method_patch.return_value = {
+            "Response": "True",
+            "Title": "Breaking Bad",
+            "Year": "2008-2013",
+            "imdbID": "tt0903747",
+            "Type": "series",
+            "Poster": "N/A",
+        }
+        search_method_patch.side_effect = lambda imdb_id, season: {
+            "Response": "True",
+            "Season": str(season),
+            "Episodes": [
+                {
+                    "Title": f"Episode {season}.{episode}",
+                    "Episode": str(episode),
+                    "imdbID": fake.word(),
+                }
+                for episode in range(1, 8)
+            ],
+        }
+
+        self.formatter.format(directory=special_test_folder, result_type="series")
+
+        get_imdb_object_method_patch.assert_called_once()
+        self.assertEqual(search_method_patch.call_count, 2)
+
+        show_folder = os.path.join(special_test_folder, "Breaking Bad [2008-2013]")
+        self.assertEqual(
+            sorted(os.listdir(special_test_folder)),
+            sorted([blockbuster.METADATA_FILENAME, "Breaking Bad [2008-2013]"]),
+        )
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(show_folder, "Season 01"))),
+            [
+                "Breaking Bad - S01E01 - Episode 1.1.mkv",
+                "Breaking Bad - S01E02 - Episode 1.2.mkv",
+                "Breaking Bad - S01E02 - Episode 1.2.srt",
+            ],
+        )
+        self.assertEqual(len(os.listdir(os.path.join(show_folder, "Season 02"))), 2)
+
+        metadata = self.formatter.initialize_metadata_file(
+            directory=special_test_folder
+        )
+        (series_title,) = metadata.get("titles")
+        self.assertEqual(series_title.get("type"), "series")
+        self.assertEqual(len(series_title.get("episodes")), 5)
+        self.assertEqual(metadata.get("errors"), [])
+
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_format_with_automatic_type_detection(self, get_imdb_object_method_patch):
+        """Ensure `format()` searches every title with its own detected `result_type` when `result_type` is `auto`."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        for folder_name, filename in [
+            ("Planet.Earth.Season.1.1080p", "Planet.Earth.01.mkv"),
+            ("Planet.Earth.Season.1.1080p", "Planet.Earth.02.mkv"),
+            ("The.Matrix.1999.1080p", "The.Matrix.1999.1080p.mkv"),
+        ]:
+            os.makedirs(os.path.join(special_test_folder, folder_name), exist_ok=True)
+            open(os.path.join(special_test_folder, folder_name, filename), "a").close()
+
+        def get_imdb_object(search_query, release_year, result_type):
+            title = "Planet Earth" if result_type == "series" else "The Matrix"
+            return {
+                "Title": title,
+                "Year": "1999",
+                "imdbID": fake.word(),
+                "Poster": "N/A",
+            }
+
+        get_imdb_object_method_patch.side_effect = get_imdb_object
+
+        self.formatter.format(directory=special_test_folder, result_type="auto")
+
+        get_imdb_object_method_patch.assert_any_call(
+            search_query="planet earth season 1 1080p",
+            release_year=None,
+            result_type="series",
+        )
+        get_imdb_object_method_patch.assert_any_call(
+            search_query="the matrix", release_year="1999", result_type="movie"
+        )
+        # A `movie` search for "planet earth season 1 1080p" would have wasted two requests per word:
+        self.assertEqual(self.formatter._omdb_calls_saved, 10)
+
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_format_with_automatic_type_detection_falls_back_to_movie(
+        self, get_imdb_object_method_patch
+    ):
+        """Ensure `format()` searches a title as a `movie` when it was (wrongly) classified as a `series` and isn't found."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        os.makedirs(os.path.join(special_test_folder, "Band.of.Brothers.S01"))
+
+        def get_imdb_object(search_query, release_year, result_type):
+            if result_type != "movie":
+                return None
+            return {
+                "Title": "Band of Brothers",
+                "Year": "2001",
+                "imdbID": fake.word(),
+                "Poster": "N/A",
+            }
+
+        get_imdb_object_method_patch.side_effect = get_imdb_object
+
+        self.formatter.format(directory=special_test_folder, result_type="auto")
+
+        get_imdb_object_method_patch.assert_any_call(
+            search_query="band of brothers s01", release_year=None, result_type="series"
+        )
+        get_imdb_object_method_patch.assert_any_call(
+            search_query="band of brothers s01", release_year=None, result_type="movie"
+        )
+        self.assertTrue(
+            os.path.isdir(os.path.join(special_test_folder, "Band of Brothers [2001]"))
+        )
+        metadata = self.formatter.initialize_metadata_file(
+            directory=special_test_folder
+        )
+        self.assertEqual(metadata.get("errors"), [])
+        # The `movie` search was needed after all, so no requests were saved:
+        self.assertEqual(self.formatter._omdb_calls_saved, 0)
+
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_format_with_media_probes(self, get_imdb_object_method_patch):
+        """Ensure `format()` classifies titles by runtime, and stores their media probes, when `probe_media` is set."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        for folder_name in ["Cosmos", "Heat.1995"]:
+            os.makedirs(os.path.join(special_test_folder, folder_name))
+        blockbuster.create_matroska_file(
+            filepath=os.path.join(special_test_folder, "Cosmos", "Cosmos.mkv"),
+            subtitle_languages=[],
+            duration=30 * 60.0,
+        )
+        blockbuster.create_mp4_file(
+            filepath=os.path.join(special_test_folder, "Heat.1995", "Heat.1995.mp4"),
+            subtitle_languages=[],
+            duration=170 * 60.0,
+        )
+
+        def get_imdb_object(search_query, release_year, result_type, runtime_minutes):
+            return {
+                "Title": search_query.title(),
+                "Year": release_year or "1980",
+                "imdbID": fake.word(),
+                "Poster": "N/A",
+            }
+
+        get_imdb_object_method_patch.side_effect = get_imdb_object
+
+        formatter = movie_file_fixer.Formatter(
+            directory=special_test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+            probe_media=True,
+            probe_cache_filepath=os.path.join(self.test_folder, "probes.json"),
+        )
+        formatter.format(directory=special_test_folder, result_type="auto")
+
+        get_imdb_object_method_patch.assert_any_call(
+            search_query="cosmos",
+            release_year=None,
+            result_type="series",
+            runtime_minutes=30.0,
+        )
+        get_imdb_object_method_patch.assert_any_call(
+            search_query="heat",
+            release_year="1995",
+            result_type="movie",
+            runtime_minutes=170.0,
+        )
+
+        metadata = formatter.initialize_metadata_file(directory=special_test_folder)
+        media_probes = {
+            title.get("original_filename"): title.get("media")
+            for title in metadata.get("titles")
+        }
+        self.assertEqual(media_probes["Cosmos"]["container"], "matroska")
+        self.assertEqual(media_probes["Heat.1995"]["container"], "mp4")
+        self.assertEqual(media_probes["Heat.1995"]["width"], 1920)
+        self.assertTrue(os.path.exists(os.path.join(self.test_folder, "probes.json")))
+
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_format_reassociates_renamed_titles(self, get_imdb_object_method_patch):
+        """Ensure a formatted title folder renamed by hand keeps its metadata, by fingerprint, without searching again."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        os.makedirs(os.path.join(special_test_folder, "Heat.1995.1080p"))
+        with open(
+            os.path.join(special_test_folder, "Heat.1995.1080p", "heat.mkv"), "wb"
+        ) as outfile:
+            outfile.write(os.urandom(4096))
+        get_imdb_object_method_patch.return_value = {
+            "Title": "Heat",
+            "Year": "1995",
+            "imdbID": "tt0113277",
+            "Poster": "N/A",
+        }
+
+        formatter = movie_file_fixer.Formatter(
+            directory=special_test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+        )
+        formatter.format()
+
+        (title,) = formatter.initialize_metadata_file().get("titles")
+        self.assertEqual(title.get("title"), "Heat [1995]")
+        fingerprint = utils.get_content_fingerprint(
+            hashes=utils.hash_media_file(
+                filepath=os.path.join(
+                    special_test_folder, "Heat [1995]", "Heat [1995].mkv"
+                )
+            )
+        )
+        self.assertEqual(title.get("fingerprint"), fingerprint)
+
+        os.rename(
+            os.path.join(special_test_folder, "Heat [1995]"),
+            os.path.join(special_test_folder, "Heat (Director's Cut)"),
+        )
+        get_imdb_object_method_patch.reset_mock()
+        formatter.format()
+
+        get_imdb_object_method_patch.assert_not_called()
+        (title,) = formatter.initialize_metadata_file().get("titles")
+        self.assertEqual(title.get("title"), "Heat (Director's Cut)")
+        self.assertEqual(title.get("imdb_id"), "tt0113277")
+        self.assertEqual(title.get("fingerprint"), fingerprint)
+
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_title_fixer_matches_renamed_folders_by_fingerprint(
+        self, get_imdb_object_method_patch
+    ):
+        """Ensure `title_fixer()` fixes the folders matching no `original_filename` by their content fingerprint."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        os.makedirs(os.path.join(special_test_folder, "heat renamed"))
+        movie_file_path = os.path.join(special_test_folder, "heat renamed", "heat.mkv")
+        with open(movie_file_path, "wb") as outfile:
+            outfile.write(os.urandom(4096))
+        formatter = movie_file_fixer.Formatter(
+            directory=special_test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+        )
+        formatter._save_metadata_file(
+            metadata={
+                "titles": [
+                    {
+                        "original_filename": "Heat.1995.1080p",
+                        "title": "Heat [1995]",
+                        "imdb_id": "tt0113277",
+                        "fingerprint": utils.get_content_fingerprint(
+                            hashes=utils.hash_media_file(filepath=movie_file_path)
+                        ),
+                    }
+                ],
+                "metadata": [],
+                "errors": [],
+            }
+        )
+        get_imdb_object_method_patch.return_value = {
+            "Title": "Heat",
+            "Year": "1995",
+            "imdbID": "tt0113277",
+            "Poster": "N/A",
+        }
+
+        movie_file_fixer.MovieFileFixer(
+            directory=special_test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+        ).title_fixer()
+
+        get_imdb_object_method_patch.assert_called_once_with(
+            search_query="", imdb_id="tt0113277"
+        )
+        self.assertEqual(
+            os.listdir(os.path.join(special_test_folder, "Heat [1995]")),
+            ["Heat [1995].mkv"],
+        )
+
+    @patch(f"{module_under_test}.formatter.OmdbService.get_imdb_object")
+    def test_fix_titles_in_dry_run_mode(self, get_imdb_object_method_patch):
+        """Ensure `fix_titles()` neither renames folders nor writes the metadata file in dry run mode."""
+        special_test_folder = os.path.join(self.test_folder, "special_test_folder")
+        os.makedirs(os.path.join(special_test_folder, "Heat.1995.1080p"))
+        metadata = {
+            "titles": [
+                {
+                    "original_filename": "Heat.1995.1080p",
+                    "title": "Heat.1995.1080p",
+                    "imdb_id": "tt0113277",
+                }
+            ],
+            "metadata": [],
+            "errors": [],
+        }
+        formatter = movie_file_fixer.Formatter(
+            directory=special_test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            dry_run=True,
+        )
+        formatter._save_metadata_file(metadata=metadata)
+        get_imdb_object_method_patch.return_value = {
+            "Title": "Heat",
+            "Year": "1995",
+            "imdbID": "tt0113277",
+            "Poster": "N/A",
+        }
+
+        formatter.fix_titles()
+
+        self.assertIn("Heat.1995.1080p", os.listdir(special_test_folder))
+        self.assertEqual(formatter.initialize_metadata_file(), metadata)
+
     def test_format_with_crazy_data(self):
         """Ensure `format()` raises an exception and writes to error log appropriately, if input is insane."""
         min_value = 1
@@ -1299,6 +1787,430 @@ class PosterFinderTestCase(TestCase):
 
         download_method_patch.assert_not_called()
 
+    @patch(f"{module_under_test}.PosterFinder._download")
+    def test_get_posters_skips_existing_posters_and_revalidates_on_refresh(
+        self, download_method_patch
+    ):
+        """
+
+        Ensure a second `get_posters()` run doesn't download existing posters, and that a refresh
+        sends the stored `ETag` and `Last-Modified` values as a conditional request.
+        """
+        self.formatter.initialize_metadata_file()
+        poster_urls = {}
+        for iteration in range(3):
+            poster_folder_name = f"{fake.word()}_{iteration}"
+            os.mkdir(os.path.join(self.test_folder, poster_folder_name))
+            poster_urls[poster_folder_name] = fake.url()
+            self.formatter._write_metadata(
+                new_content={
+                    "title": poster_folder_name,
+                    "poster": poster_urls[poster_folder_name],
+                },
+                content_key="titles",
+            )
+
+        poster_content = [fake.binary(length=1000), fake.binary(length=24)]
+        etag = f'"{fake.md5()}"'
+        last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+        download_method_patch.return_value.status_code = 200
+        download_method_patch.return_value.iter_content.return_value = poster_content
+        download_method_patch.return_value.headers = {
+            "ETag": etag,
+            "Last-Modified": last_modified,
+        }
+
+        self.assertEqual(self.poster_finder.get_posters(), len(poster_urls))
+        for poster_folder_name in poster_urls:
+            with open(
+                os.path.join(self.test_folder, poster_folder_name, "poster.jpg"), "rb"
+            ) as infile:
+                self.assertEqual(infile.read(), b"".join(poster_content))
+        for title in self.formatter.initialize_metadata_file().get("titles"):
+            self.assertEqual(title["poster_size"], 1024)
+            self.assertEqual(title["poster_etag"], etag)
+            self.assertEqual(title["poster_last_modified"], last_modified)
+
+        # A fully postered library doesn't download anything:
+        download_method_patch.reset_mock()
+        self.assertEqual(self.poster_finder.get_posters(), 0)
+        download_method_patch.assert_not_called()
+
+        # A refresh asks whether each poster changed:
+        download_method_patch.return_value.status_code = 304
+        self.assertEqual(self.poster_finder.get_posters(refresh=True), 0)
+        self.assertEqual(download_method_patch.call_count, len(poster_urls))
+        for poster_url in poster_urls.values():
+            headers = dict(movie_file_fixer.poster_finder.DEFAULT_HEADERS)
+            headers["If-None-Match"] = etag
+            headers["If-Modified-Since"] = last_modified
+            download_method_patch.assert_any_call(url=poster_url, headers=headers)
+
+    @patch(f"{module_under_test}.PosterFinder._download")
+    def test_get_posters_survives_failed_downloads(self, download_method_patch):
+        """Ensure a poster that fails to download is skipped, and the posters downloaded by other workers are recorded."""
+        self.mock_requests.RequestException = requests.RequestException
+        self.formatter.initialize_metadata_file()
+        failing_poster_url = fake.url()
+        for poster_folder_name, poster_url in [
+            ("Heat [1995]", fake.url()),
+            ("The Matrix [1999]", failing_poster_url),
+        ]:
+            os.mkdir(os.path.join(self.test_folder, poster_folder_name))
+            self.formatter._write_metadata(
+                new_content={"title": poster_folder_name, "poster": poster_url},
+                content_key="titles",
+            )
+
+        response = mock.MagicMock(status_code=200, headers={"ETag": '"etag"'})
+        response.iter_content.return_value = [fake.binary(length=64)]
+
+        def download(url, headers=None):
+            if url == failing_poster_url:
+                raise requests.ConnectionError("Connection reset by peer")
+            return response
+
+        download_method_patch.side_effect = download
+
+        self.assertEqual(self.poster_finder.get_posters(), 1)
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(self.test_folder, "The Matrix [1999]", "poster.jpg")
+            )
+        )
+        titles = {
+            title["title"]: title
+            for title in self.formatter.initialize_metadata_file().get("titles")
+        }
+        self.assertEqual(titles["Heat [1995]"]["poster_etag"], '"etag"')
+        self.assertNotIn("poster_etag", titles["The Matrix [1999]"])
+
+    @patch(f"{module_under_test}.PosterFinder._download")
+    def test_get_posters_from_poster_cache(self, download_method_patch):
+        """Ensure a poster URL that was downloaded for one title is placed from the poster cache for another title."""
+        poster_cache_directory = os.path.join(self.test_folder, "poster_cache")
+        poster_finder = movie_file_fixer.PosterFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            poster_cache_directory=poster_cache_directory,
+            verbose=True,
+        )
+        poster_url = fake.url()
+        poster_content = fake.binary(length=512)
+        download_method_patch.return_value.status_code = 200
+        download_method_patch.return_value.iter_content.return_value = [poster_content]
+        download_method_patch.return_value.headers = {}
+
+        self.formatter.initialize_metadata_file()
+        poster_folder_names = [f"{fake.word()}_{iteration}" for iteration in range(2)]
+        for poster_folder_name in poster_folder_names:
+            os.mkdir(os.path.join(self.test_folder, poster_folder_name))
+            self.formatter._write_metadata(
+                new_content={"title": poster_folder_name, "poster": poster_url},
+                content_key="titles",
+            )
+            # Each title is processed in its own run:
+            self.assertEqual(poster_finder.get_posters(), 1)
+
+        download_method_patch.assert_called_once_with(url=poster_url)
+        for poster_folder_name in poster_folder_names:
+            with open(
+                os.path.join(self.test_folder, poster_folder_name, "poster.jpg"), "rb"
+            ) as infile:
+                self.assertEqual(infile.read(), poster_content)
+        poster_sha256s = {
+            title["poster_sha256"]
+            for title in self.formatter.initialize_metadata_file().get("titles")
+        }
+        self.assertEqual(len(poster_sha256s), 1)
+
+    def test_resize_poster_url(self):
+        """Ensure Amazon image URLs are rewritten to the requested width, and any other URL is left alone."""
+        poster_url = "https://m.media-amazon.com/images/M/MV5BNzQzOTk3OTAtNDQ0Zi00ZTVkLWI0MTEtMDllZjNkYzNjNTc4@._V1_SX300.jpg"
+        resize_poster_url = movie_file_fixer.poster_finder.resize_poster_url
+        self.assertEqual(resize_poster_url(poster_url=poster_url), poster_url)
+        self.assertTrue(
+            resize_poster_url(poster_url=poster_url, width=150).endswith(
+                "@._V1_SX150.jpg"
+            )
+        )
+        self.assertTrue(
+            resize_poster_url(poster_url=poster_url, width=0).endswith("@._V1_.jpg")
+        )
+        fake_url = fake.url()
+        self.assertEqual(resize_poster_url(poster_url=fake_url, width=150), fake_url)
+        with self.assertRaises(ValueError):
+            movie_file_fixer.poster_finder.get_poster_width(poster_size=fake.word())
+
+    @patch(f"{module_under_test}.PosterFinder._download")
+    def test_get_posters_with_thumbnails(self, download_method_patch):
+        """Ensure the multi-size mode writes a full-size `poster.jpg` and a `poster-150w.jpg` in one pass."""
+        poster_finder = movie_file_fixer.PosterFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            poster_size="full",
+            thumbnail_sizes=["thumbnail"],
+            verbose=True,
+        )
+        download_method_patch.return_value.status_code = 200
+        download_method_patch.return_value.iter_content.return_value = [
+            fake.binary(length=64)
+        ]
+        download_method_patch.return_value.headers = {}
+
+        self.formatter.initialize_metadata_file()
+        poster_folder_name = fake.word()
+        os.mkdir(os.path.join(self.test_folder, poster_folder_name))
+        self.formatter._write_metadata(
+            new_content={
+                "title": poster_folder_name,
+                "poster": "https://m.media-amazon.com/images/M/MV5B@._V1_SX300.jpg",
+            },
+            content_key="titles",
+        )
+
+        self.assertEqual(poster_finder.get_posters(), 2)
+        download_method_patch.assert_any_call(
+            url="https://m.media-amazon.com/images/M/MV5B@._V1_.jpg"
+        )
+        download_method_patch.assert_any_call(
+            url="https://m.media-amazon.com/images/M/MV5B@._V1_SX150.jpg"
+        )
+        for poster_filename in ["poster.jpg", "poster-150w.jpg"]:
+            self.assertTrue(
+                os.path.isfile(
+                    os.path.join(self.test_folder, poster_folder_name, poster_filename)
+                )
+            )
+        (title,) = self.formatter.initialize_metadata_file().get("titles")
+        self.assertEqual(title["poster_size"], 64)
+        self.assertEqual(title["poster_150w_size"], 64)
+
+        # Both sizes are present now:
+        download_method_patch.reset_mock()
+        self.assertEqual(poster_finder.get_posters(), 0)
+        download_method_patch.assert_not_called()
+
+        # Posters the server can't resize are left to the `ThumbnailGenerator`:
+        poster_folder_name = fake.word() + "_2"
+        os.mkdir(os.path.join(self.test_folder, poster_folder_name))
+        self.formatter._write_metadata(
+            new_content={"title": poster_folder_name, "poster": fake.url()},
+            content_key="titles",
+        )
+        self.assertEqual(poster_finder.get_posters(), 1)
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(self.test_folder, poster_folder_name, "poster-150w.jpg")
+            )
+        )
+
+
+class ThumbnailGeneratorTestCase(TestCase):
+    def setUp(self):
+        # To suppress the stdout by having verbose=True on ThumbnailGenerator instantiation:
+        self.mock_print_patch = mock.patch("builtins.print")
+        self.mock_print = self.mock_print_patch.start()
+
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+            file_extensions=[".file"],
+            use_extensions=False,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+        self.formatter = movie_file_fixer.Formatter(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+        )
+        self.formatter.initialize_metadata_file()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+        self.mock_print_patch.stop()
+
+    def _add_title_with_poster(self, poster_content):
+        """Writes a `poster.jpg` into a new title folder, and adds the title to the metadata file."""
+        title_name = fake.uuid4()
+        os.mkdir(os.path.join(self.test_folder, title_name))
+        poster_filepath = os.path.join(self.test_folder, title_name, "poster.jpg")
+        with open(poster_filepath, "wb") as outfile:
+            outfile.write(poster_content)
+        self.formatter._write_metadata(
+            new_content={"title": title_name, "poster": fake.url()},
+            content_key="titles",
+        )
+
+        return title_name, poster_filepath
+
+    @patch(f"{module_under_test}.thumbnail_generator.Image")
+    @patch(f"{module_under_test}.thumbnail_generator._generate_thumbnails")
+    def test_generate_thumbnails_skips_unchanged_posters(
+        self, generate_thumbnails_patch, image_patch
+    ):
+        """Ensure thumbnails are recorded in the metadata file, and only regenerated when the poster's content changes."""
+
+        def generate_thumbnails(poster_filepath, widths, poster_filename):
+            thumbnails = {}
+            for width in widths:
+                thumbnail_filename = f"poster-{width}w.jpg"
+                thumbnail_filepath = os.path.join(
+                    os.path.dirname(poster_filepath), thumbnail_filename
+                )
+                with open(thumbnail_filepath, "wb") as outfile:
+                    outfile.write(b"thumbnail")
+                thumbnails[str(width)] = thumbnail_filename
+            return thumbnails
+
+        generate_thumbnails_patch.side_effect = generate_thumbnails
+        title_name, poster_filepath = self._add_title_with_poster(
+            poster_content=fake.binary(length=256)
+        )
+        thumbnail_generator = movie_file_fixer.ThumbnailGenerator(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            widths=[300, 150],
+            max_workers=1,
+            verbose=True,
+        )
+
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 1)
+        (title,) = self.formatter.initialize_metadata_file().get("titles")
+        self.assertEqual(
+            title["thumbnails"], {"150": "poster-150w.jpg", "300": "poster-300w.jpg"}
+        )
+        self.assertEqual(title["thumbnails_sha256"], utils.hash_file(poster_filepath))
+
+        # The poster hasn't changed:
+        generate_thumbnails_patch.reset_mock()
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 0)
+        generate_thumbnails_patch.assert_not_called()
+
+        # A new poster was downloaded:
+        with open(poster_filepath, "wb") as outfile:
+            outfile.write(fake.binary(length=256))
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 1)
+        generate_thumbnails_patch.assert_called_once_with(
+            poster_filepath=poster_filepath,
+            widths=[150, 300],
+            poster_filename="poster.jpg",
+        )
+
+    @patch(f"{module_under_test}.thumbnail_generator.Image")
+    @patch(f"{module_under_test}.thumbnail_generator._generate_thumbnails")
+    def test_generate_thumbnails_with_poster_replaced_by_hand(
+        self, generate_thumbnails_patch, image_patch
+    ):
+        """Ensure thumbnails are regenerated when the poster is replaced outside the `PosterFinder`, and unchanged posters aren't hashed again."""
+        generate_thumbnails_patch.return_value = {"150": "poster-150w.jpg"}
+        title_name, poster_filepath = self._add_title_with_poster(
+            poster_content=fake.binary(length=256)
+        )
+        # The `PosterFinder` records the hash of the poster it downloaded:
+        self.formatter._get_metadata_backend().update_titles(
+            updates={title_name: {"poster_sha256": utils.hash_file(poster_filepath)}}
+        )
+        with open(
+            os.path.join(self.test_folder, title_name, "poster-150w.jpg"), "wb"
+        ) as outfile:
+            outfile.write(b"thumbnail")
+        thumbnail_generator = movie_file_fixer.ThumbnailGenerator(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            widths=[150],
+            max_workers=1,
+        )
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 1)
+
+        with patch(
+            f"{module_under_test}.thumbnail_generator.hash_file",
+            wraps=utils.hash_file,
+        ) as hash_file_patch:
+            self.assertEqual(thumbnail_generator.generate_thumbnails(), 0)
+            hash_file_patch.assert_not_called()
+
+        # The poster is restored from a backup, so the recorded `poster_sha256` is stale:
+        with open(poster_filepath, "wb") as outfile:
+            outfile.write(fake.binary(length=512))
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 1)
+        (title,) = self.formatter.initialize_metadata_file().get("titles")
+        self.assertEqual(title["thumbnails_sha256"], utils.hash_file(poster_filepath))
+
+    @patch(f"{module_under_test}.thumbnail_generator.Image", None)
+    def test_generate_thumbnails_without_pillow(self):
+        """Ensure a clear error is raised when `Pillow` isn't installed and a thumbnail must be generated."""
+        self._add_title_with_poster(poster_content=fake.binary(length=256))
+        thumbnail_generator = movie_file_fixer.ThumbnailGenerator(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+        )
+        with self.assertRaises(ImportError):
+            thumbnail_generator.generate_thumbnails()
+
+    @patch(f"{module_under_test}.thumbnail_generator.Image", None)
+    @patch(f"{module_under_test}.thumbnail_generator._generate_thumbnails")
+    def test_generate_thumbnails_records_downloaded_thumbnails(
+        self, generate_thumbnails_patch
+    ):
+        """Ensure thumbnails the `PosterFinder` downloaded are only recorded (without `Pillow`), never generated."""
+        title_name, poster_filepath = self._add_title_with_poster(
+            poster_content=fake.binary(length=256)
+        )
+        with open(
+            os.path.join(self.test_folder, title_name, "poster-150w.jpg"), "wb"
+        ) as outfile:
+            outfile.write(b"thumbnail")
+        self.formatter._get_metadata_backend().update_titles(
+            updates={title_name: {"poster_150w_size": len(b"thumbnail")}}
+        )
+        thumbnail_generator = movie_file_fixer.ThumbnailGenerator(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            widths=[150],
+        )
+
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 0)
+        generate_thumbnails_patch.assert_not_called()
+        (title,) = self.formatter.initialize_metadata_file().get("titles")
+        self.assertEqual(title["thumbnails"], {"150": "poster-150w.jpg"})
+
+    @skipIf(
+        movie_file_fixer.thumbnail_generator.Image is None,
+        "Requires the `Pillow` package",
+    )
+    def test_generate_thumbnails_in_process_pool(self):
+        """Ensure real thumbnails of every width are generated in a process pool, and posters are never upscaled."""
+        Image = movie_file_fixer.thumbnail_generator.Image
+        poster_filepaths = []
+        for _ in range(3):
+            title_name, poster_filepath = self._add_title_with_poster(
+                poster_content=b""
+            )
+            Image.new("RGB", (300, 450), color=fake.color_rgb()).save(
+                poster_filepath, format="JPEG"
+            )
+            poster_filepaths.append(poster_filepath)
+        thumbnail_generator = movie_file_fixer.ThumbnailGenerator(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            widths=[100, 600],
+            max_workers=2,
+            verbose=True,
+        )
+
+        self.assertEqual(thumbnail_generator.generate_thumbnails(), 3)
+        for poster_filepath in poster_filepaths:
+            title_path = os.path.dirname(poster_filepath)
+            with Image.open(os.path.join(title_path, "poster-100w.jpg")) as thumbnail:
+                self.assertEqual(thumbnail.size, (100, 150))
+            with Image.open(os.path.join(title_path, "poster-600w.jpg")) as thumbnail:
+                self.assertEqual(thumbnail.size, (300, 450))
+
 
 class SubtitleFinderTestCase(TestCase):
     def setUp(self):
@@ -1416,6 +2328,383 @@ class SubtitleFinderTestCase(TestCase):
             test_hash = self.subtitle_finder._get_hash(filepath=filepath)
             self.assertEqual(test_hash, file_hash)
 
+    def test_get_hash_with_hash_cache(self):
+        """Ensure that `_get_hash()` doesn't read a movie file again once its hash is cached, even from a new run."""
+        hash_cache_filepath = os.path.join(self.test_folder, "hashes.json")
+        movie_filepath = os.path.join(self.test_folder, "movie.mkv")
+        file_hash = utils.create_random_file(
+            directory=self.test_folder, filename="movie.mkv", filesize=128
+        )
+        subtitle_finder = movie_file_fixer.SubtitleFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            hash_cache_filepath=hash_cache_filepath,
+        )
+        self.assertEqual(subtitle_finder._get_hash(filepath=movie_filepath), file_hash)
+        subtitle_finder._hash_cache.save()
+
+        subtitle_finder = movie_file_fixer.SubtitleFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            hash_cache_filepath=hash_cache_filepath,
+        )
+        with patch("utils.hash_cache.hash_media_file") as hash_media_file_patch:
+            self.assertEqual(
+                subtitle_finder._get_hash(filepath=movie_filepath), file_hash
+            )
+            hash_media_file_patch.assert_not_called()
+
+    @patch(f"{module_under_test}.SubtitleFinder._search_subtitles")
+    def test_get_subtitles_hashes_movie_files_in_one_batch(
+        self, search_subtitles_method_patch
+    ):
+        """Ensure that `get_subtitles()` hashes every movie file missing a subtitle up front, and searches by those hashes."""
+        search_subtitles_method_patch.return_value.status_code = 200
+        search_subtitles_method_patch.return_value.text = ""
+        self.formatter.initialize_metadata_file()
+        file_hashes = {}
+        for _ in range(3):
+            title_name = fake.uuid4()
+            os.mkdir(os.path.join(self.test_folder, title_name))
+            file_hashes[title_name] = utils.create_random_file(
+                directory=os.path.join(self.test_folder, title_name),
+                filename="movie",
+                file_extension=".mkv",
+                filesize=128,
+            )
+            self.formatter._write_metadata(
+                new_content={"title": title_name}, content_key="titles"
+            )
+        # A title which already has its subtitle:
+        subtitled_title_name = fake.uuid4()
+        os.mkdir(os.path.join(self.test_folder, subtitled_title_name))
+        utils.create_random_file(
+            directory=os.path.join(self.test_folder, subtitled_title_name),
+            filename="movie",
+            file_extension=".mkv",
+        )
+        with open(
+            os.path.join(self.test_folder, subtitled_title_name, "en_subtitles.srt"),
+            "w",
+        ):
+            pass
+        self.formatter._write_metadata(
+            new_content={"title": subtitled_title_name}, content_key="titles"
+        )
+
+        with patch(
+            f"{module_under_test}.subtitle_finder.hash_media_files",
+            wraps=utils.hash_media_files,
+        ) as hash_media_files_patch:
+            self.subtitle_finder.get_subtitles()
+            hash_media_files_patch.assert_called_once()
+            self.assertEqual(
+                len(hash_media_files_patch.call_args.kwargs["filepaths"]), 3
+            )
+
+        self.assertEqual(
+            sorted(
+                call.kwargs["hashcode"]
+                for call in search_subtitles_method_patch.call_args_list
+            ),
+            sorted(file_hashes.values()),
+        )
+
+    @patch(f"{module_under_test}.SubtitleFinder._download_subtitles")
+    @patch(f"{module_under_test}.SubtitleFinder._search_subtitles")
+    def test_get_subtitles_in_several_languages(
+        self, search_subtitles_method_patch, download_subtitles_method_patch
+    ):
+        """Ensure every movie file is searched once, and only the missing and available languages are downloaded."""
+        self.formatter.initialize_metadata_file()
+        title_names = [fake.uuid4(), fake.uuid4()]
+        hashcodes = {}
+        for title_name in title_names:
+            os.mkdir(os.path.join(self.test_folder, title_name))
+            hashcodes[title_name] = utils.create_random_file(
+                directory=os.path.join(self.test_folder, title_name),
+                filename="movie",
+                file_extension=".mp4",
+                filesize=128,
+            )
+            self.formatter._write_metadata(
+                new_content={"title": title_name}, content_key="titles"
+            )
+        # The first title already has its English subtitle:
+        with open(
+            os.path.join(self.test_folder, title_names[0], "en_subtitles.srt"), "w"
+        ):
+            pass
+        available_languages = {
+            hashcodes[title_names[0]]: "en,es,fr",
+            hashcodes[title_names[1]]: "en",
+        }
+
+        def search_subtitles(hashcode):
+            return mock.Mock(status_code=200, text=available_languages[hashcode])
+
+        search_subtitles_method_patch.side_effect = search_subtitles
+        download_subtitles_method_patch.return_value.status_code = 200
+        download_subtitles_method_patch.return_value.text = fake.text()
+
+        self.assertEqual(
+            self.subtitle_finder.get_subtitles(language=["en,es", "de"]), 2
+        )
+        self.assertEqual(search_subtitles_method_patch.call_count, 2)
+        self.assertEqual(
+            sorted(
+                (call.kwargs["hashcode"], call.kwargs["language"])
+                for call in download_subtitles_method_patch.call_args_list
+            ),
+            sorted(
+                [
+                    (hashcodes[title_names[0]], "es"),
+                    (hashcodes[title_names[1]], "en"),
+                ]
+            ),
+        )
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(self.test_folder, title_names[0], "es_subtitles.srt")
+            )
+        )
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(self.test_folder, title_names[1], "en_subtitles.srt")
+            )
+        )
+        self.assertEqual(
+            movie_file_fixer.subtitle_finder.get_languages(
+                language=["en, es", "fr", "en"]
+            ),
+            ["en", "es", "fr"],
+        )
+
+    @patch(f"{module_under_test}.subtitle_finder.requests")
+    def test_get_subtitles_from_local_provider(self, requests_method_patch):
+        """Ensure subtitles can be found offline, from a local provider, and unknown providers are rejected."""
+        self.formatter.initialize_metadata_file()
+        title_name = fake.uuid4()
+        os.mkdir(os.path.join(self.test_folder, title_name))
+        hashcode = utils.create_random_file(
+            directory=os.path.join(self.test_folder, title_name),
+            filename="movie",
+            file_extension=".avi",
+            filesize=128,
+        )
+        self.formatter._write_metadata(
+            new_content={"title": title_name}, content_key="titles"
+        )
+        local_subtitles_directory = os.path.join(self.test_folder, "local_subtitles")
+        os.makedirs(os.path.join(local_subtitles_directory, hashcode))
+        subtitles = fake.text()
+        with open(
+            os.path.join(local_subtitles_directory, hashcode, "fr.srt"),
+            "w",
+            encoding="UTF-8",
+        ) as outfile:
+            outfile.write(subtitles)
+
+        subtitle_finder = movie_file_fixer.SubtitleFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            language="fr",
+            providers=[f"local:{local_subtitles_directory}"],
+        )
+        self.assertEqual(subtitle_finder.get_subtitles(), 1)
+        requests_method_patch.get.assert_not_called()
+        with open(
+            os.path.join(self.test_folder, title_name, "fr_subtitles.srt"),
+            encoding="UTF-8",
+        ) as infile:
+            self.assertEqual(infile.read(), subtitles)
+
+        subtitle_finder = movie_file_fixer.SubtitleFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            language="de",
+            providers=[fake.word()],
+        )
+        with self.assertRaises(ValueError):
+            subtitle_finder.get_subtitles()
+
+    def test_get_subtitles_survives_failed_downloads(self):
+        """Ensure a subtitle that fails to download is skipped, and the hash cache of the run is still saved."""
+        self.formatter.initialize_metadata_file()
+        local_subtitles_directory = os.path.join(self.test_folder, "local_subtitles")
+        hashcodes = {}
+        for title_name in ["Heat [1995]", "The Matrix [1999]"]:
+            os.mkdir(os.path.join(self.test_folder, title_name))
+            hashcodes[title_name] = utils.create_random_file(
+                directory=os.path.join(self.test_folder, title_name),
+                filename="movie",
+                file_extension=".avi",
+                filesize=128,
+            )
+            self.formatter._write_metadata(
+                new_content={"title": title_name}, content_key="titles"
+            )
+            os.makedirs(os.path.join(local_subtitles_directory, hashcodes[title_name]))
+            with open(
+                os.path.join(
+                    local_subtitles_directory, hashcodes[title_name], "en.srt"
+                ),
+                "w",
+                encoding="UTF-8",
+            ) as outfile:
+                outfile.write(fake.text())
+
+        download = utils.LocalSubtitleProvider.download
+
+        def failing_download(provider, hashes, language):
+            if hashes["subdb"] == hashcodes["The Matrix [1999]"]:
+                raise OSError("Input/output error")
+            return download(provider, hashes=hashes, language=language)
+
+        hash_cache_filepath = os.path.join(self.test_folder, "hashes.json")
+        subtitle_finder = movie_file_fixer.SubtitleFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            language="en",
+            providers=[f"local:{local_subtitles_directory}"],
+            hash_cache_filepath=hash_cache_filepath,
+        )
+        with patch.object(
+            utils.LocalSubtitleProvider,
+            "download",
+            autospec=True,
+            side_effect=failing_download,
+        ):
+            self.assertEqual(subtitle_finder.get_subtitles(), 1)
+
+        self.assertTrue(
+            os.path.exists(
+                os.path.join(self.test_folder, "Heat [1995]", "en_subtitles.srt")
+            )
+        )
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(self.test_folder, "The Matrix [1999]", "en_subtitles.srt")
+            )
+        )
+        self.assertTrue(os.path.exists(hash_cache_filepath))
+
+    @patch(f"{module_under_test}.SubtitleFinder._download_subtitles")
+    @patch(f"{module_under_test}.SubtitleFinder._search_subtitles")
+    def test_get_subtitles_with_subtitle_miss_cache(
+        self, search_subtitles_method_patch, download_subtitles_method_patch
+    ):
+        """Ensure subtitles that weren't found aren't searched for again, unless the search failed."""
+        self.formatter.initialize_metadata_file()
+        title_name = fake.uuid4()
+        os.mkdir(os.path.join(self.test_folder, title_name))
+        hashcode = utils.create_random_file(
+            directory=os.path.join(self.test_folder, title_name),
+            filename="movie",
+            file_extension=".mkv",
+            filesize=128,
+        )
+        self.formatter._write_metadata(
+            new_content={"title": title_name}, content_key="titles"
+        )
+        subtitle_miss_cache_filepath = os.path.join(
+            self.test_folder, "subtitle_misses.json"
+        )
+
+        def get_subtitle_finder():
+            return movie_file_fixer.SubtitleFinder(
+                directory=blockbuster.TEST_INPUT_FOLDER,
+                metadata_filename=blockbuster.METADATA_FILENAME,
+                language="en,es",
+                subtitle_miss_cache_filepath=subtitle_miss_cache_filepath,
+            )
+
+        # A failed search proves nothing:
+        search_subtitles_method_patch.return_value = mock.Mock(status_code=500)
+        self.assertEqual(get_subtitle_finder().get_subtitles(), 0)
+        self.assertFalse(os.path.exists(subtitle_miss_cache_filepath))
+
+        search_subtitles_method_patch.return_value = mock.Mock(status_code=404)
+        self.assertEqual(get_subtitle_finder().get_subtitles(), 0)
+        self.assertEqual(search_subtitles_method_patch.call_count, 2)
+
+        # Every language was missing, so the next run doesn't search at all:
+        subtitle_finder = get_subtitle_finder()
+        self.assertEqual(subtitle_finder.get_subtitles(), 0)
+        self.assertEqual(search_subtitles_method_patch.call_count, 2)
+        self.assertEqual(subtitle_finder._subtitle_miss_cache.avoided, 2)
+        download_subtitles_method_patch.assert_not_called()
+
+        # Once the English miss is forgotten, English is searched for again (and found), but Spanish isn't:
+        search_subtitles_method_patch.return_value = mock.Mock(
+            status_code=200, text="en"
+        )
+        download_subtitles_method_patch.return_value.status_code = 200
+        download_subtitles_method_patch.return_value.text = fake.text()
+        subtitle_finder = get_subtitle_finder()
+        subtitle_finder._subtitle_miss_cache.discard(hashcode=hashcode, language="en")
+        self.assertEqual(subtitle_finder.get_subtitles(), 1)
+        self.assertEqual(search_subtitles_method_patch.call_count, 3)
+        self.assertEqual(subtitle_finder._subtitle_miss_cache.avoided, 1)
+        self.assertTrue(
+            os.path.isfile(
+                os.path.join(self.test_folder, title_name, "en_subtitles.srt")
+            )
+        )
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(self.test_folder, title_name, "es_subtitles.srt")
+            )
+        )
+
+    @patch(f"{module_under_test}.SubtitleFinder._download_subtitles")
+    @patch(f"{module_under_test}.SubtitleFinder._search_subtitles")
+    def test_get_subtitles_skips_embedded_subtitles(
+        self, search_subtitles_method_patch, download_subtitles_method_patch
+    ):
+        """Ensure languages embedded in the movie file aren't searched for, and movie files embedding them all aren't hashed."""
+        self.formatter.initialize_metadata_file()
+        title_names = [fake.uuid4(), fake.uuid4()]
+        for title_name, subtitle_languages in zip(
+            title_names, [["eng"], ["eng", "spa"]]
+        ):
+            os.mkdir(os.path.join(self.test_folder, title_name))
+            blockbuster.create_matroska_file(
+                filepath=os.path.join(self.test_folder, title_name, "movie.mkv"),
+                subtitle_languages=subtitle_languages,
+            )
+            self.formatter._write_metadata(
+                new_content={"title": title_name}, content_key="titles"
+            )
+        search_subtitles_method_patch.return_value = mock.Mock(
+            status_code=200, text="en,es"
+        )
+        download_subtitles_method_patch.return_value.status_code = 200
+        download_subtitles_method_patch.return_value.text = fake.text()
+
+        with patch(
+            f"{module_under_test}.subtitle_finder.hash_media_files",
+            wraps=utils.hash_media_files,
+        ) as hash_patch:
+            self.assertEqual(self.subtitle_finder.get_subtitles(language="en,es"), 1)
+            hash_patch.assert_called_once_with(
+                filepaths=[os.path.join(self.test_folder, title_names[0], "movie.mkv")],
+                chunk_size=64 * 1024,
+                max_workers_per_device=2,
+            )
+        self.assertEqual(search_subtitles_method_patch.call_count, 1)
+        download_subtitles_method_patch.assert_called_once()
+        self.assertEqual(
+            download_subtitles_method_patch.call_args.kwargs["language"], "es"
+        )
+
+        # Unless embedded subtitles are downloaded anyway:
+        subtitle_finder = movie_file_fixer.SubtitleFinder(
+            directory=blockbuster.TEST_INPUT_FOLDER,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            language="en",
+            skip_embedded_subtitles=False,
+        )
+        self.assertEqual(subtitle_finder.get_subtitles(), 2)
+
     @patch(f"{module_under_test}.subtitle_finder.requests")
     def test_download_with_headers_calls_requests_get(self, requests_method_patch):
         """Ensure the `requests.get()` method is called when `_download()` is called and headers are provided."""
@@ -1729,3 +3018,376 @@ class SubtitleFinderTestCase(TestCase):
     #         )
     #         self.assertTrue(os.path.exists(fake_movie_subtitle_path))
     #         self.assertTrue(os.path.isfile(fake_movie_subtitle_path))
+
+
+class DuplicateFinderTestCase(TestCase):
+    def setUp(self):
+        # To suppress the stdout by having verbose=True on DuplicateFinder instantiation:
+        self.mock_print_patch = mock.patch("builtins.print")
+        self.mock_print = self.mock_print_patch.start()
+
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+            file_extensions=[".file"],
+            use_extensions=False,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+        self.formatter = movie_file_fixer.Formatter(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+        )
+        self.duplicate_finder = movie_file_fixer.DuplicateFinder(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+        self.mock_print_patch.stop()
+
+    def _create_movie_file(self, folder_name, filename, content):
+        folder_path = os.path.join(self.test_folder, folder_name)
+        os.makedirs(folder_path, exist_ok=True)
+        filepath = os.path.join(folder_path, filename)
+        with open(filepath, "wb") as outfile:
+            outfile.write(content)
+
+        return filepath
+
+    @patch(
+        f"{module_under_test}.duplicate_finder.hash_media_files",
+        wraps=utils.hash_media_files,
+    )
+    def test_find_duplicate_files(self, hash_media_files_method_patch):
+        """Ensure only the movie files sharing their size are hashed, and identical ones (but not hard links) are grouped."""
+        content = os.urandom(256 * 1024)
+        original_filepath = self._create_movie_file("A", "a.mkv", content)
+        copy_filepath = self._create_movie_file("B", "b.mkv", content)
+        os.makedirs(os.path.join(self.test_folder, "C"))
+        os.link(original_filepath, os.path.join(self.test_folder, "C", "c.mkv"))
+        same_size_filepath = self._create_movie_file(
+            "D", "d.mkv", os.urandom(len(content))
+        )
+        self._create_movie_file("E", "e.mkv", os.urandom(1024))
+        self._create_movie_file("F", "f.txt", content)
+
+        duplicate_files = self.duplicate_finder.find_duplicate_files()
+
+        self.assertEqual(
+            duplicate_files,
+            [
+                {
+                    "size": len(content),
+                    "hash": utils.hash_media_file(filepath=original_filepath)["subdb"],
+                    "filepaths": [original_filepath, copy_filepath],
+                }
+            ],
+        )
+        hash_media_files_method_patch.assert_called_once()
+        self.assertEqual(
+            sorted(hash_media_files_method_patch.call_args.kwargs["filepaths"]),
+            sorted([original_filepath, copy_filepath, same_size_filepath]),
+        )
+
+    def test_find_duplicates(self):
+        """Ensure `find_duplicates()` reports identical files, titles with the same IMDb ID, and the reclaimable bytes."""
+        content = os.urandom(2048)
+        self._create_movie_file("Heat [1995]", "Heat [1995].mkv", content)
+        self._create_movie_file("Heat [1995]_2", "Heat [1995]_2.mkv", content)
+        self._create_movie_file(
+            "Heat [1995]_2", "Heat [1995]_2_2.mkv", os.urandom(1024)
+        )
+        for episode in range(2):
+            self._create_movie_file(
+                "Cosmos [1980]", f"Cosmos [1980] {episode}.mkv", os.urandom(4096)
+            )
+        self.formatter._save_metadata_file(
+            metadata={
+                "titles": [
+                    {"title": "Heat [1995]", "imdb_id": "tt0113277"},
+                    {"title": "Heat [1995]_2", "imdb_id": "tt0113277"},
+                    {
+                        "title": "Cosmos [1980]",
+                        "imdb_id": "tt0081846",
+                        "type": "series",
+                    },
+                ],
+                "metadata": [],
+                "errors": [],
+            }
+        )
+
+        duplicates = self.duplicate_finder.find_duplicates()
+
+        self.assertEqual(len(duplicates["files"]), 1)
+        self.assertEqual(duplicates["reclaimable_bytes"], 2048)
+        (duplicate_title,) = duplicates["titles"]
+        self.assertEqual(duplicate_title["imdb_id"], "tt0113277")
+        self.assertEqual(duplicate_title["titles"], ["Heat [1995]", "Heat [1995]_2"])
+        self.assertEqual(len(duplicate_title["sizes"]), 3)
+        self.assertEqual(
+            duplicate_title["title_sizes"],
+            {"Heat [1995]": 2048, "Heat [1995]_2": 2048 + 1024},
+        )
+        # Keeping the largest title folder (with both of its movie files):
+        self.assertEqual(duplicates["reclaimable_title_bytes"], 2048)
+
+    def test_find_duplicate_titles_ignores_multi_part_titles(self):
+        """Ensure the parts (or sample) of a single title aren't reported as duplicates of each other."""
+        self._create_movie_file("Heat [1995]", "Heat CD1.mkv", os.urandom(1000))
+        self._create_movie_file("Heat [1995]", "Heat CD2.mkv", os.urandom(900))
+        self._create_movie_file("Heat [1995]", "sample.mkv", os.urandom(100))
+        self.formatter._save_metadata_file(
+            metadata={
+                "titles": [{"title": "Heat [1995]", "imdb_id": "tt0113277"}],
+                "metadata": [],
+                "errors": [],
+            }
+        )
+
+        duplicates = self.duplicate_finder.find_duplicates()
+
+        self.assertEqual(duplicates["titles"], [])
+        self.assertEqual(duplicates["reclaimable_title_bytes"], 0)
+
+
+class ViewBuilderTestCase(TestCase):
+    def setUp(self):
+        # To suppress the stdout by having verbose=True on ViewBuilder instantiation:
+        self.mock_print_patch = mock.patch("builtins.print")
+        self.mock_print = self.mock_print_patch.start()
+
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+            file_extensions=[".file"],
+            use_extensions=False,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+        self.source_folder = os.path.join(self.test_folder, "downloads")
+        self.target_folder = os.path.join(self.test_folder, "library")
+        os.makedirs(os.path.join(self.source_folder, "Heat.1995.1080p", "Subs"))
+        for filename in [
+            os.path.join("Heat.1995.1080p", "heat.mkv"),
+            os.path.join("Heat.1995.1080p", "Subs", "en.srt"),
+            "The.Matrix.1999.mp4",
+        ]:
+            with open(os.path.join(self.source_folder, filename), "wb") as outfile:
+                outfile.write(os.urandom(1024))
+
+        self.view_builder = movie_file_fixer.ViewBuilder(
+            directory=self.source_folder,
+            target_directory=self.target_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+        self.mock_print_patch.stop()
+
+    def test_build_view(self):
+        """Ensure every source file is linked (not copied) into the target directory, keeping the folder structure."""
+        linked_names = self.view_builder.build_view()
+
+        self.assertEqual(linked_names, ["Heat.1995.1080p", "The.Matrix.1999.mp4"])
+        for filename in [
+            os.path.join("Heat.1995.1080p", "heat.mkv"),
+            os.path.join("Heat.1995.1080p", "Subs", "en.srt"),
+            "The.Matrix.1999.mp4",
+        ]:
+            self.assertTrue(
+                os.path.samefile(
+                    os.path.join(self.source_folder, filename),
+                    os.path.join(self.target_folder, filename),
+                )
+            )
+        self.assertIn(
+            utils.view_manifest_filename(blockbuster.METADATA_FILENAME),
+            os.listdir(self.target_folder),
+        )
+
+    def test_build_view_only_links_new_titles(self):
+        """Ensure rebuilding the view only links the source files and folders added since, even once formatted."""
+        self.view_builder.build_view()
+        # Formatting renames the links, never the originals:
+        os.rename(
+            os.path.join(self.target_folder, "Heat.1995.1080p"),
+            os.path.join(self.target_folder, "Heat [1995]"),
+        )
+        with open(os.path.join(self.source_folder, "Cosmos.mkv"), "wb") as outfile:
+            outfile.write(os.urandom(1024))
+
+        linked_names = self.view_builder.build_view()
+
+        self.assertEqual(linked_names, ["Cosmos.mkv"])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.target_folder, "Heat.1995.1080p"))
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.source_folder, "Heat.1995.1080p"))
+        )
+
+    @patch("utils.poster_cache.fcntl", None)
+    @patch("utils.poster_cache.os.link", side_effect=OSError("Cross-device link"))
+    def test_build_view_never_copies(self, link_method_patch):
+        """Ensure files that can neither be hardlinked nor reflinked are left out (and retried later), not copied."""
+        linked_names = self.view_builder.build_view()
+
+        self.assertEqual(linked_names, [])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.target_folder, "The.Matrix.1999.mp4"))
+        )
+        self.assertFalse(
+            os.path.exists(
+                os.path.join(
+                    self.target_folder,
+                    utils.view_manifest_filename(blockbuster.METADATA_FILENAME),
+                )
+            )
+        )
+
+
+class BrowseViewGeneratorTestCase(TestCase):
+    def setUp(self):
+        # To suppress the stdout by having verbose=True on BrowseViewGenerator instantiation:
+        self.mock_print_patch = mock.patch("builtins.print")
+        self.mock_print = self.mock_print_patch.start()
+
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+            file_extensions=[".file"],
+            use_extensions=False,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+        self.library_folder = os.path.join(self.test_folder, "library")
+        self.browse_folder = os.path.join(self.test_folder, "browse")
+        for title in ["Heat [1995]", "The Matrix [1999]"]:
+            os.makedirs(os.path.join(self.library_folder, title))
+
+        self.formatter = movie_file_fixer.Formatter(
+            directory=self.library_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+        )
+        self.imdb_objects = [
+            {
+                "Title": "Heat",
+                "Year": "1995",
+                "Genre": "Crime, Drama, Thriller",
+                "Director": "Michael Mann",
+                "imdbID": "tt0113277",
+            },
+            {
+                "Title": "The Matrix",
+                "Year": "1999",
+                "Genre": "Action, Sci-Fi",
+                "Director": "Lana Wachowski, Lilly Wachowski",
+                "imdbID": "tt0133093",
+            },
+        ]
+        self.titles = [
+            {"title": "Heat [1995]", "imdb_id": "tt0113277"},
+            {"title": "The Matrix [1999]", "imdb_id": "tt0133093"},
+        ]
+        self.formatter._save_metadata_file(
+            metadata={
+                "titles": self.titles,
+                "metadata": self.imdb_objects,
+                "errors": [],
+            }
+        )
+
+        self.browse_view_generator = movie_file_fixer.BrowseViewGenerator(
+            directory=self.library_folder,
+            browse_directory=self.browse_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            verbose=True,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+        self.mock_print_patch.stop()
+
+    def test_generate_views(self):
+        """Ensure every title is linked into the year, genre and director trees, with links resolving to its folder."""
+        links = self.browse_view_generator.generate_views()
+
+        self.assertEqual(len(links["added"]), 10)
+        self.assertEqual(links["removed"], [])
+        for link_path, title in [
+            (os.path.join("by-year", "1995", "Heat [1995]"), "Heat [1995]"),
+            (os.path.join("by-genre", "Crime", "Heat [1995]"), "Heat [1995]"),
+            (
+                os.path.join("by-director", "Lilly Wachowski", "The Matrix [1999]"),
+                "The Matrix [1999]",
+            ),
+        ]:
+            link_filepath = os.path.join(self.browse_folder, link_path)
+            self.assertTrue(os.path.islink(link_filepath))
+            self.assertFalse(os.path.isabs(os.readlink(link_filepath)))
+            self.assertTrue(
+                os.path.samefile(
+                    link_filepath, os.path.join(self.library_folder, title)
+                )
+            )
+
+    def test_generate_views_only_applies_changes(self):
+        """Ensure regenerating the views only adds and removes the links that changed, pruning emptied folders."""
+        self.browse_view_generator.generate_views()
+        unchanged_link = os.path.join(
+            self.browse_folder, "by-year", "1999", "The Matrix [1999]"
+        )
+        unchanged_inode = os.lstat(unchanged_link).st_ino
+
+        self.assertEqual(
+            self.browse_view_generator.generate_views(), {"added": [], "removed": []}
+        )
+
+        self.imdb_objects[0]["Genre"] = "Crime, Drama"
+        self.formatter._save_metadata_file(
+            metadata={
+                "titles": self.titles,
+                "metadata": self.imdb_objects,
+                "errors": [],
+            }
+        )
+        links = self.browse_view_generator.generate_views()
+
+        self.assertEqual(links["added"], [])
+        self.assertEqual(
+            links["removed"], [os.path.join("by-genre", "Thriller", "Heat [1995]")]
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(self.browse_folder, "by-genre", "Thriller"))
+        )
+        self.assertEqual(os.lstat(unchanged_link).st_ino, unchanged_inode)
+
+    def test_generate_views_dry_run(self):
+        """Ensure nothing is linked (and no manifest is written) in dry-run mode."""
+        browse_view_generator = movie_file_fixer.BrowseViewGenerator(
+            directory=self.library_folder,
+            browse_directory=self.browse_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            dry_run=True,
+        )
+
+        links = browse_view_generator.generate_views()
+
+        self.assertEqual(len(links["added"]), 10)
+        self.assertFalse(os.path.exists(self.browse_folder))
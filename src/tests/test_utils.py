@@ -1,7 +1,12 @@
+import hashlib
+import json
 import os
 import random
 import shutil
-from unittest import TestCase, mock
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock, skipIf
 from unittest.mock import patch
 
 import faker
@@ -219,3 +224,1329 @@ class UtilsTestCase(TestCase):
             filepath=fake_filepath, chunksize=int(fake_filesize / 4)
         )
         self.assertNotEqual(test_full_file_hash, test_trimmed_file_hash)
+
+
+class FuzzyMatcherTestCase(TestCase):
+    """
+    Checks that the `FuzzyMatcher` scores batches of queries correctly with every available scorer.
+    """
+
+    def setUp(self):
+        self.search_list = [
+            {
+                "Title": "The Matrix",
+                "imdbID": "tt0133093",
+                "Type": "movie",
+                "Poster": fake.url(),
+            },
+            {
+                "Title": "The Matrix Reloaded",
+                "imdbID": "tt0234215",
+                "Type": "movie",
+                "Poster": fake.url(),
+            },
+            {
+                "Title": "The Matrix Revisited",
+                "imdbID": "tt0295432",
+                "Type": "movie",
+                "Poster": "N/A",
+            },
+            {
+                "Title": "The Animatrix",
+                "imdbID": "tt0328832",
+                "Type": "series",
+                "Poster": fake.url(),
+            },
+        ]
+
+    def test_score_matrix_has_one_row_per_query_and_one_column_per_candidate(self):
+        """Ensures the score matrix is shaped (queries x candidates) and candidates without posters are dropped."""
+        fuzzy_matcher = utils.FuzzyMatcher(search_list=self.search_list)
+        search_queries = [
+            fake.word() for iteration in range(fake.pyint(min_value=1, max_value=5))
+        ]
+        score_matrix = fuzzy_matcher.score_matrix(search_queries=search_queries)
+
+        self.assertEqual(
+            fuzzy_matcher.titles, ["The Matrix", "The Matrix Reloaded", "The Animatrix"]
+        )
+        self.assertEqual(len(score_matrix), len(search_queries))
+        for row in score_matrix:
+            self.assertEqual(len(row), len(fuzzy_matcher.titles))
+
+    def test_best_matches_with_every_scorer(self):
+        """Ensures every registered scorer picks the right candidate for each query in the batch."""
+        for scorer in utils.fuzzy_matcher.SCORERS:
+            fuzzy_matcher = utils.FuzzyMatcher(
+                search_list=self.search_list, scorer=scorer
+            )
+            best_matches = fuzzy_matcher.best_matches(
+                search_queries=["the matrix", "the matrix reloaded"]
+            )
+            self.assertEqual(best_matches[0][:2], ("The Matrix", "tt0133093"))
+            self.assertEqual(best_matches[1][:2], ("The Matrix Reloaded", "tt0234215"))
+            self.assertEqual(best_matches[0][2], 100)
+
+    def test_best_matches_with_result_type(self):
+        """Ensures only candidates of the given `result_type` are scored."""
+        fuzzy_matcher = utils.FuzzyMatcher(
+            search_list=self.search_list, result_type="series"
+        )
+        ((title, imdb_id, score),) = fuzzy_matcher.best_matches(
+            search_queries=["the matrix"]
+        )
+        self.assertEqual(imdb_id, "tt0328832")
+
+    def test_best_matches_with_empty_candidate_pool(self):
+        """Ensures an empty candidate pool returns an empty result for every query."""
+        fuzzy_matcher = utils.FuzzyMatcher(search_list=[], scorer="builtin")
+        self.assertEqual(
+            fuzzy_matcher.best_matches(search_queries=["a", "b"]),
+            [(None, None, 0), (None, None, 0)],
+        )
+
+    def test_get_scorer_with_unknown_scorer_raises_valueerror(self):
+        """Ensures an unknown scorer name raises a `ValueError`."""
+        with self.assertRaises(ValueError):
+            utils.get_scorer(scorer=fake.word() + "_scorer")
+
+
+class ResolutionCacheTestCase(TestCase):
+    """
+    Checks that the `ResolutionCache` can be seeded from metadata files, exported, and imported.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def test_normalize_release_name(self):
+        """Ensures release names that only differ by punctuation and case normalize identically."""
+        self.assertEqual(
+            utils.normalize_release_name("The.Matrix.1999.1080p.BluRay.x264-GROUP"),
+            utils.normalize_release_name("the matrix_1999 1080p BluRay x264 GROUP"),
+        )
+
+    def test_import_metadata_files_and_export_cache(self):
+        """Ensures resolutions seeded from metadata files survive an export and import round trip."""
+        # Only examples that are known to resolve to an IMDb ID:
+        example_titles = [
+            example_title
+            for example_title in self.example_titles
+            if list(example_title.values())[0]["imdb_id"]
+        ][:4]
+        metadata_filepaths = []
+        for library_index, example_title in enumerate(example_titles):
+            ((original_filename, example_metadata),) = example_title.items()
+            library_folder = os.path.join(self.test_folder, f"library_{library_index}")
+            os.makedirs(library_folder)
+            metadata_filepath = os.path.join(
+                library_folder, blockbuster.METADATA_FILENAME
+            )
+            with open(metadata_filepath, mode="w") as outfile:
+                json.dump(
+                    {
+                        "titles": [
+                            {
+                                "original_filename": original_filename,
+                                "title": example_metadata["title"],
+                                "imdb_id": example_metadata["imdb_id"],
+                            }
+                        ],
+                        "metadata": [],
+                        "errors": [],
+                    },
+                    outfile,
+                )
+            metadata_filepaths.append(metadata_filepath)
+
+        resolution_cache = utils.ResolutionCache()
+        imported = resolution_cache.import_metadata_files(
+            metadata_filepaths=metadata_filepaths
+            + [os.path.join(self.test_folder, fake.word())]
+        )
+        self.assertEqual(imported, len(metadata_filepaths))
+
+        cache_filepath = os.path.join(self.test_folder, "resolutions.json")
+        resolution_cache.export_cache(filepath=cache_filepath)
+        imported_resolution_cache = utils.ResolutionCache(filepath=cache_filepath)
+
+        self.assertEqual(len(imported_resolution_cache), len(metadata_filepaths))
+        for example_title in example_titles:
+            ((original_filename, example_metadata),) = example_title.items()
+            self.assertEqual(
+                imported_resolution_cache.get(release_name=original_filename.upper()),
+                example_metadata["imdb_id"],
+            )
+        self.assertIsNone(imported_resolution_cache.get(release_name=fake.sentence()))
+        self.assertEqual(imported_resolution_cache.hits, len(metadata_filepaths))
+        self.assertEqual(imported_resolution_cache.misses, 1)
+
+
+class MetadataBackendTestCase(TestCase):
+    """
+    Checks that every metadata backend stores the JSON layout, and that the SQLite backend imports and exports it.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def test_append_find_and_update_titles(self):
+        """Ensures every backend appends entries, deduplicates IMDb objects, and finds and updates `titles` entries."""
+        for backend in utils.METADATA_BACKENDS:
+            with self.subTest(backend=backend):
+                metadata_backend = utils.get_metadata_backend(
+                    directory=self.test_folder,
+                    metadata_filename=f"{backend}.json",
+                    backend=backend,
+                )
+                self.assertTrue(metadata_backend.initialize())
+                self.assertFalse(metadata_backend.initialize())
+
+                titles = [
+                    {"original_filename": fake.word(), "title": fake.sentence()}
+                    for _ in range(3)
+                ]
+                metadata_backend.append_many(content_key="titles", new_contents=titles)
+                metadata_backend.append(
+                    content_key="metadata",
+                    new_content={"imdbID": "tt0000001", "Title": fake.word()},
+                )
+                metadata_backend.append(
+                    content_key="metadata", new_content={"Title": fake.word()}
+                )
+                latest_imdb_object = {"imdbID": "tt0000001", "Title": fake.word()}
+                metadata_backend.append(
+                    content_key="metadata", new_content=latest_imdb_object
+                )
+                with self.assertRaises(KeyError):
+                    metadata_backend.append(content_key=fake.word(), new_content={})
+
+                metadata_backend.update_title(
+                    title=titles[1]["title"], values={"type": "series"}
+                )
+                titles[1]["type"] = "series"
+
+                self.assertEqual(
+                    metadata_backend.find_title(
+                        key="original_filename", value=titles[1]["original_filename"]
+                    ),
+                    titles[1],
+                )
+                self.assertIsNone(
+                    metadata_backend.find_title(key="title", value=fake.sentence())
+                )
+                self.assertEqual(
+                    metadata_backend.find_title(key="type", value="series"), titles[1]
+                )
+
+                metadata = metadata_backend.load()
+                self.assertListEqual(list(metadata_backend.iter_titles()), titles)
+                self.assertListEqual(metadata["titles"], titles)
+                self.assertEqual(len(metadata["metadata"]), 2)
+                self.assertEqual(metadata["metadata"][0], latest_imdb_object)
+                self.assertListEqual(metadata["errors"], [])
+                metadata_backend.close()
+
+    def test_sqlite_backend_imports_and_exports_json_layout(self):
+        """Ensures the SQLite backend imports an existing metadata file on creation, and exports the same JSON layout."""
+        metadata = {
+            "titles": [
+                {
+                    "original_filename": original_filename,
+                    "title": example_metadata["title"],
+                    "imdb_id": example_metadata["imdb_id"],
+                }
+                for example_title in self.example_titles
+                for original_filename, example_metadata in example_title.items()
+            ],
+            "metadata": [{"imdbID": "tt0000001", "Title": fake.word()}],
+            "errors": [{"original_filename": fake.word()}],
+        }
+        metadata_filepath = os.path.join(
+            self.test_folder, blockbuster.METADATA_FILENAME
+        )
+        with open(metadata_filepath, mode="w") as outfile:
+            json.dump(metadata, outfile)
+
+        metadata_backend = utils.get_metadata_backend(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            backend="sqlite",
+        )
+        self.assertFalse(metadata_backend.exists())
+        self.assertTrue(metadata_backend.initialize())
+        self.assertTrue(os.path.exists(metadata_backend.database_filepath))
+        self.assertDictEqual(metadata_backend.load(), metadata)
+
+        export_filepath = os.path.join(self.test_folder, "export.json")
+        metadata_backend.export_json(filepath=export_filepath)
+        metadata_backend.close()
+        with open(export_filepath) as infile:
+            self.assertDictEqual(json.load(infile), metadata)
+
+        self.assertTrue(
+            os.path.basename(metadata_backend.database_filepath)
+            in utils.metadata_storage_filenames(blockbuster.METADATA_FILENAME)
+        )
+
+    def test_journal_backend_survives_truncated_lines_and_compacts(self):
+        """Ensures the journal backend skips a line truncated by a crash, and compacts the journal into `metadata.json`."""
+        metadata_backend = utils.get_metadata_backend(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            backend="journal",
+        )
+        titles = [{"title": fake.sentence(), "imdb_id": fake.word()} for _ in range(2)]
+        metadata_backend.append(content_key="titles", new_content=titles[0])
+        # A crash mid-append leaves a truncated line behind:
+        with open(metadata_backend.journal_filepath, mode="a") as outfile:
+            outfile.write('{"op":"append","key":"titles","entry":{"title":')
+        restarted_metadata_backend = utils.get_metadata_backend(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            backend="journal",
+        )
+        restarted_metadata_backend.append(content_key="titles", new_content=titles[1])
+        restarted_metadata_backend.append(
+            content_key="errors", new_content={"original_filename": fake.word()}
+        )
+        self.assertListEqual(list(restarted_metadata_backend.iter_titles()), titles)
+
+        # An interrupted compaction (after the compacted snapshot became authoritative) is finished on the next read:
+        expected_metadata = restarted_metadata_backend.load()
+        with open(
+            metadata_backend.metadata_filepath + ".compacted", mode="w"
+        ) as outfile:
+            json.dump(expected_metadata, outfile)
+        os.remove(metadata_backend.journal_filepath)
+        self.assertDictEqual(restarted_metadata_backend.load(), expected_metadata)
+
+        restarted_metadata_backend.append(content_key="titles", new_content=titles[0])
+        restarted_metadata_backend.close()
+        self.assertFalse(os.path.exists(metadata_backend.journal_filepath))
+        with open(metadata_backend.metadata_filepath) as infile:
+            metadata = json.load(infile)
+        self.assertListEqual(metadata["titles"], titles + [titles[0]])
+        self.assertEqual(len(metadata["errors"]), 1)
+
+    def test_journal_backend_iter_titles_during_compaction(self):
+        """Ensures a compaction running while the titles are streamed neither duplicates nor drops any of them."""
+        metadata_backend = utils.JournalMetadataBackend(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            compaction_threshold=0,
+        )
+        titles = [{"title": fake.sentence(), "imdb_id": fake.word()} for _ in range(4)]
+        metadata_backend.append_many(content_key="titles", new_contents=titles[:2])
+        metadata_backend.compact_journal()
+        metadata_backend.append_many(content_key="titles", new_contents=titles[2:])
+        metadata_backend.update_title(
+            title=titles[3]["title"], values={"type": "series"}
+        )
+
+        title_iterator = metadata_backend.iter_titles()
+        streamed_titles = [next(title_iterator)]
+        # The journal is moved into the snapshot halfway through:
+        self.assertTrue(metadata_backend.compact_journal())
+        streamed_titles.extend(title_iterator)
+
+        titles[3]["type"] = "series"
+        self.assertListEqual(streamed_titles, titles)
+        self.assertListEqual(list(metadata_backend.iter_titles()), titles)
+
+    def test_journal_backend_resumes_compaction_after_truncated_line(self):
+        """Ensures a journal folded into an interrupted compaction ending in a truncated line keeps all its records."""
+        metadata_backend = utils.get_metadata_backend(
+            directory=self.test_folder,
+            metadata_filename=blockbuster.METADATA_FILENAME,
+            backend="journal",
+        )
+        titles = [{"title": fake.sentence(), "imdb_id": fake.word()} for _ in range(2)]
+        # A compaction interrupted while the journal being compacted ended in a truncated line:
+        with open(
+            metadata_backend.journal_filepath + ".compacting", mode="w"
+        ) as outfile:
+            outfile.write(
+                json.dumps({"op": "append", "key": "titles", "entry": titles[0]})
+                + '\n{"op":"append","key":"titles","entry":{"title":'
+            )
+        metadata_backend.append(content_key="titles", new_content=titles[1])
+
+        self.assertTrue(metadata_backend.compact_journal())
+        with open(metadata_backend.metadata_filepath) as infile:
+            self.assertListEqual(json.load(infile)["titles"], titles)
+
+    def test_get_metadata_backend_with_unknown_backend_raises_valueerror(self):
+        """Ensures an unknown backend name raises a `ValueError`."""
+        with self.assertRaises(ValueError):
+            utils.get_metadata_backend(
+                directory=self.test_folder, backend=fake.word() + "_backend"
+            )
+
+
+class JsonStreamTestCase(TestCase):
+    """
+    Checks that `iter_json_array()` streams a single top-level array out of a JSON document.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def test_iter_json_array_matches_json_load(self):
+        """Ensures streamed items match `json.load()`, for any chunk size and whichever section comes first."""
+        metadata = {
+            "metadata": [
+                {
+                    "imdbID": fake.word(),
+                    "Plot": 'A "quoted" plot with [brackets], {braces} and a backslash \\',
+                    "Ratings": [{"Source": fake.word(), "Value": "8.1/10"}],
+                    "Runtime": 136,
+                }
+                for _ in range(5)
+            ],
+            "titles": [
+                {
+                    "original_filename": original_filename,
+                    "title": example_metadata["title"] + " ünïcödé",
+                    "imdb_id": example_metadata["imdb_id"],
+                    "episodes": [],
+                }
+                for example_title in self.example_titles
+                for original_filename, example_metadata in example_title.items()
+            ]
+            + [12345],
+            "errors": [],
+        }
+        metadata_filepath = os.path.join(
+            self.test_folder, blockbuster.METADATA_FILENAME
+        )
+        for indent in [None, 4]:
+            with open(metadata_filepath, mode="w", encoding="UTF-8") as outfile:
+                json.dump(metadata, outfile, indent=indent, ensure_ascii=False)
+
+            for chunk_size in [1, 7, 65536]:
+                with self.subTest(indent=indent, chunk_size=chunk_size):
+                    self.assertListEqual(
+                        list(
+                            utils.iter_json_array(
+                                filepath=metadata_filepath,
+                                key="titles",
+                                chunk_size=chunk_size,
+                            )
+                        ),
+                        metadata["titles"],
+                    )
+                    self.assertListEqual(
+                        list(
+                            utils.iter_json_array(
+                                filepath=metadata_filepath,
+                                key="errors",
+                                chunk_size=chunk_size,
+                            )
+                        ),
+                        [],
+                    )
+                    self.assertListEqual(
+                        list(
+                            utils.iter_json_array(
+                                filepath=metadata_filepath,
+                                key=fake.word() + "_key",
+                                chunk_size=chunk_size,
+                            )
+                        ),
+                        [],
+                    )
+
+    def test_iter_json_array_with_numbers_across_chunks(self):
+        """Ensures numbers split across chunk boundaries (i.e., `12.` and `5`) are decoded whole, for every chunk size."""
+        metadata_filepath = os.path.join(
+            self.test_folder, blockbuster.METADATA_FILENAME
+        )
+        for document, titles in [
+            ('{"version": 12.5, "titles": [{"a": 1}]}', [{"a": 1}]),
+            ('{"titles": [1.25, 3]}', [1.25, 3]),
+            ('{"titles": [-1.5e+10, 2E-3, 0]}', [-1.5e10, 2e-3, 0]),
+        ]:
+            with open(metadata_filepath, mode="w", encoding="UTF-8") as outfile:
+                outfile.write(document)
+
+            for chunk_size in range(1, len(document) + 1):
+                with self.subTest(document=document, chunk_size=chunk_size):
+                    self.assertListEqual(
+                        list(
+                            utils.iter_json_array(
+                                filepath=metadata_filepath,
+                                key="titles",
+                                chunk_size=chunk_size,
+                            )
+                        ),
+                        titles,
+                    )
+
+
+class PosterCacheTestCase(TestCase):
+    """
+    Checks that the `PosterCache` stores posters by content hash, places them into title folders, and evicts the least recently used.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+        self.cache_directory = os.path.join(self.test_folder, "poster_cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def _create_poster(self, content):
+        poster_filepath = os.path.join(self.test_folder, f"{fake.uuid4()}.jpg")
+        with open(poster_filepath, "wb") as outfile:
+            outfile.write(content)
+        return poster_filepath
+
+    def test_add_and_materialize_poster(self):
+        """Ensures a cached poster is stored once per content hash, survives a reload, and is hardlinked into place."""
+        content = fake.binary(length=2048)
+        poster_cache = utils.PosterCache(directory=self.cache_directory)
+        first_url, second_url = fake.url(), fake.url()
+        content_hash = poster_cache.add(
+            url=first_url, filepath=self._create_poster(content)
+        )
+        self.assertEqual(
+            poster_cache.add(url=second_url, filepath=self._create_poster(content)),
+            content_hash,
+        )
+        poster_cache.save()
+
+        reloaded_poster_cache = utils.PosterCache(directory=self.cache_directory)
+        self.assertEqual(len(reloaded_poster_cache), 2)
+        self.assertIsNone(
+            reloaded_poster_cache.materialize(
+                url=fake.url(),
+                destination=os.path.join(self.test_folder, "missing.jpg"),
+            )
+        )
+        destination = os.path.join(self.test_folder, "poster.jpg")
+        self.assertEqual(
+            reloaded_poster_cache.materialize(url=second_url, destination=destination),
+            content_hash,
+        )
+        with open(destination, "rb") as infile:
+            self.assertEqual(infile.read(), content)
+        self.assertEqual(utils.hash_file(filepath=destination), content_hash)
+        # The first poster, the cached copy (shared by both URLs) and the destination are hardlinks of each other:
+        self.assertEqual(os.stat(destination).st_nlink, 3)
+        self.assertEqual(reloaded_poster_cache.hits, 1)
+        self.assertEqual(reloaded_poster_cache.misses, 1)
+
+    def test_evict_least_recently_used_posters(self):
+        """Ensures eviction keeps the cache under its size cap, removing the least recently used posters first."""
+        poster_cache = utils.PosterCache(directory=self.cache_directory, max_size=2500)
+        urls = [fake.url() for _ in range(3)]
+        for index, url in enumerate(urls):
+            poster_filepath = self._create_poster(fake.binary(length=1000))
+            poster_cache.add(url=url, filepath=poster_filepath)
+            # No library links to the poster anymore:
+            os.remove(poster_filepath)
+            # Make the LRU order explicit:
+            content_hash = poster_cache.get(url=url)
+            object_path = os.path.join(
+                self.cache_directory, "objects", content_hash[:2], content_hash
+            )
+            os.utime(object_path, (1000000 + index, 1000000 + index))
+
+        self.assertEqual(poster_cache.evict(), 1)
+        poster_cache.save()
+        self.assertIsNone(poster_cache.get(url=urls[0]))
+        self.assertIsNotNone(poster_cache.get(url=urls[1]))
+        self.assertIsNotNone(poster_cache.get(url=urls[2]))
+
+    def test_evict_only_counts_unlinked_posters(self):
+        """Ensures posters still hardlinked into a library are neither counted toward the size cap nor evicted."""
+        poster_cache = utils.PosterCache(directory=self.cache_directory, max_size=1500)
+        linked_url, unlinked_url = fake.url(), fake.url()
+        poster_cache.add(
+            url=linked_url, filepath=self._create_poster(fake.binary(length=1000))
+        )
+        unlinked_poster_filepath = self._create_poster(fake.binary(length=1000))
+        poster_cache.add(url=unlinked_url, filepath=unlinked_poster_filepath)
+        os.remove(unlinked_poster_filepath)
+
+        # Only the unlinked poster takes space of its own, which is under the cap:
+        self.assertEqual(poster_cache.evict(), 0)
+        # Linked posters are kept, even over the cap, as evicting them would free nothing:
+        self.assertEqual(poster_cache.evict(max_size=0), 1)
+        self.assertIsNotNone(poster_cache.get(url=linked_url))
+        self.assertIsNone(poster_cache.get(url=unlinked_url))
+
+
+class FileHashingTestCase(TestCase):
+    """
+    Checks that the partial-file hashes match the SubDB and OpenSubtitles reference algorithms, for files of any size.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    @staticmethod
+    def _reference_hashes(content):
+        """The SubDB and OpenSubtitles hashes, computed the straightforward way."""
+        chunk_size = 64 * 1024
+        head, tail = content[:chunk_size], content[-chunk_size:]
+        checksum = len(content)
+        for chunk in [head, tail]:
+            chunk += b"\x00" * (-len(chunk) % 8)
+            for (word,) in struct.iter_unpack("<Q", chunk):
+                checksum = (checksum + word) & 0xFFFFFFFFFFFFFFFF
+        return {
+            "size": len(content),
+            "subdb": hashlib.md5(head + tail).hexdigest(),
+            "opensubtitles": f"{checksum:016x}",
+        }
+
+    def test_hash_media_file(self):
+        """Ensures `hash_media_file()` matches both reference hashes, including for files shorter than a chunk."""
+        for size in [0, 7, 13, 64 * 1024 - 1, 64 * 1024, 100 * 1024, 384 * 1024 + 3]:
+            content = os.urandom(size)
+            filepath = os.path.join(self.test_folder, fake.uuid4())
+            with open(filepath, "wb") as outfile:
+                outfile.write(content)
+
+            self.assertEqual(
+                utils.hash_media_file(filepath=filepath),
+                self._reference_hashes(content=content),
+            )
+            # The OpenSubtitles hash is only defined over 64 KB chunks:
+            self.assertIsNone(
+                utils.hash_media_file(filepath=filepath, chunk_size=4096)[
+                    "opensubtitles"
+                ]
+            )
+
+        # The SubDB sample file (`dexter.mp4`, trimmed to its head and tail chunks):
+        self.assertEqual(
+            utils.hash_media_file(
+                filepath=os.path.join(
+                    blockbuster.TEST_FOLDER,
+                    "test_examples",
+                    "ffd8d4aa68033dc03d1c8ef373b9028c",
+                )
+            )["subdb"],
+            "ffd8d4aa68033dc03d1c8ef373b9028c",
+        )
+
+    def test_hash_media_files(self):
+        """Ensures the batch API hashes every file, and maps files that can't be read to None."""
+        filepaths = []
+        for _ in range(5):
+            filepath = os.path.join(self.test_folder, fake.uuid4())
+            utils.create_random_file(
+                directory=self.test_folder,
+                filename=os.path.basename(filepath),
+                filesize=fake.pyint(min_value=1, max_value=256),
+            )
+            filepaths.append(filepath)
+        missing_filepath = os.path.join(self.test_folder, fake.uuid4())
+
+        file_hashes = utils.hash_media_files(filepaths=filepaths + [missing_filepath])
+        self.assertEqual(sorted(file_hashes), sorted(filepaths + [missing_filepath]))
+        self.assertIsNone(file_hashes[missing_filepath])
+        for filepath in filepaths:
+            self.assertEqual(
+                file_hashes[filepath], utils.hash_media_file(filepath=filepath)
+            )
+
+    def test_hash_media_files_per_device(self):
+        """Ensures files are grouped by device, and every device gets its own pool of `max_workers_per_device` readers."""
+        filepaths = []
+        for _ in range(4):
+            filepath = os.path.join(self.test_folder, fake.uuid4())
+            with open(filepath, "wb") as outfile:
+                outfile.write(os.urandom(fake.pyint(min_value=1, max_value=4096)))
+            filepaths.append(filepath)
+        missing_filepath = os.path.join(self.test_folder, fake.uuid4())
+        self.assertEqual(
+            utils.group_by_device(filepaths=filepaths + [missing_filepath]),
+            {os.stat(self.test_folder).st_dev: filepaths, None: [missing_filepath]},
+        )
+
+        with patch(
+            f"{module_under_test}.file_hashing.group_by_device",
+            return_value={
+                1: filepaths[:3],
+                2: filepaths[3:],
+                None: [missing_filepath],
+            },
+        ), patch(
+            f"{module_under_test}.file_hashing.ThreadPoolExecutor",
+            wraps=ThreadPoolExecutor,
+        ) as executor_patch:
+            file_hashes = utils.hash_media_files(
+                filepaths=[missing_filepath] + filepaths, max_workers_per_device=3
+            )
+
+        self.assertEqual(executor_patch.call_count, 2)
+        for call in executor_patch.call_args_list:
+            self.assertEqual(call.kwargs["max_workers"], 3)
+        self.assertEqual(list(file_hashes), [missing_filepath] + filepaths)
+        self.assertIsNone(file_hashes[missing_filepath])
+        for filepath in filepaths:
+            self.assertEqual(
+                file_hashes[filepath], utils.hash_media_file(filepath=filepath)
+            )
+
+
+class MediaFileReaderTestCase(TestCase):
+    """
+    Checks that the `MediaFileReader` reads exact ranges, and gives the page cache the right hints.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+        self.content = os.urandom(fake.pyint(min_value=1024, max_value=65536))
+        self.filepath = os.path.join(self.test_folder, fake.uuid4())
+        with open(self.filepath, "wb") as outfile:
+            outfile.write(self.content)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def test_read(self):
+        """Ensures reads return the requested range, truncated at the end of the file."""
+        with utils.MediaFileReader(filepath=self.filepath) as reader:
+            self.assertEqual(reader.size, len(self.content))
+            self.assertEqual(reader.read(length=100, offset=10), self.content[10:110])
+            self.assertEqual(
+                reader.read(length=100, offset=len(self.content) - 40),
+                self.content[-40:],
+            )
+            self.assertEqual(reader.read(length=100, offset=len(self.content)), b"")
+            with self.assertRaises(OSError):
+                reader.read_into(
+                    view=memoryview(bytearray(10)), offset=len(self.content) - 5
+                )
+
+    @skipIf(not utils.media_reader.FADVISE, "Requires `os.posix_fadvise()`")
+    def test_page_cache_hints(self):
+        """Ensures the file is declared random-access and read-once, and only the ranges read are dropped afterwards."""
+        with patch(
+            f"{module_under_test}.media_reader.os.posix_fadvise"
+        ) as fadvise_patch:
+            with utils.MediaFileReader(filepath=self.filepath) as reader:
+                file_descriptor = reader._file_descriptor
+                self.assertEqual(
+                    fadvise_patch.call_args_list,
+                    [
+                        mock.call(file_descriptor, 0, 0, os.POSIX_FADV_RANDOM),
+                        mock.call(file_descriptor, 0, 0, os.POSIX_FADV_NOREUSE),
+                    ],
+                )
+                fadvise_patch.reset_mock()
+                reader.read(length=256, offset=0)
+                reader.read(length=512, offset=768)
+                fadvise_patch.assert_not_called()
+
+        self.assertEqual(
+            fadvise_patch.call_args_list,
+            [
+                mock.call(file_descriptor, 0, 256, os.POSIX_FADV_DONTNEED),
+                mock.call(file_descriptor, 768, 512, os.POSIX_FADV_DONTNEED),
+            ],
+        )
+
+
+class HashCacheTestCase(TestCase):
+    """
+    Checks that the `HashCache` only hashes files that are new or changed since they were last hashed.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+        self.hash_cache_filepath = os.path.join(self.test_folder, "hashes.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def _create_file(self):
+        filename = fake.uuid4()
+        utils.create_random_file(
+            directory=self.test_folder,
+            filename=filename,
+            filesize=fake.pyint(min_value=1, max_value=256),
+        )
+        return os.path.join(self.test_folder, filename)
+
+    def test_hash_file_survives_reloads_and_renames(self):
+        """Ensures a saved hash is reused by a new cache, even after the file is renamed, and dropped once the file changes."""
+        filepath = self._create_file()
+        hash_cache = utils.HashCache(filepath=self.hash_cache_filepath)
+        hashes = hash_cache.hash_file(filepath=filepath)
+        self.assertEqual(hashes, utils.hash_media_file(filepath=filepath))
+        self.assertEqual(hash_cache.misses, 1)
+        hash_cache.save()
+
+        renamed_filepath = os.path.join(self.test_folder, fake.uuid4())
+        os.rename(filepath, renamed_filepath)
+        reloaded_hash_cache = utils.HashCache(filepath=self.hash_cache_filepath)
+        with patch(f"{module_under_test}.hash_cache.hash_media_file") as hash_patch:
+            self.assertEqual(
+                reloaded_hash_cache.hash_file(filepath=renamed_filepath), hashes
+            )
+            hash_patch.assert_not_called()
+        self.assertEqual(reloaded_hash_cache.hits, 1)
+
+        # A different chunk size, or a modified file, means different hashes:
+        self.assertIsNone(
+            reloaded_hash_cache.get(filepath=renamed_filepath, chunk_size=4096)
+        )
+        with open(renamed_filepath, "ab") as outfile:
+            outfile.write(b"appended")
+        self.assertIsNone(reloaded_hash_cache.get(filepath=renamed_filepath))
+        self.assertEqual(
+            reloaded_hash_cache.hash_file(filepath=renamed_filepath),
+            utils.hash_media_file(filepath=renamed_filepath),
+        )
+
+    def test_hash_files_only_reads_missing_files(self):
+        """Ensures the batch API only reads files missing from the cache, and maps unreadable files to None."""
+        cached_filepaths = [self._create_file() for _ in range(3)]
+        hash_cache = utils.HashCache(filepath=self.hash_cache_filepath)
+        hash_cache.hash_files(filepaths=cached_filepaths)
+
+        new_filepath = self._create_file()
+        missing_filepath = os.path.join(self.test_folder, fake.uuid4())
+        with patch(
+            f"{module_under_test}.hash_cache.hash_media_files",
+            wraps=utils.hash_media_files,
+        ) as hash_patch:
+            file_hashes = hash_cache.hash_files(
+                filepaths=cached_filepaths + [new_filepath, missing_filepath]
+            )
+            hash_patch.assert_called_once_with(
+                filepaths=[new_filepath], chunk_size=64 * 1024, max_workers_per_device=2
+            )
+
+        self.assertIsNone(file_hashes[missing_filepath])
+        for filepath in cached_filepaths + [new_filepath]:
+            self.assertEqual(
+                file_hashes[filepath], utils.hash_media_file(filepath=filepath)
+            )
+        self.assertEqual(len(hash_cache), 4)
+
+    def test_save_prunes_deleted_and_modified_files(self):
+        """Ensures saving drops the entries of deleted or modified files, but keeps the ones of unused, unchanged files."""
+        deleted_filepath, modified_filepath, unused_filepath = [
+            self._create_file() for _ in range(3)
+        ]
+        hash_cache = utils.HashCache(filepath=self.hash_cache_filepath)
+        hash_cache.hash_files(
+            filepaths=[deleted_filepath, modified_filepath, unused_filepath]
+        )
+        hash_cache.save()
+
+        os.remove(deleted_filepath)
+        with open(modified_filepath, "ab") as outfile:
+            outfile.write(b"appended")
+        renamed_filepath = os.path.join(self.test_folder, fake.uuid4())
+        os.rename(unused_filepath, renamed_filepath)
+        # A later run (over another library, say) only hashes a new file:
+        new_filepath = self._create_file()
+        reloaded_hash_cache = utils.HashCache(filepath=self.hash_cache_filepath)
+        reloaded_hash_cache.hash_file(filepath=new_filepath)
+        reloaded_hash_cache.save()
+
+        # The renamed file isn't where it was last seen anymore, so only the new file is kept:
+        self.assertEqual(len(utils.HashCache(filepath=self.hash_cache_filepath)), 1)
+
+        # Unused files still at their last path are kept:
+        reloaded_hash_cache.hash_file(filepath=renamed_filepath)
+        reloaded_hash_cache.save()
+        another_filepath = self._create_file()
+        last_hash_cache = utils.HashCache(filepath=self.hash_cache_filepath)
+        last_hash_cache.hash_file(filepath=another_filepath)
+        last_hash_cache.save()
+        self.assertEqual(len(utils.HashCache(filepath=self.hash_cache_filepath)), 3)
+
+
+class SubtitleProvidersTestCase(TestCase):
+    """
+    Checks that the `SubtitleProviderPool` settles on the fastest providers that have every wanted language.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+        self.hashes = {"subdb": fake.md5(), "opensubtitles": fake.hexify("^" * 16)}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def _create_local_provider(self, languages, latency=0):
+        directory = os.path.join(self.test_folder, fake.uuid4())
+        subtitle_folder = os.path.join(directory, self.hashes["opensubtitles"])
+        os.makedirs(subtitle_folder)
+        for language in languages:
+            with open(
+                os.path.join(subtitle_folder, f"{language}.srt"), "w", encoding="UTF-8"
+            ) as outfile:
+                outfile.write(f"{language} {directory}")
+        return utils.LocalSubtitleProvider(directory=directory, latency=latency)
+
+    def test_local_provider(self):
+        """Ensures the local provider finds subtitles by either hash."""
+        provider = self._create_local_provider(languages=["es", "en"])
+        self.assertEqual(provider.search(hashes=self.hashes), ["en", "es"])
+        self.assertTrue(
+            provider.download(hashes=self.hashes, language="es").startswith("es ")
+        )
+        self.assertIsNone(provider.download(hashes=self.hashes, language="fr"))
+        self.assertEqual(
+            provider.search(hashes={"subdb": fake.md5(), "opensubtitles": None}), []
+        )
+
+    def test_pool_settles_on_the_fastest_provider(self):
+        """Ensures the pool doesn't wait for slow providers once the answers cover every wanted language."""
+        slow_provider = self._create_local_provider(languages=["en"], latency=1)
+        fast_provider = self._create_local_provider(languages=["en", "fr"])
+        failing_provider = mock.Mock(name="failing")
+        failing_provider.search.side_effect = OSError("Connection refused")
+        provider_pool = utils.SubtitleProviderPool(
+            providers=[slow_provider, failing_provider, fast_provider]
+        )
+        try:
+            start_time = time.monotonic()
+            self.assertEqual(
+                provider_pool.search(hashes=self.hashes, languages=["en", "fr"]),
+                ({"en": fast_provider, "fr": fast_provider}, True),
+            )
+            self.assertLess(time.monotonic() - start_time, 0.5)
+        finally:
+            provider_pool.close()
+
+    def test_pool_merges_providers(self):
+        """Ensures the answers of every provider are merged when none has every wanted language."""
+        first_provider = self._create_local_provider(languages=["en"], latency=0.1)
+        second_provider = self._create_local_provider(languages=["en", "es"])
+        provider_pool = utils.SubtitleProviderPool(
+            providers=[first_provider, second_provider]
+        )
+        try:
+            self.assertEqual(
+                provider_pool.search(hashes=self.hashes, languages=["en", "es", "de"]),
+                ({"en": first_provider, "es": second_provider}, True),
+            )
+        finally:
+            provider_pool.close()
+
+        # A provider failed, so a language not found may still exist:
+        failing_provider = mock.Mock(name="failing")
+        failing_provider.search.side_effect = OSError("Connection refused")
+        provider_pool = utils.SubtitleProviderPool(
+            providers=[first_provider, failing_provider]
+        )
+        try:
+            self.assertEqual(
+                provider_pool.search(hashes=self.hashes, languages=["en", "es"]),
+                ({"en": first_provider}, False),
+            )
+        finally:
+            provider_pool.close()
+
+
+class SubtitleMissCacheTestCase(TestCase):
+    """
+    Checks that the `SubtitleMissCache` remembers subtitles that weren't found, until they expire.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+        self.subtitle_miss_cache_filepath = os.path.join(
+            self.test_folder, "subtitle_misses.json"
+        )
+        self.hashcode = fake.md5()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def test_misses_expire(self):
+        """Ensures a miss is only remembered for the time to live, and counts the searches it avoids."""
+        subtitle_miss_cache = utils.SubtitleMissCache(
+            filepath=self.subtitle_miss_cache_filepath, time_to_live=60
+        )
+        subtitle_miss_cache.add(hashcode=self.hashcode, language="en", now=1000)
+        self.assertTrue(
+            subtitle_miss_cache.is_missing(
+                hashcode=self.hashcode, language="en", now=1059
+            )
+        )
+        self.assertFalse(
+            subtitle_miss_cache.is_missing(
+                hashcode=self.hashcode, language="en", now=1060
+            )
+        )
+        self.assertFalse(
+            subtitle_miss_cache.is_missing(
+                hashcode=self.hashcode, language="es", now=1000
+            )
+        )
+        self.assertEqual(subtitle_miss_cache.avoided, 1)
+        self.assertEqual(subtitle_miss_cache.recorded, 1)
+
+    def test_save_merges_and_prunes(self):
+        """Ensures saved misses are merged with those another run saved, without the expired or since found ones."""
+        now = time.time()
+        first_cache = utils.SubtitleMissCache(
+            filepath=self.subtitle_miss_cache_filepath, time_to_live=60
+        )
+        second_cache = utils.SubtitleMissCache(
+            filepath=self.subtitle_miss_cache_filepath, time_to_live=60
+        )
+        first_cache.add(hashcode=self.hashcode, language="en", now=now)
+        first_cache.add(hashcode=self.hashcode, language="fr", now=now - 120)
+        first_cache.save(now=now)
+        second_cache.add(hashcode=self.hashcode, language="es", now=now)
+        second_cache.save(now=now)
+
+        reloaded_cache = utils.SubtitleMissCache(
+            filepath=self.subtitle_miss_cache_filepath, time_to_live=60
+        )
+        self.assertEqual(len(reloaded_cache), 2)
+        for language in ["en", "es"]:
+            self.assertTrue(
+                reloaded_cache.is_missing(hashcode=self.hashcode, language=language)
+            )
+
+        # A subtitle found since isn't brought back by the merge:
+        reloaded_cache.discard(hashcode=self.hashcode, language="en")
+        reloaded_cache.save()
+        self.assertFalse(
+            utils.SubtitleMissCache(
+                filepath=self.subtitle_miss_cache_filepath
+            ).is_missing(hashcode=self.hashcode, language="en")
+        )
+
+
+class MediaProbeTestCase(TestCase):
+    """
+    Checks that the `probe_media_file()` describes Matroska, MP4 and AVI files from their headers alone.
+    """
+
+    def setUp(self):
+        test_environment = blockbuster.BlockBusterBuilder(
+            level="pg-13",
+            test_folder=blockbuster.TEST_INPUT_FOLDER,
+        )
+        (
+            self.test_folder,
+            self.example_titles,
+        ) = test_environment.create_empty_environment()
+        self.filepath = os.path.join(self.test_folder, fake.uuid4())
+        self.duration = float(fake.pyint(min_value=600, max_value=10000))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_folder)
+
+    def _probe_without_media_data(self, media_size):
+        """Probes the file, ensuring (almost) none of the media data is read."""
+        with patch.object(
+            utils.MediaFileReader,
+            "read_into",
+            autospec=True,
+            side_effect=utils.MediaFileReader.read_into,
+        ) as read_into_patch:
+            probe = utils.probe_media_file(filepath=self.filepath)
+        bytes_read = sum(
+            len(call.kwargs["view"]) for call in read_into_patch.call_args_list
+        )
+        self.assertLess(bytes_read, media_size // 4)
+        return probe
+
+    def test_probe_matroska(self):
+        """Ensures every track is found before or after the media data, with their languages normalized."""
+        media_size = 256 * 1024
+        for tracks_after_media in [False, True]:
+            blockbuster.create_matroska_file(
+                filepath=self.filepath,
+                subtitle_languages=["fre", None, "pt-BR", "und"],
+                audio_languages=["ger"],
+                duration=self.duration,
+                media_size=media_size,
+                tracks_after_media=tracks_after_media,
+            )
+            probe = self._probe_without_media_data(media_size=media_size)
+            self.assertEqual(probe["container"], "matroska")
+            self.assertEqual(probe["duration"], self.duration)
+            self.assertEqual((probe["width"], probe["height"]), (1920, 1080))
+            self.assertEqual(probe["video_codec"], "V_MPEG4/ISO/AVC")
+            self.assertEqual(
+                probe["audio_tracks"], [{"language": "de", "codec": "A_AAC"}]
+            )
+            self.assertEqual(
+                [track["language"] for track in probe["subtitle_tracks"]],
+                ["fr", "en", "pt", None],
+            )
+            self.assertEqual(probe["subtitle_tracks"][0]["codec"], "S_TEXT/UTF8")
+        self.assertEqual(
+            utils.get_embedded_subtitle_languages(filepath=self.filepath),
+            {"fr", "en", "pt"},
+        )
+        self.assertEqual(utils.get_runtime_minutes(probe=probe), self.duration / 60)
+
+        # A truncated file is reported as corrupted:
+        with open(self.filepath, "r+b") as outfile:
+            outfile.truncate(media_size)
+        with self.assertRaises(ValueError):
+            utils.probe_media_file(filepath=self.filepath)
+
+    def test_probe_mp4(self):
+        """Ensures every track is found wherever the movie box is, skipping the sample tables."""
+        media_size = 256 * 1024
+        for moov_after_media in [False, True]:
+            blockbuster.create_mp4_file(
+                filepath=self.filepath,
+                subtitle_languages=["spa", "de-DE"],
+                audio_languages=["eng", "ita"],
+                duration=self.duration,
+                width=1280,
+                height=720,
+                media_size=media_size,
+                moov_after_media=moov_after_media,
+            )
+            probe = self._probe_without_media_data(media_size=media_size)
+            self.assertEqual(
+                probe,
+                {
+                    "container": "mp4",
+                    "duration": self.duration,
+                    "width": 1280,
+                    "height": 720,
+                    "video_codec": "avc1",
+                    "audio_tracks": [
+                        {"language": "en", "codec": "mp4a"},
+                        {"language": "it", "codec": "mp4a"},
+                    ],
+                    "subtitle_tracks": [
+                        {"language": "es", "codec": "tx3g"},
+                        {"language": "de", "codec": "tx3g"},
+                    ],
+                },
+            )
+
+    def test_probe_avi(self):
+        """Ensures the duration, resolution and codecs of AVI files are read from their header list."""
+        blockbuster.create_avi_file(
+            filepath=self.filepath, duration=self.duration, audio_streams=2
+        )
+        self.assertEqual(
+            utils.probe_media_file(filepath=self.filepath),
+            {
+                "container": "avi",
+                "duration": self.duration,
+                "width": 720,
+                "height": 480,
+                "video_codec": "XVID",
+                "audio_tracks": [{"language": None, "codec": "mp3"}] * 2,
+                "subtitle_tracks": [],
+            },
+        )
+
+    def test_probe_other_files(self):
+        """Ensures files in other containers are reported as such, and language codes are normalized."""
+        utils.create_random_file(
+            directory=self.test_folder, filename="movie", file_extension=".txt"
+        )
+        probe = utils.probe_media_file(
+            filepath=os.path.join(self.test_folder, "movie.txt")
+        )
+        self.assertIsNone(probe["container"])
+        self.assertIsNone(utils.get_runtime_minutes(probe=probe))
+        self.assertEqual(utils.normalize_language(language="ENG"), "en")
+        self.assertEqual(utils.normalize_language(language="en_US"), "en")
+        self.assertEqual(utils.normalize_language(language="tlh"), "tlh")
+        self.assertIsNone(utils.normalize_language(language="und"))
+
+    def test_probe_cache(self):
+        """Ensures the probe cache only probes new or changed files, and files that can't be probed map to None."""
+        filepaths = [os.path.join(self.test_folder, fake.uuid4()) for _ in range(3)]
+        for filepath in filepaths:
+            blockbuster.create_mp4_file(
+                filepath=filepath, subtitle_languages=[], duration=self.duration
+            )
+        corrupted_filepath = os.path.join(self.test_folder, fake.uuid4())
+        with open(corrupted_filepath, "wb") as outfile:
+            outfile.write(b"\x1a\x45\xdf\xa3" + os.urandom(16))
+        probe_cache_filepath = os.path.join(self.test_folder, "probes.json")
+
+        probe_cache = utils.ProbeCache(filepath=probe_cache_filepath)
+        probes = probe_cache.probe_files(filepaths=filepaths + [corrupted_filepath])
+        self.assertIsNone(probes[corrupted_filepath])
+        for filepath in filepaths:
+            self.assertEqual(probes[filepath]["duration"], self.duration)
+        probe_cache.save()
+
+        with open(filepaths[0], "ab") as outfile:
+            outfile.write(b"appended")
+        reloaded_probe_cache = utils.ProbeCache(filepath=probe_cache_filepath)
+        with patch(
+            f"{module_under_test}.probe_cache.probe_media_files",
+            wraps=utils.probe_media_files,
+        ) as probe_patch:
+            self.assertEqual(
+                reloaded_probe_cache.probe_files(filepaths=filepaths),
+                {filepath: probes[filepath] for filepath in filepaths},
+            )
+            probe_patch.assert_called_once_with(
+                filepaths=[filepaths[0]], max_workers_per_device=2
+            )
+        self.assertEqual(reloaded_probe_cache.hits, 2)
+
+
+class TitleClassifierTestCase(TestCase):
+    """
+    Checks that titles are classified as a `movie` or a `series` correctly.
+    """
+
+    def test_classify_title_with_episode_marker(self):
+        """Ensures titles (or their files) with episode markers are classified as a series."""
+        self.assertEqual(
+            utils.classify_title(title="Breaking.Bad.S01E02.720p")[0], "series"
+        )
+        self.assertEqual(
+            utils.classify_title(title="Breaking Bad", filenames=["bb.1x02.avi"])[0],
+            "series",
+        )
+
+    def test_classify_title_with_season_marker(self):
+        """Ensures show folders with season markers are classified as a series."""
+        self.assertEqual(
+            utils.classify_title(title="Planet.Earth.Season.1.1080p")[0], "series"
+        )
+        self.assertEqual(
+            utils.classify_title(title="Band.of.Brothers.S01")[0], "series"
+        )
+        self.assertEqual(
+            utils.classify_title(title="The Wire - The Complete Series")[0], "series"
+        )
+
+    def test_classify_title_with_season_words_in_movie_titles(self):
+        """Ensures movie titles merely containing "season" or "complete" aren't classified as a series."""
+        for title in [
+            "Season of the Witch (2011)",
+            "Open Season 2006",
+            "The Complete Works 2010",
+        ]:
+            self.assertEqual(utils.classify_title(title=title), ("movie", "default"))
+
+    def test_classify_title_with_episode_numbering(self):
+        """Ensures several movie files only differing by a number are classified as a series, but multi-part movies aren't."""
+        self.assertEqual(
+            utils.classify_title(
+                title="Cosmos", filenames=["Cosmos - 01.mkv", "Cosmos - 02.mkv"]
+            )[0],
+            "series",
+        )
+        self.assertEqual(
+            utils.classify_title(
+                title="The.Godfather.1972",
+                filenames=["The.Godfather.1972.CD1.avi", "The.Godfather.1972.CD2.avi"],
+            )[0],
+            "movie",
+        )
+
+    def test_classify_title_with_several_qualities(self):
+        """Ensures copies of a movie in different resolutions and codecs aren't mistaken for episode numbering."""
+        self.assertEqual(
+            utils.classify_title(
+                title="Heat.1995",
+                filenames=[
+                    "Heat.1995.1080p.mkv",
+                    "Heat.1995.720p.mkv",
+                    "Heat.1995.2160p.x265.mkv",
+                ],
+            ),
+            ("movie", "default"),
+        )
+
+    def test_classify_title_with_runtime(self):
+        """Ensures runtime hints are used when the name and folder structure aren't conclusive."""
+        self.assertEqual(
+            utils.classify_title(title="Sherlock", runtime_minutes=44)[0], "series"
+        )
+        self.assertEqual(
+            utils.classify_title(title="Sherlock", runtime_minutes=120)[0], "movie"
+        )
+        self.assertEqual(
+            utils.classify_title(title="The.Matrix.1999.1080p"), ("movie", "default")
+        )
@@ -12,4 +12,59 @@ from .utils import (
     create_random_file,
 )
 
-from .omdb_service import OmdbService
\ No newline at end of file
+from .file_hashing import (
+    get_content_fingerprint,
+    group_by_device,
+    hash_media_file,
+    hash_media_files,
+    map_by_device,
+    read_head_and_tail,
+)
+from .fuzzy_matcher import FuzzyMatcher, get_scorer
+from .hash_cache import HashCache, default_hash_cache_filepath
+from .json_stream import iter_json_array, iter_json_file_array
+from .media_probe import (
+    MEDIA_PROBE_VERSION,
+    get_embedded_subtitle_languages,
+    get_runtime_minutes,
+    normalize_language,
+    probe_media_file,
+    probe_media_files,
+)
+from .media_reader import MediaFileReader
+from .metadata_backends import (
+    METADATA_BACKENDS,
+    JournalMetadataBackend,
+    JsonMetadataBackend,
+    MetadataBackend,
+    SqliteMetadataBackend,
+    deduplicate_imdb_objects,
+    get_metadata_backend,
+    metadata_storage_filenames,
+    view_manifest_filename,
+)
+from .omdb_service import OmdbService
+from .poster_cache import (
+    PosterCache,
+    default_poster_cache_directory,
+    hash_file,
+    link_or_copy,
+)
+from .probe_cache import ProbeCache, default_probe_cache_filepath
+from .resolution_cache import ResolutionCache, normalize_release_name
+from .subtitle_miss_cache import (
+    SubtitleMissCache,
+    default_subtitle_miss_cache_filepath,
+)
+from .subtitle_providers import (
+    LocalSubtitleProvider,
+    SubtitleProvider,
+    SubtitleProviderPool,
+)
+from .title_classifier import (
+    EPISODE_PATTERNS,
+    MOVIE_FILE_EXTENSIONS,
+    SEASON_FOLDER_PATTERN,
+    classify_title,
+    has_episode_marker,
+)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Partial-file hashes of media files, as used to look up subtitles by content.
+
+Only the first and last chunks of a file are read (through a `MediaFileReader`, straight into a single
+preallocated buffer), and every digest is computed from that buffer in one pass, without intermediate copies:
+
+- `subdb`: The `md5` hex digest of the first and last 64 KB (the SubDB hash).
+- `opensubtitles`: The file size plus the sum of the little-endian 64-bit words of the first and last 64 KB,
+  modulo 2^64, as 16 hex digits (the OpenSubtitles hash).
+
+Files shorter than a chunk are hashed as if the head and the tail chunks were both the whole file,
+and a trailing partial 64-bit word is zero-padded.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .media_reader import MediaFileReader
+
+HASH_CHUNK_SIZE = 64 * 1024
+# The OpenSubtitles hash is only defined over 64 KB chunks:
+OPENSUBTITLES_CHUNK_SIZE = 64 * 1024
+WORD_SIZE = 8
+WORD_MASK = 0xFFFFFFFFFFFFFFFF
+
+
+def _padded(length):
+    """
+
+    :param int length: A number of bytes.
+    :return int: The length, rounded up to a whole number of 64-bit words.
+    """
+    return -(-length // WORD_SIZE) * WORD_SIZE
+
+
+def read_head_and_tail(filepath, chunk_size=HASH_CHUNK_SIZE):
+    """
+
+    :param str filepath: The path of the file to read.
+    :param int chunk_size: The size (in bytes) of the head and tail chunks.
+    :return tuple: The file size, and a memoryview of the head chunk and one of the tail chunk.
+
+    Both chunks are read into a single buffer, each zero-padded to a whole number of 64-bit words
+    (so the buffer can be summed as words). For files shorter than a chunk, both chunks are the whole file.
+    The chunks are dropped from the page cache once read.
+    """
+    with MediaFileReader(filepath=filepath) as reader:
+        size = reader.size
+        chunk_length = min(chunk_size, size)
+        padded_length = _padded(chunk_length)
+
+        buffer = memoryview(bytearray(2 * padded_length))
+        head = buffer[:chunk_length]
+        tail = buffer[padded_length : padded_length + chunk_length]
+        reader.read_into(view=head, offset=0)
+        reader.read_into(view=tail, offset=size - chunk_length)
+
+    return size, head, tail
+
+
+def _sum_words(buffer):
+    """
+
+    :param memoryview buffer: A buffer of a whole number of 64-bit words.
+    :return int: The sum of its little-endian 64-bit words, modulo 2^64.
+    """
+    if sys.byteorder == "little":
+        # Reinterprets the buffer in place:
+        words = buffer.cast("Q")
+    else:  # pragma: no cover
+        words = struct.unpack(f"<{len(buffer) // WORD_SIZE}Q", buffer)
+
+    return sum(words) & WORD_MASK
+
+
+def hash_media_file(filepath, chunk_size=HASH_CHUNK_SIZE):
+    """
+
+    :param str filepath: The path of the file to hash.
+    :param int chunk_size: The size (in bytes) of the head and tail chunks of the SubDB hash.
+    :return dict: The `size` of the file, and its `subdb` and `opensubtitles` hashes.
+
+    The OpenSubtitles hash is None if the chunk size isn't the 64 KB it's defined over.
+    """
+    size, head, tail = read_head_and_tail(filepath=filepath, chunk_size=chunk_size)
+
+    md5 = hashlib.md5(head)
+    md5.update(tail)
+
+    opensubtitles_hash = None
+    if chunk_size == OPENSUBTITLES_CHUNK_SIZE:
+        # Both chunks and their zero padding are contiguous in the same buffer:
+        buffer = head.obj
+        checksum = (size + _sum_words(memoryview(buffer))) & WORD_MASK
+        opensubtitles_hash = f"{checksum:016x}"
+
+    return {
+        "size": size,
+        "subdb": md5.hexdigest(),
+        "opensubtitles": opensubtitles_hash,
+    }
+
+
+def get_content_fingerprint(hashes):
+    """
+
+    :param dict hashes: The hashes of a file (as returned by `hash_media_file()`).
+    :return str: The content fingerprint of the file, its size and SubDB hash (i.e., `1468006400:5f7d0ecf...`).
+
+    Identifies a movie file by its content, whatever it's named or wherever it's moved to.
+    """
+    return f"{hashes['size']}:{hashes['subdb']}"
+
+
+def group_by_device(filepaths):
+    """
+
+    :param list filepaths: The paths of some files.
+    :return dict: The file paths on each device, keyed by device number (`st_dev`).
+    Files that can't be read are grouped under None.
+    """
+    devices = {}
+    for filepath in filepaths:
+        try:
+            device = os.stat(filepath).st_dev
+        except OSError:
+            device = None
+        devices.setdefault(device, []).append(filepath)
+
+    return devices
+
+
+def map_by_device(
+    function, filepaths, max_workers_per_device=2, thread_name_prefix="io"
+):
+    """
+
+    :param function function: The function to call on each file path (which shouldn't raise).
+    :param list filepaths: The paths of the files.
+    :param int max_workers_per_device: The number of files read concurrently from each device.
+    :param str thread_name_prefix: The prefix of the names of the worker threads.
+    :return dict: The result of the function for every file, keyed by file path, in order.
+    Files that can't be read map to None.
+
+    Files are grouped by device, and every device gets its own small pool of readers, so a library spread over
+    several disks keeps all of them busy without piling concurrent seeks onto any single one.
+    Reads release the GIL, so threads are enough.
+    """
+    filepaths = list(filepaths)
+    devices = group_by_device(filepaths=filepaths)
+    results = dict.fromkeys(devices.pop(None, []))
+
+    executors = [
+        ThreadPoolExecutor(
+            max_workers=max_workers_per_device,
+            thread_name_prefix=f"{thread_name_prefix}-{device}",
+        )
+        for device in devices
+    ]
+    try:
+        futures = {
+            filepath: executor.submit(function, filepath)
+            for executor, device_filepaths in zip(executors, devices.values())
+            for filepath in device_filepaths
+        }
+        for filepath, future in futures.items():
+            results[filepath] = future.result()
+    finally:
+        for executor in executors:
+            executor.shutdown()
+
+    return {filepath: results[filepath] for filepath in filepaths}
+
+
+def hash_media_files(filepaths, chunk_size=HASH_CHUNK_SIZE, max_workers_per_device=2):
+    """
+
+    :param list filepaths: The paths of the files to hash.
+    :param int chunk_size: The size (in bytes) of the head and tail chunks of the SubDB hash.
+    :param int max_workers_per_device: The number of files read concurrently from each device.
+    :return dict: The hashes of every file (as returned by `hash_media_file()`), keyed by file path, in order.
+    Files that can't be read map to None.
+
+    Files on different devices are hashed in parallel (see `map_by_device()`). Hashing releases the GIL too.
+    """
+
+    def hash_or_none(filepath):
+        try:
+            return hash_media_file(filepath=filepath, chunk_size=chunk_size)
+        except OSError:
+            return None
+
+    return map_by_device(
+        function=hash_or_none,
+        filepaths=filepaths,
+        max_workers_per_device=max_workers_per_device,
+        thread_name_prefix="hash",
+    )
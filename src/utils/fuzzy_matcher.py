@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Scores a batch of search queries against a pool of IMDb candidate objects in a single pass.
+
+The candidate pool is filtered and normalized once, then every query variant is scored against every candidate,
+producing a score matrix (one row per query, one column per candidate title).
+The scoring backend is pluggable: `fuzzywuzzy` (the default), `rapidfuzz` (if installed), or the in-house `builtin` scorer.
+"""
+
+import difflib
+
+from fuzzywuzzy import fuzz as fuzzywuzzy_fuzz
+from fuzzywuzzy import utils as fuzzywuzzy_utils
+
+try:
+    from rapidfuzz import fuzz as rapidfuzz_fuzz
+    from rapidfuzz import process as rapidfuzz_process
+    from rapidfuzz import utils as rapidfuzz_utils
+except ImportError:  # pragma: no cover
+    rapidfuzz_fuzz = None
+    rapidfuzz_process = None
+    rapidfuzz_utils = None
+
+
+class FuzzywuzzyScorer:
+    """Scores phrases with `fuzzywuzzy.fuzz.WRatio`, the same scorer `fuzzywuzzy.process.extractOne()` uses by default."""
+
+    name = "fuzzywuzzy"
+
+    def normalize(self, phrase):
+        """
+
+        :param str phrase: The phrase to normalize.
+        :return str: The normalized phrase.
+        """
+        return fuzzywuzzy_utils.full_process(phrase, force_ascii=True)
+
+    def score_matrix(self, queries, choices):
+        """
+
+        :param list queries: A list of normalized query phrases.
+        :param list choices: A list of normalized candidate phrases.
+        :return list: A list of rows (one per query) containing the integer score (0-100) of each choice.
+        """
+        return [
+            [
+                fuzzywuzzy_fuzz.WRatio(query, choice, full_process=False)
+                for choice in choices
+            ]
+            for query in queries
+        ]
+
+
+class RapidfuzzScorer:
+    """Scores phrases with `rapidfuzz.fuzz.WRatio`, which is API compatible with `fuzzywuzzy` but implemented in C++."""
+
+    name = "rapidfuzz"
+
+    def __init__(self):
+        if rapidfuzz_process is None:
+            raise ImportError(
+                'The "rapidfuzz" scorer requires the `rapidfuzz` package to be installed.'
+            )
+
+    def normalize(self, phrase):
+        """
+
+        :param str phrase: The phrase to normalize.
+        :return str: The normalized phrase.
+        """
+        return rapidfuzz_utils.default_process(phrase)
+
+    def score_matrix(self, queries, choices):
+        """
+
+        :param list queries: A list of normalized query phrases.
+        :param list choices: A list of normalized candidate phrases.
+        :return list: A list of rows (one per query) containing the integer score (0-100) of each choice.
+        """
+        matrix = []
+        for query in queries:
+            row = [0] * len(choices)
+            # `extract()` scores the whole pool in a single native call:
+            for choice, score, index in rapidfuzz_process.extract(
+                query, choices, scorer=rapidfuzz_fuzz.WRatio, processor=None, limit=None
+            ):
+                row[index] = int(round(score))
+            matrix.append(row)
+
+        return matrix
+
+
+class BuiltinScorer:
+    """
+
+    A dependency-free scorer based on `difflib.SequenceMatcher`.
+
+    Scores are the better of the plain ratio and the token-sorted ratio, so word order differences
+    (i.e., "matrix the" vs. "the matrix") are not penalized.
+    """
+
+    name = "builtin"
+
+    def normalize(self, phrase):
+        """
+
+        :param str phrase: The phrase to normalize.
+        :return str: The normalized phrase.
+        """
+        return " ".join(
+            "".join(
+                character if character.isalnum() else " "
+                for character in phrase.lower()
+            ).split()
+        )
+
+    def score_matrix(self, queries, choices):
+        """
+
+        :param list queries: A list of normalized query phrases.
+        :param list choices: A list of normalized candidate phrases.
+        :return list: A list of rows (one per query) containing the integer score (0-100) of each choice.
+        """
+        matrix = [[0] * len(choices) for query in queries]
+        sorted_queries = [" ".join(sorted(query.split())) for query in queries]
+        sequence_matcher = difflib.SequenceMatcher(autojunk=False)
+
+        # `SequenceMatcher` caches its analysis of the second sequence,
+        # so iterate over the choices on the outside and the queries on the inside:
+        for column, choice in enumerate(choices):
+            sorted_choice = " ".join(sorted(choice.split()))
+            for choice_variant, query_variants in (
+                (choice, queries),
+                (sorted_choice, sorted_queries),
+            ):
+                sequence_matcher.set_seq2(choice_variant)
+                for row, query in enumerate(query_variants):
+                    if query and choice_variant:
+                        sequence_matcher.set_seq1(query)
+                        score = int(round(100 * sequence_matcher.ratio()))
+                        matrix[row][column] = max(matrix[row][column], score)
+
+        return matrix
+
+
+SCORERS = {
+    FuzzywuzzyScorer.name: FuzzywuzzyScorer,
+    RapidfuzzScorer.name: RapidfuzzScorer,
+    BuiltinScorer.name: BuiltinScorer,
+}
+
+
+def get_scorer(scorer="fuzzywuzzy"):
+    """
+
+    :param str|object scorer: The name of a registered scorer or a scorer instance. Valid Options: [`fuzzywuzzy`, `rapidfuzz`, `builtin`]
+    :return object: A scorer instance, providing `normalize()` and `score_matrix()` methods.
+    """
+    if isinstance(scorer, str):
+        if scorer not in SCORERS:
+            raise ValueError(
+                f'Unknown fuzzy scorer "{scorer}". Choose one of the following: {sorted(SCORERS)}'
+            )
+        return SCORERS[scorer]()
+
+    return scorer
+
+
+class FuzzyMatcher:
+    def __init__(
+        self,
+        search_list,
+        search_key="Title",
+        result_key="imdbID",
+        result_type=None,
+        scorer="fuzzywuzzy",
+    ):
+        """
+
+        :param list search_list: List of IMDb objects to use as the candidate pool.
+        :param str search_key: The object key to check fuzziness with.
+        :param str result_key: The object key to use as the result value (usually the `imdbID`).
+        :param str result_type: Type of result to keep in the candidate pool. [optional]. Valid Options: [`movie`, `series`, `episode`]
+        :param str|object scorer: The name of a registered scorer or a scorer instance.
+        """
+        self._scorer = get_scorer(scorer=scorer)
+
+        result_values = {}
+        for search_item in search_list:
+            # Make sure our candidates are actually the type we want to search on (or that `result_type` wasn't provided)
+            # Also ensure it has a poster (missing poster is a sure sign of a bad result):
+            if (
+                result_type is None or search_item.get("Type") == result_type
+            ) and search_item.get("Poster") != "N/A":
+                result_values[search_item.get(search_key)] = search_item.get(result_key)
+
+        self._titles = list(result_values.keys())
+        self._result_values = [result_values[title] for title in self._titles]
+        # Normalize the candidate pool once, no matter how many queries get scored against it:
+        self._normalized_titles = [
+            self._scorer.normalize(str(title)) for title in self._titles
+        ]
+
+    @property
+    def titles(self):
+        """The (deduplicated) candidate titles, in the column order of the score matrix."""
+        return list(self._titles)
+
+    def score_matrix(self, search_queries):
+        """
+
+        :param list search_queries: A list of query phrases to score.
+        :return list: A list of rows (one per query) containing the score of each candidate title.
+        """
+        normalized_queries = [
+            self._scorer.normalize(search_query) for search_query in search_queries
+        ]
+        return self._scorer.score_matrix(normalized_queries, self._normalized_titles)
+
+    def best_matches(self, search_queries):
+        """
+
+        :param list search_queries: A list of query phrases to score.
+        :return list: A list of tuples (one per query) containing the best matching title, its result value and score.
+
+        If the candidate pool is empty, every query gets `(None, None, 0)`.
+        """
+        best_matches = []
+        for row in self.score_matrix(search_queries=search_queries):
+            if row:
+                # `max()` keeps the first of equally scored candidates, just like `extractOne()`:
+                best_index = max(range(len(row)), key=row.__getitem__)
+                best_matches.append(
+                    (
+                        self._titles[best_index],
+                        self._result_values[best_index],
+                        row[best_index],
+                    )
+                )
+            else:
+                best_matches.append((None, None, 0))
+
+        return best_matches
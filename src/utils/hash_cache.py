@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A persistent cache of partial-file hashes (see `file_hashing`), shared across stages and runs.
+
+Entries are keyed by file identity (the device and inode numbers) and validated against the file's size and
+modification time (in nanoseconds), so a re-run over an unchanged library doesn't read a single media file,
+and files keep their cached hashes when the `Formatter` renames them or their folders.
+
+Every entry also records the last path its file was seen at. Entries that weren't used by the current run are pruned
+when the cache is saved, unless that path still leads to the same, unmodified file, so the hashes of deleted or
+modified files don't pile up in a cache shared by several libraries.
+"""
+
+import json
+import os
+import threading
+
+from .file_hashing import HASH_CHUNK_SIZE, hash_media_file, hash_media_files
+
+HASH_CACHE_VERSION = 2
+
+
+def default_hash_cache_filepath():
+    """
+
+    :return str: The default hash cache file (`$XDG_CACHE_HOME/movie-file-fixer/hashes.json`).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "movie-file-fixer", "hashes.json")
+
+
+def _file_identity(stat_result):
+    """
+
+    :param os.stat_result stat_result: The status of a file.
+    :return tuple: The key of the file in the cache, and the stamp its cached hashes are only valid for.
+    """
+    return (
+        f"{stat_result.st_dev}:{stat_result.st_ino}",
+        [stat_result.st_size, stat_result.st_mtime_ns],
+    )
+
+
+def _is_entry_live(key, entry):
+    """
+
+    :param str key: The key of the entry in the cache.
+    :param dict entry: The cached entry.
+    :return bool: Whether the last path the entry's file was seen at still leads to the same, unmodified file.
+    """
+    try:
+        stat_result = os.stat(entry["path"])
+    except (KeyError, OSError):
+        return False
+
+    return _file_identity(stat_result=stat_result) == (key, entry["stamp"])
+
+
+class HashCache:
+    def __init__(self, filepath=None, verbose=False):
+        """
+
+        :param str filepath: The path of the cache file to load from and save to. Defaults to `default_hash_cache_filepath()`.
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._filepath = filepath or default_hash_cache_filepath()
+        self._verbose = verbose
+        self._lock = threading.Lock()
+        self._changed = False
+        # The keys of the entries used (or added) by this run, which are never pruned:
+        self._used_keys = set()
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = self._load_entries()
+
+    def _load_entries(self):
+        """
+
+        :return dict: The entries stored on disk (none if the file is missing or from another version).
+        """
+        if not os.path.exists(self._filepath):
+            return {}
+
+        with open(self._filepath, encoding="UTF-8") as infile:
+            cache_file = json.load(infile)
+
+        if cache_file.get("version") != HASH_CACHE_VERSION:
+            return {}
+
+        return cache_file.get("entries", {})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, filepath, chunk_size=HASH_CHUNK_SIZE, stat_result=None):
+        """
+
+        :param str filepath: The path of a file.
+        :param int chunk_size: The chunk size the hashes were computed with.
+        :param os.stat_result stat_result: The status of the file, if already known. [optional]
+        :return dict: The cached hashes of the file, or None if it isn't cached or has changed since.
+        """
+        if stat_result is None:
+            stat_result = os.stat(filepath)
+        key, stamp = _file_identity(stat_result=stat_result)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry["stamp"] != stamp
+                or entry["chunk_size"] != chunk_size
+            ):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._used_keys.add(key)
+            # Keep track of renamed files, so their entries aren't pruned:
+            if entry.get("path") != filepath:
+                entry["path"] = filepath
+                self._changed = True
+
+        if self._verbose:
+            print(f'[HASH CACHE HIT] "{filepath}"\n')
+
+        return entry["hashes"]
+
+    def add(self, filepath, hashes, chunk_size=HASH_CHUNK_SIZE, stat_result=None):
+        """
+
+        :param str filepath: The path of the file that was hashed.
+        :param dict hashes: The hashes of the file (as returned by `hash_media_file()`).
+        :param int chunk_size: The chunk size the hashes were computed with.
+        :param os.stat_result stat_result: The status of the file, taken before it was hashed. [optional]
+        :return None:
+
+        A file that was modified while it was being hashed isn't cached.
+        """
+        current_stat_result = os.stat(filepath)
+        if stat_result is None:
+            stat_result = current_stat_result
+
+        key, stamp = _file_identity(stat_result=stat_result)
+        if _file_identity(stat_result=current_stat_result) != (key, stamp):
+            return
+
+        with self._lock:
+            self._entries[key] = {
+                "path": filepath,
+                "stamp": stamp,
+                "chunk_size": chunk_size,
+                "hashes": hashes,
+            }
+            self._used_keys.add(key)
+            self._changed = True
+
+    def hash_file(self, filepath, chunk_size=HASH_CHUNK_SIZE):
+        """
+
+        :param str filepath: The path of the file to hash.
+        :param int chunk_size: The size (in bytes) of the head and tail chunks.
+        :return dict: The hashes of the file, from the cache if it hasn't changed since it was last hashed.
+        """
+        stat_result = os.stat(filepath)
+        hashes = self.get(
+            filepath=filepath, chunk_size=chunk_size, stat_result=stat_result
+        )
+        if hashes is None:
+            hashes = hash_media_file(filepath=filepath, chunk_size=chunk_size)
+            self.add(
+                filepath=filepath,
+                hashes=hashes,
+                chunk_size=chunk_size,
+                stat_result=stat_result,
+            )
+
+        return hashes
+
+    def hash_files(
+        self, filepaths, chunk_size=HASH_CHUNK_SIZE, max_workers_per_device=2
+    ):
+        """
+
+        :param list filepaths: The paths of the files to hash.
+        :param int chunk_size: The size (in bytes) of the head and tail chunks.
+        :param int max_workers_per_device: The number of files read concurrently from each device.
+        :return dict: The hashes of every file, keyed by file path. Files that can't be read map to None.
+
+        Only the files missing from the cache (or changed since) are read.
+        """
+        file_hashes = {}
+        stat_results = {}
+        for filepath in filepaths:
+            try:
+                stat_results[filepath] = os.stat(filepath)
+            except OSError:
+                file_hashes[filepath] = None
+                continue
+            file_hashes[filepath] = self.get(
+                filepath=filepath,
+                chunk_size=chunk_size,
+                stat_result=stat_results[filepath],
+            )
+
+        missing_filepaths = [
+            filepath
+            for filepath, hashes in file_hashes.items()
+            if hashes is None and filepath in stat_results
+        ]
+        for filepath, hashes in hash_media_files(
+            filepaths=missing_filepaths,
+            chunk_size=chunk_size,
+            max_workers_per_device=max_workers_per_device,
+        ).items():
+            file_hashes[filepath] = hashes
+            if hashes is not None:
+                self.add(
+                    filepath=filepath,
+                    hashes=hashes,
+                    chunk_size=chunk_size,
+                    stat_result=stat_results[filepath],
+                )
+
+        return file_hashes
+
+    def save(self):
+        """
+
+        :return None:
+
+        Writes the cache file (merged with any entries another run added in the meantime), if anything was added.
+        Entries this run didn't use are pruned, unless their file is still where it was last seen, unmodified.
+        The file is written to a temporary file first, so an interrupted save never leaves a truncated cache behind.
+        """
+        if not self._changed:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self._filepath)), exist_ok=True)
+        temporary_filepath = f"{self._filepath}.{os.getpid()}.tmp"
+        with self._lock:
+            entries = self._load_entries()
+            entries.update(self._entries)
+            self._entries = {
+                key: entry
+                for key, entry in entries.items()
+                if key in self._used_keys or _is_entry_live(key=key, entry=entry)
+            }
+            pruned_entries = len(entries) - len(self._entries)
+            with open(temporary_filepath, mode="w", encoding="UTF-8") as outfile:
+                json.dump(
+                    {"version": HASH_CACHE_VERSION, "entries": self._entries},
+                    outfile,
+                    separators=(",", ":"),
+                )
+            self._changed = False
+        os.replace(temporary_filepath, self._filepath)
+
+        if self._verbose:
+            print(
+                f'[SAVED] {len(self)} [FILE HASHES] to [FILE] "{self._filepath}" ({pruned_entries} [PRUNED])\n'
+            )
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Streams the items of a single top-level array out of a JSON document (i.e., the `titles` of `metadata.json`),
+without ever materializing the rest of the document.
+
+The file is read in fixed-size chunks. Items of the requested array are decoded one at a time,
+while every other top-level value (i.e., the heavy `metadata` section) is skipped by a bracket-counting scanner,
+so peak memory only depends on the chunk size and the largest single item.
+"""
+
+import json
+import re
+
+# The characters that matter when skipping over a value:
+STRUCTURAL_CHARACTERS = re.compile(r'["\[\]{}]')
+# The remainder of a string, up to and including its closing quote (an unrolled loop, so it never backtracks):
+STRING_REMAINDER = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The characters a number may continue with, up to the end of the buffer:
+NUMBER_REMAINDER = re.compile(r"[0-9.eE+\-]*\Z")
+
+
+class _JsonStream:
+    def __init__(self, infile, chunk_size=65536):
+        """
+
+        :param file infile: A JSON document opened in text mode.
+        :param int chunk_size: The number of characters to read at a time.
+        """
+        self._infile = infile
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._position = 0
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """
+
+        :return bool: Reads the next chunk into the buffer (dropping everything already consumed). Returns False at the end of the file.
+        """
+        chunk = self._infile.read(self._chunk_size)
+        self._buffer = self._buffer[self._position :] + chunk
+        self._position = 0
+
+        return bool(chunk)
+
+    def peek(self):
+        """
+
+        :return str: The next non-whitespace character (without consuming it), or an empty string at the end of the file.
+        """
+        while True:
+            self._position = WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._fill():
+                return ""
+
+    def expect(self, characters):
+        """
+
+        :param str characters: The characters allowed next.
+        :return str: The next non-whitespace character, which is consumed.
+        """
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(
+                f"Expected one of {list(characters)} but found {character!r} in the JSON document."
+            )
+        self._position += 1
+
+        return character
+
+    def decode(self):
+        """
+
+        :return: The next JSON value, decoded.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A value at the very end of the buffer, or a number followed by nothing but the start of a fraction
+            # or an exponent (i.e., `12.`), may continue in the next chunk:
+            if (
+                end == len(self._buffer)
+                or (
+                    isinstance(value, (int, float))
+                    and NUMBER_REMAINDER.match(self._buffer, end)
+                )
+            ) and self._fill():
+                continue
+
+            self._position = end
+            return value
+
+    def skip(self):
+        """
+
+        :return None:
+
+        Skips the next JSON value without decoding it.
+        """
+        if self.peek() not in "[{":
+            self.decode()
+            return
+
+        depth = 0
+        in_string = False
+        while True:
+            if self._position >= len(self._buffer) and not self._fill():
+                raise ValueError("Unexpected end of the JSON document.")
+
+            if in_string:
+                match = STRING_REMAINDER.match(self._buffer, self._position)
+                if match is None:
+                    # The string continues in the next chunk:
+                    if not self._fill():
+                        raise ValueError("Unexpected end of the JSON document.")
+                    continue
+                self._position = match.end()
+                in_string = False
+            else:
+                match = STRUCTURAL_CHARACTERS.search(self._buffer, self._position)
+                if match is None:
+                    self._position = len(self._buffer)
+                    continue
+                self._position = match.end()
+                character = match.group()
+                if character == '"':
+                    in_string = True
+                elif character in "[{":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        return
+
+
+def iter_json_array(filepath, key, chunk_size=65536):
+    """
+
+    :param str filepath: The path of a JSON document containing an object at the top level.
+    :param str key: The top-level key of the array to stream (i.e., `titles`).
+    :param int chunk_size: The number of characters to read at a time.
+    :return iterator: Yields every item of the array, one at a time. Yields nothing if the key doesn't exist.
+    """
+    with open(filepath, encoding="UTF-8") as infile:
+        yield from iter_json_file_array(infile=infile, key=key, chunk_size=chunk_size)
+
+
+def iter_json_file_array(infile, key, chunk_size=65536):
+    """
+
+    :param file infile: A JSON document containing an object at the top level, opened in text mode.
+    :param str key: The top-level key of the array to stream (i.e., `titles`).
+    :param int chunk_size: The number of characters to read at a time.
+    :return iterator: Yields every item of the array, one at a time. Yields nothing if the key doesn't exist.
+
+    The document is read from the current position of the file, which is left open.
+    """
+    stream = _JsonStream(infile=infile, chunk_size=chunk_size)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+
+    while True:
+        current_key = stream.decode()
+        stream.expect(":")
+        if current_key == key and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() != "]":
+                while True:
+                    yield stream.decode()
+                    if stream.expect(",]") == "]":
+                        break
+            else:
+                stream.expect("]")
+            # Nothing else in the document is of interest:
+            return
+        stream.skip()
+
+        if stream.expect(",}") == "}":
+            return
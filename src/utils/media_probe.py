@@ -0,0 +1,795 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A header-only probe of Matroska (`.mkv`, `.webm`), MP4 (`.mp4`, `.mov`) and AVI containers.
+
+Only the container structure is read (through a `MediaFileReader`), never the media data: a few element, box or chunk
+headers to find the track list, then the small elements describing each track. For a typical file that's a
+handful of reads of a few KB at most, wherever the track list sits in the file, and no file is read past
+`MAX_PROBE_SIZE` bytes. Every probe reports:
+
+- `container`: `matroska`, `mp4`, `avi`, or None for any other file.
+- `duration`: The duration, in seconds.
+- `width` and `height`: The resolution of the (first) video track.
+- `video_codec`: The codec of the video track, as named by the container (i.e., `V_MPEG4/ISO/AVC`, `avc1` or `XVID`).
+- `audio_tracks` and `subtitle_tracks`: The `language` and `codec` of every audio and subtitle track.
+
+Per container:
+
+- Matroska: The EBML elements of the `Segment` are walked up to its `Info` and `Tracks` elements (or the first
+  `Cluster`, in which case their positions are taken from the `SeekHead`). Track languages are the `LanguageIETF`
+  (or `Language`, `eng` by default) of each `TrackEntry`.
+- MP4: The boxes are walked down to `moov/mvhd` and `moov/trak`, skipping the sample tables except for the codec of
+  each track (`stsd`). Tracks are told apart by their `hdlr` handler, and their language is the `elng` (or `mdhd`) one.
+- AVI: The `hdrl` list at the start of the file holds the main header (`avih`) and a header per stream (`strl`).
+  AVI has no track languages.
+
+Languages are reported as two character (ISO 639-1) codes where one is known, like the subtitle languages searched for.
+Probes are versioned (`MEDIA_PROBE_VERSION`), so cached probes can be invalidated when the probe learns more.
+"""
+
+import struct
+
+from .file_hashing import map_by_device
+from .media_reader import MediaFileReader
+
+MEDIA_PROBE_VERSION = 1
+# The most elements, boxes or chunks walked at any one level, so a corrupted file can't keep the probe reading:
+MAX_ELEMENTS = 4096
+# The largest single header read (subtitle tracks can carry sizeable codec headers, i.e., ASS styles):
+MAX_HEADER_SIZE = 4 * 1024 * 1024
+# The most bytes read from any one file:
+MAX_PROBE_SIZE = 8 * 1024 * 1024
+
+MATROSKA_MAGIC = b"\x1a\x45\xdf\xa3"
+MATROSKA_SEGMENT = 0x18538067
+MATROSKA_SEEK_HEAD = 0x114D9B74
+MATROSKA_SEEK = 0x4DBB
+MATROSKA_SEEK_ID = 0x53AB
+MATROSKA_SEEK_POSITION = 0x53AC
+MATROSKA_INFO = 0x1549A966
+MATROSKA_TIMESTAMP_SCALE = 0x2AD7B1
+MATROSKA_DURATION = 0x4489
+MATROSKA_TRACKS = 0x1654AE6B
+MATROSKA_TRACK_ENTRY = 0xAE
+MATROSKA_TRACK_TYPE = 0x83
+MATROSKA_CODEC_ID = 0x86
+MATROSKA_LANGUAGE = 0x22B59C
+MATROSKA_LANGUAGE_IETF = 0x22B59D
+MATROSKA_VIDEO = 0xE0
+MATROSKA_PIXEL_WIDTH = 0xB0
+MATROSKA_PIXEL_HEIGHT = 0xBA
+MATROSKA_CLUSTER = 0x1F43B675
+MATROSKA_VIDEO_TRACK_TYPE = 1
+MATROSKA_AUDIO_TRACK_TYPE = 2
+MATROSKA_SUBTITLE_TRACK_TYPE = 17
+
+MP4_TOP_LEVEL_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+MP4_SUBTITLE_HANDLERS = {b"sbtl", b"subt", b"text"}
+
+# The WAVEFORMATEX format tags of the common AVI audio codecs:
+AVI_AUDIO_CODECS = {
+    0x0001: "pcm",
+    0x0055: "mp3",
+    0x00FF: "aac",
+    0x0161: "wma",
+    0x2000: "ac3",
+    0x2001: "dts",
+}
+
+# ISO 639-2 (bibliographic and terminology) codes of the common languages, and their ISO 639-1 codes:
+ISO_639_2_TO_1 = {
+    "ara": "ar",
+    "baq": "eu",
+    "bul": "bg",
+    "cat": "ca",
+    "ces": "cs",
+    "chi": "zh",
+    "cze": "cs",
+    "dan": "da",
+    "deu": "de",
+    "dut": "nl",
+    "ell": "el",
+    "eng": "en",
+    "est": "et",
+    "eus": "eu",
+    "fas": "fa",
+    "fin": "fi",
+    "fra": "fr",
+    "fre": "fr",
+    "ger": "de",
+    "glg": "gl",
+    "gre": "el",
+    "heb": "he",
+    "hin": "hi",
+    "hrv": "hr",
+    "hun": "hu",
+    "ice": "is",
+    "ind": "id",
+    "isl": "is",
+    "ita": "it",
+    "jpn": "ja",
+    "kor": "ko",
+    "lav": "lv",
+    "lit": "lt",
+    "may": "ms",
+    "msa": "ms",
+    "nld": "nl",
+    "nob": "no",
+    "nor": "no",
+    "per": "fa",
+    "pol": "pl",
+    "por": "pt",
+    "ron": "ro",
+    "rum": "ro",
+    "rus": "ru",
+    "slk": "sk",
+    "slo": "sk",
+    "slv": "sl",
+    "spa": "es",
+    "srp": "sr",
+    "swe": "sv",
+    "tha": "th",
+    "tur": "tr",
+    "ukr": "uk",
+    "vie": "vi",
+    "zho": "zh",
+}
+# The codes of undetermined, or no, language:
+UNDETERMINED_LANGUAGES = {"", "und", "mis", "mul", "zxx"}
+# QuickTime files may use the Macintosh language codes instead of packed ISO 639-2 codes:
+MACINTOSH_LANGUAGES = {
+    0: "en",
+    1: "fr",
+    2: "de",
+    3: "it",
+    4: "nl",
+    5: "sv",
+    6: "es",
+    7: "da",
+    8: "pt",
+    9: "no",
+    10: "he",
+    11: "ja",
+    12: "ar",
+    13: "fi",
+    14: "el",
+    17: "tr",
+    19: "zh",
+    23: "ko",
+    25: "pl",
+    26: "hu",
+    32: "ru",
+    33: "zh",
+}
+
+
+def normalize_language(language):
+    """
+
+    :param str language: An ISO 639-1, ISO 639-2 or IETF BCP 47 language code (i.e., "en", "eng", "en-US").
+    :return str: The two character language code, the code itself if it has none, or None if the language is undetermined.
+    """
+    language = language.strip().strip("\0").lower().replace("_", "-").split("-")[0]
+    if language in UNDETERMINED_LANGUAGES:
+        return None
+
+    return ISO_639_2_TO_1.get(language, language)
+
+
+def _read_vint(data, position, keep_marker=False):
+    """
+
+    :param bytes data: A buffer of EBML data.
+    :param int position: The position of an EBML variable-length integer in the buffer.
+    :param bool keep_marker: Whether to keep the length marker (as element IDs do).
+    :return tuple: The integer (None for an element of unknown size), and the position following it.
+    """
+    if position >= len(data):
+        raise ValueError("Truncated EBML element.")
+
+    first_byte = data[position]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first_byte & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer.")
+    if position + length > len(data):
+        raise ValueError("Truncated EBML element.")
+
+    value = first_byte if keep_marker else first_byte & (mask - 1)
+    for byte in data[position + 1 : position + length]:
+        value = (value << 8) | byte
+
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        value = None
+
+    return value, position + length
+
+
+class _BoundedReader:
+    """A `MediaFileReader` that refuses to read more than `MAX_PROBE_SIZE` bytes in total, or a header larger than `MAX_HEADER_SIZE`."""
+
+    def __init__(self, reader):
+        """
+
+        :param MediaFileReader reader: An open reader of a media file.
+        """
+        self._reader = reader
+        self._bytes_read = 0
+        self.size = reader.size
+
+    def read(self, length, offset):
+        """
+
+        :param int length: The number of bytes to read.
+        :param int offset: The file offset to read from.
+        :return bytes: Up to `length` bytes (fewer at the end of the file).
+        """
+        if length > MAX_HEADER_SIZE:
+            raise ValueError(f"Header of {length} bytes is too large.")
+        self._bytes_read += length
+        if self._bytes_read > MAX_PROBE_SIZE:
+            raise ValueError(f"Read more than {MAX_PROBE_SIZE} bytes of headers.")
+
+        return self._reader.read(length=length, offset=offset)
+
+
+def _empty_probe(container=None):
+    """
+
+    :param str container: The container of the media file.
+    :return dict: A probe of a media file nothing is known about yet.
+    """
+    return {
+        "container": container,
+        "duration": None,
+        "width": None,
+        "height": None,
+        "video_codec": None,
+        "audio_tracks": [],
+        "subtitle_tracks": [],
+    }
+
+
+def _read_element_header(reader, offset):
+    """
+
+    :param _BoundedReader reader: A reader of a Matroska file.
+    :param int offset: The offset of an EBML element.
+    :return tuple: The element ID, the offset of its data, and the size of its data (None if unknown).
+    """
+    header = reader.read(length=12, offset=offset)
+    element_id, position = _read_vint(data=header, position=0, keep_marker=True)
+    data_size, position = _read_vint(data=header, position=position)
+
+    return element_id, offset + position, data_size
+
+
+def _iter_elements(data, start=0, end=None):
+    """
+
+    :param bytes data: A buffer of EBML data.
+    :param int start: The position of the first element.
+    :param int end: The position the elements end at. Defaults to the end of the buffer.
+    :return generator: The ID, data start and data end of every element, in order.
+    """
+    if end is None:
+        end = len(data)
+
+    position = start
+    for _ in range(MAX_ELEMENTS):
+        if position >= end:
+            return
+
+        element_id, position = _read_vint(
+            data=data, position=position, keep_marker=True
+        )
+        data_size, position = _read_vint(data=data, position=position)
+        if data_size is None or position + data_size > end:
+            raise ValueError("Truncated EBML element.")
+
+        yield element_id, position, position + data_size
+        position += data_size
+
+
+def _read_fields(data):
+    """
+
+    :param bytes data: The data of an EBML master element.
+    :return dict: The data of its (first) child element of each ID, keyed by element ID.
+    """
+    fields = {}
+    for element_id, start, end in _iter_elements(data=data):
+        fields.setdefault(element_id, data[start:end])
+
+    return fields
+
+
+def _read_uint(data, default=None):
+    """
+
+    :param bytes data: The data of an EBML unsigned integer element (if there's one).
+    :return int: The integer, or the default if there's no element.
+    """
+    if data is None:
+        return default
+
+    return int.from_bytes(data, "big")
+
+
+def _read_string(data):
+    """
+
+    :param bytes data: The data of an EBML string element (if there's one).
+    :return str: The string, or None if there's no element.
+    """
+    if data is None:
+        return None
+
+    return data.decode("ascii", "replace").rstrip("\0") or None
+
+
+def _get_matroska_positions(seek_head):
+    """
+
+    :param bytes seek_head: The data of a `SeekHead` element.
+    :return dict: The positions of the elements it indexes (relative to the data of the `Segment`), keyed by element ID.
+    """
+    positions = {}
+    for element_id, start, end in _iter_elements(data=seek_head):
+        if element_id != MATROSKA_SEEK:
+            continue
+
+        fields = _read_fields(data=seek_head[start:end])
+        if MATROSKA_SEEK_ID in fields and MATROSKA_SEEK_POSITION in fields:
+            positions[_read_uint(fields[MATROSKA_SEEK_ID])] = _read_uint(
+                fields[MATROSKA_SEEK_POSITION]
+            )
+
+    return positions
+
+
+def _probe_matroska(reader):
+    """
+
+    :param _BoundedReader reader: A reader of a Matroska file.
+    :return dict: The probe of the file.
+    """
+    _, data_offset, data_size = _read_element_header(reader=reader, offset=0)
+    if data_size is None:
+        raise ValueError("Invalid EBML header.")
+
+    element_id, segment_offset, segment_size = _read_element_header(
+        reader=reader, offset=data_offset + data_size
+    )
+    if element_id != MATROSKA_SEGMENT:
+        raise ValueError("Missing Matroska segment.")
+    segment_end = reader.size
+    if segment_size is not None:
+        segment_end = min(segment_end, segment_offset + segment_size)
+
+    # Walks the top-level elements of the segment, up to the info and the tracks, or the media data:
+    wanted_element_ids = [MATROSKA_INFO, MATROSKA_TRACKS]
+    elements = {}
+    positions = {}
+    offset = segment_offset
+    for _ in range(MAX_ELEMENTS):
+        if offset >= segment_end or len(elements) == len(wanted_element_ids):
+            break
+
+        element_id, data_offset, data_size = _read_element_header(
+            reader=reader, offset=offset
+        )
+        if element_id == MATROSKA_CLUSTER or data_size is None:
+            break
+        if element_id in wanted_element_ids:
+            elements[element_id] = reader.read(length=data_size, offset=data_offset)
+        elif element_id == MATROSKA_SEEK_HEAD:
+            positions.update(
+                _get_matroska_positions(
+                    seek_head=reader.read(length=data_size, offset=data_offset)
+                )
+            )
+        offset = data_offset + data_size
+
+    # The elements after the media data are found through the seek head:
+    for wanted_element_id in wanted_element_ids:
+        if wanted_element_id not in elements and wanted_element_id in positions:
+            element_id, data_offset, data_size = _read_element_header(
+                reader=reader, offset=segment_offset + positions[wanted_element_id]
+            )
+            if element_id == wanted_element_id and data_size is not None:
+                elements[element_id] = reader.read(length=data_size, offset=data_offset)
+
+    probe = _empty_probe(container="matroska")
+    if MATROSKA_INFO in elements:
+        info = _read_fields(data=elements[MATROSKA_INFO])
+        duration = info.get(MATROSKA_DURATION)
+        if duration is not None and len(duration) in (4, 8):
+            # The duration is given in timestamp ticks, of a millisecond by default:
+            (ticks,) = struct.unpack(">f" if len(duration) == 4 else ">d", duration)
+            timestamp_scale = _read_uint(
+                info.get(MATROSKA_TIMESTAMP_SCALE), default=1000000
+            )
+            probe["duration"] = round(ticks * timestamp_scale / 1e9, 3)
+
+    for element_id, start, end in _iter_elements(
+        data=elements.get(MATROSKA_TRACKS, b"")
+    ):
+        if element_id != MATROSKA_TRACK_ENTRY:
+            continue
+
+        fields = _read_fields(data=elements[MATROSKA_TRACKS][start:end])
+        track_type = _read_uint(fields.get(MATROSKA_TRACK_TYPE))
+        codec = _read_string(fields.get(MATROSKA_CODEC_ID))
+        if track_type == MATROSKA_VIDEO_TRACK_TYPE:
+            if probe["video_codec"] is None:
+                video = _read_fields(data=fields.get(MATROSKA_VIDEO, b""))
+                probe["video_codec"] = codec
+                probe["width"] = _read_uint(video.get(MATROSKA_PIXEL_WIDTH))
+                probe["height"] = _read_uint(video.get(MATROSKA_PIXEL_HEIGHT))
+            continue
+
+        # The language defaults to English:
+        language = _read_string(fields.get(MATROSKA_LANGUAGE_IETF)) or _read_string(
+            fields.get(MATROSKA_LANGUAGE, b"eng")
+        )
+        track = {
+            "language": normalize_language(language=language or ""),
+            "codec": codec,
+        }
+        if track_type == MATROSKA_AUDIO_TRACK_TYPE:
+            probe["audio_tracks"].append(track)
+        elif track_type == MATROSKA_SUBTITLE_TRACK_TYPE:
+            probe["subtitle_tracks"].append(track)
+
+    return probe
+
+
+def _iter_boxes(reader, start, end):
+    """
+
+    :param _BoundedReader reader: A reader of an MP4 file.
+    :param int start: The offset of the first box.
+    :param int end: The offset the boxes end at.
+    :return generator: The type, payload start and payload end of every box, in order.
+    """
+    offset = start
+    for _ in range(MAX_ELEMENTS):
+        if offset + 8 > end:
+            return
+
+        header = reader.read(length=16, offset=offset)
+        box_size, box_type = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if box_size == 1:
+            if len(header) < 16:
+                raise ValueError("Truncated MP4 box.")
+            box_size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif box_size == 0:
+            # The box extends to the end of its parent:
+            box_size = end - offset
+        if box_size < header_size:
+            raise ValueError("Invalid MP4 box size.")
+
+        yield box_type, offset + header_size, min(offset + box_size, end)
+        offset += box_size
+
+
+def _find_box(reader, start, end, path):
+    """
+
+    :param _BoundedReader reader: A reader of an MP4 file.
+    :param int start: The offset of the first box.
+    :param int end: The offset the boxes end at.
+    :param list path: The types of the nested boxes to find, outermost first (i.e., `[b"minf", b"stbl", b"stsd"]`).
+    :return tuple: The payload start and end of the innermost box, or None if it's missing.
+    """
+    for box_type, box_start, box_end in _iter_boxes(
+        reader=reader, start=start, end=end
+    ):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return box_start, box_end
+            return _find_box(reader=reader, start=box_start, end=box_end, path=path[1:])
+
+    return None
+
+
+def _read_box(reader, start, end, length, minimum_length):
+    """
+
+    :param _BoundedReader reader: A reader of an MP4 file.
+    :param int start: The payload start of a box.
+    :param int end: The payload end of the box.
+    :param int length: The number of bytes of the payload wanted.
+    :param int minimum_length: The number of bytes of the payload needed.
+    :return bytes: The first `length` bytes of the payload (fewer if it's shorter).
+    """
+    payload = reader.read(length=min(length, end - start), offset=start)
+    if len(payload) < minimum_length:
+        raise ValueError("Truncated MP4 box.")
+
+    return payload
+
+
+def _get_mp4_language(mdhd):
+    """
+
+    :param bytes mdhd: The payload of an `mdhd` box.
+    :return str: The language of the track.
+    """
+    language_offset = 32 if mdhd[0] == 1 else 20
+    if len(mdhd) < language_offset + 2:
+        raise ValueError("Truncated MP4 box.")
+
+    (packed_language,) = struct.unpack_from(">H", mdhd, language_offset)
+    if packed_language < 0x400:
+        return MACINTOSH_LANGUAGES.get(packed_language)
+
+    return normalize_language(
+        language="".join(
+            chr(((packed_language >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0)
+        )
+    )
+
+
+def _probe_mp4_track(reader, start, end, probe):
+    """
+
+    :param _BoundedReader reader: A reader of an MP4 file.
+    :param int start: The payload start of a `trak` box.
+    :param int end: The payload end of the `trak` box.
+    :param dict probe: The probe of the file, to add the track to.
+    :return None:
+    """
+    tkhd = mdia = None
+    for box_type, box_start, box_end in _iter_boxes(
+        reader=reader, start=start, end=end
+    ):
+        if box_type == b"tkhd":
+            tkhd = _read_box(reader, box_start, box_end, length=96, minimum_length=84)
+        elif box_type == b"mdia":
+            mdia = (box_start, box_end)
+    if mdia is None:
+        return
+
+    handler = language = extended_language = codec = None
+    for box_type, box_start, box_end in _iter_boxes(
+        reader=reader, start=mdia[0], end=mdia[1]
+    ):
+        if box_type == b"hdlr":
+            handler = _read_box(
+                reader, box_start, box_end, length=12, minimum_length=12
+            )[8:12]
+        elif box_type == b"mdhd":
+            language = _get_mp4_language(
+                mdhd=_read_box(reader, box_start, box_end, length=34, minimum_length=24)
+            )
+        elif box_type == b"elng":
+            extended_language = normalize_language(
+                language=_read_box(
+                    reader, box_start, box_end, length=64, minimum_length=4
+                )[4:]
+                .split(b"\0")[0]
+                .decode("ascii", "replace")
+            )
+        elif box_type == b"minf":
+            # The codec is the type of the first sample description:
+            stsd = _find_box(
+                reader=reader, start=box_start, end=box_end, path=[b"stbl", b"stsd"]
+            )
+            if stsd is not None:
+                sample_description = _read_box(
+                    reader, *stsd, length=16, minimum_length=8
+                )
+                if len(sample_description) == 16:
+                    codec = sample_description[12:16].decode("ascii", "replace").strip()
+
+    if handler == b"vide":
+        if probe["video_codec"] is None and tkhd is not None:
+            # The track width and height are 16.16 fixed-point numbers, at the end of the track header:
+            size_offset = 88 if tkhd[0] == 1 else 76
+            if len(tkhd) < size_offset + 8:
+                raise ValueError("Truncated MP4 box.")
+            width, height = struct.unpack_from(">II", tkhd, size_offset)
+            probe["video_codec"] = codec
+            probe["width"] = width >> 16
+            probe["height"] = height >> 16
+    elif handler == b"soun":
+        probe["audio_tracks"].append(
+            {"language": extended_language or language, "codec": codec}
+        )
+    elif handler in MP4_SUBTITLE_HANDLERS:
+        probe["subtitle_tracks"].append(
+            {
+                "language": extended_language or language,
+                "codec": codec or handler.decode("ascii"),
+            }
+        )
+
+
+def _probe_mp4(reader):
+    """
+
+    :param _BoundedReader reader: A reader of an MP4 file.
+    :return dict: The probe of the file.
+    """
+    probe = _empty_probe(container="mp4")
+    moov = _find_box(reader=reader, start=0, end=reader.size, path=[b"moov"])
+    if moov is None:
+        return probe
+
+    for box_type, start, end in _iter_boxes(reader=reader, start=moov[0], end=moov[1]):
+        if box_type == b"mvhd":
+            mvhd = _read_box(reader, start, end, length=32, minimum_length=20)
+            if mvhd[0] == 1:
+                if len(mvhd) < 32:
+                    raise ValueError("Truncated MP4 box.")
+                timescale, duration = struct.unpack_from(">IQ", mvhd, 20)
+                unknown_duration = 0xFFFFFFFFFFFFFFFF
+            else:
+                timescale, duration = struct.unpack_from(">II", mvhd, 12)
+                unknown_duration = 0xFFFFFFFF
+            if timescale and duration != unknown_duration:
+                probe["duration"] = round(duration / timescale, 3)
+        elif box_type == b"trak":
+            _probe_mp4_track(reader=reader, start=start, end=end, probe=probe)
+
+    return probe
+
+
+def _iter_chunks(data, start=0, end=None):
+    """
+
+    :param bytes data: A buffer of RIFF data.
+    :param int start: The position of the first chunk.
+    :param int end: The position the chunks end at. Defaults to the end of the buffer.
+    :return generator: The ID, data start and data end of every chunk, in order (lists are yielded by their list type).
+    """
+    if end is None:
+        end = len(data)
+
+    position = start
+    for _ in range(MAX_ELEMENTS):
+        if position + 8 > end:
+            return
+
+        chunk_id, chunk_size = struct.unpack_from("<4sI", data, position)
+        data_start = position + 8
+        data_end = min(data_start + chunk_size, end)
+        if chunk_id == b"LIST":
+            chunk_id = data[data_start : data_start + 4]
+            data_start += 4
+        yield chunk_id, data_start, data_end
+
+        # Chunks are padded to an even size:
+        position += 8 + chunk_size + chunk_size % 2
+
+
+def _probe_avi(reader):
+    """
+
+    :param _BoundedReader reader: A reader of an AVI file.
+    :return dict: The probe of the file.
+    """
+    header = reader.read(length=24, offset=0)
+    if len(header) < 24 or header[12:16] != b"LIST" or header[20:24] != b"hdrl":
+        raise ValueError("Missing AVI header list.")
+    (hdrl_size,) = struct.unpack_from("<I", header, 16)
+    hdrl = reader.read(length=hdrl_size - 4, offset=24)
+
+    probe = _empty_probe(container="avi")
+    for chunk_id, start, end in _iter_chunks(data=hdrl):
+        if chunk_id == b"avih" and end - start >= 40:
+            microseconds_per_frame, total_frames = struct.unpack_from(
+                "<I12xI", hdrl, start
+            )
+            probe["width"], probe["height"] = struct.unpack_from(
+                "<II", hdrl, start + 32
+            )
+            probe["duration"] = round(total_frames * microseconds_per_frame / 1e6, 3)
+        elif chunk_id == b"strl":
+            stream = {
+                chunk_id: hdrl[start:end]
+                for chunk_id, start, end in _iter_chunks(
+                    data=hdrl, start=start, end=end
+                )
+            }
+            strh = stream.get(b"strh", b"")
+            strf = stream.get(b"strf", b"")
+            if len(strh) < 36:
+                continue
+
+            if strh[:4] == b"vids" and probe["video_codec"] is None:
+                if len(strf) >= 20:
+                    probe["video_codec"] = (
+                        strf[16:20].decode("ascii", "replace").strip("\0 ") or None
+                    )
+                # The length of the video stream is more accurate than the total frames of the main header
+                # (which only counts the frames of the first RIFF chunk of OpenDML files):
+                scale, rate, _, length = struct.unpack_from("<IIII", strh, 20)
+                if scale and rate:
+                    probe["duration"] = round(length * scale / rate, 3)
+            elif strh[:4] == b"auds":
+                codec = None
+                if len(strf) >= 2:
+                    (format_tag,) = struct.unpack_from("<H", strf)
+                    codec = AVI_AUDIO_CODECS.get(format_tag, f"0x{format_tag:04x}")
+                probe["audio_tracks"].append({"language": None, "codec": codec})
+
+    return probe
+
+
+def probe_media_file(filepath):
+    """
+
+    :param str filepath: The path of a media file.
+    :return dict: The probe of the file (see above). Files in other containers only have a None `container`.
+
+    Raises a ValueError if the container structure is corrupted.
+    """
+    with MediaFileReader(filepath=filepath) as media_file_reader:
+        reader = _BoundedReader(reader=media_file_reader)
+        magic = reader.read(length=12, offset=0)
+        if magic[:4] == MATROSKA_MAGIC:
+            return _probe_matroska(reader=reader)
+        if magic[4:8] in MP4_TOP_LEVEL_BOXES:
+            return _probe_mp4(reader=reader)
+        if magic[:4] == b"RIFF" and magic[8:12] == b"AVI ":
+            return _probe_avi(reader=reader)
+
+    return _empty_probe()
+
+
+def probe_media_files(filepaths, max_workers_per_device=2):
+    """
+
+    :param list filepaths: The paths of the media files to probe.
+    :param int max_workers_per_device: The number of files probed concurrently on each device.
+    :return dict: The probe of every file, keyed by file path, in order. Files that can't be read or probed map to None.
+
+    Files on different devices are probed in parallel (see `map_by_device()`).
+    """
+
+    def probe_or_none(filepath):
+        try:
+            return probe_media_file(filepath=filepath)
+        except (OSError, ValueError):
+            return None
+
+    return map_by_device(
+        function=probe_or_none,
+        filepaths=filepaths,
+        max_workers_per_device=max_workers_per_device,
+        thread_name_prefix="probe",
+    )
+
+
+def get_runtime_minutes(probe):
+    """
+
+    :param dict probe: The probe of a media file (or None).
+    :return float: The runtime of the media file, in minutes, or None if it's unknown.
+    """
+    if not probe or probe.get("duration") is None:
+        return None
+
+    return probe["duration"] / 60
+
+
+def get_embedded_subtitle_languages(filepath):
+    """
+
+    :param str filepath: The path of a media file.
+    :return set: The two character language codes of the subtitle tracks embedded in the file.
+    """
+    return {
+        track["language"]
+        for track in probe_media_file(filepath=filepath)["subtitle_tracks"]
+        if track["language"]
+    }
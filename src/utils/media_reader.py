@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A reader for media files that stays out of the way of the OS page cache.
+
+Library maintenance (hashing, probing, duplicate scans) only touches a few small regions of huge media files,
+which would otherwise pull pages into the page cache and evict the working set of a media server streaming
+from the same host. Where `os.posix_fadvise()` is available, the reader declares its access pattern as
+random and read-once (`POSIX_FADV_RANDOM`, `POSIX_FADV_NOREUSE`) before reading, so the kernel doesn't read ahead,
+and drops exactly the ranges it read (`POSIX_FADV_DONTNEED`) once it's closed.
+"""
+
+import os
+
+FADVISE = hasattr(os, "posix_fadvise")
+
+
+class MediaFileReader:
+    def __init__(self, filepath):
+        """
+
+        :param str filepath: The path of the media file to read.
+        """
+        self._filepath = filepath
+        self._file_descriptor = None
+        self._read_ranges = []
+        self.size = None
+
+    def _advise(self, offset, length, advice):
+        """
+
+        :param int offset: The start of the range.
+        :param int length: The length of the range (`0` for "until the end of the file").
+        :param int advice: The `os.POSIX_FADV_*` advice.
+        :return None:
+
+        Advice is only a hint, so filesystems that don't support it are ignored.
+        """
+        if not FADVISE:  # pragma: no cover
+            return
+
+        try:
+            os.posix_fadvise(self._file_descriptor, offset, length, advice)
+        except OSError:  # pragma: no cover
+            pass
+
+    def open(self):
+        """
+
+        :return MediaFileReader: The reader, opened.
+        """
+        self._file_descriptor = os.open(
+            self._filepath, os.O_RDONLY | getattr(os, "O_BINARY", 0)
+        )
+        self.size = os.fstat(self._file_descriptor).st_size
+        if FADVISE:
+            self._advise(0, 0, os.POSIX_FADV_RANDOM)
+            self._advise(0, 0, os.POSIX_FADV_NOREUSE)
+
+        return self
+
+    def close(self):
+        """
+
+        :return None:
+
+        Drops the pages of every range read from the page cache, and closes the file.
+        """
+        if self._file_descriptor is None:
+            return
+
+        try:
+            if FADVISE:
+                for offset, length in self._read_ranges:
+                    self._advise(offset, length, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(self._file_descriptor)
+            self._file_descriptor = None
+            self._read_ranges = []
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read_into(self, view, offset):
+        """
+
+        :param memoryview view: The buffer to fill.
+        :param int offset: The file offset to read from.
+        :return None:
+
+        Fills the whole buffer (without an intermediate copy where `os.preadv()` is available).
+        """
+        filled = 0
+        while filled < len(view):
+            if hasattr(os, "preadv"):
+                read = os.preadv(
+                    self._file_descriptor, [view[filled:]], offset + filled
+                )
+            else:  # pragma: no cover
+                os.lseek(self._file_descriptor, offset + filled, os.SEEK_SET)
+                chunk = os.read(self._file_descriptor, len(view) - filled)
+                read = len(chunk)
+                view[filled : filled + read] = chunk
+            if read == 0:
+                raise OSError(f'Unexpected end of file in "{self._filepath}".')
+            filled += read
+
+        self._read_ranges.append((offset, len(view)))
+
+    def read(self, length, offset):
+        """
+
+        :param int length: The number of bytes to read.
+        :param int offset: The file offset to read from.
+        :return bytes: Up to `length` bytes (fewer at the end of the file).
+        """
+        length = max(0, min(length, self.size - offset))
+        buffer = bytearray(length)
+        self.read_into(view=memoryview(buffer), offset=offset)
+
+        return bytes(buffer)
@@ -0,0 +1,923 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Storage backends for the library metadata (the `titles`, `metadata` and `errors` sections).
+
+`JsonMetadataBackend` stores everything in the classic single `metadata.json` document.
+`SqliteMetadataBackend` stores the same layout in an SQLite database next to it, with indexed lookups,
+transactional batched inserts and concurrent readers, so large libraries never rewrite (or parse) the whole index.
+`JournalMetadataBackend` appends every change to a JSON Lines journal next to `metadata.json`,
+and periodically compacts that journal into the canonical `metadata.json`.
+Every backend can import from and export to the JSON layout.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+
+from .json_stream import iter_json_array, iter_json_file_array
+
+CONTENT_KEYS = ["titles", "metadata", "errors"]
+# `titles` values that get their own (indexed) column in the SQLite backend:
+INDEXED_TITLE_KEYS = ["title", "original_filename", "imdb_id"]
+
+
+def metadata_storage_filenames(metadata_filename="metadata.json"):
+    """
+
+    :param str metadata_filename: The metadata filename (in JSON layout).
+    :return list: Every filename a metadata backend may keep in the library directory (including SQLite journals),
+    and the view manifest (see `view_manifest_filename()`).
+    """
+    database_filename = os.path.splitext(metadata_filename)[0] + ".sqlite3"
+    journal_filename = os.path.splitext(metadata_filename)[0] + ".jsonl"
+    return (
+        [metadata_filename, database_filename]
+        + [database_filename + suffix for suffix in ["-wal", "-shm", "-journal"]]
+        + [journal_filename, journal_filename + ".compacting"]
+        + [metadata_filename + suffix for suffix in [".tmp", ".compacted"]]
+        + [view_manifest_filename(metadata_filename=metadata_filename)]
+    )
+
+
+def view_manifest_filename(metadata_filename="metadata.json"):
+    """
+
+    :param str metadata_filename: The metadata filename (in JSON layout).
+    :return str: The filename of the manifest of the source files and folders linked into a library built as a view.
+    """
+    return os.path.splitext(metadata_filename)[0] + ".view.json"
+
+
+def empty_metadata():
+    """
+
+    :return dict: A new, empty metadata document.
+    """
+    return {content_key: [] for content_key in CONTENT_KEYS}
+
+
+def deduplicate_imdb_objects(imdb_objects):
+    """
+
+    :param list imdb_objects: A list of IMDb objects, possibly containing several copies of the same title.
+    :return list: The IMDb objects with only the latest copy of each `imdbID`, in order of first appearance.
+    """
+    deduplicated_imdb_objects = {}
+    for index, imdb_object in enumerate(imdb_objects):
+        imdb_id = imdb_object.get("imdbID") if isinstance(imdb_object, dict) else None
+        # Anything without an `imdbID` can't be a duplicate.
+        # Re-assigning an existing key keeps its original position, but stores the newer copy:
+        key = imdb_id if imdb_id else ("", index)
+        deduplicated_imdb_objects[key] = imdb_object
+
+    return list(deduplicated_imdb_objects.values())
+
+
+class MetadataBackend:
+    """
+
+    The interface every metadata backend implements.
+
+    All methods operate on the JSON layout: a `titles` list of title entries, a `metadata` list of IMDb objects
+    (unique by `imdbID`) and an `errors` list.
+    """
+
+    def __init__(
+        self, directory, metadata_filename="metadata.json", compact=False, verbose=False
+    ):
+        """
+
+        :param str directory: The directory containing the metadata.
+        :param str metadata_filename: The metadata filename (in JSON layout).
+        :param bool compact: Whether JSON output should be compact (non-indented).
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._directory = directory
+        self._metadata_filename = metadata_filename
+        self._compact = compact
+        self._verbose = verbose
+
+    @property
+    def metadata_filepath(self):
+        """The path of the metadata file in JSON layout."""
+        return os.path.join(self._directory, self._metadata_filename)
+
+    @property
+    def storage_filepath(self):
+        """The path of the file the backend stores the metadata in."""
+        return self.metadata_filepath
+
+    def _write_json(self, metadata, filepath):
+        """
+
+        :param dict metadata: The complete metadata document.
+        :param str filepath: The path to write the JSON document to.
+        :return None:
+        """
+        with open(filepath, mode="w") as outfile:
+            if self._compact:
+                json.dump(metadata, outfile, separators=(",", ":"))
+            else:
+                json.dump(metadata, outfile, indent=4)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+
+    def _dump_json(self, metadata, filepath):
+        """
+
+        :param dict metadata: The complete metadata document.
+        :param str filepath: The path to write the JSON document to.
+        :return None:
+
+        Writes to a temporary file first, so a crash mid-write never leaves a truncated metadata file behind.
+        """
+        temporary_filepath = filepath + ".tmp"
+        self._write_json(metadata=metadata, filepath=temporary_filepath)
+        os.replace(temporary_filepath, filepath)
+
+    def exists(self):
+        """:return bool: Whether the metadata store exists."""
+        raise NotImplementedError
+
+    def initialize(self):
+        """:return bool: Creates an empty metadata store if it doesn't exist yet. Returns True if one was created."""
+        raise NotImplementedError
+
+    def load(self):
+        """:return dict: The complete metadata document."""
+        raise NotImplementedError
+
+    def iter_titles(self):
+        """:return iterator: Yields every `titles` entry."""
+        return iter(self.load().get("titles", []))
+
+    def find_title(self, key, value):
+        """
+
+        :param str key: The `titles` entry key to look up (i.e., `title`, `original_filename` or `imdb_id`).
+        :param value: The value to look for.
+        :return dict: The first `titles` entry with the given value, or None.
+        """
+        for entry in self.iter_titles():
+            if isinstance(entry, dict) and entry.get(key) == value:
+                return entry
+
+        return None
+
+    def append(self, content_key, new_content):
+        """
+
+        :param str content_key: The section to append to. Valid Options: [`titles`, `metadata`, `errors`]
+        :param new_content: The entry to append. IMDb objects replace any older copy with the same `imdbID`.
+        :return None:
+        """
+        self.append_many(content_key=content_key, new_contents=[new_content])
+
+    def append_many(self, content_key, new_contents):
+        """
+
+        :param str content_key: The section to append to. Valid Options: [`titles`, `metadata`, `errors`]
+        :param list new_contents: The entries to append, in a single batch.
+        :return None:
+        """
+        raise NotImplementedError
+
+    def update_title(self, title, values):
+        """
+
+        :param str title: The (formatted) title of the `titles` entries to update.
+        :param dict values: The values to set on those entries.
+        :return None:
+        """
+        self.update_titles(updates={title: values})
+
+    def update_titles(self, updates):
+        """
+
+        :param dict updates: A dictionary of (formatted) titles, each containing the values to set on its `titles` entries.
+        :return None:
+
+        Updates several titles in a single batch.
+        """
+        raise NotImplementedError
+
+    def save(self, metadata):
+        """
+
+        :param dict metadata: The complete metadata document, replacing the current contents.
+        :return None:
+        """
+        raise NotImplementedError
+
+    def import_json(self, filepath=None):
+        """
+
+        :param str filepath: The JSON layout metadata file to import. Defaults to `metadata_filepath`.
+        :return None:
+        """
+        if filepath is None:
+            filepath = self.metadata_filepath
+
+        with open(filepath, encoding="UTF-8") as infile:
+            metadata = json.load(infile)
+
+        self.save(metadata=metadata)
+
+    def export_json(self, filepath=None):
+        """
+
+        :param str filepath: The path to export the metadata to, in JSON layout. Defaults to `metadata_filepath`.
+        :return None:
+        """
+        if filepath is None:
+            filepath = self.metadata_filepath
+
+        self._dump_json(metadata=self.load(), filepath=filepath)
+
+    def optimize(self):
+        """Reclaims any unused storage space."""
+        pass
+
+    def close(self):
+        """Releases any resources held by the backend."""
+        pass
+
+
+class JsonMetadataBackend(MetadataBackend):
+    """Stores the metadata as a single JSON document, which is fully parsed and rewritten on every change."""
+
+    def exists(self):
+        return os.path.exists(self.metadata_filepath)
+
+    def initialize(self):
+        if self.exists():
+            return False
+
+        self._dump_json(metadata=empty_metadata(), filepath=self.metadata_filepath)
+        return True
+
+    def load(self):
+        with open(self.metadata_filepath, encoding="UTF-8") as infile:
+            return json.load(infile)
+
+    def iter_titles(self):
+        # Stream the `titles` section, without ever parsing the (much larger) `metadata` section:
+        return iter_json_array(filepath=self.metadata_filepath, key="titles")
+
+    def append_many(self, content_key, new_contents):
+        self.initialize()
+        metadata = self.load()
+
+        # Check that the `content_key` exists:
+        if metadata.get(content_key) is None:
+            raise KeyError(content_key)
+
+        if content_key == "metadata":
+            # IMDb objects are unique by `imdbID`, so a newer copy replaces an older one:
+            metadata[content_key] = deduplicate_imdb_objects(
+                imdb_objects=metadata[content_key] + list(new_contents)
+            )
+        else:
+            metadata[content_key].extend(new_contents)
+
+        self.save(metadata=metadata)
+
+    def update_titles(self, updates):
+        metadata = self.load()
+        for entry in metadata.get("titles", []):
+            if isinstance(entry, dict) and entry.get("title") in updates:
+                entry.update(updates[entry.get("title")])
+
+        self.save(metadata=metadata)
+
+    def save(self, metadata):
+        self._dump_json(metadata=metadata, filepath=self.metadata_filepath)
+
+    def import_json(self, filepath=None):
+        # Importing the backend's own file is a no-op:
+        if filepath is None or os.path.abspath(filepath) == os.path.abspath(
+            self.metadata_filepath
+        ):
+            return
+
+        super().import_json(filepath=filepath)
+
+
+class SqliteMetadataBackend(MetadataBackend):
+    """
+
+    Stores the metadata in an SQLite database (`<metadata_filename>.sqlite3`, next to the JSON file).
+
+    Every entry is kept as a JSON document, with the common `titles` lookup keys (and `imdbID` for IMDb objects)
+    in indexed columns. The database uses write-ahead logging, so readers never block the writer.
+    If a JSON layout metadata file already exists when the database is created, it is imported automatically.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS titles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            original_filename TEXT,
+            imdb_id TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS titles_title ON titles (title);
+        CREATE INDEX IF NOT EXISTS titles_original_filename ON titles (original_filename);
+        CREATE INDEX IF NOT EXISTS titles_imdb_id ON titles (imdb_id);
+        CREATE TABLE IF NOT EXISTS metadata (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            imdb_id TEXT UNIQUE,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS errors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(
+        self, directory, metadata_filename="metadata.json", compact=False, verbose=False
+    ):
+        super().__init__(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            compact=compact,
+            verbose=verbose,
+        )
+        self._connection = None
+
+    @property
+    def database_filepath(self):
+        """The path of the SQLite database."""
+        return os.path.join(
+            self._directory, metadata_storage_filenames(self._metadata_filename)[1]
+        )
+
+    @property
+    def storage_filepath(self):
+        return self.database_filepath
+
+    def _connect(self):
+        """
+
+        :return sqlite3.Connection: The (lazily opened) database connection.
+        """
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.database_filepath, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(self.SCHEMA)
+
+        return self._connection
+
+    def exists(self):
+        return os.path.exists(self.database_filepath)
+
+    def initialize(self):
+        if self.exists():
+            self._connect()
+            return False
+
+        self._connect()
+        if os.path.exists(self.metadata_filepath):
+            if self._verbose:
+                print(
+                    f'[IMPORTING] [METADATA FILE] "{self.metadata_filepath}" into [DATABASE] "{self.database_filepath}"\n'
+                )
+            self.import_json(filepath=self.metadata_filepath)
+
+        return True
+
+    def _select(self, content_key):
+        """
+
+        :param str content_key: The section to read.
+        :return iterator: Yields every entry of the section, in insertion order.
+        """
+        if content_key not in CONTENT_KEYS:
+            raise KeyError(content_key)
+
+        self.initialize()
+        for (data,) in self._connect().execute(
+            f"SELECT data FROM {content_key} ORDER BY id"
+        ):
+            yield json.loads(data)
+
+    def load(self):
+        return {
+            content_key: list(self._select(content_key=content_key))
+            for content_key in CONTENT_KEYS
+        }
+
+    def iter_titles(self):
+        return self._select(content_key="titles")
+
+    def find_title(self, key, value):
+        if key not in INDEXED_TITLE_KEYS:
+            return super().find_title(key=key, value=value)
+
+        self.initialize()
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT data FROM titles WHERE {key} = ? ORDER BY id LIMIT 1", (value,)
+            )
+            .fetchone()
+        )
+
+        return json.loads(row[0]) if row is not None else None
+
+    def _insert(self, connection, content_key, new_contents):
+        """
+
+        :param sqlite3.Connection connection: The connection (inside a transaction) to insert with.
+        :param str content_key: The section to insert into.
+        :param list new_contents: The entries to insert.
+        :return None:
+        """
+        if content_key == "titles":
+            connection.executemany(
+                "INSERT INTO titles (title, original_filename, imdb_id, data) VALUES (?, ?, ?, ?)",
+                [
+                    [
+                        entry.get(key) if isinstance(entry, dict) else None
+                        for key in INDEXED_TITLE_KEYS
+                    ]
+                    + [json.dumps(entry)]
+                    for entry in new_contents
+                ],
+            )
+        elif content_key == "metadata":
+            # IMDb objects are unique by `imdbID`, so a newer copy replaces an older one (keeping its position):
+            connection.executemany(
+                "INSERT INTO metadata (imdb_id, data) VALUES (?, ?) ON CONFLICT (imdb_id) DO UPDATE SET data = excluded.data",
+                [
+                    (
+                        (
+                            (entry.get("imdbID") or None)
+                            if isinstance(entry, dict)
+                            else None
+                        ),
+                        json.dumps(entry),
+                    )
+                    for entry in new_contents
+                ],
+            )
+        elif content_key == "errors":
+            connection.executemany(
+                "INSERT INTO errors (data) VALUES (?)",
+                [(json.dumps(entry),) for entry in new_contents],
+            )
+        else:
+            raise KeyError(content_key)
+
+    def append_many(self, content_key, new_contents):
+        self.initialize()
+        connection = self._connect()
+        # A single transaction per batch:
+        with connection:
+            self._insert(
+                connection=connection,
+                content_key=content_key,
+                new_contents=new_contents,
+            )
+
+    def update_titles(self, updates):
+        self.initialize()
+        connection = self._connect()
+        with connection:
+            for title, values in updates.items():
+                for row_id, data in connection.execute(
+                    "SELECT id, data FROM titles WHERE title = ?", (title,)
+                ).fetchall():
+                    entry = json.loads(data)
+                    entry.update(values)
+                    connection.execute(
+                        "UPDATE titles SET title = ?, original_filename = ?, imdb_id = ?, data = ? WHERE id = ?",
+                        [entry.get(key) for key in INDEXED_TITLE_KEYS]
+                        + [json.dumps(entry), row_id],
+                    )
+
+    def save(self, metadata):
+        connection = self._connect()
+        with connection:
+            for content_key in CONTENT_KEYS:
+                connection.execute(f"DELETE FROM {content_key}")
+                self._insert(
+                    connection=connection,
+                    content_key=content_key,
+                    new_contents=metadata.get(content_key, []),
+                )
+
+    def optimize(self):
+        connection = self._connect()
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("VACUUM")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class JournalMetadataBackend(MetadataBackend):
+    """
+
+    Appends every change as a single line to a JSON Lines journal (`<metadata_filename>.jsonl`),
+    on top of the last compacted `metadata.json` snapshot.
+
+    Appends are O(1) and crash-safe: a crash can at most lose the (truncated) line being written.
+    The journal is compacted into `metadata.json` in the background every `compaction_threshold` lines,
+    and when the backend is closed (at the latest, when the process exits).
+
+    Compaction never loses or duplicates entries, even if it's interrupted:
+
+    1. The journal is renamed to `<journal>.compacting`, so new appends start a fresh journal.
+    2. The snapshot plus that journal are written to `<metadata_filename>.compacted`.
+    3. `<journal>.compacting` is removed, which makes `<metadata_filename>.compacted` authoritative.
+    4. `<metadata_filename>.compacted` replaces `metadata.json`.
+    """
+
+    def __init__(
+        self,
+        directory,
+        metadata_filename="metadata.json",
+        compact=False,
+        verbose=False,
+        compaction_threshold=1000,
+    ):
+        super().__init__(
+            directory=directory,
+            metadata_filename=metadata_filename,
+            compact=compact,
+            verbose=verbose,
+        )
+        self._compaction_threshold = compaction_threshold
+        self._lock = threading.RLock()
+        self._compaction_thread = None
+        self._appended_lines = 0
+        self._journal_checked = False
+        self._exit_handler_registered = False
+
+    @property
+    def journal_filepath(self):
+        """The path of the journal."""
+        return os.path.join(
+            self._directory, metadata_storage_filenames(self._metadata_filename)[5]
+        )
+
+    def _recover(self):
+        """
+
+        :return None:
+
+        Finishes (or rolls back) a compaction that was interrupted by a crash.
+        """
+        compacting_filepath = self.journal_filepath + ".compacting"
+        compacted_filepath = self.metadata_filepath + ".compacted"
+        if os.path.exists(compacted_filepath):
+            if os.path.exists(compacting_filepath):
+                # The compacted snapshot may be incomplete, the snapshot and journals are still authoritative:
+                os.remove(compacted_filepath)
+            else:
+                os.replace(compacted_filepath, self.metadata_filepath)
+
+    def _open_journals(self):
+        """
+
+        :return list: The journals (the one being compacted first), opened, with their size when they were opened.
+
+        Appends and compactions only ever add to the end of a journal, or rename it, so reading an opened journal
+        up to that size always yields the same records, even if the journal is compacted in the meantime.
+        """
+        journals = []
+        for filepath in [self.journal_filepath + ".compacting", self.journal_filepath]:
+            try:
+                infile = open(filepath, mode="rb")
+            except FileNotFoundError:
+                continue
+            journals.append((filepath, infile, os.fstat(infile.fileno()).st_size))
+
+        return journals
+
+    def _read_journal(self, journals=None):
+        """
+
+        :param list journals: The opened journals to read (see `_open_journals()`). Opens the current journals if not provided.
+        :return iterator: Yields every (complete) journal record, oldest first.
+        """
+        opened_journals = journals is None
+        if opened_journals:
+            journals = self._open_journals()
+
+        try:
+            for filepath, infile, size in journals:
+                infile.seek(0)
+                while infile.tell() < size:
+                    line = infile.readline(size - infile.tell())
+                    if not line:
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Only the last line can be truncated (by a crash mid-append):
+                        if self._verbose:
+                            print(
+                                f'[SKIPPED] [TRUNCATED JOURNAL LINE] in [FILE] "{filepath}"\n'
+                            )
+                        continue
+                    yield record
+        finally:
+            if opened_journals:
+                for filepath, infile, size in journals:
+                    infile.close()
+
+    def _load_snapshot(self):
+        """
+
+        :return dict: The last compacted metadata document.
+        """
+        if not os.path.exists(self.metadata_filepath):
+            return empty_metadata()
+
+        with open(self.metadata_filepath, encoding="UTF-8") as infile:
+            return json.load(infile)
+
+    def exists(self):
+        return os.path.exists(self.metadata_filepath) or os.path.exists(
+            self.journal_filepath
+        )
+
+    def initialize(self):
+        with self._lock:
+            self._recover()
+            if self.exists():
+                return False
+
+            self._dump_json(metadata=empty_metadata(), filepath=self.metadata_filepath)
+            return True
+
+    def load(self):
+        with self._lock:
+            self._recover()
+            metadata = self._load_snapshot()
+            for record in self._read_journal():
+                if record.get("op") == "append":
+                    metadata.setdefault(record["key"], []).append(record["entry"])
+                elif record.get("op") == "update":
+                    for entry in metadata.get("titles", []):
+                        if (
+                            isinstance(entry, dict)
+                            and entry.get("title") == record["title"]
+                        ):
+                            entry.update(record["values"])
+
+        metadata["metadata"] = deduplicate_imdb_objects(
+            imdb_objects=metadata.get("metadata", [])
+        )
+        return metadata
+
+    def iter_titles(self):
+        # Open the snapshot and the journals together, so a compaction running while the titles are streamed
+        # (which replaces the snapshot and moves the journal into it) can't duplicate or drop any of them:
+        with self._lock:
+            self._recover()
+            snapshot = None
+            if os.path.exists(self.metadata_filepath):
+                snapshot = open(self.metadata_filepath, encoding="UTF-8")
+            journals = self._open_journals()
+
+        try:
+            yield from self._iter_titles(snapshot=snapshot, journals=journals)
+        finally:
+            if snapshot is not None:
+                snapshot.close()
+            for filepath, infile, size in journals:
+                infile.close()
+
+    def _iter_titles(self, snapshot, journals):
+        """
+
+        :param file snapshot: The opened snapshot, if any.
+        :param list journals: The opened journals (see `_open_journals()`).
+        :return iterator: Yields every `titles` entry, with its updates applied.
+        """
+        # Updates are rare, collect them first, so the `titles` entries themselves can be streamed:
+        updates = []
+        for position, record in enumerate(self._read_journal(journals=journals)):
+            if record.get("op") == "update":
+                updates.append((position, record["title"], record["values"]))
+
+        def apply_updates(position, entry):
+            for update_position, title, values in updates:
+                if (
+                    update_position > position
+                    and isinstance(entry, dict)
+                    and entry.get("title") == title
+                ):
+                    entry.update(values)
+            return entry
+
+        if snapshot is not None:
+            # Stream the snapshot's `titles` section, without ever parsing its `metadata` section:
+            for entry in iter_json_file_array(infile=snapshot, key="titles"):
+                yield apply_updates(position=-1, entry=entry)
+
+        for position, record in enumerate(self._read_journal(journals=journals)):
+            if record.get("op") == "append" and record.get("key") == "titles":
+                yield apply_updates(position=position, entry=record["entry"])
+
+    def _append_records(self, records):
+        """
+
+        :param list records: The journal records to append, in a single write.
+        :return None:
+        """
+        with self._lock:
+            self._recover()
+            if not self._journal_checked and os.path.exists(self.journal_filepath):
+                # Never append to a line truncated by an earlier crash:
+                with open(self.journal_filepath, mode="rb") as infile:
+                    infile.seek(0, os.SEEK_END)
+                    if infile.tell() > 0:
+                        infile.seek(-1, os.SEEK_END)
+                        if infile.read(1) != b"\n":
+                            records = [None] + records
+            self._journal_checked = True
+
+            lines = "".join(
+                (
+                    json.dumps(record, separators=(",", ":"))
+                    if record is not None
+                    else ""
+                )
+                + "\n"
+                for record in records
+            )
+            with open(self.journal_filepath, mode="a", encoding="UTF-8") as outfile:
+                outfile.write(lines)
+                outfile.flush()
+                os.fsync(outfile.fileno())
+
+            if not self._exit_handler_registered:
+                atexit.register(self.close)
+                self._exit_handler_registered = True
+
+            self._appended_lines += len(records)
+            if (
+                self._compaction_threshold
+                and self._appended_lines >= self._compaction_threshold
+            ):
+                self._appended_lines = 0
+                self._start_compaction()
+
+    def _start_compaction(self):
+        """Compacts the journal in a background thread (unless a compaction is already running)."""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+
+        self._compaction_thread = threading.Thread(
+            target=self.compact_journal, daemon=True
+        )
+        self._compaction_thread.start()
+
+    def append_many(self, content_key, new_contents):
+        if content_key not in CONTENT_KEYS:
+            raise KeyError(content_key)
+
+        self._append_records(
+            records=[
+                {"op": "append", "key": content_key, "entry": new_content}
+                for new_content in new_contents
+            ]
+        )
+
+    def update_titles(self, updates):
+        self._append_records(
+            records=[
+                {"op": "update", "title": title, "values": values}
+                for title, values in updates.items()
+            ]
+        )
+
+    def save(self, metadata):
+        with self._lock:
+            self._recover()
+            self._dump_json(metadata=metadata, filepath=self.metadata_filepath)
+            for filepath in [
+                self.journal_filepath + ".compacting",
+                self.journal_filepath,
+            ]:
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+
+    def compact_journal(self):
+        """
+
+        :return bool: Compacts the journal into the `metadata.json` snapshot. Returns False if there was nothing to compact.
+        """
+        with self._lock:
+            self._recover()
+            compacting_filepath = self.journal_filepath + ".compacting"
+            if not os.path.exists(self.journal_filepath) and not os.path.exists(
+                compacting_filepath
+            ):
+                return False
+
+            if os.path.exists(self.journal_filepath):
+                if os.path.exists(compacting_filepath):
+                    # An earlier compaction was interrupted, fold the current journal into it:
+                    with open(self.journal_filepath, mode="rb") as infile, open(
+                        compacting_filepath, mode="a+b"
+                    ) as outfile:
+                        # Never append to a line truncated by the interrupted compaction:
+                        if outfile.tell() > 0:
+                            outfile.seek(-1, os.SEEK_END)
+                            if outfile.read(1) != b"\n":
+                                outfile.write(b"\n")
+                        outfile.write(infile.read())
+                    os.remove(self.journal_filepath)
+                else:
+                    os.replace(self.journal_filepath, compacting_filepath)
+                self._journal_checked = False
+
+            compacted_filepath = self.metadata_filepath + ".compacted"
+            self._write_json(metadata=self.load(), filepath=compacted_filepath)
+            os.remove(compacting_filepath)
+            os.replace(compacted_filepath, self.metadata_filepath)
+
+            if self._verbose:
+                print(
+                    f'[COMPACTED] [JOURNAL] "{self.journal_filepath}" into [FILE] "{self.metadata_filepath}"\n'
+                )
+
+            return True
+
+    def import_json(self, filepath=None):
+        # Importing the backend's own snapshot is a no-op:
+        if filepath is None or os.path.abspath(filepath) == os.path.abspath(
+            self.metadata_filepath
+        ):
+            return
+
+        super().import_json(filepath=filepath)
+
+    def export_json(self, filepath=None):
+        # Exporting to the backend's own snapshot is a compaction:
+        if filepath is None or os.path.abspath(filepath) == os.path.abspath(
+            self.metadata_filepath
+        ):
+            self.compact_journal()
+            return
+
+        super().export_json(filepath=filepath)
+
+    def optimize(self):
+        self.compact_journal()
+
+    def close(self):
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+
+        if os.path.isdir(self._directory):
+            self.compact_journal()
+
+
+METADATA_BACKENDS = {
+    "json": JsonMetadataBackend,
+    "sqlite": SqliteMetadataBackend,
+    "journal": JournalMetadataBackend,
+}
+
+
+def get_metadata_backend(
+    directory,
+    metadata_filename="metadata.json",
+    backend="json",
+    compact=False,
+    verbose=False,
+):
+    """
+
+    :param str directory: The directory containing the metadata.
+    :param str metadata_filename: The metadata filename (in JSON layout).
+    :param str backend: The name of the metadata backend. Valid Options: [`json`, `sqlite`, `journal`]
+    :param bool compact: Whether JSON output should be compact (non-indented).
+    :param bool verbose: Whether to activate verbose mode.
+    :return MetadataBackend: A metadata backend instance.
+    """
+    if backend not in METADATA_BACKENDS:
+        raise ValueError(
+            f'Unknown metadata backend "{backend}". Choose one of the following: {sorted(METADATA_BACKENDS)}'
+        )
+
+    return METADATA_BACKENDS[backend](
+        directory=directory,
+        metadata_filename=metadata_filename,
+        compact=compact,
+        verbose=verbose,
+    )
@@ -2,15 +2,21 @@ import os
 import re
 import json
 import omdb
-from fuzzywuzzy import process as fuzzywuzzy_process
+
+from .fuzzy_matcher import FuzzyMatcher
 
 OMDB_API_KEY = os.environ.get("OMDB_API_KEY")
+# The number of namesakes (e.g. remakes) whose runtimes may be looked up to tell them apart:
+MAX_RUNTIME_LOOKUPS = 4
 
 
 class OmdbService:
-    def __init__(self, omdb_api_key=None, verbose=False):
+    def __init__(self, omdb_api_key=None, fuzzy_scorer="fuzzywuzzy", verbose=False):
+        self._fuzzy_scorer = fuzzy_scorer
         self._verbose = verbose
         self._action_counter = 0
+        self._api_call_counter = 0
+        self._season_cache = {}
 
         omdb_api_key = omdb_api_key or OMDB_API_KEY
         if omdb_api_key:
@@ -64,10 +70,9 @@ class OmdbService:
             )
             self._action_counter += 1
 
-        response = {
-            "Response": "False"
-        }
-    
+        response = {"Response": "False"}
+
+        self._api_call_counter += 1
         omdb_response = self._omdb_api.search(
             search_terms=search_terms,
             imdb_id=imdb_id,
@@ -104,6 +109,35 @@ class OmdbService:
 
         return response
 
+    @property
+    def api_call_count(self):
+        """The number of requests sent to the OMDb API by this service so far."""
+        return self._api_call_counter
+
+    def get_season(self, imdb_id, season):
+        """
+
+        :param str imdb_id: The IMDb ID of a `series`.
+        :param int season: The season number to return the episode list for.
+        :return json: An OMDb API response containing the `Episodes` list of the given season.
+
+        Fetches a whole season's episode list with a single `Season=` request.
+        Responses are kept for the lifetime of the service, so every season is only requested once.
+        """
+        if self._verbose:
+            print(
+                f'[{self._action_counter}] [SEARCHING] for [SEASON] "{season}" of [IMDB ID] "{imdb_id}"\n'
+            )
+            self._action_counter += 1
+
+        season_key = (imdb_id, int(season))
+        if season_key not in self._season_cache:
+            self._season_cache[season_key] = self._search(
+                imdb_id=imdb_id, season=int(season)
+            )
+
+        return self._season_cache[season_key]
+
     def search_by_search_terms(self, search_terms, release_year=None):
         """
 
@@ -177,39 +211,106 @@ class OmdbService:
             )
             self._action_counter += 1
 
-        result_values = {}
-        for search_item in search_list:
-            # Make sure our candidates are actually the type we want to search on (or that `result_type` wasn't provided)
-            # Also ensure it has a poster (missing poster is a sure sign of a bad result):
-            if (
-                result_type is None or search_item.get("Type") == result_type
-            ) and search_item.get("Poster") != "N/A":
-                title = search_item.get(search_key)
-                result_value = search_item.get(result_key)
-                result_values[title] = result_value
-
-        titles = result_values.keys()
-        fuzziness_ratios_list = fuzzywuzzy_process.extract(search_query, titles)
+        fuzzy_matcher = FuzzyMatcher(
+            search_list=search_list,
+            search_key=search_key,
+            result_key=result_key,
+            result_type=result_type,
+            scorer=self._fuzzy_scorer,
+        )
+        ((fuzzy_title, final_result_value, fuzzy_score),) = fuzzy_matcher.best_matches(
+            search_queries=[search_query]
+        )
         if self._verbose:
             print(
-                f"[FOUND] Each title, ordered by fuzziness ratio: {fuzziness_ratios_list}\n"
+                f'[FOUND] The fuzziest title: "{fuzzy_title}" with [FUZZY SCORE] "{fuzzy_score}"\n'
             )
+            print(f'[FOUND] [RESULT KEY] ({result_key}) "{final_result_value}"')
 
-        fuzziest_title = fuzzywuzzy_process.extractOne(search_query, titles)
-        if self._verbose:
-            print(f'[FOUND] The fuzziest title: "{fuzziest_title}"\n')
+        return final_result_value, fuzzy_score
 
-        fuzzy_title, fuzzy_score = fuzziest_title
+    @staticmethod
+    def _parse_runtime(imdb_object):
+        """
 
-        final_result_value = result_values.get(fuzzy_title)
+        :param dict imdb_object: An IMDb object.
+        :return int: The runtime of the IMDb object in minutes (e.g. "142 min"), or None if it's unknown.
+        """
+        runtime_match = re.match(r"\s*(\d+)\s*min", str(imdb_object.get("Runtime", "")))
+        if runtime_match is None:
+            return None
 
-        if self._verbose:
-            print(f'[FOUND] [RESULT KEY] ({result_key}) "{final_result_value}"')
+        return int(runtime_match.group(1))
+
+    def _disambiguate_by_runtime(self, imdb_id, result_candidates, runtime_minutes):
+        """
+
+        :param str imdb_id: The IMDb ID of the best match.
+        :param list result_candidates: The IMDb objects the best match was chosen from.
+        :param float runtime_minutes: The runtime of the movie file, in minutes.
+        :return tuple: The IMDb ID of the namesake of the best match whose runtime is the closest to `runtime_minutes`,
+        and its IMDb object if it was already looked up (None otherwise).
+
+        Namesakes (e.g. a remake and the original) match a title equally well, and search results don't list runtimes,
+        so up to `MAX_RUNTIME_LOOKUPS` of them are looked up by IMDb ID. The best match wins ties.
+        """
+        candidates = {}
+        for result_candidate in result_candidates:
+            candidates.setdefault(result_candidate.get("imdbID"), result_candidate)
+
+        best_match = candidates.get(imdb_id)
+        if best_match is None:
+            return imdb_id, None
+
+        title = str(best_match.get("Title", "")).strip().lower()
+        namesake_imdb_ids = [imdb_id] + [
+            candidate_imdb_id
+            for candidate_imdb_id, candidate in candidates.items()
+            if candidate_imdb_id != imdb_id
+            and str(candidate.get("Title", "")).strip().lower() == title
+            and candidate.get("Type") == best_match.get("Type")
+        ]
+        if len(namesake_imdb_ids) < 2:
+            return imdb_id, None
+
+        imdb_objects = {}
+        runtimes = {}
+        for namesake_imdb_id in namesake_imdb_ids[:MAX_RUNTIME_LOOKUPS]:
+            namesake = candidates[namesake_imdb_id]
+            if self._parse_runtime(imdb_object=namesake) is None:
+                namesake = self.search_by_imdb_id(imdb_id=namesake_imdb_id)
+                if namesake.get("Response") != "True":
+                    continue
+                imdb_objects[namesake_imdb_id] = namesake
+
+            runtime = self._parse_runtime(imdb_object=namesake)
+            if runtime is not None:
+                runtimes[namesake_imdb_id] = runtime
+
+        if not runtimes:
+            return imdb_id, imdb_objects.get(imdb_id)
+
+        closest_imdb_id = min(
+            runtimes,
+            key=lambda namesake_imdb_id: (
+                abs(runtimes[namesake_imdb_id] - runtime_minutes),
+                namesake_imdb_id != imdb_id,
+            ),
+        )
+        if self._verbose and closest_imdb_id != imdb_id:
+            print(
+                f'[DISAMBIGUATED] [IMDB ID] "{imdb_id}" to "{closest_imdb_id}" by [RUNTIME] "{runtimes[closest_imdb_id]} min" (the movie file runs for "{runtime_minutes} min")\n'
+            )
+
+        return closest_imdb_id, imdb_objects.get(closest_imdb_id)
 
-        return final_result_value, fuzzy_score
-        
     def get_imdb_object(
-        self, search_query, imdb_id=None, release_year=None, result_type=None
+        self,
+        search_query,
+        imdb_id=None,
+        release_year=None,
+        result_type=None,
+        runtime_minutes=None,
     ):
         """
 
@@ -217,10 +318,12 @@ class OmdbService:
         :param str imdb_id: IMDb ID to search by.
         :param str release_year: Optional release year to make the search more specific.
         :param str result_type: What type of IMDb object you want returned. Valid Options: [`movie`, `series`, `episode`]
+        :param float runtime_minutes: The runtime of the movie file, used to tell namesakes apart. [optional]
         :return json: An OMDb API response containing the most probable IMDb object that matches the search criteria.
 
         Recursively searches OMDb API for a list of IMDb objects closest to the given `title_candidate` and `release_year` and uses
         Fuzzy Searching to find the best possible match from the list of results.
+        If the best match has namesakes (e.g. remakes), the one with the runtime closest to `runtime_minutes` wins.
         """
 
         # If the IMDb ID is provided, use it! It will be the most accurate result (assuming OMDb API doesn't fail)
@@ -307,19 +410,42 @@ class OmdbService:
                 f'[LAST KNOWN VALID SEARCH QUERY]: "{last_known_valid_search_query}"\n'
             )
         if result_candidates:
-            for search_query_candidate in search_query_candidates:
-                if search_query_candidate is not None:
-                    candidate_imdb_id, fuzzy_score = self._fuzzy_search(
-                        search_query=search_query_candidate,
-                        search_key="Title",
-                        search_list=result_candidates,
-                        result_key="imdbID",
-                        result_type=result_type,
+            # Build (and normalize) the candidate pool once and score every valid query candidate against it in one batch:
+            fuzzy_matcher = FuzzyMatcher(
+                search_list=result_candidates,
+                search_key="Title",
+                result_key="imdbID",
+                result_type=result_type,
+                scorer=self._fuzzy_scorer,
+            )
+            if not fuzzy_matcher.titles:
+                if self._verbose:
+                    print(
+                        f'[DID NOT FIND] Any [{result_type}] candidates for [SEARCH QUERY] "{original_search_query}"\n'
                     )
-                    if fuzzy_score not in fuzzy_scores:
-                        fuzzy_scores[fuzzy_score] = []
-                    fuzzy_scores[fuzzy_score].append(candidate_imdb_id)
-                    imdb_id_candidates[search_query_candidate] = candidate_imdb_id
+                return None
+
+            valid_search_query_candidates = [
+                search_query_candidate
+                for search_query_candidate in search_query_candidates
+                if search_query_candidate is not None
+            ]
+            best_matches = fuzzy_matcher.best_matches(
+                search_queries=valid_search_query_candidates
+            )
+            for search_query_candidate, (
+                fuzzy_title,
+                candidate_imdb_id,
+                fuzzy_score,
+            ) in zip(valid_search_query_candidates, best_matches):
+                if self._verbose:
+                    print(
+                        f'[FOUND] The fuzziest title for [SEARCH QUERY] "{search_query_candidate}": "{fuzzy_title}" with [FUZZY SCORE] "{fuzzy_score}"\n'
+                    )
+                if fuzzy_score not in fuzzy_scores:
+                    fuzzy_scores[fuzzy_score] = []
+                fuzzy_scores[fuzzy_score].append(candidate_imdb_id)
+                imdb_id_candidates[search_query_candidate] = candidate_imdb_id
             max_fuzzy_score = max(fuzzy_scores.keys())
             imdb_ids = fuzzy_scores[max_fuzzy_score]
 
@@ -338,6 +464,15 @@ class OmdbService:
             if self._verbose:
                 print(f'[FOUND BEST MATCH] [IMDB ID] "{imdb_id}"')
 
+            if runtime_minutes is not None:
+                imdb_id, imdb_object = self._disambiguate_by_runtime(
+                    imdb_id=imdb_id,
+                    result_candidates=result_candidates,
+                    runtime_minutes=runtime_minutes,
+                )
+                if imdb_object is not None:
+                    return imdb_object
+
             return self.get_imdb_object(search_query="", imdb_id=imdb_id)
 
     def _get_release_year(self, search_terms):
@@ -392,4 +527,4 @@ class OmdbService:
             if self._verbose:
                 print("[DID NOT FIND] [RELEASE YEAR]\n")
 
-        return release_year
\ No newline at end of file
+        return release_year
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A local, content-addressed poster cache, shared across libraries and runs.
+
+Every poster is stored once, under the SHA-256 hash of its content (`objects/<ab>/<abcdef...>`), and an index maps
+poster URLs to content hashes. Posters are placed into title folders with a hardlink, a reflink (copy-on-write clone)
+or, as a last resort, a copy. The cache is capped in size and evicts the least recently used posters first.
+The cap only counts the space the cache alone holds: a poster still hardlinked into a library takes no extra space
+(evicting it would free nothing), so it's neither counted nor evicted.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+POSTER_CACHE_VERSION = 1
+# The `FICLONE` ioctl (Linux), which clones a file on copy-on-write filesystems (i.e., Btrfs, XFS):
+FICLONE = 0x40049409
+HASH_CHUNK_SIZE = 65536
+
+
+def default_poster_cache_directory():
+    """
+
+    :return str: The default poster cache directory (`$XDG_CACHE_HOME/movie-file-fixer/posters`).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "movie-file-fixer", "posters")
+
+
+def hash_file(filepath):
+    """
+
+    :param str filepath: The file to hash.
+    :return str: The SHA-256 hex digest of the file's content.
+    """
+    sha256 = hashlib.sha256()
+    with open(filepath, "rb") as infile:
+        for chunk in iter(lambda: infile.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+def link_or_copy(source, destination, allow_copy=True):
+    """
+
+    :param str source: The file to place.
+    :param str destination: The path to place it at (replacing any existing file).
+    :param bool allow_copy: Whether to copy the file if it can neither be hardlinked nor reflinked.
+    :return str: How the file was placed. Valid Options: [`hardlink`, `reflink`, `copy`]
+
+    Places the file with the cheapest method the filesystem allows. The destination is written next to its final
+    path and renamed into place, so it's never left half-written. Raises an `OSError` if the file would have to be
+    copied and `allow_copy` is False.
+    """
+    temporary_destination = destination + ".part"
+    if os.path.exists(temporary_destination):
+        os.remove(temporary_destination)
+
+    try:
+        os.link(source, temporary_destination)
+        method = "hardlink"
+    except OSError:
+        method = None
+        if fcntl is not None:
+            try:
+                with open(source, "rb") as infile, open(
+                    temporary_destination, "wb"
+                ) as outfile:
+                    fcntl.ioctl(outfile.fileno(), FICLONE, infile.fileno())
+                method = "reflink"
+            except OSError:
+                pass
+        if method is None:
+            if not allow_copy:
+                if os.path.exists(temporary_destination):
+                    os.remove(temporary_destination)
+                raise OSError(
+                    f'"{source}" can neither be hardlinked nor reflinked to "{destination}".'
+                )
+            shutil.copyfile(source, temporary_destination)
+            method = "copy"
+
+    os.replace(temporary_destination, destination)
+
+    return method
+
+
+class PosterCache:
+    def __init__(self, directory=None, max_size=512 * 1024 * 1024, verbose=False):
+        """
+
+        :param str directory: The cache directory. Defaults to `default_poster_cache_directory()`.
+        :param int max_size: The maximum size of the cache (in bytes), enforced by `save()`.
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._directory = directory or default_poster_cache_directory()
+        self._max_size = max_size
+        self._verbose = verbose
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.objects_directory, exist_ok=True)
+        self._urls = self._load_index()
+
+    def _load_index(self):
+        """
+
+        :return dict: The URL -> content hash index stored on disk.
+        """
+        if not os.path.exists(self.index_filepath):
+            return {}
+
+        with open(self.index_filepath, encoding="UTF-8") as infile:
+            index = json.load(infile)
+
+        if index.get("version") != POSTER_CACHE_VERSION:
+            return {}
+
+        return index.get("urls", {})
+
+    @property
+    def objects_directory(self):
+        """The directory containing the content-addressed posters."""
+        return os.path.join(self._directory, "objects")
+
+    @property
+    def index_filepath(self):
+        """The path of the URL -> content hash index."""
+        return os.path.join(self._directory, "index.json")
+
+    def _object_path(self, content_hash):
+        """
+
+        :param str content_hash: The SHA-256 hex digest of a poster.
+        :return str: The path the poster is stored at.
+        """
+        return os.path.join(self.objects_directory, content_hash[:2], content_hash)
+
+    def __len__(self):
+        return len(self._urls)
+
+    def get(self, url):
+        """
+
+        :param str url: A poster URL.
+        :return str: The content hash of the cached poster, or None if the URL isn't cached (anymore).
+        """
+        with self._lock:
+            content_hash = self._urls.get(url)
+            if content_hash is not None and not os.path.exists(
+                self._object_path(content_hash)
+            ):
+                # Evicted (or removed by hand):
+                del self._urls[url]
+                content_hash = None
+
+            if content_hash is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            # The modification time is the LRU clock:
+            os.utime(self._object_path(content_hash))
+
+        return content_hash
+
+    def materialize(self, url, destination):
+        """
+
+        :param str url: A poster URL.
+        :param str destination: The path to place the cached poster at.
+        :return str: The content hash of the poster placed at the destination, or None on a cache miss.
+        """
+        content_hash = self.get(url=url)
+        if content_hash is None:
+            return None
+
+        method = link_or_copy(
+            source=self._object_path(content_hash), destination=destination
+        )
+        if self._verbose:
+            print(
+                f'[POSTER CACHE HIT] "{url}" -> [FILEPATH] "{destination}" by [{method.upper()}]\n'
+            )
+
+        return content_hash
+
+    def add(self, url, filepath, content_hash=None):
+        """
+
+        :param str url: The URL the poster was downloaded from.
+        :param str filepath: The downloaded poster.
+        :param str content_hash: The SHA-256 hex digest of the poster, if already known. [optional]
+        :return str: The content hash of the poster.
+        """
+        if content_hash is None:
+            content_hash = hash_file(filepath=filepath)
+
+        object_path = self._object_path(content_hash)
+        with self._lock:
+            if os.path.exists(object_path):
+                os.utime(object_path)
+            else:
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                link_or_copy(source=filepath, destination=object_path)
+            self._urls[url] = content_hash
+
+        return content_hash
+
+    def evict(self, max_size=None):
+        """
+
+        :param int max_size: The maximum size of the cache (in bytes). Defaults to the cache's `max_size`.
+        :return int: The number of posters evicted, least recently used first.
+
+        Only posters no library links to anymore (a single hardlink) count toward `max_size` and are evicted.
+        """
+        if max_size is None:
+            max_size = self._max_size
+
+        objects = []
+        for root, dirs, files in os.walk(self.objects_directory):
+            for filename in files:
+                stat_result = os.stat(os.path.join(root, filename))
+                if stat_result.st_nlink == 1:
+                    objects.append(
+                        (stat_result.st_mtime, stat_result.st_size, filename)
+                    )
+
+        total_size = sum(size for mtime, size, content_hash in objects)
+        evicted_hashes = set()
+        for mtime, size, content_hash in sorted(objects):
+            if total_size <= max_size:
+                break
+            os.remove(self._object_path(content_hash))
+            total_size -= size
+            evicted_hashes.add(content_hash)
+
+        if evicted_hashes:
+            with self._lock:
+                self._urls = {
+                    url: content_hash
+                    for url, content_hash in self._urls.items()
+                    if content_hash not in evicted_hashes
+                }
+
+            if self._verbose:
+                print(
+                    f'[EVICTED] {len(evicted_hashes)} [POSTERS] from [POSTER CACHE] "{self._directory}"\n'
+                )
+
+        return len(evicted_hashes)
+
+    def save(self):
+        """
+
+        :return None:
+
+        Evicts the least recently used posters beyond the size cap and writes the index,
+        merged with any URLs another run added in the meantime.
+        """
+        self.evict()
+
+        temporary_filepath = self.index_filepath + f".{os.getpid()}.tmp"
+        with self._lock:
+            urls = self._load_index()
+            urls.update(self._urls)
+            # Only keep URLs whose posters are still cached:
+            self._urls = {
+                url: content_hash
+                for url, content_hash in urls.items()
+                if os.path.exists(self._object_path(content_hash))
+            }
+            with open(temporary_filepath, mode="w") as outfile:
+                json.dump(
+                    {"version": POSTER_CACHE_VERSION, "urls": self._urls},
+                    outfile,
+                    separators=(",", ":"),
+                )
+        os.replace(temporary_filepath, self.index_filepath)
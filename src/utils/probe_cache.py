@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A persistent cache of media file probes (see `media_probe`), shared across runs.
+
+Like the `HashCache`, entries are keyed by file identity (the device and inode numbers) and validated against the
+file's size and modification time, so renamed files keep their probes and unchanged files are never probed twice.
+The whole cache is dropped whenever the probe itself changes (`MEDIA_PROBE_VERSION`).
+"""
+
+import json
+import os
+import threading
+
+from .hash_cache import _file_identity
+from .media_probe import MEDIA_PROBE_VERSION, probe_media_files
+
+
+def default_probe_cache_filepath():
+    """
+
+    :return str: The default probe cache file (`$XDG_CACHE_HOME/movie-file-fixer/probes.json`).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "movie-file-fixer", "probes.json")
+
+
+class ProbeCache:
+    def __init__(self, filepath=None, verbose=False):
+        """
+
+        :param str filepath: The path of the cache file to load from and save to. Defaults to `default_probe_cache_filepath()`.
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._filepath = filepath or default_probe_cache_filepath()
+        self._verbose = verbose
+        self._lock = threading.Lock()
+        self._changed = False
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = self._load_entries()
+
+    def _load_entries(self):
+        """
+
+        :return dict: The entries stored on disk (none if the file is missing or from another probe version).
+        """
+        if not os.path.exists(self._filepath):
+            return {}
+
+        with open(self._filepath, encoding="UTF-8") as infile:
+            cache_file = json.load(infile)
+
+        if cache_file.get("version") != MEDIA_PROBE_VERSION:
+            return {}
+
+        return cache_file.get("entries", {})
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, filepath, stat_result=None):
+        """
+
+        :param str filepath: The path of a media file.
+        :param os.stat_result stat_result: The status of the file, if already known. [optional]
+        :return dict: The cached probe of the file, or None if it isn't cached or has changed since.
+        """
+        if stat_result is None:
+            stat_result = os.stat(filepath)
+        key, stamp = _file_identity(stat_result=stat_result)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["stamp"] != stamp:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        if self._verbose:
+            print(f'[PROBE CACHE HIT] "{filepath}"\n')
+
+        return entry["probe"]
+
+    def add(self, filepath, probe, stat_result=None):
+        """
+
+        :param str filepath: The path of the media file that was probed.
+        :param dict probe: The probe of the file (as returned by `probe_media_file()`).
+        :param os.stat_result stat_result: The status of the file, taken before it was probed. [optional]
+        :return None:
+
+        A file that was modified while it was being probed isn't cached.
+        """
+        current_stat_result = os.stat(filepath)
+        if stat_result is None:
+            stat_result = current_stat_result
+
+        key, stamp = _file_identity(stat_result=stat_result)
+        if _file_identity(stat_result=current_stat_result) != (key, stamp):
+            return
+
+        with self._lock:
+            self._entries[key] = {"stamp": stamp, "probe": probe}
+            self._changed = True
+
+    def probe_files(self, filepaths, max_workers_per_device=2):
+        """
+
+        :param list filepaths: The paths of the media files to probe.
+        :param int max_workers_per_device: The number of files probed concurrently on each device.
+        :return dict: The probe of every file, keyed by file path. Files that can't be read or probed map to None.
+
+        Only the files missing from the cache (or changed since) are probed.
+        """
+        probes = {}
+        stat_results = {}
+        for filepath in filepaths:
+            try:
+                stat_results[filepath] = os.stat(filepath)
+            except OSError:
+                probes[filepath] = None
+                continue
+            probes[filepath] = self.get(
+                filepath=filepath, stat_result=stat_results[filepath]
+            )
+
+        missing_filepaths = [
+            filepath
+            for filepath, probe in probes.items()
+            if probe is None and filepath in stat_results
+        ]
+        for filepath, probe in probe_media_files(
+            filepaths=missing_filepaths,
+            max_workers_per_device=max_workers_per_device,
+        ).items():
+            probes[filepath] = probe
+            if probe is not None:
+                self.add(
+                    filepath=filepath,
+                    probe=probe,
+                    stat_result=stat_results[filepath],
+                )
+
+        return probes
+
+    def save(self):
+        """
+
+        :return None:
+
+        Writes the cache file (merged with any entries another run added in the meantime), if anything was added.
+        The file is written to a temporary file first, so an interrupted save never leaves a truncated cache behind.
+        """
+        if not self._changed:
+            return
+
+        os.makedirs(os.path.dirname(os.path.abspath(self._filepath)), exist_ok=True)
+        temporary_filepath = f"{self._filepath}.{os.getpid()}.tmp"
+        with self._lock:
+            entries = self._load_entries()
+            entries.update(self._entries)
+            self._entries = entries
+            with open(temporary_filepath, mode="w", encoding="UTF-8") as outfile:
+                json.dump(
+                    {"version": MEDIA_PROBE_VERSION, "entries": self._entries},
+                    outfile,
+                    separators=(",", ":"),
+                )
+            self._changed = False
+        os.replace(temporary_filepath, self._filepath)
+
+        if self._verbose:
+            print(f'[SAVED] {len(self)} [MEDIA PROBES] to [FILE] "{self._filepath}"\n')
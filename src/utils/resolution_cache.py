@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A portable cache of release names that have already been resolved to an IMDb ID.
+
+The cache maps normalized release names (i.e., "the matrix 1999 1080p bluray x264") to IMDb IDs, so a release
+resolved in one library never needs a fuzzy OMDb search again in another. It can be bulk-seeded from any
+number of existing metadata files (using their `titles[].original_filename` and `titles[].imdb_id` values)
+and exported/imported as a compact JSON file.
+"""
+
+import json
+import os
+import re
+
+RESOLUTION_CACHE_VERSION = 1
+
+
+def normalize_release_name(release_name):
+    """
+
+    :param str release_name: The release name (file or folder name) to normalize.
+    :return str: The lower-cased release name with all punctuation and duplicate whitespace removed.
+    """
+    return " ".join(re.sub(r"[\W_]+", " ", release_name).lower().split())
+
+
+class ResolutionCache:
+    def __init__(self, filepath=None, verbose=False):
+        """
+
+        :param str filepath: The path of the cache file to load from and save to. [optional]
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._filepath = filepath
+        self._verbose = verbose
+        self._resolutions = {}
+        self.hits = 0
+        self.misses = 0
+
+        if filepath is not None and os.path.exists(filepath):
+            self.import_cache(filepath=filepath)
+
+    def __len__(self):
+        return len(self._resolutions)
+
+    def __contains__(self, release_name):
+        return normalize_release_name(release_name) in self._resolutions
+
+    def get(self, release_name):
+        """
+
+        :param str release_name: The release name to look up.
+        :return str: The IMDb ID the release name resolves to, or None if it has never been resolved.
+        """
+        imdb_id = self._resolutions.get(normalize_release_name(release_name))
+
+        if imdb_id is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self._verbose:
+                print(
+                    f'[RESOLUTION CACHE HIT] "{release_name}" -> [IMDB ID] "{imdb_id}"\n'
+                )
+
+        return imdb_id
+
+    def add(self, release_name, imdb_id):
+        """
+
+        :param str release_name: The release name that was resolved.
+        :param str imdb_id: The IMDb ID the release name resolved to.
+        :return None:
+        """
+        normalized_release_name = normalize_release_name(release_name)
+        if normalized_release_name and imdb_id:
+            self._resolutions[normalized_release_name] = imdb_id
+
+    def import_metadata_files(self, metadata_filepaths):
+        """
+
+        :param list metadata_filepaths: A list of metadata file paths to import resolutions from.
+        :return int: The number of resolutions imported.
+
+        Seeds the cache from the `titles` section of existing metadata files.
+        Unreadable or malformed files are skipped.
+        """
+        imported = 0
+        for metadata_filepath in metadata_filepaths:
+            try:
+                with open(metadata_filepath, encoding="UTF-8") as infile:
+                    metadata = json.load(infile)
+            except (OSError, ValueError) as error:
+                if self._verbose:
+                    print(
+                        f'[ERROR] [SKIPPING] [METADATA FILE] "{metadata_filepath}"\n[ERROR] {error}\n'
+                    )
+                continue
+
+            for title in metadata.get("titles", []):
+                if (
+                    isinstance(title, dict)
+                    and title.get("original_filename")
+                    and title.get("imdb_id")
+                ):
+                    self.add(
+                        release_name=title["original_filename"],
+                        imdb_id=title["imdb_id"],
+                    )
+                    imported += 1
+
+            if self._verbose:
+                print(
+                    f'[IMPORTED] [METADATA FILE] "{metadata_filepath}" into the [RESOLUTION CACHE]\n'
+                )
+
+        return imported
+
+    def import_cache(self, filepath):
+        """
+
+        :param str filepath: The path of an exported cache file.
+        :return int: The number of resolutions imported.
+
+        Merges the resolutions of an exported cache file into this cache.
+        """
+        with open(filepath, encoding="UTF-8") as infile:
+            cache_file = json.load(infile)
+
+        if cache_file.get("version") != RESOLUTION_CACHE_VERSION:
+            raise ValueError(
+                f'Unsupported resolution cache version "{cache_file.get("version")}" in "{filepath}".'
+            )
+
+        resolutions = cache_file.get("resolutions", {})
+        self._resolutions.update(resolutions)
+
+        return len(resolutions)
+
+    def export_cache(self, filepath=None):
+        """
+
+        :param str filepath: The path to write the cache file to. Defaults to the path the cache was loaded from.
+        :return None:
+
+        Writes the cache as a compact JSON file. The file is written to a temporary file first,
+        so an interrupted export never leaves a truncated cache behind.
+        """
+        if filepath is None:
+            filepath = self._filepath
+
+        temporary_filepath = f"{filepath}.tmp"
+        with open(temporary_filepath, mode="w", encoding="UTF-8") as outfile:
+            json.dump(
+                {"version": RESOLUTION_CACHE_VERSION, "resolutions": self._resolutions},
+                outfile,
+                separators=(",", ":"),
+                sort_keys=True,
+            )
+        os.replace(temporary_filepath, filepath)
+
+        if self._verbose:
+            print(f'[EXPORTED] {len(self)} [RESOLUTIONS] to [FILE] "{filepath}"\n')
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: A persistent negative cache of subtitle searches, so titles known to have no subtitle in a language
+aren't searched for again on every run.
+
+Entries are keyed by the SubDB hash of the movie file and the language, and expire after a configurable time to live,
+after which the subtitle is searched for again (subtitles do get added for old titles, just rarely).
+"""
+
+import json
+import os
+import threading
+import time
+
+SUBTITLE_MISS_CACHE_VERSION = 1
+DEFAULT_TIME_TO_LIVE = 7 * 24 * 60 * 60
+
+
+def default_subtitle_miss_cache_filepath():
+    """
+
+    :return str: The default subtitle miss cache file (`$XDG_CACHE_HOME/movie-file-fixer/subtitle_misses.json`).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "movie-file-fixer", "subtitle_misses.json")
+
+
+class SubtitleMissCache:
+    def __init__(self, filepath=None, time_to_live=None, verbose=False):
+        """
+
+        :param str filepath: The path of the cache file to load from and save to. Defaults to `default_subtitle_miss_cache_filepath()`.
+        :param float time_to_live: The number of seconds a miss is remembered for. Defaults to a week.
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._filepath = filepath or default_subtitle_miss_cache_filepath()
+        self._time_to_live = (
+            DEFAULT_TIME_TO_LIVE if time_to_live is None else time_to_live
+        )
+        self._verbose = verbose
+        self._lock = threading.Lock()
+        self._changed = False
+        self._discarded = set()
+        # The number of searches avoided, and of misses recorded:
+        self.avoided = 0
+        self.recorded = 0
+
+        self._misses = self._load_misses()
+
+    def _load_misses(self):
+        """
+
+        :return dict: The misses stored on disk (none if the file is missing or from another version).
+        """
+        if not os.path.exists(self._filepath):
+            return {}
+
+        with open(self._filepath, encoding="UTF-8") as infile:
+            cache_file = json.load(infile)
+
+        if cache_file.get("version") != SUBTITLE_MISS_CACHE_VERSION:
+            return {}
+
+        return cache_file.get("misses", {})
+
+    def __len__(self):
+        return len(self._misses)
+
+    def is_missing(self, hashcode, language, now=None):
+        """
+
+        :param str hashcode: The SubDB hash of the movie file.
+        :param str language: The two character language code of the subtitle.
+        :param float now: The current time (as a UNIX timestamp). [optional]
+        :return bool: Whether the subtitle was searched for and not found, less than the time to live ago.
+        """
+        if now is None:
+            now = time.time()
+
+        with self._lock:
+            searched_at = self._misses.get(f"{hashcode}:{language}")
+            if searched_at is None or now - searched_at >= self._time_to_live:
+                return False
+
+            self.avoided += 1
+
+        return True
+
+    def add(self, hashcode, language, now=None):
+        """
+
+        :param str hashcode: The SubDB hash of the movie file.
+        :param str language: The two character language code of the subtitle which wasn't found.
+        :param float now: The current time (as a UNIX timestamp). [optional]
+        :return None:
+        """
+        with self._lock:
+            self._misses[f"{hashcode}:{language}"] = time.time() if now is None else now
+            self._discarded.discard(f"{hashcode}:{language}")
+            self.recorded += 1
+            self._changed = True
+
+    def discard(self, hashcode, language):
+        """
+
+        :param str hashcode: The SubDB hash of the movie file.
+        :param str language: The two character language code of the subtitle which was found.
+        :return None:
+        """
+        with self._lock:
+            if self._misses.pop(f"{hashcode}:{language}", None) is not None:
+                self._discarded.add(f"{hashcode}:{language}")
+                self._changed = True
+
+    def save(self, now=None):
+        """
+
+        :param float now: The current time (as a UNIX timestamp). [optional]
+        :return None:
+
+        Writes the cache file (merged with any misses another run recorded in the meantime, and without the expired
+        ones), if anything changed. The file is written to a temporary file first, so an interrupted save never leaves
+        a truncated cache behind.
+        """
+        if not self._changed:
+            return
+
+        if now is None:
+            now = time.time()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self._filepath)), exist_ok=True)
+        temporary_filepath = f"{self._filepath}.{os.getpid()}.tmp"
+        with self._lock:
+            misses = self._load_misses()
+            misses.update(self._misses)
+            self._misses = {
+                key: searched_at
+                for key, searched_at in misses.items()
+                if now - searched_at < self._time_to_live and key not in self._discarded
+            }
+            with open(temporary_filepath, mode="w", encoding="UTF-8") as outfile:
+                json.dump(
+                    {"version": SUBTITLE_MISS_CACHE_VERSION, "misses": self._misses},
+                    outfile,
+                    separators=(",", ":"),
+                )
+            self._changed = False
+        os.replace(temporary_filepath, self._filepath)
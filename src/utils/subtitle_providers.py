@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Pluggable subtitle providers, and a pool that queries several of them at once.
+
+A provider looks subtitles up by the partial-file hashes of a movie file (see `file_hashing`): `search()` lists the
+languages it has a subtitle in, and `download()` returns one of them. The `SubtitleProviderPool` fans every search
+out to all providers concurrently, and settles as soon as the providers that answered cover every wanted language,
+so the latency of a title is bounded by the fastest provider that has its subtitles.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class SubtitleProvider:
+    """The interface every subtitle provider implements."""
+
+    name = None
+
+    def search(self, hashes):
+        """
+
+        :param dict hashes: The hashes of a movie file (as returned by `hash_media_file()`).
+        :return list: The two character language codes the provider has a subtitle in.
+        """
+        raise NotImplementedError
+
+    def download(self, hashes, language):
+        """
+
+        :param dict hashes: The hashes of a movie file (as returned by `hash_media_file()`).
+        :param str language: The two character language code of the subtitle.
+        :return str: The subtitle, or None if it couldn't be downloaded.
+        """
+        raise NotImplementedError
+
+
+class LocalSubtitleProvider(SubtitleProvider):
+    """
+
+    Serves subtitles from a local directory, laid out as `<directory>/<hash>/<language>.srt`, where `<hash>` is either
+    the SubDB or the OpenSubtitles hash of the movie file. Meant for offline runs, tests and benchmarks
+    (`latency` simulates a remote provider).
+    """
+
+    name = "local"
+
+    def __init__(self, directory, latency=0):
+        """
+
+        :param str directory: The directory containing the subtitles.
+        :param float latency: The number of seconds every request takes.
+        """
+        self._directory = directory
+        self._latency = latency
+
+    def _get_subtitle_folder(self, hashes):
+        """
+
+        :param dict hashes: The hashes of a movie file.
+        :return str: The folder containing the subtitles of the movie file, or None if there's none.
+        """
+        for key in ["subdb", "opensubtitles"]:
+            if hashes.get(key):
+                subtitle_folder = os.path.join(self._directory, hashes[key])
+                if os.path.isdir(subtitle_folder):
+                    return subtitle_folder
+
+        return None
+
+    def search(self, hashes):
+        if self._latency:
+            time.sleep(self._latency)
+
+        subtitle_folder = self._get_subtitle_folder(hashes=hashes)
+        if subtitle_folder is None:
+            return []
+
+        return sorted(
+            os.path.splitext(filename)[0]
+            for filename in os.listdir(subtitle_folder)
+            if filename.endswith(".srt")
+        )
+
+    def download(self, hashes, language):
+        if self._latency:
+            time.sleep(self._latency)
+
+        subtitle_folder = self._get_subtitle_folder(hashes=hashes)
+        if subtitle_folder is None:
+            return None
+
+        subtitle_filepath = os.path.join(subtitle_folder, f"{language}.srt")
+        if not os.path.isfile(subtitle_filepath):
+            return None
+
+        with open(subtitle_filepath, encoding="UTF-8") as infile:
+            return infile.read()
+
+
+class SubtitleProviderPool:
+    def __init__(self, providers, max_workers=4, timeout=None, verbose=False):
+        """
+
+        :param list providers: The subtitle providers to query, in order of preference.
+        :param int max_workers: The number of concurrent searches per provider.
+        :param float timeout: The number of seconds to wait for more providers once one has answered. [optional]
+        :param bool verbose: Whether to activate verbose mode.
+        """
+        self._providers = list(providers)
+        self._timeout = timeout
+        self._verbose = verbose
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers * len(self._providers)),
+            thread_name_prefix="subtitle-provider",
+        )
+
+    def search(self, hashes, languages):
+        """
+
+        :param dict hashes: The hashes of a movie file (as returned by `hash_media_file()`).
+        :param list languages: The two character language codes of the subtitles wanted.
+        :return tuple: The provider to download each wanted (and available) language from, keyed by language,
+        and whether the search was conclusive (every wanted language was found, or every provider answered),
+        so the languages not found can be trusted to be missing.
+
+        Searches every provider concurrently. As soon as the answers so far cover every wanted language, the searches
+        still waiting for a worker are cancelled and the slower answers ignored. Otherwise, every provider's answer
+        is merged (preferring the providers listed first for a language several of them have).
+        """
+        futures = {
+            self._executor.submit(provider.search, hashes=hashes): provider
+            for provider in self._providers
+        }
+        answers = {}
+        failed = False
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=self._timeout if answers else None,
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                break
+
+            for future in done:
+                provider = futures[future]
+                try:
+                    answers[provider] = future.result()
+                except (OSError, ValueError) as error:
+                    answers[provider] = []
+                    failed = True
+                    if self._verbose:
+                        print(
+                            f'[ERROR] [SUBTITLE PROVIDER] "{provider.name}" [SEARCH FAILED]: {error}\n'
+                        )
+
+            available_languages = {
+                language
+                for provider_languages in answers.values()
+                for language in provider_languages
+            }
+            if all(language in available_languages for language in languages):
+                break
+
+        for future in pending:
+            future.cancel()
+
+        providers_by_language = {}
+        for provider in self._providers:
+            for language in answers.get(provider, []):
+                if language in languages:
+                    providers_by_language.setdefault(language, provider)
+
+        conclusive = len(providers_by_language) == len(set(languages)) or (
+            not pending and not failed
+        )
+
+        return providers_by_language, conclusive
+
+    def close(self):
+        """
+
+        :return None:
+
+        Cancels the searches still waiting for a worker, without waiting for the ones in flight.
+        """
+        self._executor.shutdown(wait=False)
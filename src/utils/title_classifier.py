@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+
+Description: Classifies a title (a file or folder name, plus the files it contains) as a `movie` or a `series`,
+so every title can be searched with the right OMDb `result_type` from the start.
+"""
+
+import os
+import re
+
+MOVIE_FILE_EXTENSIONS = [".avi", ".mp4", ".mkv", ".mov"]
+
+# Episode markers, matched against punctuation-stripped (lower-cased) names, i.e., "s01e02", "s01 e02" or "1x02":
+EPISODE_PATTERNS = [
+    re.compile(r"\bs(\d{1,2}) ?e(\d{1,3})\b"),
+    re.compile(r"\b(\d{1,2})x(\d{2,3})\b"),
+]
+# Season markers in show folder names, i.e., "s01", "season 1" or "complete series" (never a bare "season", which
+# is common in movie titles like "Season of the Witch" or "Open Season"):
+SEASON_FOLDER_PATTERN = re.compile(
+    r"\b(s\d{1,2}|seasons? \d{1,2}|complete (series|seasons?))\b"
+)
+# Multi-part movies (i.e., "CD1", "CD2") are numbered too, but they are not episodes:
+MULTI_PART_PATTERN = re.compile(r"\b(cd|disc|disk|part|pt) ?\d{1,2}\b")
+# Release tokens that number the copy rather than the episode, i.e., a resolution ("1080p"), a codec ("x264") or a year:
+RELEASE_NUMBER_PATTERN = re.compile(
+    r"\b(\d{3,4}[pi]|[248]k|[hx] ?26[45]|(19|20)\d{2})\b"
+)
+# Anything shorter than this (in minutes) is more likely an episode than a feature film:
+EPISODE_RUNTIME_THRESHOLD = 65
+
+
+def _normalize(phrase):
+    """
+
+    :param str phrase: The phrase to normalize.
+    :return str: The lower-cased phrase with all punctuation and duplicate whitespace removed.
+    """
+    return " ".join(re.sub(r"[\W_]+", " ", phrase).lower().split())
+
+
+def has_episode_marker(name):
+    """
+
+    :param str name: A file or folder name.
+    :return bool: Whether the name contains an `S01E02` (or `1x02`) style episode marker.
+    """
+    normalized_name = _normalize(name)
+    return any(
+        episode_pattern.search(normalized_name) for episode_pattern in EPISODE_PATTERNS
+    )
+
+
+def has_episode_numbering(filenames):
+    """
+
+    :param list filenames: The filenames contained in a title folder.
+    :return bool: Whether there are several movie files whose names only differ by a number (i.e., "Show - 01.mkv", "Show - 02.mkv").
+
+    Resolutions, codecs and years are ignored, so copies of a movie in different qualities aren't mistaken for episodes.
+    """
+    numbered_names = {}
+    for filename in filenames:
+        name, extension = os.path.splitext(filename)
+        if extension.lower() in MOVIE_FILE_EXTENSIONS:
+            normalized_name = _normalize(name)
+            if MULTI_PART_PATTERN.search(normalized_name):
+                continue
+            normalized_name = RELEASE_NUMBER_PATTERN.sub("", normalized_name)
+            numbers = tuple(re.findall(r"\d+", normalized_name))
+            if numbers:
+                numbered_names.setdefault(
+                    re.sub(r"\d+", "#", normalized_name), set()
+                ).add(numbers)
+
+    return any(len(numbers) > 1 for numbers in numbered_names.values())
+
+
+def classify_title(title, filenames=None, runtime_minutes=None):
+    """
+
+    :param str title: The file or folder name of the title.
+    :param list filenames: The filenames contained in the title folder (at any depth). [optional]
+    :param float runtime_minutes: The runtime of the main movie file, if known. [optional]
+    :return tuple: A tuple containing the `result_type` (`movie` or `series`) and the reason for the classification.
+
+    Classifies the given title from its name and folder structure, in order of confidence:
+    episode markers, season markers, episode numbering, and finally runtime hints.
+    """
+    if filenames is None:
+        filenames = []
+
+    if has_episode_marker(title) or any(
+        has_episode_marker(filename) for filename in filenames
+    ):
+        return "series", "episode marker"
+
+    if SEASON_FOLDER_PATTERN.search(_normalize(title)):
+        return "series", "season marker"
+
+    if has_episode_numbering(filenames=filenames):
+        return "series", "episode numbering"
+
+    if runtime_minutes is not None:
+        if runtime_minutes < EPISODE_RUNTIME_THRESHOLD:
+            return "series", "runtime"
+        return "movie", "runtime"
+
+    return "movie", "default"
@@ -10,6 +10,8 @@ import os
 import pathlib
 import shutil
 
+from .file_hashing import read_head_and_tail
+
 
 def listdir_fullpath(directory):
     """
@@ -127,13 +129,10 @@ def create_trimmed_file(filepath, chunksize=64):
 
     This method will take the file at the given filepath and pull two `chunksize` (in KB) sized chunks
     from the beginning and end of the file. It will then perform an `md5` hash of those chunks and
-    create a new file with the hash as the filename.
+    create a new file with the hash as the filename. Files shorter than a chunk are used whole, for both chunks.
     """
-    readsize = chunksize * 1024
-    with open(filepath, 'rb') as infile:
-        data = infile.read(readsize)
-        infile.seek(-readsize, os.SEEK_END)
-        data += infile.read(readsize)
+    filesize, head, tail = read_head_and_tail(filepath=filepath, chunk_size=chunksize * 1024)
+    data = bytes(head) + bytes(tail)
 
     root, filename = get_parent_and_child(path=filepath)
     name, extension = os.path.splitext(filename)